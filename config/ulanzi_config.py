@@ -35,10 +35,15 @@ MQTT = {
         # Nieuwe JSON topics van birdnet_mqtt_publisher (met vocalization)
         'zolder_detection': 'birdnet/zolder/detection',
         'berging_detection': 'birdnet/berging/detection',
+        # Vocalisatie volgt los van de detectie (gekoppeld via detection_id)
+        'zolder_enriched': 'birdnet/zolder/detection/enriched',
+        'berging_enriched': 'birdnet/berging/detection/enriched',
         'dual_detection': 'emsn2/dual/detection/new',
         'ulanzi_notify': 'emsn2/ulanzi/notify',
         'presence': 'emsn2/presence/home',
-    }
+    },
+    # Max wachttijd op vocalisatie enrichment voordat detectie zonder type getoond wordt
+    'enrichment_wait_seconds': 8,
 }
 
 # PostgreSQL Configuration (credentials uit secrets)
@@ -0,0 +1,37 @@
+-- Migration 018: Vocalization Enrichment State
+-- Work-queue state voor de vocalization enricher: detecties zonder model of
+-- zonder audio worden gemarkeerd i.p.v. elke batch opnieuw geselecteerd.
+--
+-- States:
+--   pending   nog niet geprobeerd (default voor nieuwe detecties)
+--   done      vocalization_type gezet
+--   no_model  geen model voor deze soort (terug naar pending als er een model komt)
+--   no_audio  audiobestand niet (meer) aanwezig
+--   failed    decode/classificatie fout, opnieuw na vocalization_retry_after
+
+ALTER TABLE bird_detections
+    ADD COLUMN IF NOT EXISTS vocalization_state VARCHAR(12) DEFAULT 'pending',
+    ADD COLUMN IF NOT EXISTS vocalization_attempts SMALLINT DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS vocalization_retry_after TIMESTAMPTZ;
+
+-- Bestaande verrijkte detecties zijn klaar
+UPDATE bird_detections
+SET vocalization_state = 'done'
+WHERE vocalization_type IS NOT NULL
+  AND vocalization_state IS DISTINCT FROM 'done';
+
+-- Work queue: alleen rijen die nog werk zijn (klein t.o.v. de hele historie)
+CREATE INDEX IF NOT EXISTS idx_bird_detections_vocalization_queue
+    ON bird_detections (detection_timestamp DESC)
+    WHERE vocalization_type IS NULL
+      AND vocalization_state IN ('pending', 'failed')
+      AND station IN ('zolder', 'berging');
+
+-- Soorten zonder model, voor het terugzetten als er een model bijkomt
+CREATE INDEX IF NOT EXISTS idx_bird_detections_vocalization_no_model
+    ON bird_detections (common_name)
+    WHERE vocalization_state = 'no_model';
+
+COMMENT ON COLUMN bird_detections.vocalization_state IS 'Enrichment state: pending, done, no_model, no_audio, failed';
+COMMENT ON COLUMN bird_detections.vocalization_attempts IS 'Aantal mislukte classificatie pogingen';
+COMMENT ON COLUMN bird_detections.vocalization_retry_after IS 'Failed: niet opnieuw proberen voor dit tijdstip (NULL = opgegeven)';
@@ -0,0 +1,12 @@
+-- Migration 019: Vocalization Training Throughput
+-- Wall time, doorvoer en epochs per soort voor train_orchestrator.py
+-- (parallelle training met hervatbare checkpoints)
+
+ALTER TABLE vocalization_training
+    ADD COLUMN IF NOT EXISTS wall_time_seconds FLOAT,
+    ADD COLUMN IF NOT EXISTS samples_per_sec FLOAT,
+    ADD COLUMN IF NOT EXISTS epochs_completed INTEGER;
+
+COMMENT ON COLUMN vocalization_training.wall_time_seconds IS 'Trainingstijd in seconden, opgeteld over hervatte runs';
+COMMENT ON COLUMN vocalization_training.samples_per_sec IS 'Gemiddelde training doorvoer (samples per seconde)';
+COMMENT ON COLUMN vocalization_training.epochs_completed IS 'Aantal voltooide epochs (checkpoint)';
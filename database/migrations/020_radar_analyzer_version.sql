@@ -0,0 +1,18 @@
+-- Migration 020: Radar Analyzer Version
+-- Versie van de kleuranalyse per radar_observations rij, zodat
+-- scripts/flysafe/reanalyze_radar.py historische beelden in bulk (en
+-- hervatbaar) opnieuw kan analyseren na een wijziging in color_analyzer.py.
+--
+-- analyzer_version NULL = geanalyseerd voor deze migratie (of zonder analyse).
+
+ALTER TABLE radar_observations
+    ADD COLUMN IF NOT EXISTS analyzer_version SMALLINT,
+    ADD COLUMN IF NOT EXISTS analyzed_at TIMESTAMPTZ;
+
+-- Rijen die nog (opnieuw) geanalyseerd moeten worden, per beeld
+CREATE INDEX IF NOT EXISTS idx_radar_observations_analyzer_version
+    ON radar_observations (analyzer_version)
+    WHERE local_image_path IS NOT NULL;
+
+COMMENT ON COLUMN radar_observations.analyzer_version IS 'color_analyzer.ANALYZER_VERSION van de laatste analyse';
+COMMENT ON COLUMN radar_observations.analyzed_at IS 'Tijdstip van de laatste kleuranalyse';
@@ -0,0 +1,14 @@
+-- Migration 021: Radar Correlation Indexes
+-- radar_correlation.py koppelt alle nog niet gecorreleerde radar observaties
+-- in één UPDATE aan de detecties in een venster van +/- 2 uur. Elke
+-- observatie doet een range scan op detection_timestamp; met confidence en
+-- species in de index is dat een index-only scan.
+
+CREATE INDEX IF NOT EXISTS idx_bird_detections_timestamp_covering
+    ON bird_detections (detection_timestamp)
+    INCLUDE (confidence, species);
+
+-- Alleen de (kleine) set observaties die nog gecorreleerd moet worden
+CREATE INDEX IF NOT EXISTS idx_radar_observations_uncorrelated
+    ON radar_observations (id)
+    WHERE correlation_score IS NULL;
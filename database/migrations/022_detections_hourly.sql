@@ -0,0 +1,40 @@
+-- Migration 022: Detections Hourly Rollup
+-- Detecties per station, soort en uur. Wordt na elke lifetime sync
+-- incrementeel bijgewerkt (alleen de uren die de sync raakte) door
+-- scripts/sync/detections_hourly.py. De FlySafe analyses (species_correlation,
+-- migration_forecast, seasonal_analysis) en de FlySafe Grafana dashboards
+-- lezen hieruit i.p.v. bird_detections telkens opnieuw per uur te aggregeren.
+--
+-- Soft-deleted detecties tellen niet mee. Een uur waarvan alle detecties van
+-- een soort verwijderd zijn blijft staan met count = 0 (birdpi_berging heeft
+-- geen DELETE recht).
+--
+-- Vullen na deze migratie:
+--   python3 scripts/sync/detections_hourly.py --backfill
+-- Controleren tegen bird_detections:
+--   python3 scripts/sync/detections_hourly.py --check --days 30
+
+CREATE TABLE IF NOT EXISTS detections_hourly (
+    station VARCHAR(20) NOT NULL,
+    species VARCHAR(100) NOT NULL,
+    hour TIMESTAMP NOT NULL,               -- DATE_TRUNC('hour', detection_timestamp)
+    common_name VARCHAR(100),
+    count INTEGER NOT NULL DEFAULT 0,
+    avg_conf REAL,
+    max_conf REAL,
+    high_conf_count INTEGER NOT NULL DEFAULT 0,  -- confidence >= 0.7
+    high_conf_avg REAL,                    -- AVG(confidence) van die detecties
+    refreshed_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (station, species, hour)
+);
+
+CREATE INDEX IF NOT EXISTS idx_detections_hourly_hour ON detections_hourly (hour);
+CREATE INDEX IF NOT EXISTS idx_detections_hourly_species_hour ON detections_hourly (species, hour);
+
+COMMENT ON TABLE detections_hourly IS 'Uur-rollup van bird_detections per station en soort (scripts/sync/detections_hourly.py)';
+COMMENT ON COLUMN detections_hourly.high_conf_count IS 'Detecties met confidence >= 0.7';
+COMMENT ON COLUMN detections_hourly.high_conf_avg IS 'Gemiddelde confidence van de detecties met confidence >= 0.7';
+
+GRANT SELECT, INSERT, UPDATE ON detections_hourly TO birdpi_zolder;
+GRANT SELECT, INSERT, UPDATE ON detections_hourly TO birdpi_berging;
+GRANT SELECT ON detections_hourly TO emsn_readonly;
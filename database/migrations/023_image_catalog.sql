@@ -0,0 +1,36 @@
+-- Migration 023: Image Catalog
+-- Index van camerabeelden op de NAS: AtmosBird luchtfoto's en nestkast
+-- screenshots. Vervangt de rglob scans over de complete screenshot bomen
+-- (honderdduizenden NFS stats per aanroep) in de timelapse generators,
+-- de nestkast detectors en de nestkast cleanup door index lookups.
+--
+-- Gevuld door scripts/core/image_catalog.py:
+--   - bij capture (nestbox_screenshot.sh, atmosbird_archive_sync.py)
+--   - reconciler over de dag-mappen van de laatste dagen
+--     (scripts/maintenance/image_catalog_sync.py, image-catalog-sync.timer)
+--
+-- Vullen na deze migratie (leest de complete bomen eenmalig):
+--   python3 scripts/maintenance/image_catalog_sync.py reconcile --full
+
+CREATE TABLE IF NOT EXISTS image_catalog (
+    id BIGSERIAL PRIMARY KEY,
+    source VARCHAR(20) NOT NULL,           -- 'atmosbird', 'nestbox'
+    camera VARCHAR(30) NOT NULL,           -- 'berging', 'voor', 'midden', 'achter'
+    taken_at TIMESTAMP NOT NULL,           -- Uit de bestandsnaam (lokale tijd)
+    path TEXT NOT NULL UNIQUE,
+    size_bytes BIGINT,
+    cataloged_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Periode, "laatste beeld" en MIN/MAX lookups per camera
+CREATE INDEX IF NOT EXISTS idx_image_catalog_camera_taken
+    ON image_catalog (source, camera, taken_at);
+
+COMMENT ON TABLE image_catalog IS 'Index van camerabeelden op de NAS (scripts/core/image_catalog.py)';
+COMMENT ON COLUMN image_catalog.taken_at IS 'Opnametijd uit de bestandsnaam <prefix>_JJJJMMDD_UUMMSS.jpg';
+
+GRANT SELECT, INSERT, UPDATE, DELETE ON image_catalog TO birdpi_zolder;
+GRANT SELECT, INSERT, UPDATE, DELETE ON image_catalog TO birdpi_berging;
+GRANT USAGE ON SEQUENCE image_catalog_id_seq TO birdpi_zolder;
+GRANT USAGE ON SEQUENCE image_catalog_id_seq TO birdpi_berging;
+GRANT SELECT ON image_catalog TO emsn_readonly;
@@ -0,0 +1,55 @@
+-- Migration 024: AtmosBird Analyse Status
+-- atmosbird_analysis.py analyseerde elke run alle observaties van de laatste
+-- 30 minuten opnieuw (timer elk kwartier), waardoor elke foto 2-3 keer
+-- geanalyseerd werd en moon_observations/star_brightness dubbele rijen kregen.
+--
+-- Nu: analyzed_at markeert geanalyseerde observaties. De analyse pakt alleen
+-- rijen met analyzed_at IS NULL en zet de markering in dezelfde transactie
+-- als de resultaten. Unieke indexes op observation_id maken de bestaande
+-- ON CONFLICT DO NOTHING inserts effectief, zodat een herhaalde batch geen
+-- dubbele rijen geeft.
+
+ALTER TABLE sky_observations ADD COLUMN IF NOT EXISTS analyzed_at TIMESTAMP;
+
+COMMENT ON COLUMN sky_observations.analyzed_at IS 'Moment van ISS/maan/sterren/meteoor analyse (atmosbird_analysis.py); NULL = nog te doen';
+
+-- Alles ouder dan het oude lookback venster is al (meerdere keren) geanalyseerd
+UPDATE sky_observations
+SET analyzed_at = observation_timestamp
+WHERE analyzed_at IS NULL
+  AND observation_timestamp < NOW() - INTERVAL '30 minutes';
+
+-- Klein: bevat alleen de observaties die nog op analyse wachten
+CREATE INDEX IF NOT EXISTS idx_sky_observations_pending_analysis
+    ON sky_observations (observation_timestamp)
+    WHERE analyzed_at IS NULL;
+
+-- Dubbele analyse resultaten opruimen (oudste rij per observatie blijft)
+DELETE FROM moon_observations a
+USING moon_observations b
+WHERE a.observation_id = b.observation_id
+  AND a.ctid > b.ctid;
+
+DELETE FROM star_brightness a
+USING star_brightness b
+WHERE a.observation_id = b.observation_id
+  AND a.ctid > b.ctid;
+
+DELETE FROM meteor_detections a
+USING meteor_detections b
+WHERE a.observation_id = b.observation_id
+  AND a.ctid > b.ctid;
+
+DELETE FROM iss_passes a
+USING iss_passes b
+WHERE a.observation_id = b.observation_id
+  AND a.ctid > b.ctid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_moon_observations_observation
+    ON moon_observations (observation_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_star_brightness_observation
+    ON star_brightness (observation_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_meteor_detections_observation
+    ON meteor_detections (observation_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_iss_passes_observation
+    ON iss_passes (observation_id);
@@ -0,0 +1,28 @@
+-- Migration 025: Nestkast Geanalyseerde Frames
+-- nestbox_realtime_detector.py schrijft sinds de StatusSmoother alleen nog een
+-- uitgedunde occupancy log (wijzigingen, twijfel, hartslag per 3 uur) naar
+-- nestbox_occupancy. nestbox_cleanup.py mag een beeld alleen verwijderen als
+-- het echt door het model beoordeeld is; handmatige captures, extra frames en
+-- onleesbare beelden zijn nooit bekeken en blijven staan.
+--
+-- Nu: elk geanalyseerd 'leeg' frame dat niet in de occupancy log komt,
+-- krijgt hier een lichte rij met de eigen detectie. Bezette frames worden
+-- nooit verwijderd en krijgen geen rij. Geen rij in beide tabellen = geen
+-- classificatie = bewaren. De cleanup verwijdert de rijen tot en met de
+-- cutoff dag, zodat de tabel niet langer groeit dan de retentie periode.
+
+CREATE TABLE IF NOT EXISTS nestbox_analyzed_frames (
+    image_path TEXT PRIMARY KEY,
+    nestbox_id VARCHAR(20) NOT NULL,       -- 'voor', 'midden', 'achter'
+    analyzed_at TIMESTAMP NOT NULL,
+    is_occupied BOOLEAN NOT NULL,
+    confidence REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_nestbox_analyzed_frames_nestbox_time
+    ON nestbox_analyzed_frames (nestbox_id, analyzed_at);
+
+COMMENT ON TABLE nestbox_analyzed_frames IS 'Geanalyseerde nestkast frames buiten de uitgedunde nestbox_occupancy log (nestbox_realtime_detector.py)';
+
+GRANT SELECT, INSERT, UPDATE, DELETE ON nestbox_analyzed_frames TO birdpi_zolder;
+GRANT SELECT ON nestbox_analyzed_frames TO emsn_readonly;
@@ -0,0 +1,13 @@
+-- Migration 026: AtmosBird Analyse Fouten
+-- atmosbird_analysis.py schreef alle resultaten van een batch in één
+-- transactie. Eén observatie met een onverwachte waarde (bv. NULL
+-- cloud_coverage) of een foute resultaat rij rolde de hele batch terug, zodat
+-- dezelfde observaties elke run opnieuw faalden en de queue vast bleef zitten.
+--
+-- Nu: een mislukte observatie krijgt toch analyzed_at, met de foutmelding in
+-- analysis_error. Resultaat rijen worden bij een fout per observatie onder
+-- een eigen savepoint geschreven.
+
+ALTER TABLE sky_observations ADD COLUMN IF NOT EXISTS analysis_error TEXT;
+
+COMMENT ON COLUMN sky_observations.analysis_error IS 'Foutmelding als de analyse van deze observatie mislukte (atmosbird_analysis.py); NULL = geslaagd';
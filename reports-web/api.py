@@ -3342,8 +3342,10 @@ def generate_timelapse():
             cmd.extend(['--duration', str(duration)])
         if fps:
             cmd.extend(['--fps', str(fps)])
-        if day_night and day_night != 'all':
-            cmd.extend(['--filter', day_night])
+        if day_night == 'day':
+            cmd.append('--day-only')
+        elif day_night == 'night':
+            cmd.append('--night-only')
 
         # Generate unique job ID
         job_id = f"{nestbox_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
@@ -3624,6 +3626,83 @@ def delete_atmosbird_timelapse():
         return jsonify({'error': str(e)}), 500
 
 
+# === TIMELAPSE SEGMENTEN API ===
+# Dag-segmenten uit de segment cache (scripts/core/timelapse_segments.py):
+# <bron>/<camera>/<resolutie>_<fps>fps[_filter]/<JJJJ-MM-DD>.mp4 met manifest
+
+TIMELAPSE_SEGMENT_DIR = Path("/mnt/nas-birdnet-archive/gegenereerde_beelden/segmenten")
+
+
+def list_timelapse_segments(source, camera=None):
+    """Dag-segmenten van een bron (optioneel één camera), nieuwste dag eerst"""
+    segments = []
+    source_dir = TIMELAPSE_SEGMENT_DIR / source
+    search_dir = source_dir / camera if camera else source_dir
+
+    if search_dir.exists():
+        for manifest_file in search_dir.glob('*/*/*.json'):
+            mp4_file = manifest_file.with_suffix('.mp4')
+            if not mp4_file.exists():
+                continue
+            try:
+                manifest = json.loads(manifest_file.read_text())
+            except (OSError, ValueError):
+                continue
+            segments.append({
+                'day': manifest.get('day', mp4_file.stem),
+                'camera': manifest_file.parent.parent.name,
+                'variant': manifest_file.parent.name,
+                'frames': manifest.get('frames'),
+                'fps': manifest.get('fps'),
+                'resolution': manifest.get('resolution'),
+                'path': str(mp4_file.relative_to(TIMELAPSE_SEGMENT_DIR)),
+                'size_mb': round(mp4_file.stat().st_size / 1024 / 1024, 1),
+                'created': manifest.get('created'),
+            })
+
+    segments.sort(key=lambda x: (x['day'], x['camera'], x['variant']), reverse=True)
+    return segments
+
+
+@app.route('/api/nestbox/timelapse/segments')
+def list_nestbox_timelapse_segments():
+    """List cached daily timelapse segments for a nestbox"""
+    try:
+        nestbox_id = request.args.get('nestbox_id')
+        if nestbox_id and nestbox_id not in ['voor', 'midden', 'achter']:
+            return jsonify({'error': 'Invalid nestbox_id'}), 400
+        return jsonify({'segments': list_timelapse_segments('nestbox', nestbox_id)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/atmosbird/timelapse/segments')
+def list_atmosbird_timelapse_segments():
+    """List cached daily AtmosBird timelapse segments"""
+    try:
+        return jsonify({'segments': list_timelapse_segments('atmosbird')})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/timelapse/segments/file/<path:filename>')
+def serve_timelapse_segment(filename):
+    """Serve a cached daily timelapse segment"""
+    try:
+        cache_root = TIMELAPSE_SEGMENT_DIR.resolve()
+        resolved = (TIMELAPSE_SEGMENT_DIR / filename).resolve()
+
+        # Security check - ensure path is within segment dir
+        if resolved.suffix != '.mp4' or not resolved.is_relative_to(cache_root):
+            return jsonify({'error': 'Invalid path'}), 400
+        if not resolved.exists():
+            return jsonify({'error': 'File not found'}), 404
+
+        return send_file(resolved, mimetype='video/mp4')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 if __name__ == '__main__':
     # Run development server
     app.run(host='0.0.0.0', port=8081, debug=False)
@@ -9,7 +9,8 @@ Refactored: 2025-12-29 - Gebruikt nu core modules voor config en logging
 import os
 import sys
 import psycopg2
-from datetime import datetime, timedelta
+from psycopg2.extras import execute_values
+from datetime import timedelta
 import requests
 import json
 from pathlib import Path
@@ -18,17 +19,20 @@ import cv2
 from astral import LocationInfo
 from astral.sun import sun
 from astral.moon import phase
-import ephem
 
 # Add project root to path for core modules
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 sys.path.insert(0, str(PROJECT_ROOT / 'config'))
+sys.path.insert(0, str(Path(__file__).parent))
 
 # Import EMSN core modules
 from scripts.core.logging import EMSNLogger
 from scripts.core.config import get_postgres_config
 
+# Precomputed ISS/sun/moon positions
+from ephemeris import get_ephemeris, to_epoch
+
 # Configuration
 STATION_ID = "berging"
 LOCATION_LAT = 52.360179  # Berging camera locatie, Nijverdal
@@ -51,16 +55,137 @@ ISS_NORAD_ID = 25544  # ISS NORAD catalog number
 # Storage
 DETECTION_DIR = "/mnt/usb/atmosbird/detecties"
 
+# Incremental analysis (sky_observations.analyzed_at, migration 024)
+ANALYSIS_BATCH_SIZE = 500  # Max observations per run (catch-up after downtime)
+METEOR_MAX_FRAME_GAP = timedelta(minutes=20)  # Only difference consecutive frames
+
+PENDING_OBSERVATIONS_SQL = """
+    SELECT id, observation_timestamp, image_path, brightness, cloud_coverage
+    FROM sky_observations
+    WHERE analyzed_at IS NULL
+    ORDER BY observation_timestamp
+    LIMIT %s
+"""
+
+PREVIOUS_OBSERVATION_SQL = """
+    SELECT observation_timestamp, image_path, brightness
+    FROM sky_observations
+    WHERE observation_timestamp < %s
+    ORDER BY observation_timestamp DESC
+    LIMIT 1
+"""
+
+MARK_ANALYZED_SQL = "UPDATE sky_observations SET analyzed_at = NOW() WHERE id = ANY(%s)"
+
+# Failed observations are marked too (migration 026), so one bad frame or row
+# cannot block the queue; analysis_error keeps the reason for inspection
+MARK_FAILED_SQL = "UPDATE sky_observations SET analyzed_at = NOW(), analysis_error = %s WHERE id = %s"
+
+# Star analysis pyramid: threshold and statistics come from a 256-bin histogram
+# of the blurred frame (no sort, no masked copies). With STAR_SEARCH_FACTOR > 1
+# candidates are searched on a max-pooled copy (factor x factor blocks) and
+# contours are only traced around them. On the 1/4 frames from load_frame one
+# full contour pass is faster (benchmark_star_analysis.py), hence factor 1.
+STAR_PERCENTILE = 99.5  # Top 0.5% brightest pixels
+STAR_SEARCH_FACTOR = 1
+STAR_MIN_AREA = 1
+STAR_MAX_AREA = 50
+
+# Result inserts; the unique observation_id indexes make a retried batch a no-op
+BATCH_INSERT_SQL = {
+    'iss': """
+        INSERT INTO iss_passes (
+            pass_start, pass_end, max_elevation_degrees,
+            duration_seconds, observation_id, notes
+        ) VALUES %s
+        ON CONFLICT DO NOTHING
+    """,
+    'moon': """
+        INSERT INTO moon_observations (
+            observation_id, observation_timestamp, phase_name,
+            illumination_percent, age_days, altitude_degrees,
+            azimuth_degrees, detected_in_image
+        ) VALUES %s
+        ON CONFLICT DO NOTHING
+    """,
+    'stars': """
+        INSERT INTO star_brightness (
+            observation_id, observation_timestamp, star_count,
+            avg_star_brightness, brightest_star_magnitude,
+            seeing_quality_score, sky_background_brightness,
+            bortle_scale_estimate
+        ) VALUES %s
+        ON CONFLICT DO NOTHING
+    """,
+    'meteors': """
+        INSERT INTO meteor_detections (
+            observation_id, detection_timestamp, frame_diff_score,
+            streak_length_pixels, brightness_delta, confidence_score,
+            bbox_x, bbox_y, bbox_width, bbox_height
+        ) VALUES %s
+        ON CONFLICT DO NOTHING
+    """,
+}
+
 # Module logger
 _logger = EMSNLogger('atmosbird_analysis', Path('/mnt/usb/logs'))
 
 
+def histogram_percentile(hist, q):
+    """
+    np.percentile (linear interpolation) of the pixels counted in a uint8 histogram
+    O(256) after np.bincount instead of sorting every pixel
+    """
+    total = int(hist.sum())
+    rank = q / 100 * (total - 1)
+    lower = int(np.floor(rank))
+    cumulative = np.cumsum(hist)
+    low, high = np.searchsorted(cumulative, [lower, min(lower + 1, total - 1)], side='right')
+    return float(low + (high - low) * (rank - lower))
+
+
+def count_star_contours(blurred, level, search_factor=STAR_SEARCH_FACTOR):
+    """
+    Count star-sized blobs of pixels brighter than `level`
+
+    search_factor > 1: find candidate blocks on a max-pooled copy, then trace
+    contours per candidate, limited to its own blocks so every blob is counted
+    once and whole (8-connected blobs never span two coarse components).
+    """
+    def star_sized(mask):
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return sum(1 for c in contours if STAR_MIN_AREA <= cv2.contourArea(c) <= STAR_MAX_AREA)
+
+    if search_factor <= 1:
+        _, mask = cv2.threshold(blurred, level, 255, cv2.THRESH_BINARY)
+        return star_sized(mask)
+
+    height, width = blurred.shape
+    kernel = np.ones((search_factor, search_factor), np.uint8)
+    pooled = cv2.dilate(blurred, kernel, anchor=(0, 0), borderType=cv2.BORDER_CONSTANT,
+                        borderValue=0)[::search_factor, ::search_factor]
+    _, coarse = cv2.threshold(pooled, level, 255, cv2.THRESH_BINARY)
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(coarse, connectivity=8)
+
+    total = 0
+    for label in range(1, count):
+        x, y, w, h = stats[label, :4]
+        y0, x0 = y * search_factor, x * search_factor
+        y1, x1 = min(height, (y + h) * search_factor), min(width, (x + w) * search_factor)
+        _, mask = cv2.threshold(blurred[y0:y1, x0:x1], level, 255, cv2.THRESH_BINARY)
+        if count > 2 and (w > 1 or h > 1):
+            own = (labels[y:y + h, x:x + w] == label).astype(np.uint8) * 255
+            own = cv2.resize(own, (w * search_factor, h * search_factor), interpolation=cv2.INTER_NEAREST)
+            mask &= own[:y1 - y0, :x1 - x0]
+        total += star_sized(mask)
+    return total
+
+
 class SkyAnalyzer:
     def __init__(self):
         self.conn = None
-        self.observer = None
+        self.ephemeris = None  # Ephemeris grid, loaded/computed on first lookup
         self.logger = _logger
-        self.setup_observer()
 
     def log(self, level, message):
         """Log message with timestamp - nu via core logger"""
@@ -76,36 +201,29 @@ class SkyAnalyzer:
             self.log("ERROR", f"Database connection failed: {e}")
             return False
 
-    def setup_observer(self):
-        """Setup PyEphem observer for astronomical calculations"""
-        self.observer = ephem.Observer()
-        self.observer.lat = str(LOCATION_LAT)
-        self.observer.lon = str(LOCATION_LON)
-        self.observer.elevation = LOCATION_ELEVATION
+    def sky_positions(self, observation_times):
+        """
+        ISS, sun and moon positions for a list of observation times (one dict
+        per time), interpolated from the ephemeris cache (ephemeris.py)
+        """
+        epochs = to_epoch(observation_times)
+        self.ephemeris = get_ephemeris(epochs, LOCATION_LAT, LOCATION_LON, LOCATION_ELEVATION,
+                                       current=self.ephemeris)
+        positions = self.ephemeris.at(epochs)
+        return [{key: float(values[i]) for key, values in positions.items()} for i in range(len(epochs))]
 
-    def check_iss_visibility(self, observation_time):
+    def check_iss_visibility(self, observation_time, position=None):
         """
         Check if ISS is visible at observation time
-        Uses PyEphem for ISS position calculation
+        Uses the precomputed ephemeris (position from sky_positions)
         """
         try:
-            # Create ISS TLE (Two-Line Element) object
-            # Updated from Celestrak on 2025-12-22
-            iss = ephem.readtle(
-                "ISS (ZARYA)             ",
-                "1 25544U 98067A   25355.95645853  .00010990  00000+0  20227-3 0  9999",
-                "2 25544  51.6324  96.8363 0003164 283.4657  76.5979 15.49714244544284"
-            )
-
-            # Set observer time
-            self.observer.date = observation_time
-
-            # Compute ISS position
-            iss.compute(self.observer)
+            if position is None:
+                position = self.sky_positions([observation_time])[0]
 
-            # Get altitude (elevation above horizon) in degrees
-            altitude_deg = float(iss.alt) * 180.0 / np.pi
-            azimuth_deg = float(iss.az) * 180.0 / np.pi
+            # Get altitude (elevation above horizon) and azimuth in degrees
+            altitude_deg = position['iss_alt']
+            azimuth_deg = position['iss_az']
 
             # Camera kijkt recht omhoog (zenith) met 120° diagonaal FOV
             # Dus ISS moet minimaal 90° - (120°/2) = 30° boven horizon zijn
@@ -114,9 +232,7 @@ class SkyAnalyzer:
             is_in_camera_fov = altitude_deg >= min_altitude_for_fov
 
             # Check if it's twilight/night
-            sun_obj = ephem.Sun()
-            sun_obj.compute(self.observer)
-            sun_alt = float(sun_obj.alt) * 180.0 / np.pi
+            sun_alt = position['sun_alt']
             is_dark = sun_alt < -6  # Nautical twilight
 
             # ISS is zichtbaar in camera als:
@@ -141,24 +257,21 @@ class SkyAnalyzer:
             self.log("WARNING", f"ISS calculation error: {e}")
             return {'visible': False, 'altitude': None, 'azimuth': None}
 
-    def analyze_moon(self, observation_time):
+    def analyze_moon(self, observation_time, position=None):
         """
         Analyze moon position and phase
+        Uses the precomputed ephemeris (position from sky_positions)
         """
         try:
-            # Set observer time
-            self.observer.date = observation_time
-
-            # Create moon object
-            moon = ephem.Moon()
-            moon.compute(self.observer)
+            if position is None:
+                position = self.sky_positions([observation_time])[0]
 
             # Get moon position
-            altitude_deg = float(moon.alt) * 180.0 / np.pi
-            azimuth_deg = float(moon.az) * 180.0 / np.pi
+            altitude_deg = position['moon_alt']
+            azimuth_deg = position['moon_az']
 
             # Moon phase (0-100% illumination)
-            illumination = moon.phase
+            illumination = position['moon_phase']
 
             # Determine phase name
             phase_names = [
@@ -175,9 +288,8 @@ class SkyAnalyzer:
             min_altitude_for_fov = 90 - (CAMERA_FOV_DIAGONAL / 2)  # = 30°
             is_in_camera_fov = altitude_deg >= min_altitude_for_fov
 
-            # Calculate moon age (days since new moon)
-            previous_new = ephem.previous_new_moon(observation_time)
-            moon_age = observation_time - previous_new.datetime()
+            # Moon age (whole days since new moon)
+            moon_age_days = int(position['moon_age_days'])
 
             self.log("INFO", f"Moon: {phase_name}, {illumination:.1f}% illuminated, "
                            f"alt={altitude_deg:.1f}°, in_camera_fov={is_in_camera_fov}")
@@ -189,16 +301,25 @@ class SkyAnalyzer:
                 'azimuth': azimuth_deg,
                 'phase_name': phase_name,
                 'illumination': illumination,
-                'age_days': moon_age.days
+                'age_days': moon_age_days
             }
 
         except Exception as e:
             self.log("ERROR", f"Moon analysis error: {e}")
             return None
 
-    def analyze_stars(self, image_path, brightness_mean):
+    def load_frame(self, image_path):
+        """
+        Decode an image once as downscaled (1/4) grayscale
+        The JPEG decoder scales while decoding, the full resolution is never built
         """
-        Analyze star visibility and brightness
+        if not image_path or not os.path.exists(image_path):
+            return None
+        return cv2.imread(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+
+    def analyze_stars(self, small, brightness_mean, search_factor=STAR_SEARCH_FACTOR):
+        """
+        Analyze star visibility and brightness on a frame from load_frame()
         Only performs analysis for nighttime images
         """
         try:
@@ -206,45 +327,37 @@ class SkyAnalyzer:
             if brightness_mean > 80:
                 return None  # Too bright for stars
 
-            # Load image
-            img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-            if img is None:
+            if small is None:
                 return None
 
-            # Reduce image size for faster processing
-            scale = 0.25
-            small = cv2.resize(img, None, fx=scale, fy=scale)
-
             # Apply Gaussian blur to reduce noise
             blurred = cv2.GaussianBlur(small, (5, 5), 0)
 
-            # Detect bright spots (potential stars)
-            # Use adaptive thresholding to find local maxima
-            threshold = np.percentile(blurred, 99.5)  # Top 0.5% brightest pixels
-            _, stars_mask = cv2.threshold(blurred, threshold, 255, cv2.THRESH_BINARY)
-
-            # Count star-like features
-            contours, _ = cv2.findContours(stars_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            # Detect bright spots (potential stars): pixels above the percentile.
+            # cv2.threshold compares uint8 pixels against floor(threshold).
+            hist = np.bincount(blurred.ravel(), minlength=256)
+            values = np.arange(256)
+            level = int(histogram_percentile(hist, STAR_PERCENTILE))
 
-            # Filter contours by size (stars should be small)
-            star_contours = [c for c in contours if 1 <= cv2.contourArea(c) <= 50]
-            star_count = len(star_contours)
+            # Count star-like features (stars should be small)
+            star_count = count_star_contours(blurred, level, search_factor)
 
             # Calculate average brightness of detected stars
+            star_hist = hist[level + 1:]
             if star_count > 0:
-                star_pixels = blurred[stars_mask > 0]
-                avg_star_brightness = float(np.mean(star_pixels))
-                brightest_star = float(np.max(star_pixels))
+                avg_star_brightness = float(star_hist @ values[level + 1:] / star_hist.sum())
+                brightest_star = float(level + 1 + np.flatnonzero(star_hist)[-1])
             else:
                 avg_star_brightness = 0
                 brightest_star = 0
 
             # Calculate sky background brightness (excluding stars)
-            background_mask = stars_mask == 0
-            if np.sum(background_mask) > 0:
-                sky_background = float(np.mean(blurred[background_mask]))
+            background_hist = hist[:level + 1]
+            mean = float(hist @ values / hist.sum())
+            if background_hist.sum() > 0:
+                sky_background = float(background_hist @ values[:level + 1] / background_hist.sum())
             else:
-                sky_background = float(np.mean(blurred))
+                sky_background = mean
 
             # Estimate Bortle scale (light pollution)
             # Lower background = darker sky = better for astronomy
@@ -260,7 +373,8 @@ class SkyAnalyzer:
                 bortle = 9  # Inner city sky
 
             # Calculate seeing quality (lower variance = better seeing)
-            seeing_quality = float(100 - min(100, np.std(blurred)))
+            std = np.sqrt(max(0.0, float(hist @ values ** 2 / hist.sum()) - mean ** 2))
+            seeing_quality = float(100 - min(100, std))
 
             self.log("INFO", f"Stars: count={star_count}, brightness={avg_star_brightness:.1f}, "
                            f"background={sky_background:.1f}, Bortle={bortle}")
@@ -278,27 +392,17 @@ class SkyAnalyzer:
             self.log("ERROR", f"Star analysis error: {e}")
             return None
 
-    def detect_meteor(self, current_image_path, previous_image_path):
+    def detect_meteor(self, current_small, previous_small):
         """
-        Detect potential meteors using frame differencing
+        Detect potential meteors using frame differencing on frames from load_frame()
         Looks for bright streaks that appear only in current frame
         """
         try:
-            if not previous_image_path or not os.path.exists(previous_image_path):
+            if current_small is None or previous_small is None:
                 return None
-
-            # Load images
-            current = cv2.imread(current_image_path, cv2.IMREAD_GRAYSCALE)
-            previous = cv2.imread(previous_image_path, cv2.IMREAD_GRAYSCALE)
-
-            if current is None or previous is None:
+            if current_small.shape != previous_small.shape:
                 return None
 
-            # Resize for faster processing
-            scale = 0.25
-            current_small = cv2.resize(current, None, fx=scale, fy=scale)
-            previous_small = cv2.resize(previous, None, fx=scale, fy=scale)
-
             # Calculate absolute difference
             diff = cv2.absdiff(current_small, previous_small)
 
@@ -347,162 +451,195 @@ class SkyAnalyzer:
             self.log("ERROR", f"Meteor detection error: {e}")
             return None
 
-    def process_recent_observations(self, lookback_minutes=20):
+    def process_recent_observations(self, limit=ANALYSIS_BATCH_SIZE):
         """
-        Process recent observations for advanced analysis
+        Analyze observations that have not been analyzed yet (analyzed_at IS NULL)
+
+        Frames are processed oldest first. Each frame is decoded at most once;
+        its downscaled grayscale is kept as the previous frame for meteor
+        differencing of the next one. Results and analyzed_at marks are
+        written in one transaction. An observation whose analysis or result
+        rows fail is marked with analysis_error instead, so it is not retried
+        forever and does not hold back the rest of the queue.
         """
         try:
             cursor = self.conn.cursor()
-
-            # Get recent observations without advanced analysis
-            cutoff_time = datetime.now() - timedelta(minutes=lookback_minutes)
-
-            query = """
-                SELECT id, observation_timestamp, image_path, brightness, cloud_coverage
-                FROM sky_observations
-                WHERE observation_timestamp >= %s
-                ORDER BY observation_timestamp DESC
-            """
-
-            cursor.execute(query, (cutoff_time,))
+            cursor.execute(PENDING_OBSERVATIONS_SQL, (limit,))
             observations = cursor.fetchall()
 
-            self.log("INFO", f"Processing {len(observations)} recent observations")
-
-            previous_image = None
-
-            for obs_id, obs_time, image_path, brightness, cloud_coverage in observations:
-                self.log("INFO", f"Analyzing observation {obs_id} at {obs_time}")
-
-                # ISS visibility check
-                iss_data = self.check_iss_visibility(obs_time)
-                if iss_data['visible']:
-                    self.save_iss_observation(obs_id, obs_time, iss_data)
-
-                # Moon analysis
-                moon_data = self.analyze_moon(obs_time)
-                if moon_data:
-                    self.save_moon_observation(obs_id, obs_time, moon_data)
-
-                # Star analysis (only for dark skies)
-                if brightness < 80 and cloud_coverage < 50:
-                    star_data = self.analyze_stars(image_path, brightness)
-                    if star_data:
-                        self.save_star_observation(obs_id, obs_time, star_data)
-
-                # Meteor detection (compare with previous frame)
-                if previous_image and brightness < 100:
-                    meteor_data = self.detect_meteor(image_path, previous_image)
-                    if meteor_data and meteor_data['confidence'] > 50:
-                        self.save_meteor_detection(obs_id, obs_time, meteor_data)
-
-                previous_image = image_path
-
+            if not observations:
+                self.log("INFO", "No new observations to analyze")
+                return 0
+
+            self.log("INFO", f"Processing {len(observations)} new observations")
+
+            # Previous frame for meteor differencing of the first new frame
+            previous_time, previous_frame = None, None
+            cursor.execute(PREVIOUS_OBSERVATION_SQL, (observations[0][1],))
+            row = cursor.fetchone()
+            if row and row[2] is not None and row[2] < 100:
+                previous_time, previous_frame = row[0], self.load_frame(row[1])
+
+            analyzed = []  # (obs_id, result rows per table)
+            failed = []    # (obs_id, error)
+
+            # ISS/sun/moon positions for the whole batch in one interpolation
+            positions = self.sky_positions([obs[1] for obs in observations])
+
+            for observation, position in zip(observations, positions):
+                obs_id, obs_time = observation[0], observation[1]
+                try:
+                    results, frame = self.analyze_observation(observation, position,
+                                                              previous_time, previous_frame)
+                except Exception as e:
+                    self.log("ERROR", f"Analysis of observation {obs_id} failed: {e}")
+                    failed.append((obs_id, str(e)))
+                    frame = None
+                else:
+                    analyzed.append((obs_id, results))
+                previous_time, previous_frame = obs_time, frame
+
+            failed.extend(self.save_analysis_batch(cursor, analyzed))
+            for obs_id, error in failed:
+                cursor.execute(MARK_FAILED_SQL, (error[:500], obs_id))
             self.conn.commit()
-            self.log("INFO", "Analysis completed successfully")
+
+            counts = {key: sum(len(results[key]) for _, results in analyzed) for key in BATCH_INSERT_SQL}
+            self.log("INFO", f"Analysis completed: {len(observations)} observations "
+                             f"({len(failed)} failed), {counts['iss']} ISS, {counts['moon']} moon, "
+                             f"{counts['stars']} star, {counts['meteors']} meteor rows")
+            return len(observations)
 
         except Exception as e:
             self.log("ERROR", f"Processing error: {e}")
             if self.conn:
                 self.conn.rollback()
+            return 0
 
-    def save_iss_observation(self, obs_id, obs_time, iss_data):
-        """Save ISS visibility to iss_passes table"""
-        try:
-            cursor = self.conn.cursor()
-
-            # Schat pass duration (10 min tussen foto's, dus we schatten 5 min voor/na)
-            pass_start = obs_time - timedelta(minutes=5)
-            pass_end = obs_time + timedelta(minutes=5)
-
-            cursor.execute("""
-                INSERT INTO iss_passes (
-                    pass_start, pass_end, max_elevation_degrees,
-                    duration_seconds, observation_id, notes
-                ) VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT DO NOTHING
-                RETURNING id
-            """, (
-                pass_start, pass_end, iss_data.get('altitude'),
-                600,  # 10 min geschatte duration
-                obs_id,
-                f"Detected in camera FOV at {iss_data.get('altitude', 0):.1f}° alt, {iss_data.get('azimuth', 0):.1f}° az"
-            ))
-
-            result = cursor.fetchone()
-            if result:
-                self.log("INFO", f"ISS PASS LOGGED! ID={result[0]}, observation={obs_id}, "
-                               f"altitude={iss_data.get('altitude', 0):.1f}°")
-            else:
-                self.log("INFO", f"ISS pass already logged for this timeframe")
+    def analyze_observation(self, observation, position, previous_time, previous_frame):
+        """
+        Analyze one observation
 
-        except Exception as e:
-            self.log("WARNING", f"Failed to save ISS data: {e}")
+        Returns:
+            (result rows per table, decoded frame or None for the next meteor diff)
+        """
+        obs_id, obs_time, image_path, brightness, cloud_coverage = observation
+        self.log("INFO", f"Analyzing observation {obs_id} at {obs_time}")
+        results = {key: [] for key in BATCH_INSERT_SQL}
+
+        # ISS visibility check
+        iss_data = self.check_iss_visibility(obs_time, position)
+        if iss_data['visible']:
+            results['iss'].append(self.iss_row(obs_id, obs_time, iss_data))
+
+        # Moon analysis
+        moon_data = self.analyze_moon(obs_time, position)
+        if moon_data:
+            results['moon'].append(self.moon_row(obs_id, obs_time, moon_data))
+
+        # Image analysis only for dark frames: decode once, reuse for both
+        frame = None
+        if brightness is not None and brightness < 100 and image_path:
+            frame = self.load_frame(image_path)
+
+        # Star analysis (only for dark, clear skies; unknown coverage counts as cloudy)
+        if (frame is not None and brightness < 80
+                and cloud_coverage is not None and cloud_coverage < 50):
+            star_data = self.analyze_stars(frame, brightness)
+            if star_data:
+                results['stars'].append(self.star_row(obs_id, obs_time, star_data))
+
+        # Meteor detection (compare with previous frame)
+        if (frame is not None and previous_frame is not None and previous_time is not None
+                and obs_time - previous_time <= METEOR_MAX_FRAME_GAP):
+            meteor_data = self.detect_meteor(frame, previous_frame)
+            if meteor_data and meteor_data['confidence'] > 50:
+                self.log("WARNING", f"METEOR DETECTED! observation={obs_id}, "
+                                    f"confidence={meteor_data['confidence']:.1f}%")
+                results['meteors'].append(self.meteor_row(obs_id, obs_time, meteor_data))
+
+        return results, frame
+
+    def iss_row(self, obs_id, obs_time, iss_data):
+        """iss_passes row for an ISS sighting"""
+        # Schat pass duration (10 min tussen foto's, dus we schatten 5 min voor/na)
+        return (
+            obs_time - timedelta(minutes=5), obs_time + timedelta(minutes=5),
+            iss_data.get('altitude'),
+            600,  # 10 min geschatte duration
+            obs_id,
+            f"Detected in camera FOV at {iss_data.get('altitude', 0):.1f}° alt, {iss_data.get('azimuth', 0):.1f}° az"
+        )
+
+    def moon_row(self, obs_id, obs_time, moon_data):
+        """moon_observations row"""
+        return (
+            obs_id, obs_time, moon_data['phase_name'],
+            moon_data['illumination'], moon_data['age_days'],
+            moon_data['altitude'], moon_data['azimuth'],
+            moon_data['visible']
+        )
+
+    def star_row(self, obs_id, obs_time, star_data):
+        """star_brightness row"""
+        return (
+            obs_id, obs_time, star_data['star_count'],
+            star_data['avg_star_brightness'], star_data['brightest_star'],
+            star_data['seeing_quality'], star_data['sky_background'],
+            star_data['bortle_scale']
+        )
+
+    def meteor_row(self, obs_id, obs_time, meteor_data):
+        """meteor_detections row"""
+        x, y, w, h = meteor_data['bbox']
+        return (
+            obs_id, obs_time, meteor_data['brightness_delta'],
+            meteor_data['streak_length'], meteor_data['brightness_delta'],
+            meteor_data['confidence'], x, y, w, h
+        )
+
+    def save_analysis_batch(self, cursor, analyzed):
+        """
+        Insert result rows and mark the observations analyzed (caller commits)
 
-    def save_moon_observation(self, obs_id, obs_time, moon_data):
-        """Save moon observation to database"""
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                INSERT INTO moon_observations (
-                    observation_id, observation_timestamp, phase_name,
-                    illumination_percent, age_days, altitude_degrees,
-                    azimuth_degrees, detected_in_image
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT DO NOTHING
-            """, (
-                obs_id, obs_time, moon_data['phase_name'],
-                moon_data['illumination'], moon_data['age_days'],
-                moon_data['altitude'], moon_data['azimuth'],
-                moon_data['visible']
-            ))
-            self.log("INFO", f"Moon observation saved for {obs_id}")
-        except Exception as e:
-            self.log("WARNING", f"Failed to save moon data: {e}")
+        The whole batch is tried first; if that fails each observation is
+        written under its own savepoint, so one bad row only loses its own
+        observation.
 
-    def save_star_observation(self, obs_id, obs_time, star_data):
-        """Save star brightness observation to database"""
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                INSERT INTO star_brightness (
-                    observation_id, observation_timestamp, star_count,
-                    avg_star_brightness, brightest_star_magnitude,
-                    seeing_quality_score, sky_background_brightness,
-                    bortle_scale_estimate
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT DO NOTHING
-            """, (
-                obs_id, obs_time, star_data['star_count'],
-                star_data['avg_star_brightness'], star_data['brightest_star'],
-                star_data['seeing_quality'], star_data['sky_background'],
-                star_data['bortle_scale']
-            ))
-            self.log("INFO", f"Star observation saved for {obs_id}: {star_data['star_count']} stars detected")
-        except Exception as e:
-            self.log("WARNING", f"Failed to save star data: {e}")
+        Returns:
+            List of (obs_id, error) for observations that could not be saved
+        """
+        if not analyzed:
+            return []
 
-    def save_meteor_detection(self, obs_id, obs_time, meteor_data):
-        """Save meteor detection to database"""
+        cursor.execute("SAVEPOINT analysis_batch")
         try:
-            cursor = self.conn.cursor()
-            x, y, w, h = meteor_data['bbox']
-            cursor.execute("""
-                INSERT INTO meteor_detections (
-                    observation_id, detection_timestamp, frame_diff_score,
-                    streak_length_pixels, brightness_delta, confidence_score,
-                    bbox_x, bbox_y, bbox_width, bbox_height
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id
-            """, (
-                obs_id, obs_time, meteor_data['brightness_delta'],
-                meteor_data['streak_length'], meteor_data['brightness_delta'],
-                meteor_data['confidence'], x, y, w, h
-            ))
-            meteor_id = cursor.fetchone()[0]
-            self.log("WARNING", f"METEOR DETECTED! ID={meteor_id}, confidence={meteor_data['confidence']:.1f}%")
-        except Exception as e:
-            self.log("WARNING", f"Failed to save meteor detection: {e}")
+            self.insert_results(cursor, analyzed)
+            cursor.execute("RELEASE SAVEPOINT analysis_batch")
+            return []
+        except psycopg2.Error as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT analysis_batch")
+            self.log("WARNING", f"Batch insert failed, saving per observation: {e}")
+
+        failed = []
+        for obs_id, results in analyzed:
+            cursor.execute("SAVEPOINT analysis_observation")
+            try:
+                self.insert_results(cursor, [(obs_id, results)])
+                cursor.execute("RELEASE SAVEPOINT analysis_observation")
+            except psycopg2.Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT analysis_observation")
+                self.log("ERROR", f"Saving observation {obs_id} failed: {e}")
+                failed.append((obs_id, str(e)))
+        return failed
+
+    def insert_results(self, cursor, analyzed):
+        """Insert the result rows of the given observations and mark them analyzed"""
+        for key, sql in BATCH_INSERT_SQL.items():
+            rows = [row for _, results in analyzed for row in results[key]]
+            if rows:
+                execute_values(cursor, sql, rows)
+        cursor.execute(MARK_ANALYZED_SQL, ([obs_id for obs_id, _ in analyzed],))
 
     def cleanup(self):
         """Cleanup resources"""
@@ -517,8 +654,8 @@ class SkyAnalyzer:
             if not self.connect_db():
                 return False
 
-            # Process recent observations
-            self.process_recent_observations(lookback_minutes=30)
+            # Process observations not analyzed yet
+            self.process_recent_observations()
 
             self.log("INFO", "=== AtmosBird Advanced Analysis Completed ===")
             return True
@@ -31,6 +31,7 @@ NAS_BASE = "/mnt/nas-birdnet-archive/atmosbird"
 NAS_PHOTO_DIR = f"{NAS_BASE}/ruwe_foto"
 NAS_TIMELAPSE_DIR = f"{NAS_BASE}/timelapse"
 NAS_THUMBNAIL_DIR = f"{NAS_BASE}/thumbnails"
+CATALOG_SOURCE = "atmosbird"  # image_catalog bron; camera = STATION_ID
 
 # Thumbnail settings
 THUMBNAIL_SIZE = (320, 180)  # 16:9 aspect voor dashboard preview
@@ -39,6 +40,7 @@ THUMBNAIL_QUALITY = 75
 # Import core modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from core.config import get_postgres_config
+from core.image_catalog import CatalogError, ImageCatalog, parse_timestamp
 from core.logging import get_logger
 
 DB_CONFIG = get_postgres_config()
@@ -208,6 +210,7 @@ class AtmosBirdArchiveSync:
             """)
 
             rows = cursor.fetchall()
+            archived = []
 
             for obs_id, local_path in rows:
                 if not local_path:
@@ -226,10 +229,13 @@ class AtmosBirdArchiveSync:
                         WHERE id = %s
                     """, (nas_path, obs_id))
                     self.stats['db_updated'] += 1
+                    archived.append(nas_path)
 
             self.conn.commit()
             logger.info(f"Database geüpdatet: {self.stats['db_updated']} records")
 
+            self.catalog_archived(archived)
+
         except Exception as e:
             logger.error(f"Database update fout: {e}")
             self.conn.rollback()
@@ -237,6 +243,21 @@ class AtmosBirdArchiveSync:
         finally:
             cursor.close()
 
+    def catalog_archived(self, nas_paths):
+        """Register newly archived photos in the image catalog (timelapse lookups)"""
+        images = {}
+        for nas_path in nas_paths:
+            taken_at = parse_timestamp(os.path.basename(nas_path), 'sky')
+            if taken_at is not None:
+                images[nas_path] = (taken_at, os.path.getsize(nas_path))
+
+        try:
+            added = ImageCatalog(self.conn).add_many(CATALOG_SOURCE, STATION_ID, images)
+            logger.info(f"Image catalog: {added} foto's geregistreerd")
+        except CatalogError as e:
+            # Niet fataal: de image-catalog-sync reconciler pakt ze later op
+            logger.warning(f"Image catalog update mislukt: {e}")
+
     def cleanup_local_old_files(self):
         """Remove local files older than RETENTION_DAYS"""
         logger.info(f"Cleanup lokale bestanden ouder dan {RETENTION_DAYS} dagen...")
@@ -4,25 +4,39 @@ AtmosBird Sky Capture Script
 Captures sky photos every 10 minutes with Pi Camera NoIR
 Analyzes cloud coverage using AI model and stores to NAS + PostgreSQL
 
+Runs as a long-lived service (--daemon, atmosbird-capture.service): imports,
+the ONNX cloud classifier and a small PostgreSQL connection pool are set up
+once. Each capture streams the JPEG from rpicam-still to memory, decodes it
+once and shares the frame between brightness stats, AI inference and the
+fallback analyzer; the original JPEG bytes are written to the NAS as-is.
+Per-stage timings are logged after every capture.
+
+Without --daemon a single capture is made (manual test runs).
+
 Refactored: 2025-12-30 - AI cloud classifier integration
 """
 
+import argparse
+import math
 import os
-import sys
-import shutil
+import signal
 import subprocess
+import sys
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict
 
 import numpy as np
-from PIL import Image
 import cv2
 import psycopg2
+from psycopg2.pool import SimpleConnectionPool
 
 # Add project root to path for core modules
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
 
 # Import EMSN core modules
 from scripts.core.logging import EMSNLogger
@@ -39,13 +53,20 @@ STATION_ID = "berging"
 # Storage paths
 NAS_BASE = "/mnt/usb/atmosbird"
 RAW_PHOTO_DIR = f"{NAS_BASE}/ruwe_foto"
-TEMP_DIR = "/tmp/atmosbird"
+
+# Service mode: capture on the clock (:00, :10, ...)
+CAPTURE_INTERVAL = 600
+
+# rpicam-vid of the livestream holds the camera; it is paused per capture
+STREAM_SERVICE = "atmosbird-stream.service"
+STREAM_RELEASE_DELAY = 1.0
 
 # AI Model path
 MODEL_PATH = Path(__file__).parent / "cloud_classifier.onnx"
 
 # Database configuration
 DB_CONFIG = get_postgres_config()
+DB_POOL_MAX = 2
 
 # Fallback thresholds (only used when AI model unavailable)
 DAYTIME_BRIGHTNESS_THRESHOLD = 100
@@ -59,13 +80,16 @@ class SkyCapture:
 
     def __init__(self):
         self.timestamp = datetime.now()
-        self.temp_image_path: Optional[str] = None
         self.final_image_path: Optional[str] = None
+        self.jpeg: Optional[bytes] = None
+        self.frame: Optional[np.ndarray] = None  # BGR, decoded once per capture
+        self.pool: Optional[SimpleConnectionPool] = None
         self.conn: Optional[psycopg2.extensions.connection] = None
+        self.timings: Dict[str, float] = {}
+        self.running = False
         self.logger = _logger
         self.ai_classifier: Optional[CloudClassifierONNX] = None
 
-        Path(TEMP_DIR).mkdir(parents=True, exist_ok=True)
         self._init_ai_classifier()
 
     def _init_ai_classifier(self) -> None:
@@ -85,26 +109,49 @@ class SkyCapture:
         """Log message via core logger."""
         self.logger.log(level, message)
 
+    @contextmanager
+    def stage(self, name: str):
+        """Add the wall time of the block to self.timings[name]."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
     def connect_db(self) -> bool:
-        """Connect to PostgreSQL database."""
+        """Take a connection from the pool (created on first use)."""
         try:
-            self.conn = psycopg2.connect(**DB_CONFIG)
-            self.log("INFO", "Connected to database")
+            if self.pool is None:
+                self.pool = SimpleConnectionPool(1, DB_POOL_MAX, **DB_CONFIG)
+                self.log("INFO", "Connected to database")
+            self.conn = self.pool.getconn()
+            if self.conn.closed:
+                self.pool.putconn(self.conn, close=True)
+                self.conn = self.pool.getconn()
             return True
         except Exception as e:
             self.log("ERROR", f"Database connection failed: {e}")
             return False
 
-    def capture_photo(self) -> bool:
-        """Capture photo with rpicam-still."""
+    def set_stream(self, running: bool) -> None:
+        """Start or stop the livestream, which holds the camera while it runs."""
+        action = "start" if running else "stop"
         try:
-            self.temp_image_path = (
-                f"{TEMP_DIR}/capture_{self.timestamp.strftime('%Y%m%d_%H%M%S')}.jpg"
+            subprocess.run(
+                ["/usr/bin/sudo", "/usr/bin/systemctl", action, STREAM_SERVICE],
+                capture_output=True, timeout=30, check=True
             )
+            if not running:
+                time.sleep(STREAM_RELEASE_DELAY)
+        except (subprocess.SubprocessError, OSError) as e:
+            self.log("WARNING", f"Could not {action} {STREAM_SERVICE}: {e}")
 
+    def capture_photo(self) -> bool:
+        """Capture photo with rpicam-still straight to memory (JPEG on stdout)."""
+        try:
             cmd = [
                 "rpicam-still",
-                "-o", self.temp_image_path,
+                "-o", "-",
                 "--width", str(CAMERA_WIDTH),
                 "--height", str(CAMERA_HEIGHT),
                 "--rotation", "180",
@@ -115,18 +162,22 @@ class SkyCapture:
             ]
 
             self.log("INFO", f"Capturing photo: {CAMERA_WIDTH}x{CAMERA_HEIGHT}")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+            self.set_stream(False)
+            try:
+                result = subprocess.run(cmd, capture_output=True, timeout=10)
+            finally:
+                self.set_stream(True)
 
             if result.returncode != 0:
-                self.log("ERROR", f"Capture failed: {result.stderr}")
+                self.log("ERROR", f"Capture failed: {result.stderr.decode(errors='replace')}")
                 return False
 
-            if not os.path.exists(self.temp_image_path):
-                self.log("ERROR", "Capture file not created")
+            if not result.stdout:
+                self.log("ERROR", "Capture returned no image data")
                 return False
 
-            file_size = os.path.getsize(self.temp_image_path)
-            self.log("INFO", f"Photo captured: {file_size / 1024 / 1024:.2f} MB")
+            self.jpeg = result.stdout
+            self.log("INFO", f"Photo captured: {len(self.jpeg) / 1024 / 1024:.2f} MB")
             return True
 
         except subprocess.TimeoutExpired:
@@ -136,16 +187,18 @@ class SkyCapture:
             self.log("ERROR", f"Capture error: {e}")
             return False
 
+    def decode_photo(self) -> bool:
+        """Decode the captured JPEG once; all analysis works on self.frame."""
+        self.frame = cv2.imdecode(np.frombuffer(self.jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if self.frame is None:
+            self.log("ERROR", "Failed to decode captured image")
+            return False
+        return True
+
     def analyze_image(self) -> Optional[Dict]:
-        """Analyze captured image for cloud coverage and brightness."""
+        """Analyze the decoded frame for cloud coverage and brightness."""
         try:
-            # Load image for brightness analysis
-            img = cv2.imread(self.temp_image_path)
-            if img is None:
-                self.log("ERROR", "Failed to load image for analysis")
-                return None
-
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            gray = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
             brightness_mean = float(np.mean(gray))
             brightness_std = float(np.std(gray))
             contrast_score = brightness_std
@@ -188,9 +241,9 @@ class SkyCapture:
             return None
 
     def _analyze_with_ai(self) -> Optional[Dict]:
-        """Run AI cloud classifier on image."""
+        """Run AI cloud classifier on the decoded frame."""
         try:
-            return self.ai_classifier.predict(self.temp_image_path)
+            return self.ai_classifier.predict(cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB))
         except Exception as e:
             self.log("WARNING", f"AI analysis failed, using fallback: {e}")
             return None
@@ -251,7 +304,10 @@ class SkyCapture:
             filename = f"sky_{self.timestamp.strftime('%Y%m%d_%H%M%S')}.jpg"
             self.final_image_path = str(target_dir / filename)
 
-            shutil.move(self.temp_image_path, self.final_image_path)
+            # Write under a temp name so readers never see a partial JPEG
+            partial = target_dir / f".{filename}.part"
+            partial.write_bytes(self.jpeg)
+            partial.replace(self.final_image_path)
             self.log("INFO", f"Photo stored: {self.final_image_path}")
             return True
 
@@ -331,45 +387,67 @@ class SkyCapture:
             self.log("WARNING", f"Health update failed: {e}")
 
     def cleanup(self) -> None:
-        """Cleanup temporary files and close connections."""
+        """Release the frame and return the connection to the pool."""
         try:
-            if self.temp_image_path and os.path.exists(self.temp_image_path):
-                os.remove(self.temp_image_path)
+            self.jpeg = None
+            self.frame = None
 
-            if self.conn:
-                self.conn.close()
+            if self.conn is not None and self.pool is not None:
+                self.pool.putconn(self.conn, close=bool(self.conn.closed))
+            self.conn = None
 
         except Exception as e:
             self.log("WARNING", f"Cleanup error: {e}")
 
+    def close(self) -> None:
+        """Close all pooled database connections."""
+        if self.pool is not None:
+            self.pool.closeall()
+            self.pool = None
+
     def run(self) -> bool:
-        """Main execution flow."""
+        """Make one capture: photo, analysis, storage, database."""
+        self.timestamp = datetime.now()
+        self.final_image_path = None
+        self.timings = {}
+        started = time.perf_counter()
         try:
             self.log("INFO", "=== AtmosBird Capture Started ===")
 
-            if not self.connect_db():
+            with self.stage("database"):
+                if not self.connect_db():
+                    return False
+
+            with self.stage("capture"):
+                captured = self.capture_photo()
+            if not captured:
+                self.update_health_metrics(False)
                 return False
 
-            if not self.capture_photo():
+            with self.stage("decode"):
+                decoded = self.decode_photo()
+            if not decoded:
                 self.update_health_metrics(False)
                 return False
 
-            analysis = self.analyze_image()
+            with self.stage("analyze"):
+                analysis = self.analyze_image()
             if not analysis:
                 self.update_health_metrics(False)
                 return False
 
-            if not self.store_photo():
+            with self.stage("store"):
+                stored = self.store_photo()
+            if not stored:
                 self.update_health_metrics(False)
                 return False
 
-            observation_id = self.save_to_database(analysis)
+            with self.stage("database"):
+                observation_id = self.save_to_database(analysis)
+                self.update_health_metrics(bool(observation_id))
             if not observation_id:
-                self.update_health_metrics(False)
                 return False
 
-            self.update_health_metrics(True)
-
             self.log("INFO", "=== AtmosBird Capture Completed Successfully ===")
             return True
 
@@ -378,12 +456,59 @@ class SkyCapture:
             return False
 
         finally:
+            self.timings["total"] = time.perf_counter() - started
+            self.log("INFO", "Timings: " + ", ".join(
+                f"{name}={seconds:.2f}s" for name, seconds in self.timings.items()
+            ))
             self.cleanup()
 
+    def serve(self, interval: int = CAPTURE_INTERVAL) -> int:
+        """Capture every `interval` seconds on the clock until SIGTERM/SIGINT."""
+        self.running = True
+
+        def signal_handler(sig, frame):
+            self.log("INFO", f"Signal {sig} received - stopping")
+            self.running = False
+
+        signal.signal(signal.SIGINT, signal_handler)
+        signal.signal(signal.SIGTERM, signal_handler)
+
+        self.log("INFO", f"AtmosBird capture service started (every {interval}s)")
+        try:
+            while self.running:
+                due = next_capture_time(time.time(), interval)
+                while self.running and time.time() < due:
+                    time.sleep(min(1.0, max(0.0, due - time.time())))
+                if self.running:
+                    self.run()
+        finally:
+            self.close()
+
+        self.log("INFO", "AtmosBird capture service stopped")
+        return 0
+
+
+def next_capture_time(now: float, interval: int = CAPTURE_INTERVAL) -> float:
+    """Next multiple of `interval` after `now` (epoch seconds)."""
+    return (math.floor(now / interval) + 1) * interval
+
 
 def main():
+    parser = argparse.ArgumentParser(description="AtmosBird sky capture")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep running and capture every --interval seconds")
+    parser.add_argument("--interval", type=int, default=CAPTURE_INTERVAL,
+                        help=f"Seconds between captures in --daemon mode (default: {CAPTURE_INTERVAL})")
+    args = parser.parse_args()
+
     capture = SkyCapture()
-    success = capture.run()
+    if args.daemon:
+        sys.exit(capture.serve(args.interval))
+
+    try:
+        success = capture.run()
+    finally:
+        capture.close()
     sys.exit(0 if success else 1)
 
 
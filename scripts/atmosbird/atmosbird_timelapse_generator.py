@@ -24,142 +24,83 @@ COMMAND LINE:
 
     # Handmatige fps instelling
     ./atmosbird_timelapse_generator.py -d 7 --fps 15
+
+SEGMENT CACHE:
+    Volledige dagen worden één keer gecodeerd (per resolutie, fps en
+    filter) en daarna zonder her-codering samengevoegd, zie
+    scripts/core/timelapse_segments.py.
 """
 
 import argparse
-import subprocess
-import tempfile
 from datetime import datetime, timedelta
 from pathlib import Path
 import sys
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from core.image_catalog import find_date_range, find_images
+from core.timelapse_segments import build_timelapse, fps_for_duration
+
 # Configuratie
-SCREENSHOTS_BASE = Path("/mnt/nas-birdnet-archive/atmosbird/ruwe_foto")
+CATALOG_SOURCE = "atmosbird"  # Screenshots via image_catalog (scripts/core/image_catalog.py)
+CATALOG_CAMERA = "berging"
 OUTPUT_DIR = Path("/mnt/nas-birdnet-archive/gegenereerde_beelden/atmosbird")
 
 
 def get_screenshots(start_date: datetime, end_date: datetime,
                     night_only: bool = False, day_only: bool = False) -> list:
-    """Verzamel screenshots binnen de opgegeven periode."""
+    """Verzamel screenshots binnen de opgegeven periode (via image catalog)."""
     screenshots = []
 
-    if not SCREENSHOTS_BASE.exists():
-        print(f"Error: Screenshots map niet gevonden: {SCREENSHOTS_BASE}")
-        return []
+    for timestamp, jpg_file in find_images(CATALOG_SOURCE, CATALOG_CAMERA, start_date, end_date):
+        hour = timestamp.hour
 
-    # Loop door alle jpg bestanden
-    for jpg_file in sorted(SCREENSHOTS_BASE.rglob("*.jpg")):
-        # Parse timestamp uit bestandsnaam: sky_20260105_192858.jpg
-        try:
-            name = jpg_file.stem
-            parts = name.split('_')
-            if len(parts) >= 3 and parts[0] == 'sky':
-                date_str = parts[1]  # 20260105
-                time_str = parts[2]  # 192858
-                timestamp = datetime.strptime(f"{date_str}_{time_str}", "%Y%m%d_%H%M%S")
-
-                # Check datum range
-                if start_date <= timestamp <= end_date:
-                    hour = timestamp.hour
-
-                    # Filter op dag/nacht indien gewenst
-                    if night_only and not (hour >= 22 or hour < 6):
-                        continue
-                    if day_only and (hour >= 22 or hour < 6):
-                        continue
-
-                    screenshots.append((timestamp, jpg_file))
-        except (ValueError, IndexError):
+        # Filter op dag/nacht indien gewenst
+        if night_only and not (hour >= 22 or hour < 6):
             continue
+        if day_only and (hour >= 22 or hour < 6):
+            continue
+
+        screenshots.append((timestamp, jpg_file))
 
-    # Sorteer op timestamp
-    screenshots.sort(key=lambda x: x[0])
     return screenshots
 
 
 def get_available_date_range() -> tuple:
     """Bepaal beschikbare datum range."""
-    if not SCREENSHOTS_BASE.exists():
+    first, last = find_date_range(CATALOG_SOURCE, CATALOG_CAMERA)
+    if first is None:
         return None, None
-
-    all_files = list(SCREENSHOTS_BASE.rglob("*.jpg"))
-    if not all_files:
-        return None, None
-
-    dates = []
-    for jpg_file in all_files:
-        try:
-            name = jpg_file.stem
-            parts = name.split('_')
-            if len(parts) >= 2 and parts[0] == 'sky':
-                date_str = parts[1]
-                dates.append(datetime.strptime(date_str, "%Y%m%d"))
-        except (ValueError, IndexError):
-            continue
-
-    if dates:
-        return min(dates), max(dates)
-    return None, None
+    return (first.replace(hour=0, minute=0, second=0, microsecond=0),
+            last.replace(hour=0, minute=0, second=0, microsecond=0))
 
 
 def create_timelapse(screenshots: list, output_path: Path, fps: int = 10,
-                     resolution: str = "1920x1080", show_timestamp: bool = True) -> bool:
-    """Maak timelapse video met ffmpeg."""
+                     resolution: str = "1920x1080", show_timestamp: bool = True,
+                     start_date: datetime = None, end_date: datetime = None,
+                     time_filter: str = None, use_cache: bool = True) -> bool:
+    """
+    Maak timelapse video uit dag-segmenten (scripts/core/timelapse_segments.py).
+
+    Volledige dagen binnen start_date-end_date komen uit de segment cache,
+    alleen randdagen worden los gecodeerd; samenvoegen zonder her-codering.
+    """
     if not screenshots:
         print("Error: Geen screenshots om te verwerken")
         return False
 
-    # Maak tijdelijke map voor genummerde symlinks
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmppath = Path(tmpdir)
-
-        print(f"Voorbereiden van {len(screenshots)} frames...")
-
-        # Maak genummerde symlinks voor ffmpeg
-        for i, (timestamp, filepath) in enumerate(screenshots):
-            link_name = tmppath / f"frame_{i:06d}.jpg"
-            link_name.symlink_to(filepath)
-
-        # FFmpeg commando
-        input_pattern = str(tmppath / "frame_%06d.jpg")
-
-        # Parse resolution
-        width, height = resolution.split('x')
-
-        # Bouw filter voor timestamp overlay
-        if show_timestamp:
-            filter_complex = (
-                f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
-                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black,"
-                f"drawtext=fontfile=/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf:"
-                f"fontsize=28:fontcolor=white:x=10:y=h-50:"
-                f"text='%{{frame_num}}/{len(screenshots)}':start_number=1"
-            )
-        else:
-            filter_complex = (
-                f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
-                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black"
-            )
-
-        cmd = [
-            'ffmpeg', '-y',
-            '-framerate', str(fps),
-            '-i', input_pattern,
-            '-vf', filter_complex,
-            '-c:v', 'libx264',
-            '-preset', 'medium',
-            '-crf', '23',
-            '-pix_fmt', 'yuv420p',
-            str(output_path)
-        ]
-
-        print(f"Genereren timelapse ({fps} fps)...")
-        result = subprocess.run(cmd, capture_output=True, text=True)
-
-        if result.returncode != 0:
-            print(f"FFmpeg error: {result.stderr}")
-            return False
+    print(f"Genereren timelapse ({len(screenshots)} frames, {fps} fps)...")
+    counts = build_timelapse(
+        CATALOG_SOURCE, CATALOG_CAMERA, screenshots,
+        start_date or screenshots[0][0], end_date or screenshots[-1][0], output_path,
+        fps=fps, resolution=resolution, show_timestamp=show_timestamp,
+        time_filter=time_filter, fontsize=28, use_cache=use_cache
+    )
+    if not counts:
+        print("FFmpeg error: zie log voor details")
+        return False
 
+    print(f"Segmenten: {counts['cached']} uit cache, {counts['encoded']} nieuw, "
+          f"{counts['partial']} los gecodeerd")
     return True
 
 
@@ -279,7 +220,7 @@ def interactive_mode() -> int:
 
     if duration_choice == "Gewenste video duur opgeven (aanbevolen)":
         target_duration = input_number("Gewenste video duur in seconden", default=30, min_val=5, max_val=300)
-        fps = max(1, len(screenshots) // target_duration)
+        fps = fps_for_duration(len(screenshots), target_duration)
         actual_duration = len(screenshots) / fps
         print(f"  Berekende framerate: {fps} fps (video wordt {actual_duration:.1f} seconden)")
     else:
@@ -319,7 +260,10 @@ def interactive_mode() -> int:
         screenshots, output_path,
         fps=fps,
         resolution="1920x1080",
-        show_timestamp=True
+        show_timestamp=True,
+        start_date=start_date,
+        end_date=end_date,
+        time_filter='night' if night_only else 'day' if day_only else None
     )
 
     if success:
@@ -359,7 +303,9 @@ Voorbeelden:
     parser.add_argument('--night-only', action='store_true', help='Alleen nacht screenshots (22:00-06:00)')
     parser.add_argument('--day-only', action='store_true', help='Alleen dag screenshots (06:00-22:00)')
     parser.add_argument('--resolution', type=str, default='1920x1080', help='Video resolutie (default: 1920x1080)')
-    parser.add_argument('--no-timestamp', action='store_true', help='Geen timestamp overlay')
+    parser.add_argument('--no-timestamp', action='store_true', help='Geen dag/frame overlay')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Alle dagen opnieuw coderen, segment cache niet gebruiken')
     parser.add_argument('-o', '--output', type=str, help='Output bestandspad')
     parser.add_argument('--list', action='store_true', help='Toon beschikbare data en stop')
 
@@ -418,7 +364,7 @@ Voorbeelden:
 
     # Bepaal fps
     if args.duration:
-        fps = max(1, len(screenshots) // args.duration)
+        fps = fps_for_duration(len(screenshots), args.duration)
         print(f"Gewenste duur: {args.duration}s -> berekende fps: {fps}")
     elif args.fps:
         fps = args.fps
@@ -450,7 +396,11 @@ Voorbeelden:
         screenshots, output_path,
         fps=fps,
         resolution=args.resolution,
-        show_timestamp=not args.no_timestamp
+        show_timestamp=not args.no_timestamp,
+        start_date=start_date,
+        end_date=end_date,
+        time_filter='night' if args.night_only else 'day' if args.day_only else None,
+        use_cache=not args.no_cache
     )
 
     if success:
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+AtmosBird Meteor Scanner Benchmark
+==================================
+
+Compares per-pair differencing as atmosbird_analysis.py did it before the
+incremental analysis (cv2.imread of both full resolution frames for every
+consecutive pair, absdiff, contours) with meteor_scanner.scan_frames on
+one and on all CPU cores, over the same night of frames.
+
+Usage:
+    python benchmark_meteor_scanner.py --night 2026-01-05
+    python benchmark_meteor_scanner.py --dir /mnt/usb/atmosbird/ruwe_foto/2026/01/05 --limit 60
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from meteor_scanner import directory_frames, night_frames, scan_frames
+
+
+def pair_differencing(frames: list) -> int:
+    """Reference: both frames of every consecutive pair read from disk at full resolution"""
+    candidates = 0
+    for (_, previous_path), (_, current_path) in zip(frames, frames[1:]):
+        previous = cv2.imread(previous_path, cv2.IMREAD_GRAYSCALE)
+        current = cv2.imread(current_path, cv2.IMREAD_GRAYSCALE)
+        if previous is None or current is None or previous.shape != current.shape:
+            continue
+        _, diff = cv2.threshold(cv2.absdiff(current, previous), 30, 255, cv2.THRESH_BINARY)
+        contours, _ = cv2.findContours(diff, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for contour in contours:
+            if not 10 <= cv2.contourArea(contour) <= 1000:
+                continue
+            x, y, w, h = cv2.boundingRect(contour)
+            if max(w, h) / (min(w, h) + 1) > 3:
+                delta = float(np.mean(current[y:y + h, x:x + w]) - np.mean(previous[y:y + h, x:x + w]))
+                candidates += delta > 20
+    return candidates
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark meteor scanner vs per-pair differencing')
+    parser.add_argument('--night', type=date.fromisoformat, default=date.today() - timedelta(days=1),
+                        help='Evening date (default: yesterday)')
+    parser.add_argument('--dir', type=Path, help='Use sky_*.jpg below this directory instead of --night')
+    parser.add_argument('--limit', type=int, default=0, help='Max number of frames (0: all)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Workers for the parallel run')
+    args = parser.parse_args()
+
+    frames = directory_frames(args.dir) if args.dir else night_frames(args.night)
+    if args.limit:
+        frames = frames[:args.limit]
+    if len(frames) < 2:
+        print(f"Not enough frames for {args.dir or args.night}")
+        return 1
+
+    start = time.perf_counter()
+    pair_candidates = pair_differencing(frames)
+    pair_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, sequential = scan_frames(frames, workers=1)
+    sequential_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, parallel = scan_frames(frames, workers=args.workers)
+    parallel_seconds = time.perf_counter() - start
+
+    print(f"Frames:      {len(frames)}")
+    print(f"Pairwise:    {pair_seconds:.2f}s ({len(frames) / pair_seconds:.1f} frames/s), "
+          f"{pair_candidates} candidates")
+    print(f"Scanner x1:  {sequential_seconds:.2f}s ({len(frames) / sequential_seconds:.1f} frames/s), "
+          f"{len(sequential)} candidates, {pair_seconds / sequential_seconds:.1f}x")
+    print(f"Scanner x{args.workers}:  {parallel_seconds:.2f}s ({len(frames) / parallel_seconds:.1f} frames/s), "
+          f"{len(parallel)} candidates, {pair_seconds / parallel_seconds:.1f}x")
+    print(f"Parallel equals sequential: {parallel == sequential}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
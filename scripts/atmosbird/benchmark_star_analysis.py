@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+AtmosBird Star Analysis Benchmark
+=================================
+
+Runs the star analysis over a night of archived sky frames and compares
+the old implementation (np.percentile over the whole frame, masked copies
+for the statistics) with the histogram pyramid in atmosbird_analysis.py
+for several decode reductions and STAR_SEARCH_FACTOR values.
+
+Every combination runs in a fresh process, so the reported peak RSS is
+not inflated by earlier runs. Results are checked against the old
+implementation at the same reduction.
+
+Usage:
+    python benchmark_star_analysis.py                      # Last night (18:00 - 06:00)
+    python benchmark_star_analysis.py --night 2026-01-05 --reductions 1 4
+    python benchmark_star_analysis.py --dir /mnt/usb/atmosbird/ruwe_foto/2026/01/05 --factors 1 4 8
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from atmosbird_analysis import SkyAnalyzer
+
+# Decode reduction -> imread flag (4 is what load_frame uses)
+REDUCTIONS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+NIGHT_START_HOUR = 18
+NIGHT_END_HOUR = 6
+
+
+def legacy_stars(small, brightness_mean):
+    """Reference: analyze_stars before the histogram pyramid"""
+    if brightness_mean > 80:
+        return None
+    blurred = cv2.GaussianBlur(small, (5, 5), 0)
+    threshold = np.percentile(blurred, 99.5)
+    _, stars_mask = cv2.threshold(blurred, threshold, 255, cv2.THRESH_BINARY)
+    contours, _ = cv2.findContours(stars_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    star_count = len([c for c in contours if 1 <= cv2.contourArea(c) <= 50])
+    if star_count > 0:
+        star_pixels = blurred[stars_mask > 0]
+        avg_star_brightness, brightest_star = float(np.mean(star_pixels)), float(np.max(star_pixels))
+    else:
+        avg_star_brightness, brightest_star = 0, 0
+    background_mask = stars_mask == 0
+    if np.sum(background_mask) > 0:
+        sky_background = float(np.mean(blurred[background_mask]))
+    else:
+        sky_background = float(np.mean(blurred))
+    return {
+        'star_count': star_count,
+        'avg_star_brightness': avg_star_brightness,
+        'brightest_star': brightest_star,
+        'sky_background': sky_background,
+        'seeing_quality': float(100 - min(100, np.std(blurred))),
+    }
+
+
+def night_frames(night: date) -> list:
+    """Archived berging frames from `night` 18:00 until 06:00 the next morning"""
+    from core.image_catalog import find_images
+
+    start = datetime.combine(night, datetime.min.time()) + timedelta(hours=NIGHT_START_HOUR)
+    end = start + timedelta(hours=24 - NIGHT_START_HOUR + NIGHT_END_HOUR)
+    return [str(path) for _, path in find_images('atmosbird', 'berging', start, end)]
+
+
+def run_config(files: list, reduction: int, method: str) -> dict:
+    """Decode and analyze every frame once; meant to run in its own process"""
+    analyzer = SkyAnalyzer()
+    analyzer.log = lambda level, message: None
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    decode_seconds = analyze_seconds = 0.0
+    results = []
+    for path in files:
+        start = time.perf_counter()
+        frame = cv2.imread(path, REDUCTIONS[reduction])
+        decode_seconds += time.perf_counter() - start
+        if frame is None:
+            results.append(None)
+            continue
+
+        brightness = float(np.mean(frame))
+        start = time.perf_counter()
+        if method == 'legacy':
+            stars = legacy_stars(frame, brightness)
+        else:
+            stars = analyzer.analyze_stars(frame, brightness, search_factor=int(method[1:]))
+        analyze_seconds += time.perf_counter() - start
+        results.append(stars and [stars[key] for key in
+                                  ('star_count', 'avg_star_brightness', 'brightest_star',
+                                   'sky_background', 'seeing_quality')])
+
+    analyzed = sum(1 for r in results if r is not None)
+    return {
+        'reduction': reduction,
+        'method': method,
+        'frames': len(files),
+        'analyzed': analyzed,
+        'decode_ms_per_frame': 1000 * decode_seconds / len(files),
+        'analyze_ms_per_frame': 1000 * analyze_seconds / analyzed if analyzed else 0,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'baseline_rss_mb': baseline_rss,
+        'results': results,
+    }
+
+
+def mismatches(reference: list, results: list) -> int:
+    """Frames whose star count or statistics differ from the reference"""
+    count = 0
+    for a, b in zip(reference, results):
+        if (a is None) != (b is None):
+            count += 1
+        elif a is not None and (a[0] != b[0] or not np.allclose(a[1:], b[1:], atol=1e-6)):
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark AtmosBird star analysis (time and peak RSS)')
+    parser.add_argument('--night', type=date.fromisoformat,
+                        default=date.today() - timedelta(days=1), help='Evening date (default: yesterday)')
+    parser.add_argument('--dir', type=Path, help='Use all JPEGs in this directory instead of --night')
+    parser.add_argument('--limit', type=int, default=0, help='Max number of frames (0: all)')
+    parser.add_argument('--reductions', type=int, nargs='+', choices=list(REDUCTIONS), default=[1, 4],
+                        help='Decode reductions to measure (default: 1 4)')
+    parser.add_argument('--factors', type=int, nargs='+', default=[1, 2, 4],
+                        help='STAR_SEARCH_FACTOR values to measure (default: 1 2 4)')
+    parser.add_argument('--run', nargs=2, metavar=('REDUCTION', 'METHOD'),
+                        help='Measure one combination and print JSON (used internally)')
+    parser.add_argument('--files', type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        files = args.files.read_text().splitlines()
+        print(json.dumps(run_config(files, int(args.run[0]), args.run[1])))
+        return 0
+
+    files = sorted(str(p) for p in args.dir.rglob('*.jpg')) if args.dir else night_frames(args.night)
+    if args.limit:
+        files = files[:args.limit]
+    if not files:
+        print(f"No frames found for {args.dir or args.night}")
+        return 1
+
+    list_path = Path(f"/tmp/star_benchmark_{time.time_ns()}.txt")
+    list_path.write_text("\n".join(files))
+    print(f"Frames: {len(files)}")
+    print(f"{'Decode':<7} {'Method':<7} {'Decode/frame':>13} {'Stars/frame':>12} {'Peak RSS':>10} {'Mismatches':>11}")
+    try:
+        for reduction in args.reductions:
+            reference = None
+            for method in ['legacy'] + [f"f{factor}" for factor in args.factors]:
+                proc = subprocess.run(
+                    [sys.executable, __file__, '--run', str(reduction), method, '--files', str(list_path)],
+                    capture_output=True, text=True
+                )
+                if proc.returncode != 0:
+                    print(f"1/{reduction:<5} {method:<7} failed\n{proc.stderr.strip()[-500:]}")
+                    continue
+                r = json.loads(proc.stdout.strip().splitlines()[-1])
+                if method == 'legacy':
+                    reference = r['results']
+                diff = '-' if reference is None else mismatches(reference, r['results'])
+                print(f"1/{reduction:<5} {method:<7} {r['decode_ms_per_frame']:>11.1f}ms "
+                      f"{r['analyze_ms_per_frame']:>10.1f}ms {r['peak_rss_mb']:>8.0f}MB {diff:>11}")
+    finally:
+        list_path.unlink(missing_ok=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -82,18 +82,22 @@ class CloudClassifierONNX:
 
         logger.info(f"Cloud classifier geladen: {self.model_path}")
 
-    def preprocess(self, image_path: Union[str, Path]) -> np.ndarray:
+    def preprocess(self, image: Union[str, Path, np.ndarray]) -> np.ndarray:
         """
         Preprocess beeld voor model input.
 
         Args:
-            image_path: Pad naar het beeld
+            image: Pad naar het beeld, of een al gedecodeerd RGB frame
+                   (uint8 [H, W, 3]) zodat het niet opnieuw van schijf komt
 
         Returns:
             Numpy array met shape [1, 3, 224, 224]
         """
         # Laad en resize
-        img = Image.open(image_path).convert('RGB')
+        if isinstance(image, np.ndarray):
+            img = Image.fromarray(image)
+        else:
+            img = Image.open(image).convert('RGB')
         img = img.resize((self.IMAGE_SIZE, self.IMAGE_SIZE), Image.BILINEAR)
 
         # Naar numpy array [H, W, C] -> [C, H, W]
@@ -104,12 +108,12 @@ class CloudClassifierONNX:
         # Voeg batch dimensie toe [1, C, H, W]
         return np.expand_dims(img_array, 0)
 
-    def predict(self, image_path: Union[str, Path]) -> Dict:
+    def predict(self, image: Union[str, Path, np.ndarray]) -> Dict:
         """
         Voorspel bewolkingsklasse en percentage.
 
         Args:
-            image_path: Pad naar het hemelbeeld
+            image: Pad naar het hemelbeeld of gedecodeerd RGB frame
 
         Returns:
             dict met:
@@ -120,7 +124,7 @@ class CloudClassifierONNX:
                 - confidence: hoogste waarschijnlijkheid
         """
         # Preprocess
-        input_tensor = self.preprocess(image_path)
+        input_tensor = self.preprocess(image)
 
         # Inference
         outputs = self.session.run(None, {self.input_name: input_tensor})
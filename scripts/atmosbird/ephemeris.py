@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+AtmosBird Ephemeris Cache
+
+Precomputes ISS, sun and moon positions for the berging camera on a fixed
+time grid (GRID_STEP_SECONDS, HORIZON_HOURS ahead) and keeps them as NumPy
+arrays in a small .npz cache. atmosbird_analysis.py looks observations up
+by interpolation instead of running PyEphem per observation.
+
+The cache is rebuilt when the ISS TLE changes (iss_tle.txt, refreshed daily
+by atmosbird-tle-update.timer via --update-tle), when the observer location
+changes or when a lookup falls outside the grid.
+Because the ISS track is on the grid anyway, upcoming visible passes come
+for free (--passes, for the Ulanzi display and reports).
+
+Usage:
+    python ephemeris.py --update-tle          # Fetch the current ISS TLE (Celestrak)
+    python ephemeris.py --passes              # Visible ISS passes in the next 48 h
+    python ephemeris.py --passes --json
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import ephem
+import numpy as np
+
+GRID_STEP_SECONDS = 10  # ISS altitude interpolation error < 0.5° (30 s: ~2°)
+HORIZON_HOURS = 48
+
+CACHE_PATH = Path("/mnt/usb/atmosbird/ephemeris_cache.npz")
+TLE_PATH = Path("/mnt/usb/atmosbird/iss_tle.txt")
+TLE_URL = "https://celestrak.org/NORAD/elements/gp.php?CATNR=25544&FORMAT=TLE"
+
+# Fallback when iss_tle.txt is missing (Celestrak, 2025-12-22)
+DEFAULT_TLE = (
+    "ISS (ZARYA)",
+    "1 25544U 98067A   25355.95645853  .00010990  00000+0  20227-3 0  9999",
+    "2 25544  51.6324  96.8363 0003164 283.4657  76.5979 15.49714244544284",
+)
+
+# Visible ISS pass for the zenith camera: high enough for the FOV, sun below nautical twilight
+PASS_MIN_ALTITUDE = 30.0
+DARK_SUN_ALTITUDE = -6.0
+
+FIELDS = ('iss_alt', 'iss_az', 'sun_alt', 'moon_alt', 'moon_az', 'moon_phase')
+
+
+def load_tle(path: Path = TLE_PATH) -> Tuple[str, str, str]:
+    """ISS TLE from iss_tle.txt (name, line 1, line 2), or DEFAULT_TLE"""
+    try:
+        lines = [line.rstrip() for line in path.read_text().splitlines() if line.strip()]
+        if len(lines) >= 3 and lines[1].startswith('1 ') and lines[2].startswith('2 '):
+            return lines[0], lines[1], lines[2]
+    except OSError:
+        pass
+    return DEFAULT_TLE
+
+
+def update_tle(path: Path = TLE_PATH, timeout: int = 30) -> bool:
+    """Fetch the current ISS TLE; the next lookup rebuilds the cache if it changed"""
+    import requests
+
+    response = requests.get(TLE_URL, timeout=timeout)
+    response.raise_for_status()
+    lines = [line.rstrip() for line in response.text.splitlines() if line.strip()]
+    if len(lines) < 3 or not lines[1].startswith('1 ') or not lines[2].startswith('2 '):
+        raise ValueError(f"Unexpected TLE response: {response.text[:200]!r}")
+
+    changed = load_tle(path) != tuple(lines[:3])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(lines[:3]) + "\n")
+    return changed
+
+
+def to_epoch(times) -> np.ndarray:
+    """Naive local datetimes (as stored by atmosbird_capture) to UTC epoch seconds"""
+    return np.array([t.timestamp() for t in times], dtype=np.float64)
+
+
+def cache_key(tle: Sequence[str], lat: float, lon: float, elevation: float) -> str:
+    """Identifies the inputs of a grid; a different key means rebuild"""
+    text = "|".join([*tle, f"{lat:.6f}", f"{lon:.6f}", f"{elevation:.1f}", str(GRID_STEP_SECONDS)])
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+class Ephemeris:
+    """
+    ISS, sun and moon positions on a regular time grid
+
+    Arrays (degrees, moon_phase in % illuminated) are indexed like
+    `epochs`, UTC seconds from `start` in steps of `step`.
+    """
+
+    def __init__(self, key: str, start: float, step: float, arrays: Dict[str, np.ndarray],
+                 new_moons: np.ndarray):
+        self.key = key
+        self.start = start
+        self.step = step
+        self.arrays = arrays
+        self.new_moons = new_moons
+        self.epochs = start + step * np.arange(len(arrays['sun_alt']))
+
+    @classmethod
+    def compute(cls, start: datetime, hours: float, tle: Sequence[str], lat: float, lon: float,
+                elevation: float, step: float = GRID_STEP_SECONDS) -> 'Ephemeris':
+        """Run PyEphem once per grid point from `start` (naive local time) for `hours`"""
+        first = np.floor(start.timestamp() / step) * step
+        count = int(np.ceil(hours * 3600 / step)) + 1
+
+        observer = ephem.Observer()
+        observer.lat = str(lat)
+        observer.lon = str(lon)
+        observer.elevation = elevation
+        iss = ephem.readtle(*tle)
+        sun = ephem.Sun()
+        moon = ephem.Moon()
+
+        values = np.empty((len(FIELDS), count))
+        for i in range(count):
+            observer.date = ephem.Date(datetime.fromtimestamp(first + i * step, timezone.utc).replace(tzinfo=None))
+            iss.compute(observer)
+            sun.compute(observer)
+            moon.compute(observer)
+            values[:, i] = (iss.alt, iss.az, sun.alt, moon.alt, moon.az, moon.phase)
+        values[:5] = np.degrees(values[:5])
+
+        # New moons around the grid, for the moon age
+        last = first + (count - 1) * step
+        new_moons = [ephem.previous_new_moon(ephem.Date(datetime.fromtimestamp(first, timezone.utc)
+                                                        .replace(tzinfo=None)))]
+        while True:
+            following = ephem.next_new_moon(new_moons[-1])
+            new_moons.append(following)
+            if following.datetime().replace(tzinfo=timezone.utc).timestamp() > last:
+                break
+        moon_epochs = np.array([m.datetime().replace(tzinfo=timezone.utc).timestamp() for m in new_moons])
+
+        return cls(cache_key(tle, lat, lon, elevation), first, step,
+                   dict(zip(FIELDS, values)), moon_epochs)
+
+    @classmethod
+    def load(cls, path: Path = CACHE_PATH) -> Optional['Ephemeris']:
+        """Cached grid, or None when missing or unreadable"""
+        try:
+            with np.load(path) as data:
+                return cls(str(data['key']), float(data['start']), float(data['step']),
+                           {field: data[field] for field in FIELDS}, data['new_moons'])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save(self, path: Path = CACHE_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.stem + '.tmp.npz')
+        np.savez(tmp, key=self.key, start=self.start, step=self.step,
+                 new_moons=self.new_moons, **self.arrays)
+        tmp.replace(path)
+
+    def covers(self, epochs: np.ndarray) -> bool:
+        return bool(len(epochs)) and epochs.min() >= self.epochs[0] and epochs.max() <= self.epochs[-1]
+
+    def at(self, epochs: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Interpolated positions for UTC epoch seconds (all within the grid)
+
+        Azimuths are unwrapped before interpolating, so 359° -> 1° does not
+        pass through 180°.
+        """
+        result = {}
+        for field, values in self.arrays.items():
+            if field.endswith('_az'):
+                unwrapped = np.degrees(np.unwrap(np.radians(values)))
+                result[field] = np.interp(epochs, self.epochs, unwrapped) % 360.0
+            else:
+                result[field] = np.interp(epochs, self.epochs, values)
+        previous_new = self.new_moons[np.searchsorted(self.new_moons, epochs, side='right') - 1]
+        result['moon_age_days'] = (epochs - previous_new) / 86400.0
+        return result
+
+    def iss_passes(self, min_altitude: float = PASS_MIN_ALTITUDE,
+                   max_sun_altitude: float = DARK_SUN_ALTITUDE) -> List[Dict]:
+        """
+        Visible ISS passes on the grid: ISS above min_altitude while the sun
+        is below max_sun_altitude. Times are naive local datetimes.
+        """
+        visible = (self.arrays['iss_alt'] >= min_altitude) & (self.arrays['sun_alt'] < max_sun_altitude)
+        edges = np.diff(visible.astype(np.int8), prepend=0, append=0)
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+
+        passes = []
+        for first, last in zip(starts, ends):
+            peak = first + int(np.argmax(self.arrays['iss_alt'][first:last + 1]))
+            passes.append({
+                'start': datetime.fromtimestamp(self.epochs[first]),
+                'end': datetime.fromtimestamp(self.epochs[last]),
+                'max_time': datetime.fromtimestamp(self.epochs[peak]),
+                'max_altitude': float(self.arrays['iss_alt'][peak]),
+                'azimuth_at_max': float(self.arrays['iss_az'][peak]),
+            })
+        return passes
+
+
+def get_ephemeris(epochs: np.ndarray, lat: float, lon: float, elevation: float,
+                  path: Path = CACHE_PATH, current: Optional[Ephemeris] = None) -> Ephemeris:
+    """
+    Ephemeris covering `epochs`: `current` or the cached grid if it still
+    matches TLE and location, otherwise a new grid (saved to `path`)
+    """
+    tle = load_tle()
+    key = cache_key(tle, lat, lon, elevation)
+    for candidate in (current, Ephemeris.load(path) if current is None else None):
+        if candidate is not None and candidate.key == key and candidate.covers(epochs):
+            return candidate
+
+    start = datetime.fromtimestamp(epochs.min() - GRID_STEP_SECONDS)
+    hours = max(HORIZON_HOURS, (epochs.max() - epochs.min()) / 3600 + 1)
+    grid = Ephemeris.compute(start, hours, tle, lat, lon, elevation)
+    try:
+        grid.save(path)
+    except OSError:
+        pass  # Still usable in memory; next run recomputes
+    return grid
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='AtmosBird ephemeris cache')
+    parser.add_argument('--update-tle', action='store_true', help='Fetch the current ISS TLE')
+    parser.add_argument('--passes', action='store_true', help='List visible ISS passes')
+    parser.add_argument('--json', action='store_true', help='With --passes: JSON output')
+    args = parser.parse_args()
+
+    if args.update_tle:
+        changed = update_tle()
+        print(f"ISS TLE {'updated' if changed else 'unchanged'}: {TLE_PATH}")
+
+    if args.passes:
+        # Only here: atmosbird_analysis needs the database config, --update-tle does not
+        sys.path.insert(0, str(Path(__file__).parent))
+        from atmosbird_analysis import LOCATION_ELEVATION, LOCATION_LAT, LOCATION_LON
+
+        now = to_epoch([datetime.now()])
+        grid = get_ephemeris(now + np.array([0.0, HORIZON_HOURS * 3600 - GRID_STEP_SECONDS]),
+                             LOCATION_LAT, LOCATION_LON, LOCATION_ELEVATION)
+        passes = [p for p in grid.iss_passes() if p['end'] >= datetime.now()]
+        if args.json:
+            print(json.dumps(passes, default=lambda d: d.isoformat(timespec='seconds'), indent=2))
+        else:
+            for p in passes:
+                print(f"{p['start']:%a %d-%m %H:%M:%S} - {p['end']:%H:%M:%S}  "
+                      f"max {p['max_altitude']:.0f}° at {p['max_time']:%H:%M:%S}, az {p['azimuth_at_max']:.0f}°")
+            if not passes:
+                print(f"No visible ISS passes in the next {HORIZON_HOURS} h")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+AtmosBird Nightly Meteor Scanner
+================================
+
+Scans all frames of one night (18:00 - 06:00) in time order for meteors,
+as a complement to the pairwise differencing in atmosbird_analysis.py.
+
+- Each frame is decoded once at 1/4 scale (JPEG decoder downscaling)
+- The background is the rolling median of the last BACKGROUND_FRAMES dark
+  frames, kept in a small preallocated NumPy ring buffer; a gap, a bright
+  or an unreadable frame restarts the background
+- Transients are pixels clearly brighter than the background; elongated
+  blobs (minAreaRect, so diagonal streaks count too) with a real
+  brightness increase are meteor candidates
+- The night is split into chunks that are scanned in a process pool; every
+  chunk starts BACKGROUND_FRAMES frames early to rebuild the background, so
+  the result equals one sequential pass
+- Candidates are cropped from the full resolution frame and written with
+  a summary.json to DETECTION_DIR/<night>/
+
+Usage:
+    python meteor_scanner.py                          # Last night
+    python meteor_scanner.py --night 2026-01-05 --workers 4
+    python meteor_scanner.py --dir /mnt/usb/atmosbird/ruwe_foto/2026/01/05 --output /tmp/meteors
+
+Draait via systemd timer (atmosbird-meteor-scan.timer, dagelijks 07:00)
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.image_catalog import find_images, parse_timestamp
+from core.logging import get_logger
+
+logger = get_logger('atmosbird_meteor_scan')
+
+DETECTION_DIR = Path("/mnt/usb/atmosbird/detecties/meteoren")
+
+NIGHT_START_HOUR = 18
+NIGHT_END_HOUR = 6
+
+# Same 1/4 grayscale decode as SkyAnalyzer.load_frame
+DECODE_FLAG = cv2.IMREAD_REDUCED_GRAYSCALE_4
+DECODE_SCALE = 4
+
+# Rolling median background
+BACKGROUND_FRAMES = 5
+MIN_BACKGROUND_FRAMES = 3
+MAX_FRAME_GAP = timedelta(minutes=20)
+DARK_BRIGHTNESS = 100  # Mean brightness above this: no meteor scan
+
+# Transient criteria (decoded 1/4 scale pixels)
+DIFF_THRESHOLD = 30
+MIN_AREA = 10
+MAX_AREA = 1000
+MIN_ELONGATION = 3.0
+MIN_BRIGHTNESS_DELTA = 20.0
+MIN_CONFIDENCE = 50.0
+
+# Parallel scan
+CHUNK_FRAMES = 24
+CROP_MARGIN = 64  # Full resolution pixels around a candidate
+
+
+class RollingBackground:
+    """Median of the last `size` frames, kept in a preallocated ring buffer"""
+
+    def __init__(self, shape: Tuple[int, int], size: int = BACKGROUND_FRAMES):
+        self.buffer = np.empty((size, *shape), dtype=np.uint8)
+        self.count = 0
+        self.position = 0
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.buffer.shape[1:]
+
+    def reset(self) -> None:
+        self.count = 0
+        self.position = 0
+
+    def push(self, frame: np.ndarray) -> None:
+        self.buffer[self.position] = frame
+        self.position = (self.position + 1) % len(self.buffer)
+        self.count = min(self.count + 1, len(self.buffer))
+
+    def median(self) -> np.ndarray:
+        """
+        Per-pixel median (upper median for an even count), uint8
+
+        Partial bubble sort with cv2.min/cv2.max compare-exchanges until the
+        middle frame is in place; for a handful of frames this is an order of
+        magnitude faster than np.partition along the frame axis.
+        """
+        frames = [self.buffer[i] for i in range(self.count)]
+        middle = self.count // 2
+        for i in range(middle + 1):
+            for j in range(self.count - 1, i, -1):
+                frames[j - 1], frames[j] = cv2.min(frames[j - 1], frames[j]), cv2.max(frames[j - 1], frames[j])
+        return frames[middle]
+
+
+def detect_transients(frame: np.ndarray, background: np.ndarray) -> List[Dict]:
+    """
+    Elongated blobs that are clearly brighter than the background
+
+    Coordinates and lengths are in decoded (1/4 scale) pixels.
+    """
+    diff = cv2.subtract(frame, background)  # Saturates: only brightening counts
+    _, mask = cv2.threshold(diff, DIFF_THRESHOLD, 255, cv2.THRESH_BINARY)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    candidates = []
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        if area < MIN_AREA or area > MAX_AREA:
+            continue
+
+        _, (width, height), _ = cv2.minAreaRect(contour)
+        length = max(width, height)
+        elongation = length / (min(width, height) + 1)
+        if elongation <= MIN_ELONGATION:
+            continue
+
+        # Brightness increase inside the blob itself, not its bounding box
+        x, y, w, h = cv2.boundingRect(contour)
+        blob = np.zeros((h, w), dtype=np.uint8)
+        cv2.drawContours(blob, [contour - (x, y)], -1, 255, -1)
+        delta = (cv2.mean(frame[y:y + h, x:x + w], blob)[0]
+                 - cv2.mean(background[y:y + h, x:x + w], blob)[0])
+        if delta <= MIN_BRIGHTNESS_DELTA:
+            continue
+
+        confidence = min(100.0, delta * elongation / 10)
+        if confidence < MIN_CONFIDENCE:
+            continue
+
+        candidates.append({
+            'bbox': (x, y, w, h),
+            'streak_length': float(length),
+            'brightness_delta': float(delta),
+            'confidence': float(confidence),
+        })
+    return candidates
+
+
+def scan_chunk(task: Tuple[Sequence[Tuple[datetime, str]], int]) -> Tuple[Dict, List[Dict]]:
+    """
+    Scan frames in order; the first `warmup` frames only build the background
+
+    Every frame that is not added to the background (unreadable, bright,
+    after a gap) restarts it, so the background at any frame only depends on
+    the BACKGROUND_FRAMES frames before it and chunks can run independently.
+    """
+    frames, warmup = task
+    stats = {'scanned': 0, 'unreadable': 0, 'bright': 0}
+    candidates = []
+    background: Optional[RollingBackground] = None
+    previous_time = None
+
+    for index, (taken_at, path) in enumerate(frames):
+        counted = index >= warmup
+        frame = cv2.imread(path, DECODE_FLAG)
+        if frame is None:
+            stats['unreadable'] += counted
+            if background is not None:
+                background.reset()
+            continue
+
+        if cv2.mean(frame)[0] > DARK_BRIGHTNESS:
+            stats['bright'] += counted
+            if background is not None:
+                background.reset()
+            continue
+
+        if background is None or background.shape != frame.shape:
+            background = RollingBackground(frame.shape)
+        elif previous_time is not None and taken_at - previous_time > MAX_FRAME_GAP:
+            background.reset()
+        previous_time = taken_at
+
+        if counted:
+            stats['scanned'] += 1
+            if background.count >= MIN_BACKGROUND_FRAMES:
+                for candidate in detect_transients(frame, background.median()):
+                    candidates.append({'time': taken_at, 'path': path, **candidate})
+
+        background.push(frame)
+
+    return stats, candidates
+
+
+def make_chunks(frames: Sequence[Tuple[datetime, str]], chunk_frames: int = CHUNK_FRAMES,
+                overlap: int = BACKGROUND_FRAMES) -> List[Tuple[Sequence[Tuple[datetime, str]], int]]:
+    """(frames, warmup) tasks; each chunk starts `overlap` frames early"""
+    tasks = []
+    for start in range(0, len(frames), chunk_frames):
+        first = max(0, start - overlap)
+        tasks.append((frames[first:start + chunk_frames], start - first))
+    return tasks
+
+
+def scan_frames(frames: Sequence[Tuple[datetime, str]], workers: Optional[int] = None,
+                chunk_frames: int = CHUNK_FRAMES) -> Tuple[Dict, List[Dict]]:
+    """Scan time ordered (timestamp, path) frames; workers=1 scans in-process"""
+    tasks = make_chunks(frames, chunk_frames)
+    workers = min(workers or os.cpu_count() or 1, len(tasks)) or 1
+
+    if workers == 1:
+        results = list(map(scan_chunk, tasks))
+    else:
+        with Pool(processes=workers) as pool:
+            results = pool.map(scan_chunk, tasks)
+
+    stats = {'frames': len(frames), 'scanned': 0, 'unreadable': 0, 'bright': 0}
+    candidates = []
+    for chunk_stats, chunk_candidates in results:
+        for key, value in chunk_stats.items():
+            stats[key] += value
+        candidates.extend(chunk_candidates)
+    return stats, candidates
+
+
+def save_crops(candidates: List[Dict], output_dir: Path) -> None:
+    """Crop every candidate from its full resolution frame (decoded once per frame)"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    by_path: Dict[str, List[Dict]] = {}
+    for candidate in candidates:
+        by_path.setdefault(candidate['path'], []).append(candidate)
+
+    for path, found in by_path.items():
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            continue
+        height, width = image.shape[:2]
+        for number, candidate in enumerate(found, 1):
+            x, y, w, h = (value * DECODE_SCALE for value in candidate['bbox'])
+            x0, y0 = max(0, x - CROP_MARGIN), max(0, y - CROP_MARGIN)
+            x1, y1 = min(width, x + w + CROP_MARGIN), min(height, y + h + CROP_MARGIN)
+            crop_path = output_dir / f"{Path(path).stem}_{number}.jpg"
+            cv2.imwrite(str(crop_path), image[y0:y1, x0:x1])
+            candidate['crop'] = str(crop_path)
+
+
+def night_frames(night: date) -> List[Tuple[datetime, str]]:
+    """Archived berging frames from `night` 18:00 until 06:00 the next morning"""
+    start = datetime.combine(night, datetime.min.time()) + timedelta(hours=NIGHT_START_HOUR)
+    end = start + timedelta(hours=24 - NIGHT_START_HOUR + NIGHT_END_HOUR)
+    return [(taken_at, str(path)) for taken_at, path in find_images('atmosbird', 'berging', start, end)]
+
+
+def directory_frames(directory: Path) -> List[Tuple[datetime, str]]:
+    """sky_*.jpg frames below a directory, in time order"""
+    frames = []
+    for path in directory.rglob('sky_*.jpg'):
+        taken_at = parse_timestamp(path.name, 'sky')
+        if taken_at:
+            frames.append((taken_at, str(path)))
+    return sorted(frames)
+
+
+def write_summary(output_dir: Path, label: str, stats: Dict, candidates: List[Dict]) -> Path:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    summary = {
+        'night': label,
+        **stats,
+        'candidates': [
+            {**c, 'time': c['time'].isoformat(timespec='seconds'),
+             'bbox': [value * DECODE_SCALE for value in c['bbox']],
+             'streak_length': round(c['streak_length'] * DECODE_SCALE, 1),
+             'brightness_delta': round(c['brightness_delta'], 1),
+             'confidence': round(c['confidence'], 1)}
+            for c in candidates
+        ],
+    }
+    path = output_dir / 'summary.json'
+    path.write_text(json.dumps(summary, indent=2))
+    return path
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='AtmosBird nightly meteor scan')
+    parser.add_argument('--night', type=date.fromisoformat, default=date.today() - timedelta(days=1),
+                        help='Evening date (default: yesterday)')
+    parser.add_argument('--dir', type=Path, help='Scan sky_*.jpg below this directory instead of --night')
+    parser.add_argument('--output', type=Path, help=f'Output directory (default: {DETECTION_DIR}/<night>)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-frames', type=int, default=CHUNK_FRAMES, help='Frames per chunk')
+    args = parser.parse_args()
+
+    label = args.dir.name if args.dir else args.night.isoformat()
+    frames = directory_frames(args.dir) if args.dir else night_frames(args.night)
+    if not frames:
+        logger.warning(f"No frames found for {label}")
+        return 0
+
+    start = time.monotonic()
+    stats, candidates = scan_frames(frames, args.workers, args.chunk_frames)
+    stats['elapsed'] = round(time.monotonic() - start, 2)
+    stats['frames_per_sec'] = round(stats['frames'] / stats['elapsed'], 1) if stats['elapsed'] else 0.0
+
+    output_dir = args.output or DETECTION_DIR / label
+    if candidates:
+        save_crops(candidates, output_dir)
+    summary = write_summary(output_dir, label, stats, candidates)
+
+    logger.info(f"Meteor scan {label}: {stats['frames']} frames ({stats['scanned']} dark), "
+                f"{len(candidates)} candidate(s), {stats['elapsed']}s "
+                f"({stats['frames_per_sec']} frames/sec) -> {summary}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
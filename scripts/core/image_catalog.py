@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+EMSN 2.0 - Image Catalog
+
+Index van camerabeelden op de NAS (tabel image_catalog, migratie 023):
+één rij per beeld met bron, camera, opnametijd, pad en grootte.
+Vervangt de rglob scans over de complete screenshot bomen in de
+timelapse generators, de nestkast detectors en de nestkast cleanup.
+
+Gevuld op twee manieren:
+- Bij capture: het pad van een nieuw beeld wordt direct geregistreerd
+  (nestbox_screenshot.sh, atmosbird_archive_sync.py)
+- Reconciler: scripts/maintenance/image_catalog_sync.py vergelijkt de
+  dag-mappen (JJJJ/MM/DD) van de laatste dagen met de catalogus en
+  herstelt gemiste of verwijderde beelden
+
+Gebruik:
+    from scripts.core.image_catalog import ImageCatalog, CatalogError
+
+    with ImageCatalog() as catalog:
+        frames = catalog.images('nestbox', 'midden', start, end)
+        latest = catalog.latest('nestbox', 'midden')
+        first, last = catalog.date_range('atmosbird', 'berging')
+
+    # Of met terugval op de dag-mappen als de database niet bereikbaar is
+    frames = find_images('nestbox', 'midden', start, end)
+    latest = find_latest('nestbox', 'midden')
+"""
+
+import logging
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from .config import get_postgres_config
+
+
+NAS_ARCHIVE = Path('/mnt/nas-birdnet-archive')
+
+# Bron -> camera's; de mapstructuur per camera staat in camera_root()
+CATALOG_SOURCES: Dict[str, List[str]] = {
+    'atmosbird': ['berging'],
+    'nestbox': ['voor', 'midden', 'achter'],
+}
+
+# Bestandsnaam prefix per bron (None = elke prefix, zoals midden_20260108_200012.jpg)
+FILENAME_PREFIX: Dict[str, Optional[str]] = {
+    'atmosbird': 'sky',
+    'nestbox': None,
+}
+
+IMAGE_SUFFIX = '.jpg'
+RECONCILE_DAYS = 2  # Standaard aantal dag-mappen dat de reconciler nakijkt
+BATCH_SIZE = 1000
+
+IMAGES_SQL = """
+    SELECT taken_at, path
+    FROM image_catalog
+    WHERE source = %s AND camera = %s
+      AND taken_at >= %s AND taken_at <= %s
+    ORDER BY taken_at
+"""
+
+LATEST_SQL = """
+    SELECT taken_at, path
+    FROM image_catalog
+    WHERE source = %s AND camera = %s
+    ORDER BY taken_at DESC
+    LIMIT 1
+"""
+
+DATE_RANGE_SQL = """
+    SELECT MIN(taken_at), MAX(taken_at)
+    FROM image_catalog
+    WHERE source = %s AND camera = %s
+"""
+
+COUNT_SQL = "SELECT COUNT(*) FROM image_catalog WHERE source = %s AND camera = %s"
+
+SIZES_SQL = """
+    SELECT path, size_bytes
+    FROM image_catalog
+    WHERE source = %s AND camera = %s
+      AND taken_at >= %s AND taken_at < %s
+"""
+
+UPSERT_SQL = """
+    INSERT INTO image_catalog (source, camera, taken_at, path, size_bytes)
+    VALUES %s
+    ON CONFLICT (path) DO UPDATE SET
+        taken_at = EXCLUDED.taken_at,
+        size_bytes = EXCLUDED.size_bytes,
+        cataloged_at = NOW()
+"""
+
+DELETE_SQL = "DELETE FROM image_catalog WHERE path = ANY(%s)"
+
+_logger = logging.getLogger(__name__)
+
+
+class CatalogError(Exception):
+    """Catalogus niet bereikbaar of query mislukt."""
+
+
+def camera_root(source: str, camera: str) -> Path:
+    """Map met de dag-mappen (JJJJ/MM/DD) van een camera."""
+    if source == 'atmosbird':
+        return NAS_ARCHIVE / 'atmosbird' / 'ruwe_foto'
+    if source == 'nestbox':
+        return NAS_ARCHIVE / 'nestbox' / camera / 'screenshots'
+    raise ValueError(f"Onbekende bron: {source}")
+
+
+def media_path(source: str, path) -> Path:
+    """
+    Absoluut pad van een beeld zoals de reconciler het registreert.
+
+    Relatieve paden (nestbox_media.file_path uit de capture API, zoals
+    midden/screenshots/2026/01/08/midden_20260108_200012.jpg) zijn relatief
+    aan de media map van de bron op de NAS.
+    """
+    path = Path(path)
+    if path.is_absolute():
+        return path
+    if source not in CATALOG_SOURCES:
+        raise ValueError(f"Onbekende bron: {source}")
+    return NAS_ARCHIVE / source / path
+
+
+def parse_timestamp(name: str, prefix: Optional[str] = None) -> Optional[datetime]:
+    """
+    Opnametijd uit een bestandsnaam als <prefix>_JJJJMMDD_UUMMSS.jpg.
+
+    Returns:
+        datetime, of None als de naam niet aan het patroon voldoet
+    """
+    parts = Path(name).stem.split('_')
+    if len(parts) < 3 or (prefix is not None and parts[0] != prefix):
+        return None
+    try:
+        return datetime.strptime(f"{parts[1]}_{parts[2]}", "%Y%m%d_%H%M%S")
+    except ValueError:
+        return None
+
+
+def day_dirs(root: Path, start: date, end: date) -> Iterator[Path]:
+    """Dag-mappen root/JJJJ/MM/DD van start t/m end."""
+    day = start
+    while day <= end:
+        yield root / f"{day:%Y}" / f"{day:%m}" / f"{day:%d}"
+        day += timedelta(days=1)
+
+
+def scan_images(root: Path, prefix: Optional[str] = None,
+                start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, Tuple[datetime, int]]:
+    """
+    Scan beelden op schijf.
+
+    Met start/end worden alleen de dag-mappen in die periode gelezen,
+    zonder start/end de hele boom.
+
+    Returns:
+        Dict pad -> (opnametijd, grootte in bytes)
+    """
+    if start is not None and end is not None:
+        dirs = [d for d in day_dirs(root, start, end) if d.is_dir()]
+    else:
+        dirs = [Path(dirpath) for dirpath, _, _ in os.walk(root)]
+
+    images = {}
+    for directory in dirs:
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if not entry.name.endswith(IMAGE_SUFFIX) or not entry.is_file():
+                continue
+            taken_at = parse_timestamp(entry.name, prefix)
+            if taken_at is None:
+                continue
+            try:
+                images[entry.path] = (taken_at, entry.stat().st_size)
+            except OSError:
+                continue
+    return images
+
+
+class ImageCatalog:
+    """
+    Lees- en schrijftoegang tot de image_catalog tabel.
+
+    Args:
+        conn: Bestaande psycopg2 connectie (default: nieuwe via core.config)
+    """
+
+    def __init__(self, conn=None):
+        self.conn = conn
+        self._owns_conn = conn is None
+
+    def __enter__(self) -> 'ImageCatalog':
+        if self.conn is None:
+            try:
+                self.conn = psycopg2.connect(**get_postgres_config())
+            except (psycopg2.Error, ImportError, FileNotFoundError) as e:
+                raise CatalogError(f"Geen database connectie: {e}") from e
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._owns_conn and self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def _fetch(self, sql: str, params: tuple, one: bool = False):
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute(sql, params)
+                return cur.fetchone() if one else cur.fetchall()
+        except psycopg2.Error as e:
+            self.conn.rollback()
+            raise CatalogError(f"Catalogus query mislukt: {e}") from e
+
+    def images(self, source: str, camera: str, start: datetime, end: datetime) -> List[Tuple[datetime, Path]]:
+        """Beelden met start <= opnametijd <= end, gesorteerd op tijd."""
+        rows = self._fetch(IMAGES_SQL, (source, camera, start, end))
+        return [(taken_at, Path(path)) for taken_at, path in rows]
+
+    def latest(self, source: str, camera: str) -> Optional[Tuple[datetime, Path]]:
+        """Nieuwste beeld van een camera, of None."""
+        row = self._fetch(LATEST_SQL, (source, camera), one=True)
+        return (row[0], Path(row[1])) if row else None
+
+    def date_range(self, source: str, camera: str) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """Opnametijd van het eerste en laatste beeld, of (None, None)."""
+        row = self._fetch(DATE_RANGE_SQL, (source, camera), one=True)
+        return (row[0], row[1]) if row else (None, None)
+
+    def count(self, source: str, camera: str) -> int:
+        """Aantal beelden van een camera."""
+        return self._fetch(COUNT_SQL, (source, camera), one=True)[0]
+
+    def add(self, source: str, camera: str, path, taken_at: Optional[datetime] = None,
+            size: Optional[int] = None) -> None:
+        """Registreer één (nieuw) beeld; opnametijd en grootte worden anders afgeleid."""
+        path = media_path(source, path)
+        if taken_at is None:
+            taken_at = parse_timestamp(path.name, FILENAME_PREFIX.get(source))
+            if taken_at is None:
+                raise ValueError(f"Geen opnametijd in bestandsnaam: {path.name}")
+        if size is None:
+            size = path.stat().st_size
+        self.add_many(source, camera, {str(path): (taken_at, size)})
+
+    def add_many(self, source: str, camera: str, images: Dict[str, Tuple[datetime, int]]) -> int:
+        """Registreer beelden (pad -> (opnametijd, grootte)) in batches; commit."""
+        rows = [(source, camera, taken_at, path, size) for path, (taken_at, size) in images.items()]
+        try:
+            with self.conn.cursor() as cur:
+                for i in range(0, len(rows), BATCH_SIZE):
+                    execute_values(cur, UPSERT_SQL, rows[i:i + BATCH_SIZE])
+            self.conn.commit()
+        except psycopg2.Error as e:
+            self.conn.rollback()
+            raise CatalogError(f"Registreren mislukt: {e}") from e
+        return len(rows)
+
+    def remove(self, paths) -> int:
+        """Verwijder beelden uit de catalogus (na het verwijderen van de bestanden); commit."""
+        paths = [str(p) for p in paths]
+        if not paths:
+            return 0
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute(DELETE_SQL, (paths,))
+                removed = cur.rowcount
+            self.conn.commit()
+        except psycopg2.Error as e:
+            self.conn.rollback()
+            raise CatalogError(f"Verwijderen mislukt: {e}") from e
+        return removed
+
+    def reconcile(self, source: str, camera: str, days: Optional[int] = RECONCILE_DAYS,
+                  today: Optional[date] = None) -> Dict[str, int]:
+        """
+        Breng de catalogus in lijn met de schijf.
+
+        Leest alleen de dag-mappen van de laatste `days` dagen (days=None:
+        de hele boom). Ontbrekende of gewijzigde beelden worden geregistreerd,
+        catalogus rijen zonder bestand verwijderd.
+
+        Returns:
+            Dict met scanned, added, removed
+        """
+        root = camera_root(source, camera)
+        if days is None:
+            first, last = None, None
+            window = (datetime.min, datetime.max)
+        else:
+            last = today or date.today()
+            first = last - timedelta(days=days - 1)
+            window = (datetime.combine(first, datetime.min.time()),
+                      datetime.combine(last + timedelta(days=1), datetime.min.time()))
+
+        on_disk = scan_images(root, FILENAME_PREFIX.get(source), first, last)
+        cataloged = dict(self._fetch(SIZES_SQL, (source, camera) + window))
+
+        changed = {path: info for path, info in on_disk.items() if cataloged.get(path) != info[1]}
+        # Alleen echt verdwenen bestanden; een beeld buiten de dag-mappen blijft staan
+        missing = [path for path in cataloged if path not in on_disk and not os.path.exists(path)]
+
+        self.add_many(source, camera, changed)
+        removed = self.remove(missing)
+        return {'scanned': len(on_disk), 'added': len(changed), 'removed': removed}
+
+
+# Lookups met terugval op de schijf als de catalogus niet bereikbaar is.
+# De terugval leest alleen de dag-mappen die nodig zijn, nooit meer rglob.
+
+LATEST_FALLBACK_DAYS = 31  # Zoek zonder catalogus hooguit zoveel dag-mappen terug
+
+
+def find_images(source: str, camera: str, start: datetime, end: datetime) -> List[Tuple[datetime, Path]]:
+    """Beelden met start <= opnametijd <= end, gesorteerd op tijd."""
+    try:
+        with ImageCatalog() as catalog:
+            return catalog.images(source, camera, start, end)
+    except CatalogError as e:
+        _logger.warning(f"Image catalog niet beschikbaar, scan dag-mappen: {e}")
+
+    found = scan_images(camera_root(source, camera), FILENAME_PREFIX.get(source), start.date(), end.date())
+    return sorted((taken_at, Path(path)) for path, (taken_at, _) in found.items()
+                  if start <= taken_at <= end)
+
+
+def find_latest(source: str, camera: str, today: Optional[date] = None) -> Optional[Tuple[datetime, Path]]:
+    """Nieuwste beeld van een camera, of None."""
+    try:
+        with ImageCatalog() as catalog:
+            return catalog.latest(source, camera)
+    except CatalogError as e:
+        _logger.warning(f"Image catalog niet beschikbaar, scan dag-mappen: {e}")
+
+    root = camera_root(source, camera)
+    day = today or date.today()
+    for _ in range(LATEST_FALLBACK_DAYS):
+        found = scan_images(root, FILENAME_PREFIX.get(source), day, day)
+        if found:
+            path, (taken_at, _) = max(found.items(), key=lambda item: item[1][0])
+            return taken_at, Path(path)
+        day -= timedelta(days=1)
+    return None
+
+
+def find_date_range(source: str, camera: str) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Opnametijd van het eerste en laatste beeld, of (None, None)."""
+    try:
+        with ImageCatalog() as catalog:
+            return catalog.date_range(source, camera)
+    except CatalogError as e:
+        _logger.warning(f"Image catalog niet beschikbaar, scan complete boom: {e}")
+
+    found = scan_images(camera_root(source, camera), FILENAME_PREFIX.get(source))
+    if not found:
+        return None, None
+    times = [taken_at for taken_at, _ in found.values()]
+    return min(times), max(times)
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+EMSN 2.0 - Timelapse Segment Cache
+
+Dag-segmenten voor de timelapse generators (AtmosBird en nestkasten):
+per bron, camera, resolutie, fps en dag/nacht filter wordt elke dag één
+keer gecodeerd naar een H.264 segment met vaste encoder instellingen.
+Een timelapse over meerdere dagen is daarna een concatenatie van die
+segmenten via de ffmpeg concat demuxer (-c copy, geen her-codering):
+een week of maand kost seconden in plaats van minuten.
+
+Naast elk segment staat een manifest (.json) met het aantal frames en een
+vingerafdruk van de frame lijst. Komen er frames bij (vandaag) of zijn er
+verwijderd, dan klopt de vingerafdruk niet meer en wordt alleen dat ene
+segment opnieuw gecodeerd.
+
+Dagen die maar deels in de gevraagde periode vallen (bijv. -d 7 vanaf nu)
+worden los gecodeerd en niet gecached; de overlay toont per frame de dag
+en de positie binnen die dag, omdat een teller over de hele video niet
+over segmentgrenzen heen kan.
+
+Gebruik:
+    from core.timelapse_segments import build_timelapse
+
+    counts = build_timelapse('nestbox', 'midden', screenshots, start, end,
+                             output_path, fps=10, resolution='1280x720')
+"""
+
+import hashlib
+import json
+import logging
+import subprocess
+import tempfile
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_ROOT = Path('/mnt/nas-birdnet-archive/gegenereerde_beelden/segmenten')
+
+# Verhoog bij elke wijziging van de encoder instellingen of de overlay:
+# segmenten met een andere versie worden opnieuw gecodeerd
+SEGMENT_VERSION = 1
+
+# Vaste encoder instellingen: alleen segmenten met identieke parameters
+# mogen met -c copy achter elkaar gezet worden
+ENCODER_ARGS = [
+    '-c:v', 'libx264',
+    '-preset', 'medium',
+    '-crf', '23',
+    '-profile:v', 'high',
+    '-pix_fmt', 'yuv420p',
+    '-video_track_timescale', '90000',
+]
+
+FONT_FILE = '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+
+# Framerates voor --duration: een berekende fps wordt naar de dichtstbijzijnde
+# stap afgerond, zodat verschillende periodes dezelfde segmenten delen
+FPS_STEPS = (1, 2, 3, 4, 5, 6, 8, 10, 12, 15, 20, 24, 30, 40, 50, 60)
+
+FFMPEG_TIMEOUT = 1800
+
+
+def fps_for_duration(frame_count: int, duration: int) -> int:
+    """Framerate uit FPS_STEPS die `frame_count` frames het dichtst bij `duration` seconden brengt"""
+    wanted = max(1.0, frame_count / duration)
+    return min(FPS_STEPS, key=lambda step: abs(step - wanted))
+
+
+def segment_dir(source: str, camera: str, resolution: str, fps: int,
+                time_filter: Optional[str] = None, show_timestamp: bool = True,
+                root: Path = SEGMENT_ROOT) -> Path:
+    """Map met de dag-segmenten voor één combinatie van encoder parameters"""
+    name = f"{resolution}_{fps}fps"
+    if time_filter:
+        name += f"_{time_filter}"
+    if not show_timestamp:
+        name += "_plain"
+    return root / source / camera / name
+
+
+def fingerprint(frames: Sequence[Tuple[datetime, Path]]) -> str:
+    """Identificeert de frame lijst van een segment; anders = opnieuw coderen"""
+    digest = hashlib.sha1(f"v{SEGMENT_VERSION}".encode())
+    for timestamp, path in frames:
+        digest.update(f"\n{timestamp.isoformat()}|{path}".encode())
+    return digest.hexdigest()[:16]
+
+
+def overlay_filter(resolution: str, label: Optional[str], frame_count: int, fontsize: int) -> str:
+    """Scale/pad naar `resolution`, met optioneel '<label>  <n>/<frame_count>' linksonder"""
+    width, height = resolution.split('x')
+    vf = (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black"
+    )
+    if label is not None:
+        vf += (
+            f",drawtext=fontfile={FONT_FILE}:"
+            f"fontsize={fontsize}:fontcolor=white:x=10:y=h-{fontsize + 16}:"
+            f"text='{label}  %{{frame_num}}/{frame_count}':start_number=1"
+        )
+    return vf
+
+
+def encode_segment(frames: Sequence[Tuple[datetime, Path]], output_path: Path, fps: int,
+                   resolution: str, label: Optional[str] = None, fontsize: int = 24) -> bool:
+    """
+    Codeer frames naar één segment met ENCODER_ARGS
+
+    Schrijft eerst naar een .part bestand, zodat een afgebroken run geen
+    half segment in de cache achterlaat.
+    """
+    if not frames:
+        return False
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    part_path = output_path.with_name(output_path.stem + '.part.mp4')
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmppath = Path(tmpdir)
+        for i, (_, filepath) in enumerate(frames):
+            (tmppath / f"frame_{i:06d}.jpg").symlink_to(filepath)
+
+        cmd = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-framerate', str(fps),
+            '-i', str(tmppath / "frame_%06d.jpg"),
+            '-vf', overlay_filter(resolution, label, len(frames), fontsize),
+            *ENCODER_ARGS,
+            '-r', str(fps),
+            str(part_path)
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=FFMPEG_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            logger.error(f"ffmpeg timeout bij {output_path.name}")
+            part_path.unlink(missing_ok=True)
+            return False
+
+    if result.returncode != 0:
+        logger.error(f"ffmpeg fout bij {output_path.name}: {result.stderr.strip()[-500:]}")
+        part_path.unlink(missing_ok=True)
+        return False
+
+    part_path.replace(output_path)
+    return True
+
+
+def cached_segment(directory: Path, day: date, frames: Sequence[Tuple[datetime, Path]], fps: int,
+                   resolution: str, show_timestamp: bool = True,
+                   fontsize: int = 24) -> Tuple[Optional[Path], bool]:
+    """
+    Segment voor alle frames van `day`, uit de cache of nieuw gecodeerd
+
+    Returns:
+        (pad van het segment of None als coderen mislukt, True als uit de cache).
+    """
+    segment_path = directory / f"{day.isoformat()}.mp4"
+    manifest_path = segment_path.with_suffix('.json')
+    key = fingerprint(frames)
+
+    try:
+        manifest = json.loads(manifest_path.read_text())
+        if manifest.get('fingerprint') == key and segment_path.exists():
+            return segment_path, True
+    except (OSError, ValueError):
+        pass
+
+    label = day.isoformat() if show_timestamp else None
+    if not encode_segment(frames, segment_path, fps, resolution, label, fontsize):
+        return None, False
+
+    manifest_path.write_text(json.dumps({
+        'day': day.isoformat(),
+        'frames': len(frames),
+        'first': frames[0][0].isoformat(),
+        'last': frames[-1][0].isoformat(),
+        'fps': fps,
+        'resolution': resolution,
+        'fingerprint': key,
+        'version': SEGMENT_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+    }, indent=2))
+    return segment_path, False
+
+
+def concat_segments(segments: Sequence[Path], output_path: Path) -> bool:
+    """Zet segmenten achter elkaar met de concat demuxer, zonder her-codering"""
+    if not segments:
+        return False
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', suffix='.ffconcat', delete=False) as listing:
+        listing.write("ffconcat version 1.0\n")
+        for segment in segments:
+            escaped = str(segment).replace("'", "'\\''")
+            listing.write(f"file '{escaped}'\n")
+        list_path = Path(listing.name)
+
+    cmd = [
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'concat', '-safe', '0',
+        '-i', str(list_path),
+        '-c', 'copy',
+        '-movflags', '+faststart',
+        str(output_path)
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=FFMPEG_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        logger.error(f"ffmpeg concat timeout bij {output_path.name}")
+        return False
+    finally:
+        list_path.unlink(missing_ok=True)
+
+    if result.returncode != 0:
+        logger.error(f"ffmpeg concat fout bij {output_path.name}: {result.stderr.strip()[-500:]}")
+        return False
+    return True
+
+
+def build_timelapse(source: str, camera: str, screenshots: Sequence[Tuple[datetime, Path]],
+                    start: datetime, end: datetime, output_path: Path, fps: int = 10,
+                    resolution: str = '1280x720', show_timestamp: bool = True,
+                    time_filter: Optional[str] = None, fontsize: int = 24,
+                    use_cache: bool = True, root: Path = SEGMENT_ROOT) -> Dict[str, int]:
+    """
+    Timelapse over `start`-`end` uit dag-segmenten
+
+    Args:
+        source: Catalogus bron ('atmosbird', 'nestbox').
+        camera: Camera binnen de bron.
+        screenshots: (timestamp, path) tuples binnen start-end, op tijd gesorteerd
+            en al gefilterd op dag/nacht.
+        start: Begin van de gevraagde periode.
+        end: Einde van de gevraagde periode.
+        output_path: Pad voor de timelapse.
+        fps: Frames per seconde.
+        resolution: Video resolutie (WxH).
+        show_timestamp: Dag en frame positie als overlay.
+        time_filter: 'night' of 'day' als de screenshots gefilterd zijn (deel van de cache sleutel).
+        fontsize: Grootte van de overlay tekst.
+        use_cache: False codeert elke dag los, zonder de cache te lezen of te vullen.
+        root: Basismap van de segment cache.
+
+    Returns:
+        Dict met 'cached', 'encoded' en 'partial' segmenten, of een leeg dict bij een fout.
+    """
+    directory = segment_dir(source, camera, resolution, fps, time_filter, show_timestamp, root)
+    counts = {'cached': 0, 'encoded': 0, 'partial': 0}
+    segments: List[Path] = []
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for day, day_frames in groupby(screenshots, key=lambda item: item[0].date()):
+            day_frames = list(day_frames)
+            whole_day = use_cache and (start <= datetime.combine(day, time.min)
+                                       and end >= datetime.combine(day + timedelta(days=1), time.min) - timedelta(seconds=1))
+
+            if whole_day:
+                segment, reused = cached_segment(directory, day, day_frames, fps, resolution,
+                                                 show_timestamp, fontsize)
+                counts['cached' if reused else 'encoded'] += 1
+            else:
+                segment = Path(tmpdir) / f"{day.isoformat()}.mp4"
+                label = day.isoformat() if show_timestamp else None
+                if not encode_segment(day_frames, segment, fps, resolution, label, fontsize):
+                    segment = None
+                counts['partial'] += 1
+
+            if segment is None:
+                return {}
+            segments.append(segment)
+
+        if not concat_segments(segments, output_path):
+            return {}
+
+    return counts
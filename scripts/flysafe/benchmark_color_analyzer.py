@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+FlySafe Color Analyzer Benchmark
+================================
+
+Compares the per-level boolean mask counting (count_color_pixels, one
+full pass per level and per quadrant) with the single-pass lookup table
+counting (level_counts) on a folder of saved FlySafe radar PNGs, and
+checks that both give identical pixel counts.
+
+Usage:
+    python benchmark_color_analyzer.py /mnt/usb/flysafe/images/herwijnen/2026/05
+    python benchmark_color_analyzer.py ./radar_pngs --limit 200
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from color_analyzer import RadarColorAnalyzer
+
+HIGH_LEVELS = ('moderate', 'high', 'very_high')
+
+
+def mask_counts(analyzer: RadarColorAnalyzer, roi_array: np.ndarray) -> dict:
+    """Reference counts with one boolean mask per level (ROI) and per quadrant"""
+    roi = {level: analyzer.count_color_pixels(roi_array, color_range)
+           for level, color_range in analyzer.COLOR_RANGES.items()}
+
+    height, width = roi_array.shape[:2]
+    mid_h, mid_w = height // 2, width // 2
+    quadrant_arrays = {
+        'NW': roi_array[:mid_h, :mid_w],
+        'NE': roi_array[:mid_h, mid_w:],
+        'SW': roi_array[mid_h:, :mid_w],
+        'SE': roi_array[mid_h:, mid_w:]
+    }
+    quadrants = {
+        q: {level: analyzer.count_color_pixels(arr, analyzer.COLOR_RANGES[level]) for level in HIGH_LEVELS}
+        for q, arr in quadrant_arrays.items()
+    }
+    return {'roi': roi, 'quadrants': quadrants}
+
+
+def counts_match(reference: dict, lut: dict) -> bool:
+    """Compare ROI counts and the high-level quadrant counts used by detect_direction"""
+    if reference['roi'] != lut['roi']:
+        return False
+    return all(
+        reference['quadrants'][q][level] == lut['quadrants'][q][level]
+        for q in reference['quadrants'] for level in HIGH_LEVELS
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark FlySafe color counting (masks vs lookup table)')
+    parser.add_argument('image_dir', type=Path, help='Directory with radar PNGs (searched recursively)')
+    parser.add_argument('--limit', type=int, default=100, help='Max number of images')
+    args = parser.parse_args()
+
+    files = sorted(args.image_dir.rglob('*.png'))[:args.limit]
+    if not files:
+        print(f"No PNGs found in {args.image_dir}")
+        return 1
+
+    analyzer = RadarColorAnalyzer()
+    analyzer.level_counts(np.zeros((2, 2, 3), dtype=np.uint8))  # Build LUT outside the timing
+
+    images = []
+    for path in files:
+        img_array = np.array(Image.open(path).convert('RGB'))
+        images.append(img_array[analyzer.define_roi(img_array.shape)])
+
+    start = time.perf_counter()
+    reference = [mask_counts(analyzer, roi_array) for roi_array in images]
+    mask_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lut = [analyzer.level_counts(roi_array) for roi_array in images]
+    lut_seconds = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(reference, lut) if not counts_match(a, b))
+
+    print(f"Images:     {len(images)} ({images[0].shape[1]}x{images[0].shape[0]} ROI)")
+    print(f"Masks:      {mask_seconds:.3f}s ({len(images) / mask_seconds:.1f} images/s)")
+    print(f"LUT:        {lut_seconds:.3f}s ({len(images) / lut_seconds:.1f} images/s)")
+    print(f"Speedup:    {mask_seconds / lut_seconds:.1f}x")
+    print(f"Mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+FlySafe Radar Correlation Benchmark
+===================================
+
+Seeds a season of radar observations and BirdNET detections in a scratch
+schema and compares the old per-observation loop (two new connections and
+one window aggregate per observation) with the set-based analyze_all
+(one UPDATE for all observations). Both must give the same detection
+counts and correlation scores.
+
+The scratch schema is put on the search_path of every connection, so
+the production tables are never touched. It is dropped afterwards unless
+--keep is given.
+
+Usage:
+    python benchmark_radar_correlation.py
+    python benchmark_radar_correlation.py --days 180 --detections-per-day 2500
+    python benchmark_radar_correlation.py --skip-legacy   # Only time the set-based query
+"""
+
+import argparse
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import psycopg2
+
+import radar_correlation
+from radar_correlation import MIN_CONFIDENCE, TIME_WINDOW_HOURS, RadarCorrelationAnalyzer
+
+BENCH_SCHEMA = 'emsn_bench_radar'
+SEASON_START = date(2026, 3, 1)
+SPECIES_COUNT = 80
+
+
+def bench_config() -> dict:
+    """DB_CONFIG with the scratch schema first on the search_path"""
+    config = dict(radar_correlation.DB_CONFIG)
+    config['options'] = f"-c search_path={BENCH_SCHEMA}"
+    return config
+
+
+def seed(conn, days: int, observations_per_day: int, detections_per_day: int):
+    """Create the scratch schema with a season of observations and detections"""
+    start = datetime.combine(SEASON_START, datetime.min.time())
+    end = start + timedelta(days=days)
+    step = timedelta(hours=24 / observations_per_day)
+
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+        cur.execute(f"SET search_path = {BENCH_SCHEMA}")
+        cur.execute("SELECT setseed(0.42)")
+        cur.execute("""
+            CREATE TABLE radar_observations (
+                id SERIAL PRIMARY KEY,
+                observation_date DATE NOT NULL,
+                observation_time TIME NOT NULL,
+                intensity_level INTEGER,
+                intensity_category VARCHAR(20),
+                bird_detections_count INTEGER DEFAULT 0,
+                correlation_score NUMERIC(6, 4)
+            )
+        """)
+        cur.execute("""
+            CREATE TABLE bird_detections (
+                id SERIAL PRIMARY KEY,
+                detection_timestamp TIMESTAMP NOT NULL,
+                species VARCHAR(100),
+                confidence NUMERIC(5, 4)
+            )
+        """)
+        cur.execute("""
+            INSERT INTO radar_observations (observation_date, observation_time, intensity_level, intensity_category)
+            SELECT ts::date, ts::time, level,
+                   CASE WHEN level > 75 THEN 'very_high' WHEN level > 50 THEN 'high'
+                        WHEN level > 25 THEN 'moderate' WHEN level > 10 THEN 'low' ELSE 'minimal' END
+            FROM (
+                SELECT ts, (random() * 100)::int AS level
+                FROM generate_series(%s, %s, %s) AS ts
+            ) s
+        """, (start, end - step, step))
+        cur.execute("""
+            INSERT INTO bird_detections (detection_timestamp, species, confidence)
+            SELECT %s + random() * %s, 'species_' || (random() * %s)::int, 0.5 + random() * 0.5
+            FROM generate_series(1, %s)
+        """, (start, end - start, SPECIES_COUNT, days * detections_per_day))
+        cur.execute("CREATE INDEX ON bird_detections (detection_timestamp) INCLUDE (confidence, species)")
+        cur.execute("CREATE INDEX ON radar_observations (id) WHERE correlation_score IS NULL")
+        cur.execute("ANALYZE radar_observations")
+        cur.execute("ANALYZE bird_detections")
+    conn.commit()
+
+
+def reset(conn):
+    """Mark all observations as uncorrelated again"""
+    with conn.cursor() as cur:
+        cur.execute("UPDATE radar_observations SET bird_detections_count = 0, correlation_score = NULL")
+    conn.commit()
+
+
+def fetch_scores(conn) -> dict:
+    """id -> (bird_detections_count, correlation_score)"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT id, bird_detections_count, correlation_score FROM radar_observations")
+        return {row_id: (count, float(score)) for row_id, count, score in cur.fetchall()}
+
+
+def legacy_analyze_all(analyzer: RadarCorrelationAnalyzer) -> int:
+    """The previous analyze_all: per observation a window aggregate and an UPDATE, each on a new connection"""
+    observations = analyzer.get_uncorrelated_observations()
+    for obs in observations:
+        obs_timestamp = datetime.combine(obs['observation_date'], obs['observation_time'])
+        window = timedelta(hours=TIME_WINDOW_HOURS)
+
+        conn = analyzer.get_db_connection()
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT
+                COUNT(DISTINCT species) as species_count,
+                AVG(confidence) as avg_confidence,
+                SUM(CASE WHEN confidence >= %s THEN 1 ELSE 0 END) as high_confidence_count
+            FROM bird_detections
+            WHERE detection_timestamp >= %s
+              AND detection_timestamp <= %s
+        """, (MIN_CONFIDENCE, obs_timestamp - window, obs_timestamp + window))
+        species_count, avg_confidence, high_confidence_count = cur.fetchone()
+        conn.close()
+
+        stats = {
+            'high_confidence_count': int(high_confidence_count or 0),
+            'species_count': int(species_count or 0),
+            'avg_confidence': float(avg_confidence or 0.0)
+        }
+        score = analyzer.calculate_correlation_score(obs['intensity_level'], stats)
+
+        conn = analyzer.get_db_connection()
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE radar_observations
+            SET bird_detections_count = %s,
+                correlation_score = %s
+            WHERE id = %s
+        """, (stats['high_confidence_count'], score, obs['id']))
+        conn.commit()
+        conn.close()
+    return len(observations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark set-based radar correlation')
+    parser.add_argument('--days', type=int, default=120, help='Season length in days')
+    parser.add_argument('--observations-per-day', type=int, default=24)
+    parser.add_argument('--detections-per-day', type=int, default=1500)
+    parser.add_argument('--skip-legacy', action='store_true', help='Do not run the per-observation loop')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch schema')
+    args = parser.parse_args()
+
+    radar_correlation.DB_CONFIG = bench_config()
+    conn = psycopg2.connect(**radar_correlation.DB_CONFIG)
+    analyzer = RadarCorrelationAnalyzer()
+
+    try:
+        print(f"Seeding {args.days} days: {args.days * args.observations_per_day:,} observations, "
+              f"{args.days * args.detections_per_day:,} detections")
+        seed(conn, args.days, args.observations_per_day, args.detections_per_day)
+
+        legacy = None
+        if not args.skip_legacy:
+            start = time.perf_counter()
+            n = legacy_analyze_all(analyzer)
+            legacy_time = time.perf_counter() - start
+            legacy = fetch_scores(conn)
+            print(f"Per-observation loop: {n:,} observations in {legacy_time:.2f}s "
+                  f"({n / legacy_time:,.0f} obs/s)")
+            reset(conn)
+
+        start = time.perf_counter()
+        n = len(analyzer.analyze_all())
+        set_time = time.perf_counter() - start
+        print(f"Set-based UPDATE:     {n:,} observations in {set_time:.2f}s "
+              f"({n / set_time:,.0f} obs/s)")
+
+        if legacy is not None:
+            current = fetch_scores(conn)
+            mismatches = sum(
+                1 for row_id, (count, score) in legacy.items()
+                if current[row_id][0] != count or abs(current[row_id][1] - score) > 1e-4
+            )
+            print(f"Speedup: {legacy_time / set_time:.1f}x, mismatches: {mismatches}")
+            return 1 if mismatches else 0
+        return 0
+
+    finally:
+        if not args.keep:
+            conn.rollback()
+            with conn.cursor() as cur:
+                cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+            conn.commit()
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
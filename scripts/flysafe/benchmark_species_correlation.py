@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+FlySafe Species Correlation Benchmark
+=====================================
+
+Builds a synthetic year of hourly radar intensity and per-species
+detections (no database needed) and compares the previous group
+correlation (lists built row by row, Pearson r with generator sums) with
+correlation_stats.grouped_pearson. Both must give the same coefficients.
+Also times the lagged cross-correlations (0-6 h) and the bootstrap
+confidence intervals on the same data.
+
+Usage:
+    python benchmark_species_correlation.py
+    python benchmark_species_correlation.py --days 365 --species 120 --bootstrap 1000
+"""
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from correlation_stats import bootstrap_ci, grouped_pearson, lagged_correlations
+
+GROUP_COUNT = 9  # SPECIES_GROUPS + 'Overig'
+MAX_LAG = 6
+
+
+def synthetic_year(days: int, species: int, seed: int = 42) -> dict:
+    """
+    Hourly radar intensity with seasonal and nocturnal peaks, and per species
+    Poisson detections that follow the radar with a species-specific lag.
+    About 10% of the hours have no radar observation.
+    """
+    rng = np.random.default_rng(seed)
+    hours = np.arange(days * 24)
+    day_of_year = hours / 24.0
+    hour_of_day = hours % 24
+
+    season = np.maximum(np.sin(2 * np.pi * (day_of_year - 60) / 365), 0) ** 2 \
+        + np.maximum(np.sin(2 * np.pi * (day_of_year - 230) / 365), 0) ** 2
+    night = np.where((hour_of_day >= 20) | (hour_of_day < 6), 1.0, 0.3)
+    radar = np.clip(60 * season * night + rng.normal(0, 8, hours.size), 0, 100)
+    radar_observed = np.where(rng.random(hours.size) < 0.9, radar, np.nan)
+
+    lags = rng.integers(0, MAX_LAG + 1, species)
+    strength = rng.uniform(0.0, 0.08, species)
+    detections = np.empty((species, hours.size))
+    for s in range(species):
+        rate = 0.05 + strength[s] * np.roll(radar, lags[s])
+        detections[s] = rng.poisson(rate)
+
+    return {
+        'radar': radar_observed,
+        'detections': detections,
+        'species_group': np.arange(species) % GROUP_COUNT,
+        'lags': lags,
+        'strength': strength,
+    }
+
+
+def to_rows(data: dict) -> list:
+    """Rows as the old query returned them: detected species-hours with radar"""
+    radar = data['radar']
+    species_idx, hour_idx = np.nonzero(data['detections'])
+    keep = ~np.isnan(radar[hour_idx])
+    return [
+        {'species': int(s), 'detections': int(data['detections'][s, h]), 'intensity': float(radar[h])}
+        for s, h in zip(species_idx[keep], hour_idx[keep])
+    ]
+
+
+def legacy_group_correlations(rows: list, species_group: np.ndarray) -> dict:
+    """The previous get_group_correlations math: per-group lists and generator sums"""
+    group_data = defaultdict(lambda: {'detections': [], 'intensities': []})
+    for row in rows:
+        group = int(species_group[row['species']])
+        group_data[group]['detections'].append(float(row['detections']))
+        group_data[group]['intensities'].append(float(row['intensity'] or 0))
+
+    correlations = {}
+    for group, data in group_data.items():
+        n = len(data['detections'])
+        sum_x = sum(data['detections'])
+        sum_y = sum(data['intensities'])
+        sum_xy = sum(x * y for x, y in zip(data['detections'], data['intensities']))
+        sum_x2 = sum(x ** 2 for x in data['detections'])
+        sum_y2 = sum(y ** 2 for y in data['intensities'])
+        numerator = n * sum_xy - sum_x * sum_y
+        denominator = ((n * sum_x2 - sum_x ** 2) * (n * sum_y2 - sum_y ** 2)) ** 0.5
+        correlations[group] = numerator / denominator if denominator != 0 else 0
+    return correlations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark FlySafe species/group correlation math')
+    parser.add_argument('--days', type=int, default=365, help='Length of the synthetic series in days')
+    parser.add_argument('--species', type=int, default=80, help='Number of synthetic species')
+    parser.add_argument('--bootstrap', type=int, default=1000, help='Bootstrap resamples per group')
+    args = parser.parse_args()
+
+    data = synthetic_year(args.days, args.species)
+    rows = to_rows(data)
+    print(f"Synthetic data: {args.days * 24:,} hours, {args.species} species, {len(rows):,} species-hour pairs")
+
+    start = time.perf_counter()
+    legacy = legacy_group_correlations(rows, data['species_group'])
+    legacy_seconds = time.perf_counter() - start
+
+    # Columnar form, as fetch_hourly_pairs returns it
+    species = np.array([row['species'] for row in rows])
+    detections = np.array([row['detections'] for row in rows], dtype=np.float64)
+    intensity = np.array([row['intensity'] for row in rows], dtype=np.float64)
+    group_ids = data['species_group'][species]
+
+    start = time.perf_counter()
+    stats = grouped_pearson(group_ids, detections, intensity, GROUP_COUNT)
+    numpy_seconds = time.perf_counter() - start
+
+    mismatches = sum(1 for group, r in legacy.items() if abs(stats['r'][group] - r) > 1e-9)
+    print(f"Group r, generator sums: {legacy_seconds * 1000:8.1f} ms")
+    print(f"Group r, NumPy bincount: {numpy_seconds * 1000:8.1f} ms "
+          f"({legacy_seconds / numpy_seconds:.0f}x), mismatches: {mismatches}")
+
+    start = time.perf_counter()
+    group_series = np.zeros((GROUP_COUNT, data['detections'].shape[1]))
+    np.add.at(group_series, data['species_group'], data['detections'])
+    lagged_species = lagged_correlations(data['radar'], data['detections'], MAX_LAG)
+    lagged_correlations(data['radar'], group_series, MAX_LAG)
+    lag_seconds = time.perf_counter() - start
+    print(f"Lagged r 0-{MAX_LAG} h:         {lag_seconds * 1000:8.1f} ms "
+          f"({args.species} species + {GROUP_COUNT} groups)")
+
+    start = time.perf_counter()
+    for group in range(GROUP_COUNT):
+        mask = group_ids == group
+        bootstrap_ci(detections[mask], intensity[mask], samples=args.bootstrap)
+    boot_seconds = time.perf_counter() - start
+    print(f"Bootstrap CI ({args.bootstrap}x):    {boot_seconds * 1000:8.1f} ms ({GROUP_COUNT} groups)")
+
+    clear = data['strength'] > 0.02  # Species with a clear radar response
+    recovered = np.nanargmax(lagged_species[clear], axis=1) == data['lags'][clear]
+    print(f"Best lag = true lag:     {recovered.sum()}/{clear.sum()} species")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -20,6 +20,15 @@ The analyzer:
 4. Calculates migration intensity score
 5. Determines predominant direction (if detectable)
 
+Color counting is a single pass: every pixel is quantized through a
+lookup table to a color cell, and one np.bincount gives the cell counts
+for all four quadrants of the ROI. Level counts for the ROI and each
+quadrant follow from a small cell x level membership matrix.
+
+ANALYZER_VERSION is stored with every radar_observations row; bump it
+whenever the analysis changes so reanalyze_radar.py can bring historical
+rows up to date.
+
 Author: Claude Sonnet 4.5 & Ronny Hullegie
 """
 
@@ -30,6 +39,11 @@ from PIL import Image
 from typing import Dict, Tuple, Optional
 import json
 
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
 # Import core modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from core.logging import get_logger
@@ -37,6 +51,35 @@ from core.logging import get_logger
 # Centrale logger
 logger = get_logger('flysafe_color_analyzer')
 
+# Version of the analysis stored in radar_observations.analyzer_version
+ANALYZER_VERSION = 1
+
+# Intensity score weights per level (0-100)
+LEVEL_WEIGHTS = {
+    'minimal': 0,
+    'low': 25,
+    'moderate': 50,
+    'high': 75,
+    'very_high': 100
+}
+
+
+def decode_image(image_path) -> Optional[np.ndarray]:
+    """
+    Decode an image file to an RGB uint8 array
+
+    Uses OpenCV when available (decodes straight into a numpy array,
+    10-15% faster than PIL on RGB radar PNGs), PIL otherwise. Palette and
+    RGBA images are converted to plain RGB in both cases.
+    """
+    if cv2 is not None:
+        img = cv2.imread(str(image_path), cv2.IMREAD_COLOR)
+        if img is not None:
+            return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+    with Image.open(image_path) as img:
+        return np.asarray(img.convert('RGB'))
+
 
 class RadarColorAnalyzer:
     """Analyzes radar images for bird migration intensity"""
@@ -71,14 +114,113 @@ class RadarColorAnalyzer:
         }
     }
 
+    # Quadrant order for the combined bincount in level_counts
+    QUADRANTS = ('NW', 'NE', 'SW', 'SE')
+
+    # Lookup tables, built once per process (see _build_lut)
+    _lut = None
+
     def __init__(self):
         pass
 
+    @classmethod
+    def _build_lut(cls) -> Tuple[np.ndarray, np.ndarray, Tuple[str, ...]]:
+        """
+        Build the RGB -> color cell lookup tables from COLOR_RANGES
+
+        Each channel is split at every range boundary, so all pixels within
+        one cell fall in exactly the same set of ranges. The ranges overlap
+        at their edges (e.g. g == 100 is both 'very_high' and 'high'), so a
+        cell maps to a membership row instead of a single level.
+
+        Returns:
+            channel_codes: (3, 256) cell offset per channel value (already
+                multiplied by the channel stride, so code = r + g + b)
+            membership: (n_cells, n_levels) uint8, 1 if the cell is in the range
+            levels: level names in membership column order
+        """
+        if cls._lut is not None:
+            return cls._lut
+
+        levels = tuple(cls.COLOR_RANGES.keys())
+        channel_bins = []
+        for channel in ('r', 'g', 'b'):
+            edges = {0, 256}
+            for color_range in cls.COLOR_RANGES.values():
+                edges.add(color_range[f'{channel}_min'])
+                edges.add(color_range[f'{channel}_max'] + 1)
+            channel_bins.append(np.array(sorted(edges)))
+
+        sizes = [len(edges) - 1 for edges in channel_bins]
+        strides = [sizes[1] * sizes[2], sizes[2], 1]
+        values = np.arange(256)
+        channel_codes = np.stack([
+            (np.searchsorted(edges, values, side='right') - 1) * stride
+            for edges, stride in zip(channel_bins, strides)
+        ]).astype(np.uint16)  # Small dtype keeps the gathers cache friendly
+
+        # Membership per cell, evaluated at the first value of each interval
+        membership = np.zeros((sizes[0] * sizes[1] * sizes[2], len(levels)), dtype=np.uint8)
+        r0, g0, b0 = (edges[:-1] for edges in channel_bins)
+        rr, gg, bb = np.meshgrid(r0, g0, b0, indexing='ij')
+        rr, gg, bb = rr.ravel(), gg.ravel(), bb.ravel()
+        for j, level in enumerate(levels):
+            c = cls.COLOR_RANGES[level]
+            membership[:, j] = (
+                (rr >= c['r_min']) & (rr <= c['r_max'])
+                & (gg >= c['g_min']) & (gg <= c['g_max'])
+                & (bb >= c['b_min']) & (bb <= c['b_max'])
+            )
+
+        cls._lut = (channel_codes, membership, levels)
+        return cls._lut
+
+    def quantize(self, img_array: np.ndarray) -> np.ndarray:
+        """Map every RGB pixel to its color cell index via the lookup tables"""
+        channel_codes, _, _ = self._build_lut()
+        return (channel_codes[0][img_array[:, :, 0]]
+                + channel_codes[1][img_array[:, :, 1]]
+                + channel_codes[2][img_array[:, :, 2]])
+
+    def level_counts(self, roi_array: np.ndarray) -> Dict:
+        """
+        Count pixels per intensity level for the ROI and its quadrants in one pass
+
+        Returns dict with:
+        - roi: {level: count}
+        - quadrants: {'NW'|'NE'|'SW'|'SE': {level: count}}
+        """
+        _, membership, levels = self._build_lut()
+
+        if len(roi_array.shape) == 2:
+            # Grayscale image
+            logger.warning("Grayscale image - color analysis not applicable")
+            empty = {level: 0 for level in levels}
+            return {'roi': dict(empty), 'quadrants': {q: dict(empty) for q in self.QUADRANTS}}
+
+        height, width = roi_array.shape[:2]
+        mid_h, mid_w = height // 2, width // 2
+        n_cells = len(membership)
+
+        # Quadrant id as offset: 0=NW, 1=NE, 2=SW, 3=SE
+        rows = (np.arange(height) >= mid_h).astype(np.uint16) * np.uint16(2 * n_cells)
+        cols = (np.arange(width) >= mid_w).astype(np.uint16) * np.uint16(n_cells)
+        index = self.quantize(roi_array) + rows[:, None] + cols[None, :]
+
+        cells = np.bincount(index.ravel(), minlength=4 * n_cells).reshape(4, n_cells)
+        per_quadrant = cells @ membership.astype(np.int64)
+
+        quadrants = {
+            q: {level: int(per_quadrant[i, j]) for j, level in enumerate(levels)}
+            for i, q in enumerate(self.QUADRANTS)
+        }
+        roi = {level: int(per_quadrant[:, j].sum()) for j, level in enumerate(levels)}
+        return {'roi': roi, 'quadrants': quadrants}
+
     def load_image(self, image_path: str) -> Optional[np.ndarray]:
         """Load radar image and convert to numpy array"""
         try:
-            img = Image.open(image_path)
-            img_array = np.array(img)
+            img_array = decode_image(image_path)
 
             logger.info(f"Loaded image: {image_path}")
             logger.info(f"Image shape: {img_array.shape}")
@@ -112,7 +254,7 @@ class RadarColorAnalyzer:
         return (slice(row_start, row_end), slice(col_start, col_end))
 
     def count_color_pixels(self, img_array: np.ndarray, color_range: dict) -> int:
-        """Count pixels within specified color range"""
+        """Count pixels within specified color range (reference for level_counts)"""
         if len(img_array.shape) == 2:
             # Grayscale image
             logger.warning("Grayscale image - color analysis not applicable")
@@ -128,10 +270,13 @@ class RadarColorAnalyzer:
 
         return int(np.sum(mask))
 
-    def analyze_intensity(self, img_array: np.ndarray, roi: Optional[Tuple[slice, slice]] = None) -> Dict:
+    def analyze_intensity(self, img_array: np.ndarray, roi: Optional[Tuple[slice, slice]] = None,
+                          counts: Optional[Dict] = None) -> Dict:
         """
         Analyze migration intensity from image
 
+        counts: precomputed level_counts() result for this ROI (optional)
+
         Returns dict with:
         - intensity: categorical level
         - percentages: breakdown by color category
@@ -147,11 +292,20 @@ class RadarColorAnalyzer:
         logger.info(f"Analyzing {total_pixels:,} pixels")
 
         # Count pixels for each intensity level
-        color_counts = {}
-        for level, color_range in self.COLOR_RANGES.items():
-            count = self.count_color_pixels(roi_array, color_range)
-            color_counts[level] = count
+        if counts is None:
+            counts = self.level_counts(roi_array)
+        color_counts = dict(counts['roi'])
+
+        result = self.intensity_from_counts(color_counts, total_pixels)
+
+        logger.info(f"Intensity: {result['intensity']} (score: {result['score']:.1f})")
+        logger.info(f"Distribution: {json.dumps(result['percentages'], indent=2)}")
+
+        return result
 
+    @staticmethod
+    def intensity_from_counts(color_counts: Dict, total_pixels: int) -> Dict:
+        """Intensity category, score and percentages from ROI level counts (no logging)"""
         # Calculate percentages
         percentages = {
             level: (count / total_pixels * 100) if total_pixels > 0 else 0
@@ -159,16 +313,8 @@ class RadarColorAnalyzer:
         }
 
         # Calculate weighted intensity score (0-100)
-        weights = {
-            'minimal': 0,
-            'low': 25,
-            'moderate': 50,
-            'high': 75,
-            'very_high': 100
-        }
-
         score = sum(
-            percentages[level] * weights[level] / 100
+            percentages[level] * LEVEL_WEIGHTS[level] / 100
             for level in percentages
         )
 
@@ -184,7 +330,7 @@ class RadarColorAnalyzer:
         else:
             intensity = 'minimal'
 
-        result = {
+        return {
             'intensity': intensity,
             'score': round(score, 2),
             'percentages': {k: round(v, 2) for k, v in percentages.items()},
@@ -192,51 +338,39 @@ class RadarColorAnalyzer:
             'total_pixels': total_pixels
         }
 
-        logger.info(f"Intensity: {intensity} (score: {score:.1f})")
-        logger.info(f"Distribution: {json.dumps(result['percentages'], indent=2)}")
-
-        return result
-
-    def detect_direction(self, img_array: np.ndarray, roi: Optional[Tuple[slice, slice]] = None) -> Optional[str]:
+    def detect_direction(self, img_array: np.ndarray, roi: Optional[Tuple[slice, slice]] = None,
+                         counts: Optional[Dict] = None) -> Optional[str]:
         """
         Attempt to detect predominant migration direction
 
         This is a simplified heuristic - actual direction detection
         would require temporal analysis of multiple frames.
 
+        counts: precomputed level_counts() result for this ROI (optional)
+
         Returns: cardinal direction string or None
         """
-        if roi:
-            roi_array = img_array[roi]
-        else:
-            roi_array = img_array
+        if counts is None:
+            roi_array = img_array[roi] if roi else img_array
+            counts = self.level_counts(roi_array)
 
-        # Divide into quadrants
-        height, width = roi_array.shape[:2]
-        mid_h, mid_w = height // 2, width // 2
-
-        quadrants = {
-            'NW': roi_array[:mid_h, :mid_w],
-            'NE': roi_array[:mid_h, mid_w:],
-            'SW': roi_array[mid_h:, :mid_w],
-            'SE': roi_array[mid_h:, mid_w:]
+        predominant = self.direction_from_counts(counts)
+        if predominant:
+            logger.info(f"Predominant quadrant: {predominant}")
+        return predominant
+
+    @staticmethod
+    def direction_from_counts(counts: Dict) -> Optional[str]:
+        """Quadrant with the most high-intensity pixels from level_counts() (no logging)"""
+        # Count high-intensity (yellow, orange, red) pixels per quadrant
+        quadrant_scores = {
+            direction: sum(level_counts[level] for level in ['moderate', 'high', 'very_high'])
+            for direction, level_counts in counts['quadrants'].items()
         }
 
-        # Count high-intensity pixels per quadrant
-        quadrant_scores = {}
-        for direction, quad_array in quadrants.items():
-            # Count yellow, orange, red pixels
-            score = 0
-            for level in ['moderate', 'high', 'very_high']:
-                score += self.count_color_pixels(quad_array, self.COLOR_RANGES[level])
-
-            quadrant_scores[direction] = score
-
         # Determine predominant direction
         if max(quadrant_scores.values()) > 0:
-            predominant = max(quadrant_scores, key=quadrant_scores.get)
-            logger.info(f"Predominant quadrant: {predominant}")
-            return predominant
+            return max(quadrant_scores, key=quadrant_scores.get)
 
         return None
 
@@ -254,8 +388,10 @@ class RadarColorAnalyzer:
 
         roi = self.define_roi(img_array.shape, region=region)
 
-        intensity_result = self.analyze_intensity(img_array, roi)
-        direction = self.detect_direction(img_array, roi)
+        # One pass over the ROI for both intensity and direction
+        counts = self.level_counts(img_array[roi])
+        intensity_result = self.analyze_intensity(img_array, roi, counts=counts)
+        direction = self.detect_direction(img_array, roi, counts=counts)
 
         result = {
             'image_path': str(image_path),
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+FlySafe Correlation Statistics
+==============================
+
+Vectorized correlation math for species_correlation.py, on NumPy arrays
+built from columnar query results (no database access here):
+
+- grouped_pearson: Pearson r per group over pooled (detections, intensity)
+  pairs, all groups in one pass with np.bincount
+- lagged_correlations: r between hourly radar intensity and hourly
+  detections shifted 0..max_lag hours (radar leading), for many series at once
+- bootstrap_ci: percentile confidence interval of r from resampled pairs
+
+Author: EMSN Team
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+BOOTSTRAP_SAMPLES = 1000
+BOOTSTRAP_CHUNK = 250  # Resamples per vectorized batch (bounds memory for large n)
+CONFIDENCE_LEVEL = 0.95
+
+
+def _pearson_from_sums(n, sum_x, sum_y, sum_xy, sum_x2, sum_y2) -> np.ndarray:
+    """Pearson r from (arrays of) raw sums; 0.0 where a variance is zero"""
+    numerator = n * sum_xy - sum_x * sum_y
+    denominator = np.sqrt(np.maximum(n * sum_x2 - sum_x ** 2, 0) * np.maximum(n * sum_y2 - sum_y ** 2, 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.where(denominator > 0, numerator / denominator, 0.0)
+    return np.clip(r, -1.0, 1.0)
+
+
+def grouped_pearson(group_ids: np.ndarray, x: np.ndarray, y: np.ndarray,
+                    n_groups: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Pearson correlation of x and y per group
+
+    Args:
+        group_ids: int array, group index per pair
+        x, y: float arrays of the same length
+        n_groups: number of groups (default max(group_ids) + 1)
+
+    Returns:
+        dict of arrays indexed by group: 'n', 'sum_x', 'mean_y', 'r'
+    """
+    group_ids = np.asarray(group_ids, dtype=np.intp)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if n_groups is None:
+        n_groups = int(group_ids.max()) + 1 if group_ids.size else 0
+
+    def total(weights=None):
+        return np.bincount(group_ids, weights=weights, minlength=n_groups)
+
+    n = total()
+    sum_x, sum_y = total(x), total(y)
+    r = _pearson_from_sums(n, sum_x, sum_y, total(x * y), total(x * x), total(y * y))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_y = np.where(n > 0, sum_y / np.maximum(n, 1), 0.0)
+    return {'n': n.astype(np.int64), 'sum_x': sum_x, 'mean_y': mean_y, 'r': r}
+
+
+def lagged_correlations(radar: np.ndarray, detections: np.ndarray, max_lag: int = 6) -> np.ndarray:
+    """
+    Cross-correlation of an hourly radar series with hourly detection series
+
+    Lag k correlates radar[t] with detections[:, t + k], i.e. radar leading
+    the detections by k hours. Hours without radar (NaN) are skipped.
+
+    Args:
+        radar: float array (T,), NaN where there is no radar observation
+        detections: float array (S, T), one zero-filled series per row
+        max_lag: largest lag in hours
+
+    Returns:
+        float array (S, max_lag + 1); NaN where a series has no variance
+    """
+    radar = np.asarray(radar, dtype=np.float64)
+    detections = np.atleast_2d(np.asarray(detections, dtype=np.float64))
+    n_series, n_hours = detections.shape
+    result = np.full((n_series, max_lag + 1), np.nan)
+
+    for lag in range(min(max_lag, n_hours - 1) + 1):
+        x = radar[:n_hours - lag]
+        valid = ~np.isnan(x)
+        if valid.sum() < 3:
+            continue
+        x = x[valid]
+        ys = detections[:, lag:][:, valid]
+
+        xc = x - x.mean()
+        yc = ys - ys.mean(axis=1, keepdims=True)
+        denominator = np.sqrt((yc * yc).sum(axis=1) * (xc @ xc))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result[:, lag] = np.where(denominator > 0, (yc @ xc) / denominator, np.nan)
+    return result
+
+
+def bootstrap_ci(x: np.ndarray, y: np.ndarray, samples: int = BOOTSTRAP_SAMPLES,
+                 confidence: float = CONFIDENCE_LEVEL, seed: int = 0) -> Tuple[float, float]:
+    """
+    Percentile bootstrap confidence interval of Pearson r
+
+    Pairs are resampled with replacement; each batch of BOOTSTRAP_CHUNK
+    resamples is a (resamples x pairs) count matrix times the per-pair
+    moments (x, y, xy, x², y²).
+
+    Returns:
+        (low, high), or (nan, nan) for fewer than 3 pairs
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = x.size
+    if n < 3:
+        return float('nan'), float('nan')
+
+    rng = np.random.default_rng(seed)
+    moments = np.column_stack([x, y, x * y, x * x, y * y])
+    rs = np.empty(samples)
+    for start in range(0, samples, BOOTSTRAP_CHUNK):
+        size = min(BOOTSTRAP_CHUNK, samples - start)
+        # How often each pair is drawn per resample; one matmul then gives all sums
+        idx = rng.integers(0, n, size=(size, n)) + np.arange(size)[:, None] * n
+        counts = np.bincount(idx.ravel(), minlength=size * n).reshape(size, n).astype(np.float64)
+        sums = counts @ moments
+        rs[start:start + size] = _pearson_from_sums(n, *sums.T)
+
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(rs, [alpha, 1 - alpha])
+    return float(low), float(high)
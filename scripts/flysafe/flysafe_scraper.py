@@ -37,7 +37,7 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 
 # Import color analyzer
-from color_analyzer import RadarColorAnalyzer
+from color_analyzer import ANALYZER_VERSION, RadarColorAnalyzer
 from migration_alerts import MigrationAlertSystem
 
 # Configuration
@@ -255,9 +255,11 @@ class FlySafeScraper:
                     intensity_level,
                     intensity_category,
                     bird_detections_count,
-                    correlation_score
+                    correlation_score,
+                    analyzer_version,
+                    analyzed_at
                 ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s
+                    %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW()
                 )
                 RETURNING id
             """
@@ -292,7 +294,8 @@ class FlySafeScraper:
                 intensity_level,
                 intensity_category,
                 0,  # bird_detections_count - will be filled by correlation script
-                None  # correlation_score - will be calculated later
+                None,  # correlation_score - will be calculated later
+                ANALYZER_VERSION if intensity_score is not None else None
             ))
 
             result_id = cur.fetchone()[0]
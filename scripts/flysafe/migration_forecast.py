@@ -232,6 +232,9 @@ class MigrationForecaster:
     def get_detection_trend_factor(self, hours=24):
         """
         Factor based on recent BirdNET detection trends
+
+        Reads the detections_hourly rollup, so the window starts at the
+        beginning of the hour `hours` ago
         """
         try:
             conn = self.get_db_connection()
@@ -239,10 +242,9 @@ class MigrationForecaster:
 
             cur.execute("""
                 SELECT
-                    COUNT(*) as recent_count
-                FROM bird_detections
-                WHERE detection_timestamp >= NOW() - INTERVAL '%s hours'
-                  AND confidence >= 0.7
+                    COALESCE(SUM(high_conf_count), 0) as recent_count
+                FROM detections_hourly
+                WHERE hour >= DATE_TRUNC('hour', NOW() - INTERVAL '%s hours')
             """, (hours,))
 
             result = cur.fetchone()
@@ -11,12 +11,15 @@ For each radar observation:
 - Calculates correlation score
 - Updates radar_observations table
 
+All pending observations are handled by one set-based UPDATE: each
+observation is joined (LATERAL) to the aggregate of the detections in its
+window, which uses the index on bird_detections.detection_timestamp.
+
 Author: Claude Sonnet 4.5 & Ronny Hullegie
 """
 
 import os
 import sys
-from datetime import datetime, timedelta
 from pathlib import Path
 import psycopg2
 from psycopg2.extras import RealDictCursor
@@ -37,6 +40,49 @@ CORRELATION_WEIGHT = 0.7  # Weight for high-confidence detections
 # Centrale logger
 logger = get_logger('flysafe_radar_correlation')
 
+# Correlate all pending observations in one statement. The score expression
+# mirrors RadarCorrelationAnalyzer.calculate_correlation_score; keep both in sync.
+CORRELATION_UPDATE_SQL = """
+    WITH pending AS (
+        SELECT id,
+               observation_date + observation_time AS observed_at,
+               COALESCE(intensity_level, 0) / 100.0 AS intensity
+        FROM radar_observations
+        WHERE correlation_score IS NULL
+    ),
+    windowed AS (
+        SELECT p.id, p.intensity, d.high_confidence_count, d.species_count,
+               LEAST(1.0, (d.high_confidence_count + d.species_count * 2) / 50.0) AS detection_score
+        FROM pending p
+        CROSS JOIN LATERAL (
+            SELECT COUNT(*) FILTER (WHERE confidence >= %(min_confidence)s) AS high_confidence_count,
+                   COUNT(DISTINCT species) AS species_count
+            FROM bird_detections
+            WHERE detection_timestamp >= p.observed_at - make_interval(hours => %(window_hours)s)
+              AND detection_timestamp <= p.observed_at + make_interval(hours => %(window_hours)s)
+        ) d
+    ),
+    scored AS (
+        SELECT id, high_confidence_count, species_count, intensity, detection_score,
+               GREATEST(0.0, 1.0 - ABS(intensity - detection_score) * 1.5) AS correlation
+        FROM windowed
+    )
+    UPDATE radar_observations r
+    SET bird_detections_count = s.high_confidence_count,
+        correlation_score = ROUND(
+            CASE
+                WHEN (s.intensity > 0.5 AND s.detection_score > 0.5)
+                  OR (s.intensity < 0.2 AND s.detection_score < 0.2)
+                THEN LEAST(1.0, s.correlation * 1.2)
+                ELSE s.correlation
+            END, 4)
+    FROM scored s
+    WHERE r.id = s.id
+    RETURNING r.id, r.observation_date, r.observation_time, r.intensity_level,
+              r.intensity_category, r.bird_detections_count, s.species_count,
+              r.correlation_score
+"""
+
 
 class RadarCorrelationAnalyzer:
     """Analyzes correlation between radar and BirdNET detections"""
@@ -82,62 +128,12 @@ class RadarCorrelationAnalyzer:
             logger.error(f"Failed to fetch uncorrelated observations: {e}")
             return []
 
-    def count_bird_detections(self, observation_date, observation_time, time_window_hours=2):
-        """
-        Count bird detections within time window of radar observation
-
-        Returns dict with:
-        - total_count: All detections in window
-        - high_confidence_count: Detections >= MIN_CONFIDENCE
-        - species_count: Unique species detected
-        - avg_confidence: Average confidence of detections
-        """
-        try:
-            conn = self.get_db_connection()
-            cur = conn.cursor(cursor_factory=RealDictCursor)
-
-            # Combine date and time to timestamp
-            obs_timestamp = datetime.combine(observation_date, observation_time)
-
-            # Calculate time window
-            start_time = obs_timestamp - timedelta(hours=time_window_hours)
-            end_time = obs_timestamp + timedelta(hours=time_window_hours)
-
-            query = """
-                SELECT
-                    COUNT(*) as total_count,
-                    COUNT(DISTINCT species) as species_count,
-                    AVG(confidence) as avg_confidence,
-                    SUM(CASE WHEN confidence >= %s THEN 1 ELSE 0 END) as high_confidence_count
-                FROM bird_detections
-                WHERE detection_timestamp >= %s
-                  AND detection_timestamp <= %s
-            """
-
-            cur.execute(query, (MIN_CONFIDENCE, start_time, end_time))
-            result = cur.fetchone()
-            conn.close()
-
-            return {
-                'total_count': int(result['total_count']) if result['total_count'] else 0,
-                'high_confidence_count': int(result['high_confidence_count']) if result['high_confidence_count'] else 0,
-                'species_count': int(result['species_count']) if result['species_count'] else 0,
-                'avg_confidence': float(result['avg_confidence']) if result['avg_confidence'] else 0.0
-            }
-
-        except Exception as e:
-            logger.error(f"Failed to count bird detections: {e}")
-            return {
-                'total_count': 0,
-                'high_confidence_count': 0,
-                'species_count': 0,
-                'avg_confidence': 0.0
-            }
-
     def calculate_correlation_score(self, intensity_level, detection_stats):
         """
         Calculate correlation score between radar intensity and bird detections
 
+        Python reference for the score computed in CORRELATION_UPDATE_SQL.
+
         Score ranges from 0.0 to 1.0:
         - 0.0: No correlation (no detections despite high radar intensity, or vice versa)
         - 1.0: Perfect correlation (high intensity = many detections, low intensity = few detections)
@@ -181,80 +177,51 @@ class RadarCorrelationAnalyzer:
 
         return round(correlation, 4)
 
-    def update_correlation(self, observation_id, detection_count, correlation_score):
-        """Update radar observation with correlation data"""
-        try:
-            conn = self.get_db_connection()
-            cur = conn.cursor()
+    def analyze_all(self):
+        """
+        Analyze correlation for all uncorrelated observations
 
-            query = """
-                UPDATE radar_observations
-                SET bird_detections_count = %s,
-                    correlation_score = %s
-                WHERE id = %s
-            """
+        Runs as one set-based statement (CORRELATION_UPDATE_SQL): every
+        pending observation is joined to the aggregate of its detection
+        window, scored and updated in a single UPDATE on one connection.
+        """
+        logger.info("=== Starting Radar-BirdNET Correlation Analysis ===")
 
-            cur.execute(query, (detection_count, correlation_score, observation_id))
+        conn = None
+        try:
+            conn = self.get_db_connection()
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute(CORRELATION_UPDATE_SQL, {
+                'min_confidence': MIN_CONFIDENCE,
+                'window_hours': TIME_WINDOW_HOURS
+            })
+            rows = cur.fetchall()
             conn.commit()
-            conn.close()
-
-            logger.info(f"Updated observation {observation_id}: {detection_count} detections, score: {correlation_score}")
-            return True
-
         except Exception as e:
-            logger.error(f"Failed to update correlation: {e}")
-            return False
-
-    def analyze_all(self):
-        """Analyze correlation for all uncorrelated observations"""
-        logger.info("=== Starting Radar-BirdNET Correlation Analysis ===")
-
-        observations = self.get_uncorrelated_observations()
+            logger.error(f"Failed to update correlations: {e}")
+            if conn:
+                conn.rollback()
+            return []
+        finally:
+            if conn:
+                conn.close()
 
-        if not observations:
+        if not rows:
             logger.info("No uncorrelated observations found")
             return []
 
-        results = []
-        for obs in observations:
-            obs_id = obs['id']
-            obs_date = obs['observation_date']
-            obs_time = obs['observation_time']
-            intensity = obs['intensity_level']
-            category = obs['intensity_category']
-
-            logger.info(f"Analyzing observation {obs_id}: {obs_date} {obs_time} - {category} ({intensity})")
-
-            # Count bird detections in time window
-            detection_stats = self.count_bird_detections(
-                obs_date,
-                obs_time,
-                time_window_hours=TIME_WINDOW_HOURS
-            )
-
-            # Calculate correlation score
-            correlation_score = self.calculate_correlation_score(
-                intensity,
-                detection_stats
-            )
-
-            # Update database
-            success = self.update_correlation(
-                obs_id,
-                detection_stats['high_confidence_count'],
-                correlation_score
-            )
-
-            if success:
-                results.append({
-                    'id': obs_id,
-                    'timestamp': f"{obs_date} {obs_time}",
-                    'intensity': intensity,
-                    'category': category,
-                    'detections': detection_stats['high_confidence_count'],
-                    'species': detection_stats['species_count'],
-                    'correlation': correlation_score
-                })
+        results = [
+            {
+                'id': row['id'],
+                'timestamp': f"{row['observation_date']} {row['observation_time']}",
+                'intensity': row['intensity_level'],
+                'category': row['intensity_category'],
+                'detections': row['bird_detections_count'],
+                'species': row['species_count'],
+                'correlation': float(row['correlation_score'])
+            }
+            for row in rows
+        ]
 
         logger.info(f"=== Correlation Analysis Complete: {len(results)} observations processed ===")
         return results
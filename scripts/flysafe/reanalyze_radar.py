@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+FlySafe Radar Bulk Re-analysis
+==============================
+
+Re-runs the color analysis over the saved radar images in
+IMAGES_DIR/<station>/<YYYY>/<MM>/<DD>/ and updates the matching
+radar_observations rows in bulk.
+
+- Only rows whose analyzer_version differs from color_analyzer.ANALYZER_VERSION
+  are processed, and every update stamps the current version, so an
+  interrupted run simply continues where it stopped
+- Images are decoded and analyzed in a multiprocessing pool (OpenCV decode
+  when available, see color_analyzer.decode_image)
+- Results are written with one UPDATE ... FROM (VALUES ...) per batch and
+  committed per batch
+- Re-analysed rows get correlation_score NULL again, so the next
+  radar_correlation.py run recomputes them against the new intensity
+- Progress and the final throughput are reported in images/sec
+
+Usage:
+    python reanalyze_radar.py                              # All stations, all dates
+    python reanalyze_radar.py --station herwijnen --since 2026-04-01
+    python reanalyze_radar.py --workers 4 --dry-run        # Analyze, don't write
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from color_analyzer import ANALYZER_VERSION, RadarColorAnalyzer, decode_image
+from core.config import get_postgres_config
+from core.logging import get_logger
+
+logger = get_logger('flysafe_reanalyze')
+
+IMAGES_DIR = Path("/mnt/usb/flysafe/images")
+BATCH_SIZE = 500  # Rows per UPDATE/commit
+POOL_CHUNKSIZE = 16  # Images per task sent to a worker
+
+# Analyzer per worker process, created on first use
+_analyzer = None
+
+
+def iter_images(images_dir: Path, stations: Optional[List[str]] = None,
+                since: Optional[date] = None, until: Optional[date] = None) -> Iterator[Path]:
+    """Yield radar PNGs from <station>/<YYYY>/<MM>/<DD>/, filtered on date directory"""
+    images_dir = Path(images_dir)
+    if not images_dir.exists():
+        return
+
+    for station_dir in sorted(images_dir.iterdir()):
+        if not station_dir.is_dir() or (stations and station_dir.name not in stations):
+            continue
+        for day_dir in sorted(station_dir.glob('[0-9][0-9][0-9][0-9]/[0-9][0-9]/[0-9][0-9]')):
+            try:
+                day = date(int(day_dir.parent.parent.name), int(day_dir.parent.name), int(day_dir.name))
+            except ValueError:
+                continue
+            if (since and day < since) or (until and day > until):
+                continue
+            yield from sorted(day_dir.glob('*.png'))
+
+
+def analyze_file(path: Path, region: str = 'netherlands') -> Tuple[Path, Optional[Dict]]:
+    """
+    Analyze one image in a worker process
+
+    Same result as RadarColorAnalyzer.analyze_image, without the per-image
+    log lines. Returns (path, {'intensity', 'score', 'direction'}) or
+    (path, None) if the image could not be decoded.
+    """
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = RadarColorAnalyzer()
+
+    try:
+        img_array = decode_image(path)
+    except Exception:
+        return path, None
+    if img_array is None:
+        return path, None
+
+    roi = _analyzer.define_roi(img_array.shape, region=region)
+    roi_array = img_array[roi]
+    counts = _analyzer.level_counts(roi_array)
+    intensity = _analyzer.intensity_from_counts(counts['roi'], roi_array.shape[0] * roi_array.shape[1])
+    return path, {
+        'intensity': intensity['intensity'],
+        'score': intensity['score'],
+        'direction': _analyzer.direction_from_counts(counts),
+    }
+
+
+def pending_observations(conn, version: int = ANALYZER_VERSION) -> Dict[str, int]:
+    """Image file name -> radar_observations id for rows not yet at this analyzer version"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT id, local_image_path
+            FROM radar_observations
+            WHERE local_image_path IS NOT NULL
+              AND analyzer_version IS DISTINCT FROM %s
+        """, (version,))
+        # File names are unique (radar_<station>_<timestamp>.png), so matching
+        # on name keeps working if the image tree has been moved
+        return {Path(path).name: row_id for row_id, path in cur.fetchall()}
+
+
+def update_observations(conn, results: List[Tuple[int, Dict]], version: int = ANALYZER_VERSION) -> int:
+    """Write a batch of (id, analysis) results in one UPDATE and commit; resets the correlation"""
+    if not results:
+        return 0
+
+    values = [(row_id, int(round(a['score'])), a['intensity'], version) for row_id, a in results]
+    with conn.cursor() as cur:
+        execute_values(cur, """
+            UPDATE radar_observations AS r
+            SET intensity_level = v.intensity_level,
+                intensity_category = v.intensity_category,
+                analyzer_version = v.analyzer_version,
+                analyzed_at = NOW(),
+                correlation_score = NULL
+            FROM (VALUES %s) AS v(id, intensity_level, intensity_category, analyzer_version)
+            WHERE r.id = v.id
+        """, values)
+    conn.commit()
+    return len(values)
+
+
+def reanalyze(conn, images_dir: Path = IMAGES_DIR, stations: Optional[List[str]] = None,
+              since: Optional[date] = None, until: Optional[date] = None,
+              workers: Optional[int] = None, dry_run: bool = False) -> Dict:
+    """
+    Re-analyze all pending images under images_dir
+
+    Returns dict with counts (analyzed, updated, failed, skipped) and
+    elapsed seconds / images_per_sec.
+    """
+    pending = pending_observations(conn)
+    images = [p for p in iter_images(images_dir, stations, since, until) if p.name in pending]
+    logger.info(f"{len(images)} images to re-analyze ({len(pending)} rows below version {ANALYZER_VERSION})")
+
+    stats = {'analyzed': 0, 'updated': 0, 'failed': 0, 'skipped': len(pending) - len(images)}
+    batch = []
+    start = time.monotonic()
+
+    with Pool(processes=workers or os.cpu_count() or 1) as pool:
+        for path, analysis in pool.imap_unordered(analyze_file, images, chunksize=POOL_CHUNKSIZE):
+            if analysis is None:
+                stats['failed'] += 1
+                logger.warning(f"Could not decode {path}")
+                continue
+
+            stats['analyzed'] += 1
+            batch.append((pending[path.name], analysis))
+            if len(batch) >= BATCH_SIZE:
+                if not dry_run:
+                    stats['updated'] += update_observations(conn, batch)
+                batch = []
+                elapsed = time.monotonic() - start
+                logger.info(f"{stats['analyzed']}/{len(images)} images "
+                            f"({stats['analyzed'] / elapsed:.0f} images/sec)")
+
+    if batch and not dry_run:
+        stats['updated'] += update_observations(conn, batch)
+
+    stats['elapsed'] = time.monotonic() - start
+    stats['images_per_sec'] = stats['analyzed'] / stats['elapsed'] if stats['elapsed'] > 0 else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-analyze historical FlySafe radar images in bulk')
+    parser.add_argument('--images-dir', type=Path, default=IMAGES_DIR, help='Radar image root')
+    parser.add_argument('--station', nargs='+', help='Only these stations')
+    parser.add_argument('--since', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(),
+                        help='First date (YYYY-MM-DD)')
+    parser.add_argument('--until', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(),
+                        help='Last date (YYYY-MM-DD)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--dry-run', action='store_true', help='Analyze without updating the database')
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**get_postgres_config())
+    try:
+        stats = reanalyze(conn, args.images_dir, args.station, args.since, args.until,
+                          workers=args.workers, dry_run=args.dry_run)
+    finally:
+        conn.close()
+
+    logger.info(f"Re-analysis complete: {stats['analyzed']} analyzed, {stats['updated']} updated, "
+                f"{stats['failed']} failed, {stats['skipped']} rows without image in range, "
+                f"{stats['elapsed']:.1f}s ({stats['images_per_sec']:.1f} images/sec)")
+    return 0 if stats['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,6 +12,8 @@ Features:
 - Seasonal patterns and trends
 - Migration prediction insights
 
+BirdNET counts come from the detections_hourly rollup (migration 022).
+
 Author: EMSN Team
 """
 
@@ -105,12 +107,13 @@ class SeasonalAnalyzer:
                 ),
                 bird_daily AS (
                     SELECT
-                        date,
-                        COUNT(*) as birdnet_detections,
+                        hour::date as date,
+                        SUM(count) as birdnet_detections,
                         COUNT(DISTINCT species) as species_count
-                    FROM bird_detections
-                    WHERE date >= CURRENT_DATE - INTERVAL '%s days'
-                    GROUP BY date
+                    FROM detections_hourly
+                    WHERE hour >= CURRENT_DATE - INTERVAL '%s days'
+                      AND count > 0
+                    GROUP BY hour::date
                 )
                 SELECT
                     ds.observation_date as date,
@@ -159,14 +162,14 @@ class SeasonalAnalyzer:
                 ),
                 species_daily AS (
                     SELECT
-                        date,
+                        hour::date as date,
                         species,
                         common_name,
-                        COUNT(*) as detections
-                    FROM bird_detections
-                    WHERE date >= CURRENT_DATE - INTERVAL '%s days'
-                      AND confidence >= 0.7
-                    GROUP BY date, species, common_name
+                        SUM(high_conf_count) as detections
+                    FROM detections_hourly
+                    WHERE hour >= CURRENT_DATE - INTERVAL '%s days'
+                      AND high_conf_count > 0
+                    GROUP BY hour::date, species, common_name
                 )
                 SELECT
                     sd.species,
@@ -237,15 +240,15 @@ class SeasonalAnalyzer:
                 SELECT
                     species,
                     common_name,
-                    COUNT(*) as total_detections,
-                    COUNT(DISTINCT date) as days_detected,
-                    MIN(date) as first_detection,
-                    MAX(date) as last_detection,
-                    AVG(confidence) as avg_confidence
-                FROM bird_detections
+                    SUM(high_conf_count) as total_detections,
+                    COUNT(DISTINCT hour::date) as days_detected,
+                    MIN(hour::date) as first_detection,
+                    MAX(hour::date) as last_detection,
+                    SUM(high_conf_avg * high_conf_count) / SUM(high_conf_count) as avg_confidence
+                FROM detections_hourly
                 WHERE species IN %s
-                  AND date >= CURRENT_DATE - INTERVAL '%s days'
-                  AND confidence >= 0.7
+                  AND hour >= CURRENT_DATE - INTERVAL '%s days'
+                  AND high_conf_count > 0
                 GROUP BY species, common_name
                 ORDER BY total_detections DESC
             """
@@ -279,13 +282,13 @@ class SeasonalAnalyzer:
                 ),
                 weekly_birds AS (
                     SELECT
-                        DATE_TRUNC('week', date) as week_start,
-                        COUNT(*) as bird_detections,
+                        DATE_TRUNC('week', hour::date) as week_start,
+                        SUM(high_conf_count) as bird_detections,
                         COUNT(DISTINCT species) as species_count
-                    FROM bird_detections
-                    WHERE date >= CURRENT_DATE - INTERVAL '%s weeks'
-                      AND confidence >= 0.7
-                    GROUP BY DATE_TRUNC('week', date)
+                    FROM detections_hourly
+                    WHERE hour >= CURRENT_DATE - INTERVAL '%s weeks'
+                      AND high_conf_count > 0
+                    GROUP BY DATE_TRUNC('week', hour::date)
                 )
                 SELECT
                     wr.week_start,
@@ -9,9 +9,14 @@ radar migration intensity.
 Features:
 - Per-species correlation with radar data
 - Species grouping (thrushes, geese, waders, etc.)
+- Lagged correlation (radar leading detections by 0-6 hours)
+- Bootstrap confidence intervals per species and group
 - Migration timing per species
 - Detection confidence analysis
 
+Detections are read from the detections_hourly rollup (migration 022),
+which scripts/sync/detections_hourly.py keeps up to date after each sync.
+
 Author: EMSN Team
 """
 
@@ -20,10 +25,13 @@ import json
 from datetime import datetime, timedelta
 from pathlib import Path
 import logging
+import numpy as np
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from collections import defaultdict
 
+from correlation_stats import bootstrap_ci, grouped_pearson, lagged_correlations
+
 # Import core modules
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -35,6 +43,8 @@ DB_CONFIG = get_postgres_config()
 LOGS_DIR = Path("/mnt/usb/logs")
 REPORTS_DIR = Path("/mnt/usb/flysafe/reports")
 
+MAX_LAG_HOURS = 6  # Radar leading detections by 0..6 hours
+
 # Species groups for aggregated analysis
 SPECIES_GROUPS = {
     'Lijsters': [
@@ -125,18 +135,18 @@ class SpeciesCorrelationAnalyzer:
                     GROUP BY observation_date, DATE_TRUNC('hour', observation_time)
                 ),
                 species_hourly AS (
-                    -- Count detections per species per hour
+                    -- High-confidence detections per species per hour (rollup, all stations)
                     SELECT
-                        date,
-                        DATE_TRUNC('hour', time)::time as hour,
-                        species,
-                        common_name,
-                        COUNT(*) as detections,
-                        AVG(confidence) as avg_confidence
-                    FROM bird_detections
-                    WHERE date >= CURRENT_DATE - INTERVAL '%s days'
-                      AND confidence >= 0.7
-                    GROUP BY date, DATE_TRUNC('hour', time), species, common_name
+                        dh.hour::date as date,
+                        dh.hour::time as hour,
+                        dh.species,
+                        MAX(dh.common_name) as common_name,
+                        SUM(dh.high_conf_count) as detections,
+                        SUM(dh.high_conf_avg * dh.high_conf_count) / SUM(dh.high_conf_count) as avg_confidence
+                    FROM detections_hourly dh
+                    WHERE dh.hour >= CURRENT_DATE - INTERVAL '%s days'
+                      AND dh.high_conf_count > 0
+                    GROUP BY dh.hour, dh.species
                 )
                 SELECT
                     sh.species,
@@ -169,83 +179,211 @@ class SpeciesCorrelationAnalyzer:
             logger.error(f"Failed to get species correlation: {e}")
             return []
 
-    def get_group_correlations(self, days=30):
+    def fetch_hourly_pairs(self, days=30):
         """
-        Calculate correlation for species groups
+        Fetch (species, hour, detections, radar intensity) for every hour a
+        species was detected and radar data exists, as NumPy columns
+
+        Same pairs as the species_hourly/radar_hourly join in
+        get_species_radar_correlation. The query returns one row of arrays,
+        so no per-row Python objects are built.
         """
         try:
             conn = self.get_db_connection()
-            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur = conn.cursor()
 
-            # Get all detections with radar match
             query = """
                 WITH radar_hourly AS (
                     SELECT
-                        observation_date,
-                        DATE_TRUNC('hour', observation_time)::time as hour,
+                        observation_date + DATE_TRUNC('hour', observation_time)::time as hour,
                         AVG(intensity_level) as intensity
                     FROM radar_observations
                     WHERE observation_date >= CURRENT_DATE - INTERVAL '%s days'
-                    GROUP BY observation_date, DATE_TRUNC('hour', observation_time)
+                    GROUP BY 1
+                ),
+                species_hourly AS (
+                    SELECT species, hour, SUM(high_conf_count) as detections
+                    FROM detections_hourly
+                    WHERE hour >= CURRENT_DATE - INTERVAL '%s days'
+                      AND high_conf_count > 0
+                    GROUP BY species, hour
                 )
                 SELECT
-                    bd.species,
-                    bd.date,
-                    DATE_TRUNC('hour', bd.time)::time as hour,
-                    COUNT(*) as detections,
-                    rh.intensity
-                FROM bird_detections bd
-                JOIN radar_hourly rh
-                    ON bd.date = rh.observation_date
-                    AND DATE_TRUNC('hour', bd.time)::time = rh.hour
-                WHERE bd.date >= CURRENT_DATE - INTERVAL '%s days'
-                  AND bd.confidence >= 0.7
-                GROUP BY bd.species, bd.date, DATE_TRUNC('hour', bd.time), rh.intensity
+                    ARRAY_AGG(sh.species),
+                    ARRAY_AGG(EXTRACT(EPOCH FROM sh.hour)::bigint),
+                    ARRAY_AGG(sh.detections::float8),
+                    ARRAY_AGG(COALESCE(rh.intensity, 0)::float8)
+                FROM species_hourly sh
+                JOIN radar_hourly rh ON sh.hour = rh.hour
             """
 
             cur.execute(query, (days, days))
-            results = cur.fetchall()
+            species, hours, detections, intensities = cur.fetchone()
             conn.close()
 
-            # Aggregate by group
-            group_data = defaultdict(lambda: {'detections': [], 'intensities': []})
+            return {
+                'species': np.array(species or [], dtype=object),
+                'hour': np.array(hours or [], dtype=np.int64),
+                'detections': np.array(detections or [], dtype=np.float64),
+                'intensity': np.array(intensities or [], dtype=np.float64)
+            }
 
-            for row in results:
-                species = row['species']
-                group = SPECIES_TO_GROUP.get(species, 'Overig')
-                group_data[group]['detections'].append(float(row['detections']))
-                group_data[group]['intensities'].append(float(row['intensity'] or 0))
-
-            # Calculate correlation per group
-            group_correlations = []
-            for group, data in group_data.items():
-                if len(data['detections']) >= 5:
-                    # Calculate Pearson correlation manually
-                    n = len(data['detections'])
-                    sum_x = sum(data['detections'])
-                    sum_y = sum(data['intensities'])
-                    sum_xy = sum(x * y for x, y in zip(data['detections'], data['intensities']))
-                    sum_x2 = sum(x ** 2 for x in data['detections'])
-                    sum_y2 = sum(y ** 2 for y in data['intensities'])
-
-                    numerator = n * sum_xy - sum_x * sum_y
-                    denominator = ((n * sum_x2 - sum_x ** 2) * (n * sum_y2 - sum_y ** 2)) ** 0.5
-
-                    correlation = numerator / denominator if denominator != 0 else 0
-
-                    group_correlations.append({
-                        'group': group,
-                        'data_points': n,
-                        'total_detections': int(sum_x),
-                        'correlation': round(correlation, 4),
-                        'avg_intensity_when_detected': round(sum_y / n, 1)
-                    })
+        except Exception as e:
+            logger.error(f"Failed to fetch hourly pairs: {e}")
+            return None
+
+    def get_group_correlations(self, days=30, pairs=None):
+        """
+        Calculate correlation for species groups
+
+        Pearson r over the pooled (detections, intensity) pairs of all
+        species in a group, for all groups at once, with a bootstrap
+        confidence interval per group
+        """
+        if pairs is None:
+            pairs = self.fetch_hourly_pairs(days)
+        if pairs is None or not pairs['species'].size:
+            return []
+
+        group_names = sorted(set(SPECIES_GROUPS) | {'Overig'})
+        group_index = {group: i for i, group in enumerate(group_names)}
+        unique_species, species_ids = np.unique(pairs['species'], return_inverse=True)
+        species_groups = np.array([group_index[SPECIES_TO_GROUP.get(sp, 'Overig')] for sp in unique_species],
+                                  dtype=np.intp)
+        group_ids = species_groups[species_ids]
+
+        stats = grouped_pearson(group_ids, pairs['detections'], pairs['intensity'], len(group_names))
+
+        group_correlations = []
+        for i, group in enumerate(group_names):
+            n = int(stats['n'][i])
+            if n < 5:
+                continue
+            mask = group_ids == i
+            ci_low, ci_high = bootstrap_ci(pairs['detections'][mask], pairs['intensity'][mask])
+            group_correlations.append({
+                'group': group,
+                'data_points': n,
+                'total_detections': int(stats['sum_x'][i]),
+                'correlation': round(float(stats['r'][i]), 4),
+                'ci_low': round(ci_low, 4),
+                'ci_high': round(ci_high, 4),
+                'avg_intensity_when_detected': round(float(stats['mean_y'][i]), 1)
+            })
+
+        return sorted(group_correlations, key=lambda x: x['correlation'], reverse=True)
+
+    def get_species_confidence_intervals(self, pairs, species_list):
+        """Bootstrap confidence interval of r per species, from fetch_hourly_pairs"""
+        if pairs is None or not pairs['species'].size:
+            return {}
+
+        order = np.argsort(pairs['species'], kind='stable')
+        sorted_species = pairs['species'][order]
+        intervals = {}
+        for species in species_list:
+            start = np.searchsorted(sorted_species, species, side='left')
+            end = np.searchsorted(sorted_species, species, side='right')
+            idx = order[start:end]
+            if idx.size >= 3:
+                intervals[species] = bootstrap_ci(pairs['detections'][idx], pairs['intensity'][idx])
+        return intervals
+
+    def get_lagged_correlations(self, days=30, max_lag=MAX_LAG_HOURS, min_detections=20):
+        """
+        Cross-correlation with radar leading detections by 0..max_lag hours
+
+        Uses continuous hourly series (hours without detections count as 0,
+        hours without radar are skipped), per group and per species with at
+        least min_detections high-confidence detections
+        """
+        try:
+            conn = self.get_db_connection()
+            cur = conn.cursor()
+
+            cur.execute("""
+                SELECT
+                    ARRAY_AGG(EXTRACT(EPOCH FROM hour)::bigint),
+                    ARRAY_AGG(intensity::float8)
+                FROM (
+                    SELECT
+                        observation_date + DATE_TRUNC('hour', observation_time)::time as hour,
+                        AVG(intensity_level) as intensity
+                    FROM radar_observations
+                    WHERE observation_date >= CURRENT_DATE - INTERVAL '%s days'
+                      AND intensity_level IS NOT NULL
+                    GROUP BY 1
+                ) radar_hourly
+            """, (days,))
+            radar_hours, radar_values = cur.fetchone()
 
-            return sorted(group_correlations, key=lambda x: x['correlation'], reverse=True)
+            cur.execute("""
+                SELECT
+                    ARRAY_AGG(species),
+                    ARRAY_AGG(EXTRACT(EPOCH FROM hour)::bigint),
+                    ARRAY_AGG(detections::float8)
+                FROM (
+                    SELECT species, hour, SUM(high_conf_count) as detections
+                    FROM detections_hourly
+                    WHERE hour >= CURRENT_DATE - INTERVAL '%s days'
+                      AND high_conf_count > 0
+                    GROUP BY species, hour
+                ) species_hourly
+            """, (days,))
+            det_species, det_hours, det_values = cur.fetchone()
+            conn.close()
 
         except Exception as e:
-            logger.error(f"Failed to get group correlations: {e}")
-            return []
+            logger.error(f"Failed to get lagged correlations: {e}")
+            return {'groups': [], 'species': []}
+
+        if not radar_hours or not det_hours:
+            return {'groups': [], 'species': []}
+
+        radar_hours = np.array(radar_hours, dtype=np.int64)
+        det_hours = np.array(det_hours, dtype=np.int64)
+        det_values = np.array(det_values, dtype=np.float64)
+        first = min(radar_hours.min(), det_hours.min())
+        n_hours = int((max(radar_hours.max(), det_hours.max()) - first) // 3600) + 1
+
+        radar = np.full(n_hours, np.nan)
+        radar[(radar_hours - first) // 3600] = radar_values
+
+        unique_species, species_ids = np.unique(np.array(det_species, dtype=object), return_inverse=True)
+        series = np.zeros((unique_species.size, n_hours))
+        np.add.at(series, (species_ids, (det_hours - first) // 3600), det_values)
+
+        group_names = sorted(set(SPECIES_GROUPS) | {'Overig'})
+        group_index = {group: i for i, group in enumerate(group_names)}
+        species_groups = np.array([group_index[SPECIES_TO_GROUP.get(sp, 'Overig')] for sp in unique_species],
+                                  dtype=np.intp)
+        group_series = np.zeros((len(group_names), n_hours))
+        np.add.at(group_series, species_groups, series)
+
+        totals = series.sum(axis=1)
+        selected = np.flatnonzero(totals >= min_detections)
+
+        def lag_rows(names, lagged, counts):
+            rows = []
+            for name, r, count in zip(names, lagged, counts):
+                if count == 0 or np.all(np.isnan(r)):
+                    continue
+                best = int(np.nanargmax(np.abs(r)))
+                rows.append({
+                    'name': name,
+                    'total_detections': int(count),
+                    'correlations': [None if np.isnan(v) else round(float(v), 4) for v in r],
+                    'best_lag_hours': best,
+                    'best_correlation': round(float(r[best]), 4)
+                })
+            return sorted(rows, key=lambda x: abs(x['best_correlation']), reverse=True)
+
+        return {
+            'groups': lag_rows(group_names, lagged_correlations(radar, group_series, max_lag),
+                               group_series.sum(axis=1)),
+            'species': lag_rows(unique_species[selected], lagged_correlations(radar, series[selected], max_lag),
+                                totals[selected])
+        }
 
     def get_nocturnal_vs_diurnal(self, days=30):
         """
@@ -260,46 +398,51 @@ class SpeciesCorrelationAnalyzer:
                 WITH radar_with_period AS (
                     SELECT
                         observation_date,
-                        observation_time,
-                        intensity_level,
                         CASE
                             WHEN EXTRACT(HOUR FROM observation_time) >= 20
                               OR EXTRACT(HOUR FROM observation_time) < 6
                             THEN 'night'
                             ELSE 'day'
-                        END as period
+                        END as period,
+                        COUNT(*) as observations,
+                        COUNT(intensity_level) as intensity_count,
+                        SUM(intensity_level) as intensity_sum
                     FROM radar_observations
                     WHERE observation_date >= CURRENT_DATE - INTERVAL '%s days'
+                    GROUP BY 1, 2
                 ),
                 birds_with_period AS (
                     SELECT
                         species,
                         common_name,
-                        date,
-                        time,
-                        confidence,
+                        hour::date as date,
                         CASE
-                            WHEN EXTRACT(HOUR FROM time) >= 20
-                              OR EXTRACT(HOUR FROM time) < 6
+                            WHEN EXTRACT(HOUR FROM hour) >= 20
+                              OR EXTRACT(HOUR FROM hour) < 6
                             THEN 'night'
                             ELSE 'day'
-                        END as period
-                    FROM bird_detections
-                    WHERE date >= CURRENT_DATE - INTERVAL '%s days'
-                      AND confidence >= 0.7
+                        END as period,
+                        SUM(high_conf_count) as detections
+                    FROM detections_hourly
+                    WHERE hour >= CURRENT_DATE - INTERVAL '%s days'
+                      AND high_conf_count > 0
+                    GROUP BY 1, 2, 3, 4
                 )
+                -- Every detection is paired with every radar observation of the
+                -- same date and period, so counts are weighted by both sides
                 SELECT
                     bp.species,
                     bp.common_name,
                     bp.period,
-                    COUNT(*) as detections,
-                    AVG(rp.intensity_level) as avg_radar_intensity
+                    SUM(bp.detections * rp.observations)::bigint as detections,
+                    SUM(bp.detections * rp.intensity_sum)
+                        / NULLIF(SUM(bp.detections * rp.intensity_count), 0) as avg_radar_intensity
                 FROM birds_with_period bp
                 JOIN radar_with_period rp
                     ON bp.date = rp.observation_date
                     AND bp.period = rp.period
                 GROUP BY bp.species, bp.common_name, bp.period
-                HAVING COUNT(*) >= 5
+                HAVING SUM(bp.detections * rp.observations) >= 5
                 ORDER BY bp.species, bp.period
             """
 
@@ -391,19 +534,33 @@ class SpeciesCorrelationAnalyzer:
             'period_days': days,
             'species_correlations': [],
             'group_correlations': [],
+            'lagged_correlations': {},
             'nocturnal_analysis': [],
             'peak_migration_species': [],
             'summary': {}
         }
 
-        # Individual species correlations
+        # Hourly (detections, intensity) pairs, shared by the group and CI calculations
+        pairs = self.fetch_hourly_pairs(days)
+
+        # Individual species correlations (PostgreSQL CORR) with bootstrap intervals
         species_corr = self.get_species_radar_correlation(days)
-        report['species_correlations'] = [dict(row) for row in species_corr]
+        intervals = self.get_species_confidence_intervals(pairs, [row['species'] for row in species_corr])
+        report['species_correlations'] = []
+        for row in species_corr:
+            entry = dict(row)
+            ci_low, ci_high = intervals.get(row['species'], (None, None))
+            entry['ci_low'] = round(ci_low, 4) if ci_low is not None else None
+            entry['ci_high'] = round(ci_high, 4) if ci_high is not None else None
+            report['species_correlations'].append(entry)
 
         # Group correlations
-        group_corr = self.get_group_correlations(days)
+        group_corr = self.get_group_correlations(days, pairs=pairs)
         report['group_correlations'] = group_corr
 
+        # Radar leading detections
+        report['lagged_correlations'] = self.get_lagged_correlations(days)
+
         # Nocturnal vs diurnal
         nocturnal = self.get_nocturnal_vs_diurnal(days)
         report['nocturnal_analysis'] = nocturnal
@@ -437,13 +594,13 @@ class SpeciesCorrelationAnalyzer:
 
     def print_report(self, report):
         """Print human-readable report"""
-        print("\n" + "="*70)
+        print("\n" + "=" * 70)
         print("  SOORT-SPECIFIEKE RADAR CORRELATIE")
-        print("="*70)
+        print("=" * 70)
 
         # Top correlated species
         print("\n🔝 Top Soorten met Radar Correlatie:")
-        print("-"*70)
+        print("-" * 70)
         for sp in report['species_correlations'][:15]:
             corr = sp['correlation']
             if corr:
@@ -460,16 +617,25 @@ class SpeciesCorrelationAnalyzer:
         # Group correlations
         if report['group_correlations']:
             print("\n📊 Soortgroep Correlaties:")
-            print("-"*70)
+            print("-" * 70)
             for g in report['group_correlations']:
                 corr = g['correlation']
                 indicator = '🟢' if corr > 0.3 else '🟡' if corr > 0 else '🔴'
-                print(f"  {indicator} {g['group']:20} r={corr:+.4f} ({g['total_detections']} detecties)")
+                print(f"  {indicator} {g['group']:20} r={corr:+.4f} "
+                      f"[{g['ci_low']:+.2f}, {g['ci_high']:+.2f}] ({g['total_detections']} detecties)")
+
+        # Lagged correlations
+        lagged = report.get('lagged_correlations', {}).get('groups', [])
+        if lagged:
+            print("\n⏱️  Radar Voorloop (beste vertraging 0-6 uur):")
+            print("-" * 70)
+            for g in lagged:
+                print(f"  • {g['name']:20} +{g['best_lag_hours']}u r={g['best_correlation']:+.3f}")
 
         # Nocturnal analysis
         if report['nocturnal_analysis']:
             print("\n🌙 Nacht vs Dag Analyse:")
-            print("-"*70)
+            print("-" * 70)
             nocturnal = [n for n in report['nocturnal_analysis'] if n['primarily_nocturnal']][:10]
             if nocturnal:
                 print("  Voornamelijk nachtelijke trekkers:")
@@ -479,12 +645,12 @@ class SpeciesCorrelationAnalyzer:
         # Peak migration species
         if report['peak_migration_species']:
             print("\n⚡ Meest Actief bij Hoge Radar Intensiteit:")
-            print("-"*70)
+            print("-" * 70)
             for sp in report['peak_migration_species'][:10]:
                 name = sp['common_name'] or sp['species']
                 print(f"  • {name:30} {sp['detections_during_high_radar']} detecties")
 
-        print("\n" + "="*70 + "\n")
+        print("\n" + "=" * 70 + "\n")
 
 
 def main():
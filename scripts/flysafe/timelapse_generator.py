@@ -6,6 +6,13 @@ FlySafe Radar Timelapse Generator
 Creates timelapse videos from saved radar images to visualize
 bird migration patterns over time.
 
+By default frames are streamed: a worker pool decodes the PNGs and draws
+the timestamp overlay, and the raw RGB frames are piped to ffmpeg's stdin
+in windows of FRAME_WINDOW frames. No intermediate PNGs are written, so a
+weekly timelapse needs no temp disk space and memory stays bounded.
+GIFs go through ffmpeg palettegen/paletteuse on at most GIF_MAX_FRAMES
+frames. --no-stream keeps the old temp-dir route.
+
 Requirements:
 - ffmpeg (for video generation)
 - PIL/Pillow (for image processing)
@@ -17,7 +24,10 @@ import os
 import sys
 import subprocess
 import shutil
+from collections import deque
 from datetime import datetime, timedelta
+from itertools import islice
+from multiprocessing import Pool
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont
 
@@ -31,9 +41,71 @@ IMAGES_DIR = STORAGE_BASE / "images"
 TIMELAPSE_DIR = STORAGE_BASE / "timelapses"
 LOGS_DIR = Path("/mnt/usb/logs")
 
+FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+FRAME_WINDOW = 32  # Max frames in flight between the worker pool and ffmpeg
+GIF_MAX_FRAMES = 50
+GIF_SIZE = (320, 215)
+GIF_FRAME_MS = 250
+
 # Centrale logger
 logger = get_logger('flysafe_timelapse_generator')
 
+# Overlay font per worker process, loaded on first use
+_font = None
+
+
+def _overlay_font():
+    """Bold DejaVu font, or PIL's default font if it is not installed"""
+    global _font
+    if _font is None:
+        try:
+            _font = ImageFont.truetype(FONT_PATH, 20)
+        except (IOError, OSError):
+            _font = ImageFont.load_default()
+    return _font
+
+
+def draw_timestamp(img, timestamp):
+    """Draw the timestamp with a dark background box in the top-left corner"""
+    draw = ImageDraw.Draw(img)
+    text = timestamp.strftime('%Y-%m-%d %H:%M')
+    bbox = draw.textbbox((10, 10), text, font=_overlay_font())
+    padding = 5
+    draw.rectangle(
+        [bbox[0] - padding, bbox[1] - padding,
+         bbox[2] + padding, bbox[3] + padding],
+        fill=(0, 0, 0, 180)
+    )
+    draw.text((10, 10), text, fill=(255, 255, 255), font=_overlay_font())
+
+
+def render_frame(task):
+    """
+    Decode one image and return it as raw RGB bytes (runs in a worker)
+
+    Args:
+        task: (path, timestamp or None for no overlay, (width, height))
+
+    Returns:
+        bytes of length width * height * 3, or None if the image can't be read
+    """
+    path, timestamp, size = task
+    try:
+        with Image.open(path) as src:
+            img = src.convert('RGB')
+    except Exception as e:
+        logger.warning(f"Skipping unreadable frame {path}: {e}")
+        return None
+
+    if img.size != size:
+        img = img.resize(size, Image.Resampling.LANCZOS)
+    if timestamp is not None:
+        try:
+            draw_timestamp(img, timestamp)
+        except Exception as e:
+            logger.error(f"Failed to add overlay: {e}")
+    return img.tobytes()
+
 
 class TimelapseGenerator:
     """Generates timelapse videos from radar images"""
@@ -75,31 +147,7 @@ class TimelapseGenerator:
         """Add timestamp overlay to image"""
         try:
             img = Image.open(image_path)
-
-            # Create draw object
-            draw = ImageDraw.Draw(img)
-
-            # Try to use a nice font, fallback to default
-            try:
-                font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 20)
-            except (IOError, OSError):
-                font = ImageFont.load_default()
-
-            # Format timestamp
-            text = timestamp.strftime('%Y-%m-%d %H:%M')
-
-            # Add semi-transparent background for text
-            bbox = draw.textbbox((10, 10), text, font=font)
-            padding = 5
-            draw.rectangle(
-                [bbox[0] - padding, bbox[1] - padding,
-                 bbox[2] + padding, bbox[3] + padding],
-                fill=(0, 0, 0, 180)
-            )
-
-            # Draw text
-            draw.text((10, 10), text, fill=(255, 255, 255), font=font)
-
+            draw_timestamp(img, timestamp)
             img.save(output_path)
             return True
 
@@ -109,7 +157,64 @@ class TimelapseGenerator:
             shutil.copy(image_path, output_path)
             return False
 
-    def create_timelapse(self, station, start_date, end_date, fps=4, output_name=None):
+    def stream_to_ffmpeg(self, tasks, size, fps, output_args, workers=None):
+        """
+        Render frames in a worker pool and pipe them to ffmpeg as raw RGB
+
+        At most FRAME_WINDOW frames are in flight (rendering or waiting to
+        be written), so memory stays bounded and nothing touches the disk.
+
+        Args:
+            tasks: list of render_frame tasks (path, timestamp or None, size)
+            size: (width, height) of every frame
+            fps: input frame rate
+            output_args: ffmpeg arguments after the input (filters, codec, output)
+            workers: worker processes (default: CPU count)
+
+        Returns:
+            Number of frames written, or None if ffmpeg failed
+        """
+        width, height = size
+        cmd = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'rgb24',
+            '-s', f"{width}x{height}",
+            '-framerate', str(fps),
+            '-i', '-'
+        ] + output_args
+
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        written = 0
+        try:
+            with Pool(processes=workers or os.cpu_count()) as pool:
+                remaining = iter(tasks)
+                pending = deque(pool.apply_async(render_frame, (task,))
+                                for task in islice(remaining, FRAME_WINDOW))
+                while pending:
+                    frame = pending.popleft().get()
+                    task = next(remaining, None)
+                    if task is not None:
+                        pending.append(pool.apply_async(render_frame, (task,)))
+                    if frame is not None:
+                        proc.stdin.write(frame)
+                        written += 1
+        except BrokenPipeError:
+            pass  # ffmpeg exited early; its stderr explains why
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+            stderr = proc.stderr.read().decode(errors='replace')
+            proc.wait()
+
+        if proc.returncode != 0:
+            logger.error(f"ffmpeg error: {stderr}")
+            return None
+        return written
+
+    def create_timelapse(self, station, start_date, end_date, fps=4, output_name=None, streaming=True):
         """
         Create timelapse video from radar images
 
@@ -119,6 +224,7 @@ class TimelapseGenerator:
             end_date: End date (datetime or string YYYY-MM-DD)
             fps: Frames per second (default 4)
             output_name: Custom output filename
+            streaming: Pipe frames to ffmpeg (default) instead of writing temp PNGs
         """
         # Parse dates if strings
         if isinstance(start_date, str):
@@ -135,6 +241,43 @@ class TimelapseGenerator:
             logger.warning("No images found for timelapse")
             return None
 
+        # Generate output filename
+        if output_name is None:
+            output_name = f"timelapse_{station}_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.mp4"
+
+        output_path = TIMELAPSE_DIR / output_name
+
+        # libx264 with yuv420p needs even dimensions
+        encode_args = [
+            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+            '-c:v', 'libx264',
+            '-pix_fmt', 'yuv420p',
+            '-crf', '23',
+            '-preset', 'medium',
+            str(output_path)
+        ]
+
+        if not streaming:
+            return self._create_timelapse_from_temp_frames(images, fps, encode_args, output_path)
+
+        try:
+            with Image.open(images[0]['path']) as first:
+                size = first.size
+        except Exception as e:
+            logger.error(f"Cannot read first frame {images[0]['path']}: {e}")
+            return None
+
+        logger.info(f"Streaming {len(images)} frames to ffmpeg at {fps} fps...")
+        tasks = [(img_info['path'], img_info['timestamp'], size) for img_info in images]
+        frames = self.stream_to_ffmpeg(tasks, size, fps, encode_args)
+
+        if frames:
+            logger.info(f"Timelapse created: {output_path} ({frames} frames)")
+            return str(output_path)
+        return None
+
+    def _create_timelapse_from_temp_frames(self, images, fps, encode_args, output_path):
+        """Non-streaming route: overlay PNGs in a temp dir, then ffmpeg on the PNG sequence"""
         # Create temp directory for processed frames
         temp_dir = TIMELAPSE_DIR / f"temp_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         temp_dir.mkdir(parents=True, exist_ok=True)
@@ -150,25 +293,14 @@ class TimelapseGenerator:
                     frame_path
                 )
 
-            # Generate output filename
-            if output_name is None:
-                output_name = f"timelapse_{station}_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.mp4"
-
-            output_path = TIMELAPSE_DIR / output_name
-
             # Create video with ffmpeg
             logger.info(f"Generating video at {fps} fps...")
 
             cmd = [
                 'ffmpeg', '-y',
                 '-framerate', str(fps),
-                '-i', str(temp_dir / 'frame_%05d.png'),
-                '-c:v', 'libx264',
-                '-pix_fmt', 'yuv420p',
-                '-crf', '23',
-                '-preset', 'medium',
-                str(output_path)
-            ]
+                '-i', str(temp_dir / 'frame_%05d.png')
+            ] + encode_args
 
             result = subprocess.run(cmd, capture_output=True, text=True)
 
@@ -184,7 +316,7 @@ class TimelapseGenerator:
             if temp_dir.exists():
                 shutil.rmtree(temp_dir)
 
-    def create_daily_timelapse(self, station, date=None):
+    def create_daily_timelapse(self, station, date=None, streaming=True):
         """Create timelapse for a single day"""
         if date is None:
             date = datetime.now().date()
@@ -196,10 +328,11 @@ class TimelapseGenerator:
 
         return self.create_timelapse(
             station, start, end, fps=2,
-            output_name=f"timelapse_{station}_{date.strftime('%Y%m%d')}_daily.mp4"
+            output_name=f"timelapse_{station}_{date.strftime('%Y%m%d')}_daily.mp4",
+            streaming=streaming
         )
 
-    def create_weekly_timelapse(self, station, end_date=None):
+    def create_weekly_timelapse(self, station, end_date=None, streaming=True):
         """Create timelapse for the last 7 days"""
         if end_date is None:
             end_date = datetime.now()
@@ -210,11 +343,18 @@ class TimelapseGenerator:
 
         return self.create_timelapse(
             station, start_date, end_date, fps=6,
-            output_name=f"timelapse_{station}_{end_date.strftime('%Y%m%d')}_weekly.mp4"
+            output_name=f"timelapse_{station}_{end_date.strftime('%Y%m%d')}_weekly.mp4",
+            streaming=streaming
         )
 
-    def create_gif(self, station, start_date, end_date, output_name=None):
-        """Create animated GIF from radar images (for sharing)"""
+    def create_gif(self, station, start_date, end_date, output_name=None, streaming=True):
+        """
+        Create animated GIF from radar images (for sharing)
+
+        Streaming mode pipes at most GIF_MAX_FRAMES downscaled frames to
+        ffmpeg palettegen/paletteuse; that window is also all ffmpeg buffers
+        for the palette.
+        """
         if isinstance(start_date, str):
             start_date = datetime.strptime(start_date, '%Y-%m-%d')
         if isinstance(end_date, str):
@@ -226,22 +366,34 @@ class TimelapseGenerator:
             logger.warning("No images found for GIF")
             return None
 
-        # Limit to max 50 frames for GIF
-        if len(images) > 50:
-            step = len(images) // 50
-            images = images[::step][:50]
+        # Limit to max GIF_MAX_FRAMES frames for GIF
+        if len(images) > GIF_MAX_FRAMES:
+            step = len(images) // GIF_MAX_FRAMES
+            images = images[::step][:GIF_MAX_FRAMES]
 
         if output_name is None:
             output_name = f"radar_{station}_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.gif"
 
         output_path = TIMELAPSE_DIR / output_name
 
+        if streaming:
+            tasks = [(img_info['path'], None, GIF_SIZE) for img_info in images]
+            frames = self.stream_to_ffmpeg(tasks, GIF_SIZE, 1000 / GIF_FRAME_MS, [
+                '-filter_complex', '[0:v]split[a][b];[a]palettegen=stats_mode=diff[p];[b][p]paletteuse',
+                '-loop', '0',
+                str(output_path)
+            ])
+            if frames:
+                logger.info(f"GIF created: {output_path} ({frames} frames)")
+                return str(output_path)
+            return None
+
         try:
             frames = []
             for img_info in images:
                 img = Image.open(img_info['path'])
                 # Resize for smaller GIF
-                img = img.resize((320, 215), Image.Resampling.LANCZOS)
+                img = img.resize(GIF_SIZE, Image.Resampling.LANCZOS)
                 frames.append(img)
 
             if frames:
@@ -249,7 +401,7 @@ class TimelapseGenerator:
                     output_path,
                     save_all=True,
                     append_images=frames[1:],
-                    duration=250,  # 250ms per frame
+                    duration=GIF_FRAME_MS,
                     loop=0
                 )
                 logger.info(f"GIF created: {output_path}")
@@ -273,10 +425,13 @@ def main():
     parser.add_argument('--gif', action='store_true', help='Create GIF instead of video')
     parser.add_argument('--fps', type=int, default=4, help='Frames per second')
     parser.add_argument('--list', action='store_true', help='List available images')
+    parser.add_argument('--no-stream', action='store_true',
+                        help='Write overlay frames to a temp dir instead of piping them to ffmpeg')
 
     args = parser.parse_args()
 
     generator = TimelapseGenerator()
+    streaming = not args.no_stream
 
     if args.list:
         # List available images
@@ -290,14 +445,14 @@ def main():
         return
 
     if args.daily:
-        generator.create_daily_timelapse(args.station, args.start)
+        generator.create_daily_timelapse(args.station, args.start, streaming=streaming)
     elif args.weekly:
-        generator.create_weekly_timelapse(args.station, args.end)
+        generator.create_weekly_timelapse(args.station, args.end, streaming=streaming)
     elif args.start and args.end:
         if args.gif:
-            generator.create_gif(args.station, args.start, args.end)
+            generator.create_gif(args.station, args.start, args.end, streaming=streaming)
         else:
-            generator.create_timelapse(args.station, args.start, args.end, fps=args.fps)
+            generator.create_timelapse(args.station, args.start, args.end, fps=args.fps, streaming=streaming)
     else:
         print("Please specify --daily, --weekly, or --start/--end dates")
         print("Use --list to see available images")
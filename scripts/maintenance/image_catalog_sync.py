@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+EMSN Image Catalog Sync
+
+Houdt de image_catalog tabel (scripts/core/image_catalog.py) bij:
+- add: registreer nieuwe beelden direct na capture
+- reconcile: vergelijk de dag-mappen van de laatste dagen met de catalogus
+  (--full: de complete boom, eenmalig na migratie 023)
+- latest / range: snelle lookup vanaf de command line
+
+Gebruik:
+    ./image_catalog_sync.py add --source nestbox --camera midden /pad/midden_20260108_200012.jpg
+    ./image_catalog_sync.py reconcile                  # Laatste 2 dagen, alle camera's
+    ./image_catalog_sync.py reconcile --source nestbox --days 7
+    ./image_catalog_sync.py reconcile --full
+    ./image_catalog_sync.py latest --source nestbox --camera voor
+
+Draait via systemd timer (image-catalog-sync.timer, elk uur)
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add core modules path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.image_catalog import CATALOG_SOURCES, RECONCILE_DAYS, CatalogError, ImageCatalog
+from core.logging import get_logger
+
+# Centrale logger
+logger = get_logger('image_catalog_sync')
+
+
+def cameras_for(source, camera):
+    """(bron, camera) paren voor de opgegeven filters."""
+    sources = [source] if source else list(CATALOG_SOURCES)
+    return [(s, c) for s in sources for c in CATALOG_SOURCES[s] if camera in (None, c)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='EMSN image catalog bijwerken en bevragen')
+    parser.add_argument('command', choices=['add', 'reconcile', 'latest', 'range'])
+    parser.add_argument('paths', nargs='*', help='Beelden voor add')
+    parser.add_argument('--source', choices=list(CATALOG_SOURCES), help='Alleen deze bron')
+    parser.add_argument('--camera', help='Alleen deze camera')
+    parser.add_argument('--days', type=int, default=RECONCILE_DAYS,
+                        help=f'Reconcile: aantal dag-mappen terug (default: {RECONCILE_DAYS})')
+    parser.add_argument('--full', action='store_true', help='Reconcile: complete boom scannen')
+    args = parser.parse_args()
+
+    targets = cameras_for(args.source, args.camera)
+    if not targets:
+        parser.error('Onbekende camera voor deze bron')
+
+    try:
+        with ImageCatalog() as catalog:
+            if args.command == 'add':
+                if not args.source or not args.camera:
+                    parser.error('add vereist --source en --camera')
+                for path in args.paths:
+                    catalog.add(args.source, args.camera, path)
+                logger.info(f"{len(args.paths)} beeld(en) geregistreerd voor {args.source}/{args.camera}")
+                return 0
+
+            for source, camera in targets:
+                if args.command == 'reconcile':
+                    stats = catalog.reconcile(source, camera, None if args.full else args.days)
+                    logger.info(f"{source}/{camera}: {stats['scanned']} gescand, "
+                                f"{stats['added']} toegevoegd, {stats['removed']} verwijderd")
+                elif args.command == 'latest':
+                    latest = catalog.latest(source, camera)
+                    print(f"{source}/{camera}: {latest[1] if latest else '-'}")
+                else:
+                    first, last = catalog.date_range(source, camera)
+                    print(f"{source}/{camera}: {first or '-'} .. {last or '-'}")
+    except (CatalogError, OSError, ValueError) as e:
+        logger.error(f"Image catalog {args.command} mislukt: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -310,6 +310,7 @@ SERVICES = {
     'berging': [
         'birdnet-mqtt-publisher',
         'mosquitto',
+        'atmosbird-capture',
     ],
     'meteo': [],
 }
@@ -322,10 +323,11 @@ TIMERS = {
     ],
     'berging': [
         'lifetime-sync.timer',
-        'atmosbird-capture.timer',
         'atmosbird-analysis.timer',
         'atmosbird-timelapse.timer',
         'atmosbird-archive-sync.timer',
+        'atmosbird-meteor-scan.timer',
+        'atmosbird-tle-update.timer',
     ],
     'meteo': [
         'weather-sync.timer',
@@ -471,6 +473,8 @@ KNOWN_SERVICES = {
         'atmosbird-analysis.service',
         'atmosbird-archive-sync.service',
         'atmosbird-timelapse.service',
+        'atmosbird-meteor-scan.service',
+        'atmosbird-tle-update.service',
         'emsn-dbmirror-berging.service',
         'reboot-alert.service',
         'avahi-alias@emsn2-berging.local.service',
@@ -486,10 +490,11 @@ KNOWN_SERVICES = {
         # Timers
         'lifetime-sync.timer',
         'lifetime-sync-berging.timer',
-        'atmosbird-capture.timer',
         'atmosbird-analysis.timer',
         'atmosbird-timelapse.timer',
         'atmosbird-archive-sync.timer',
+        'atmosbird-meteor-scan.timer',
+        'atmosbird-tle-update.timer',
         'emsn-dbmirror-berging.timer',
         'hardware-monitor.timer',
         # Utility services (backup, cleanup)
@@ -3727,6 +3732,67 @@ def check_vocalization_docker() -> CheckResult:
         )
 
 
+@timed_check
+def check_vocalization_cache() -> CheckResult:
+    """Check vocalization model cache (retained metrics van birdnet_mqtt_publisher)"""
+    mqtt_config = get_mqtt_config()
+
+    try:
+        cmd = ['mosquitto_sub', '-h', HOSTS['zolder']['ip'], '-t', 'birdnet/zolder/vocalization/metrics',
+               '-C', '1', '-W', '3']
+        if mqtt_config and mqtt_config.get('username') and mqtt_config.get('password'):
+            cmd.extend(['-u', mqtt_config['username'], '-P', mqtt_config['password']])
+
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=8)
+        if result.returncode != 0 or not result.stdout.strip():
+            return CheckResult(
+                name="Vocalization Cache",
+                status=Status.UNKNOWN,
+                message="Geen metrics ontvangen"
+            )
+
+        metrics = json.loads(result.stdout.strip())
+        cache = metrics.get('model_cache')
+        if not cache:
+            return CheckResult(
+                name="Vocalization Cache",
+                status=Status.OK,
+                message="Classifier nog niet geladen",
+                details=metrics
+            )
+
+        used_mb = cache['bytes_used'] / 1024 / 1024
+        budget_mb = cache['budget_bytes'] / 1024 / 1024
+        hit_rate = cache.get('hit_rate')
+        message = (f"{cache['models']} modellen ({used_mb:.0f}/{budget_mb:.0f} MB), "
+                   f"hit rate {hit_rate:.0%}, {cache['evictions']} evictions, "
+                   f"queue {metrics.get('queue_depth', 0)}") if hit_rate is not None else \
+            f"{cache['models']} modellen ({used_mb:.0f}/{budget_mb:.0f} MB), nog geen lookups"
+
+        # Veel evictions t.o.v. lookups = cache te klein (thrashing)
+        lookups = cache['hits'] + cache['misses']
+        thrashing = lookups >= 50 and hit_rate is not None and hit_rate < 0.5
+        return CheckResult(
+            name="Vocalization Cache",
+            status=Status.WARNING if thrashing else Status.OK,
+            message=message + (" - budget te klein?" if thrashing else ""),
+            details=metrics
+        )
+
+    except FileNotFoundError:
+        return CheckResult(
+            name="Vocalization Cache",
+            status=Status.UNKNOWN,
+            message="mosquitto_sub niet geïnstalleerd"
+        )
+    except Exception as e:
+        return CheckResult(
+            name="Vocalization Cache",
+            status=Status.UNKNOWN,
+            message=f"Fout: {e}"
+        )
+
+
 @timed_check
 def check_vocalization_enrichment_rate() -> CheckResult:
     """Check hoeveel detecties vocalization type hebben"""
@@ -3758,20 +3824,23 @@ def check_vocalization_enrichment_rate() -> CheckResult:
         )
         cursor = conn.cursor()
 
-        # Check enrichment rate laatste 7 dagen
+        # Check enrichment rate laatste 7 dagen, soorten zonder model tellen niet mee
         cursor.execute("""
             SELECT
                 COUNT(*) as total,
                 COUNT(vocalization_type) as enriched,
-                ROUND(COUNT(vocalization_type)::numeric / NULLIF(COUNT(*), 0) * 100, 1) as pct
+                ROUND(COUNT(vocalization_type)::numeric / NULLIF(COUNT(*), 0) * 100, 1) as pct,
+                COUNT(*) FILTER (WHERE vocalization_type IS NULL
+                                 AND vocalization_state IN ('pending', 'failed')) as backlog
             FROM bird_detections
             WHERE detection_timestamp >= NOW() - INTERVAL '7 days'
+              AND vocalization_state IS DISTINCT FROM 'no_model'
         """)
         row = cursor.fetchone()
         conn.close()
 
         if row:
-            total, enriched, pct = row
+            total, enriched, pct, backlog = row
             pct = float(pct or 0)
 
             if pct >= 80:
@@ -3779,21 +3848,21 @@ def check_vocalization_enrichment_rate() -> CheckResult:
                     name="Vocalization Rate",
                     status=Status.OK,
                     message=f"{pct}% verrijkt ({enriched}/{total} laatste 7d)",
-                    details={'total': total, 'enriched': enriched, 'percentage': pct}
+                    details={'total': total, 'enriched': enriched, 'percentage': pct, 'backlog': backlog}
                 )
             elif pct >= 50:
                 return CheckResult(
                     name="Vocalization Rate",
                     status=Status.OK,
                     message=f"{pct}% verrijkt (werk in gang)",
-                    details={'total': total, 'enriched': enriched, 'percentage': pct}
+                    details={'total': total, 'enriched': enriched, 'percentage': pct, 'backlog': backlog}
                 )
             else:
                 return CheckResult(
                     name="Vocalization Rate",
                     status=Status.WARNING,
                     message=f"Slechts {pct}% verrijkt",
-                    details={'total': total, 'enriched': enriched, 'percentage': pct}
+                    details={'total': total, 'enriched': enriched, 'percentage': pct, 'backlog': backlog}
                 )
 
         return CheckResult(
@@ -5825,6 +5894,10 @@ def run_deep_health_check() -> Dict[str, CategoryResult]:
     cat.checks.append(result)
     print_check(result)
 
+    result = check_vocalization_cache()
+    cat.checks.append(result)
+    print_check(result)
+
     categories['vocalization'] = cat
 
     # ─── 21. FLYSAFE RADAR & MIGRATIE ─────────────────────────────
@@ -244,13 +244,15 @@ if [[ $BERGING_OK -eq 0 ]]; then
         print_subheader "Services"
         check_ssh_service "$BERGING" "birdnet-mqtt-publisher"
         check_ssh_service "$BERGING" "mosquitto"
+        check_ssh_service "$BERGING" "atmosbird-capture"
 
         print_subheader "Timers"
         check_ssh_timer "$BERGING" "lifetime-sync.timer"
-        check_ssh_timer "$BERGING" "atmosbird-capture.timer"
         check_ssh_timer "$BERGING" "atmosbird-analysis.timer"
         check_ssh_timer "$BERGING" "atmosbird-timelapse.timer"
         check_ssh_timer "$BERGING" "atmosbird-archive-sync.timer"
+        check_ssh_timer "$BERGING" "atmosbird-meteor-scan.timer"
+        check_ssh_timer "$BERGING" "atmosbird-tle-update.timer"
 
         print_subheader "Disk"
         check_disk_usage "$BERGING" "/" "Root filesystem"
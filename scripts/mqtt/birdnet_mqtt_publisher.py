@@ -6,6 +6,9 @@ Includes real-time vocalization classification (song/call/alarm)
 
 Refactored: 2025-12-29 - Gebruikt nu core modules voor config
 Updated: 2025-12-29 - Startup catchup protection + age filter
+Updated: 2026-10-18 - Vocalisatie classificatie ontkoppeld van publish:
+                      detectie gaat direct uit, classificatie draait in een
+                      worker pool en volgt als .../detection/enriched bericht
 """
 
 import os
@@ -14,6 +17,9 @@ import json
 import time
 import sqlite3
 import socket
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 import paho.mqtt.client as mqtt
@@ -42,6 +48,8 @@ MQTT_PASS = _mqtt.get('password', '')
 # Topics
 TOPIC_DETECTION = f"birdnet/{STATION_NAME}/detection"
 TOPIC_STATS = f"birdnet/{STATION_NAME}/stats"
+TOPIC_ENRICHED = f"birdnet/{STATION_NAME}/detection/enriched"
+TOPIC_VOCALIZATION_METRICS = f"birdnet/{STATION_NAME}/vocalization/metrics"
 
 # State
 STATE_FILE = Path(f"/mnt/usb/logs/birdnet_mqtt_{STATION_NAME}_state.json")
@@ -51,6 +59,14 @@ CHECK_INTERVAL = 30  # seconds
 MAX_CATCHUP_DETECTIONS = 50  # Skip to current if backlog exceeds this
 MAX_DETECTION_AGE_SECONDS = 900  # 15 minuten - oudere detecties niet naar Ulanzi
 
+# Vocalization worker pool settings
+VOCALIZATION_WORKERS = int(os.getenv("VOCALIZATION_WORKERS", "2"))
+MAX_PENDING_CLASSIFICATIONS = 20  # Daarboven geen nieuwe jobs (CPU bescherming)
+MIN_VOCALIZATION_CONFIDENCE = 0.5
+LATENCY_WINDOW = 100  # Aantal recente classificaties voor latency statistieken
+VOCALIZATION_CACHE_MB = 128  # Model cache budget (Pi geheugen delen met BirdNET)
+PINNED_SPECIES = 3  # Top-N soorten (30 dagen) blijven altijd geladen
+
 # Centrale logger
 logger = get_logger(f'birdnet_mqtt_{STATION_NAME}')
 
@@ -64,7 +80,7 @@ def get_vocalization_classifier():
         try:
             sys.path.insert(0, str(Path(__file__).parent.parent / 'vocalization'))
             from vocalization_classifier import VocalizationClassifier
-            _vocalization_classifier = VocalizationClassifier(max_cached_models=3)
+            _vocalization_classifier = VocalizationClassifier(cache_budget_bytes=VOCALIZATION_CACHE_MB * 1024 * 1024)
             logger.info("Vocalization classifier loaded")
         except Exception as e:
             logger.warning(f"Vocalization classifier not available: {e}")
@@ -72,11 +88,168 @@ def get_vocalization_classifier():
     return _vocalization_classifier if _vocalization_classifier else None
 
 
+class VocalizationWorker:
+    """Classificeert vocalisaties in een worker pool, los van de publish loop.
+
+    Detecties worden direct gepubliceerd; het resultaat van de classificatie
+    volgt als apart enrichment bericht op TOPIC_ENRICHED, gekoppeld via
+    detection_id. Houdt queue-diepte en latency bij voor de metrics topic.
+    """
+
+    def __init__(self, publish_fn, max_workers=VOCALIZATION_WORKERS,
+                 max_pending=MAX_PENDING_CLASSIFICATIONS):
+        self.publish_fn = publish_fn
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vocalization")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.max_pending_seen = 0
+        self.classified = 0
+        self.unclassified = 0
+        self.failed = 0
+        self.dropped = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    @staticmethod
+    def get_audio_path(species_name, audio_file, detection_date):
+        """Bepaal pad naar BirdNET audio clip."""
+        # Audio files are in: /home/ronny/BirdSongs/Extracted/By_Date/YYYY-MM-DD/Species/filename.mp3
+        # Species folder uses underscores instead of spaces
+        species_folder = species_name.replace(' ', '_')
+        return Path("/home/ronny/BirdSongs/Extracted/By_Date") / detection_date / species_folder / audio_file
+
+    def reserve(self, species_name, audio_file):
+        """Reserveer een plek in de queue. Returns True als er een enrichment kan volgen.
+
+        Een gereserveerde plek moet daarna met start() ingepland of met
+        release() vrijgegeven worden.
+        """
+        classifier = get_vocalization_classifier()
+        if not classifier or not audio_file or not classifier.has_model(species_name):
+            return False
+
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                logger.warning(f"Vocalization queue full ({self.pending}), skipping {species_name}")
+                return False
+            self.pending += 1
+            self.max_pending_seen = max(self.max_pending_seen, self.pending)
+        return True
+
+    def start(self, detection_id, species_name, audio_file, detection_date):
+        """Plan classificatie in op een eerder gereserveerde plek."""
+        audio_path = self.get_audio_path(species_name, audio_file, detection_date)
+        self.executor.submit(self._run, detection_id, species_name, audio_path, time.monotonic())
+
+    def release(self):
+        """Geef een gereserveerde plek vrij zonder classificatie."""
+        with self._lock:
+            self.pending -= 1
+
+    def submit(self, detection_id, species_name, audio_file, detection_date):
+        """Plan classificatie in. Returns True als er een enrichment volgt."""
+        if not self.reserve(species_name, audio_file):
+            return False
+        self.start(detection_id, species_name, audio_file, detection_date)
+        return True
+
+    def _run(self, detection_id, species_name, audio_path, queued_at):
+        """Worker: classificeer en publiceer enrichment bericht."""
+        started = time.monotonic()
+        vocalization = None
+        try:
+            vocalization = self.classify(species_name, audio_path)
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            logger.debug(f"Vocalization classification failed: {e}")
+        finally:
+            finished = time.monotonic()
+            with self._lock:
+                self.pending -= 1
+                self.latencies.append(finished - started)
+                if vocalization:
+                    self.classified += 1
+                else:
+                    self.unclassified += 1
+
+        msg = {
+            "station": STATION_NAME,
+            "detection_id": detection_id,
+            "species": species_name,
+            "classified": vocalization is not None,
+            "queue_seconds": round(started - queued_at, 3),
+            "classification_seconds": round(finished - started, 3),
+        }
+        if vocalization:
+            msg["vocalization"] = vocalization['type']
+            msg["vocalization_nl"] = vocalization['type_nl']
+            msg["vocalization_confidence"] = vocalization['confidence']
+
+        if self.publish_fn(TOPIC_ENRICHED, msg):
+            voc_info = f" - {msg['vocalization_nl']}" if vocalization else " - geen type"
+            logger.info(f"Enriched: {species_name}{voc_info} ({msg['classification_seconds']:.2f}s)")
+
+    def classify(self, species_name, audio_path):
+        """Classify vocalization type for a detection."""
+        classifier = get_vocalization_classifier()
+        if not classifier:
+            return None
+
+        if not audio_path.exists():
+            logger.debug(f"Audio not found: {audio_path}")
+            return None
+
+        result = classifier.classify(species_name, audio_path)
+        if result and result.get('confidence', 0) > MIN_VOCALIZATION_CONFIDENCE:
+            return {
+                'type': result['type'],
+                'type_nl': result['type_nl'],
+                'confidence': result['confidence']
+            }
+        return None
+
+    def get_metrics(self):
+        """Queue-diepte en latency statistieken voor de metrics topic."""
+        with self._lock:
+            latencies = sorted(self.latencies)
+            metrics = {
+                "station": STATION_NAME,
+                "timestamp": datetime.now().isoformat(),
+                "queue_depth": self.pending,
+                "queue_depth_max": self.max_pending_seen,
+                "classified": self.classified,
+                "unclassified": self.unclassified,
+                "failed": self.failed,
+                "dropped": self.dropped,
+            }
+        classifier = get_vocalization_classifier()
+        if classifier:
+            metrics["model_cache"] = classifier.cache_stats()
+        if latencies:
+            metrics["latency_avg_seconds"] = round(sum(latencies) / len(latencies), 3)
+            metrics["latency_p95_seconds"] = round(latencies[int(0.95 * (len(latencies) - 1))], 3)
+            metrics["latency_max_seconds"] = round(latencies[-1], 3)
+        return metrics
+
+    def pin_species(self, species_names):
+        """Laad en pin modellen van de meest gedetecteerde soorten (in de pool)."""
+        classifier = get_vocalization_classifier()
+        if classifier and species_names:
+            self.executor.submit(classifier.pin_species, species_names)
+
+    def shutdown(self, wait=False):
+        """Stop de worker pool."""
+        self.executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
 class BirdNetMQTTPublisher:
     def __init__(self):
         self.last_detection_id = self.load_last_id()
         self.client = None
         self.connected = False
+        self.vocalization = VocalizationWorker(self._publish_json)
         self._check_catchup_needed()
 
     def load_last_id(self) -> int:
@@ -189,19 +362,16 @@ class BirdNetMQTTPublisher:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
 
-            # Get new detections since last check
+            # Get new detections since last check; SELECT * geeft de
+            # (impliciete) rowid niet terug, dus expliciet meenemen
             cursor.execute("""
-                SELECT * FROM detections
+                SELECT rowid AS rowid, * FROM detections
                 WHERE rowid > ?
                 ORDER BY rowid ASC
                 LIMIT 100
             """, (self.last_detection_id,))
 
-            detections = []
-            for row in cursor.fetchall():
-                detection = dict(row)
-                detection['rowid'] = row['rowid'] if 'rowid' in row.keys() else self.last_detection_id + 1
-                detections.append(detection)
+            detections = [dict(row) for row in cursor.fetchall()]
 
             conn.close()
             return detections
@@ -210,46 +380,28 @@ class BirdNetMQTTPublisher:
             logger.error(f"Database error: {e}")
             return []
 
-    def classify_vocalization(self, species_name, audio_file, detection_date):
-        """Classify vocalization type for a detection."""
-        classifier = get_vocalization_classifier()
-        if not classifier:
-            return None
-
-        # Audio files are in: /home/ronny/BirdSongs/Extracted/By_Date/YYYY-MM-DD/Species/filename.mp3
-        # Species folder uses underscores instead of spaces
-        species_folder = species_name.replace(' ', '_')
-        audio_path = Path("/home/ronny/BirdSongs/Extracted/By_Date") / detection_date / species_folder / audio_file
-        if not audio_path.exists():
-            logger.debug(f"Audio not found: {audio_path}")
-            return None
-
-        try:
-            result = classifier.classify(species_name, audio_path)
-            if result and result.get('confidence', 0) > 0.5:
-                return {
-                    'type': result['type'],
-                    'type_nl': result['type_nl'],
-                    'confidence': result['confidence']
-                }
-        except Exception as e:
-            logger.debug(f"Vocalization classification failed: {e}")
-
-        return None
+    def _publish_json(self, topic, msg, retain=False):
+        """Publish JSON bericht (thread-safe, ook vanuit workers gebruikt)."""
+        if not self.client:
+            return False
+        result = self.client.publish(topic, json.dumps(msg), qos=1, retain=retain)
+        if result.rc != mqtt.MQTT_ERR_SUCCESS:
+            logger.warning(f"Publish failed on {topic}: {result.rc}")
+            return False
+        return True
 
     def publish_detection(self, detection):
-        """Publish a detection to MQTT with vocalization classification"""
+        """Publish a detection to MQTT, vocalization follows as enrichment"""
         try:
             species = detection.get("Com_Name", "Unknown")
             audio_file = detection.get("File_Name", "")
             detection_date = detection.get("Date", "")
-
-            # Classify vocalization (real-time)
-            vocalization = self.classify_vocalization(species, audio_file, detection_date)
+            detection_id = detection.get("rowid")
 
             # Build message
             msg = {
                 "station": STATION_NAME,
+                "detection_id": detection_id,
                 "timestamp": detection.get("Date", "") + " " + detection.get("Time", ""),
                 "species": species,
                 "scientific_name": detection.get("Sci_Name", ""),
@@ -259,31 +411,70 @@ class BirdNetMQTTPublisher:
                 "longitude": detection.get("Lon", 0),
             }
 
-            # Add vocalization if classified
-            if vocalization:
-                msg["vocalization"] = vocalization['type']
-                msg["vocalization_nl"] = vocalization['type_nl']
-                msg["vocalization_confidence"] = vocalization['confidence']
+            # Classificatie gaat naar de worker pool; consumers wachten op
+            # het enrichment bericht als vocalization_pending gezet is. De
+            # detectie gaat eerst de deur uit, zodat het enrichment bericht
+            # nooit vóór de detectie zelf aankomt.
+            vocalization_pending = self.vocalization.reserve(species, audio_file)
+            msg["vocalization_pending"] = vocalization_pending
 
-            # Publish
-            result = self.client.publish(
-                TOPIC_DETECTION,
-                json.dumps(msg),
-                qos=1
-            )
+            published = False
+            try:
+                published = self._publish_json(TOPIC_DETECTION, msg)
+            finally:
+                if vocalization_pending and not published:
+                    self.vocalization.release()
 
-            if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                voc_info = f" - {msg.get('vocalization_nl', '')}" if 'vocalization_nl' in msg else ""
-                logger.info(f"Published: {msg['species']}{voc_info} ({msg['confidence']:.2f})")
-                return True
-            else:
-                logger.warning(f"Publish failed: {result.rc}")
+            if not published:
                 return False
 
+            if vocalization_pending:
+                self.vocalization.start(detection_id, species, audio_file, detection_date)
+            pending_info = " - vocalisatie volgt" if vocalization_pending else ""
+            logger.info(f"Published: {msg['species']}{pending_info} ({msg['confidence']:.2f})")
+            return True
+
         except Exception as e:
             logger.error(f"Publish error: {e}")
             return False
 
+    def publish_vocalization_metrics(self):
+        """Publish queue-diepte en classificatie latency van de worker pool"""
+        try:
+            metrics = self.vocalization.get_metrics()
+            # Retained zodat de health check altijd de laatste stand kan lezen
+            self._publish_json(TOPIC_VOCALIZATION_METRICS, metrics, retain=True)
+            logger.info(
+                f"Vocalization metrics: queue={metrics['queue_depth']}, "
+                f"classified={metrics['classified']}, "
+                f"avg={metrics.get('latency_avg_seconds', 0):.2f}s"
+            )
+        except Exception as e:
+            logger.error(f"Vocalization metrics error: {e}")
+
+    def get_top_species(self, limit=PINNED_SPECIES, days=30):
+        """Meest gedetecteerde soorten van de laatste dagen (voor model pinning)."""
+        if not BIRDNET_DB.exists():
+            return []
+
+        try:
+            conn = sqlite3.connect(str(BIRDNET_DB))
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT Com_Name, COUNT(*) as count
+                FROM detections
+                WHERE Date >= date('now', ?)
+                GROUP BY Com_Name
+                ORDER BY count DESC
+                LIMIT ?
+            """, (f"-{days} days", limit))
+            species = [r[0] for r in cursor.fetchall()]
+            conn.close()
+            return species
+        except Exception as e:
+            logger.warning(f"Top species query failed: {e}")
+            return []
+
     def publish_stats(self):
         """Publish daily statistics"""
         if not BIRDNET_DB.exists():
@@ -353,6 +544,9 @@ class BirdNetMQTTPublisher:
         stats_interval = 300  # Publish stats every 5 minutes
         last_stats_time = 0
 
+        # Warm de model cache met de meest gedetecteerde soorten
+        self.vocalization.pin_species(self.get_top_species())
+
         try:
             while True:
                 if not self.connected:
@@ -365,7 +559,7 @@ class BirdNetMQTTPublisher:
                 detections = self.get_new_detections()
 
                 for detection in detections:
-                    rowid = detection.get('rowid', self.last_detection_id)
+                    rowid = detection['rowid']
 
                     # Skip old detections - only update state, don't publish
                     if self._is_detection_too_old(detection):
@@ -386,6 +580,7 @@ class BirdNetMQTTPublisher:
                 now = time.time()
                 if now - last_stats_time > stats_interval:
                     self.publish_stats()
+                    self.publish_vocalization_metrics()
                     last_stats_time = now
 
                 time.sleep(CHECK_INTERVAL)
@@ -393,6 +588,7 @@ class BirdNetMQTTPublisher:
         except KeyboardInterrupt:
             logger.info("Shutting down...")
         finally:
+            self.vocalization.shutdown()
             if self.client:
                 self.client.loop_stop()
                 self.client.disconnect()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+EMSN 2.0 - Nestkast Model Benchmark
+
+Meet per inference backend (torch, onnx, onnx-int8) in een apart proces
+de cold start (import + model laden, wat elke timer run van de realtime
+detector betaalt), de latency per beeld, piek RSS en de bezet/leeg
+nauwkeurigheid op de gelabelde beelden van
+training/prepare_training_data.py. De ONNX backends worden daarnaast
+vergeleken met de voorspellingen van torch.
+
+Gebruik:
+    python benchmark_nestbox_model.py
+    python benchmark_nestbox_model.py --model /mnt/nas-birdnet-archive/nestbox/models/nestbox_model_latest.pt
+    python benchmark_nestbox_model.py --data-dir ./training/data --limit 50
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from .export_onnx import LABELED_DATA_DIR, labeled_images, occupancy_accuracy
+except ImportError:
+    from export_onnx import LABELED_DATA_DIR, labeled_images, occupancy_accuracy
+
+DEFAULT_MODEL = Path('/mnt/nas-birdnet-archive/nestbox/models/nestbox_model_latest.pt')
+
+BACKENDS = {
+    'torch': {'backend': 'torch', 'prefer_int8': False},
+    'onnx': {'backend': 'onnx', 'prefer_int8': False},
+    'onnx-int8': {'backend': 'onnx', 'prefer_int8': True},
+}
+
+
+def run_backend_benchmark(model_path: Path, images: list, backend: str) -> dict:
+    """Meet cold start, latency, piek RSS en nauwkeurigheid voor één backend.
+
+    Bedoeld om in een vers proces te draaien (zie compare_backends) zodat
+    import kosten en geheugen niet door andere backends vertekend worden.
+    """
+    start = time.perf_counter()
+    from nestbox_model import load_image_array, load_model
+    model, info = load_model(model_path, **BACKENDS[backend])
+    cold_seconds = time.perf_counter() - start
+
+    inputs = [load_image_array(path) for path, _ in images]
+
+    start = time.perf_counter()
+    probas = np.concatenate([model.predict_proba(x[None]) for x in inputs])
+    inference_seconds = time.perf_counter() - start
+
+    return {
+        'backend': backend,
+        'loaded_backend': model.backend,
+        'cold_start_seconds': cold_seconds,
+        'inference_ms_per_image': 1000 * inference_seconds / len(inputs),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'accuracy': occupancy_accuracy(probas, info['classes'], [label for _, label in images]),
+        'predictions': probas.argmax(axis=1).tolist(),
+    }
+
+
+def compare_backends(args) -> list:
+    """Draai run_backend_benchmark per backend in een apart proces."""
+    results = []
+    for backend in BACKENDS:
+        cmd = [
+            sys.executable, __file__,
+            '--model', str(args.model), '--data-dir', str(args.data_dir),
+            '--limit', str(args.limit), '--backend', backend,
+        ]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{backend}: mislukt\n{proc.stderr.strip()[-500:]}")
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark nestkast model backends (torch, onnx, onnx-int8)')
+    parser.add_argument('--model', type=Path, default=DEFAULT_MODEL, help='Pad naar .pt checkpoint')
+    parser.add_argument('--data-dir', type=Path, default=LABELED_DATA_DIR,
+                        help='Gelabelde beelden (leeg/, bezet/) van prepare_training_data.py')
+    parser.add_argument('--limit', type=int, default=100, help='Max aantal beelden per klasse')
+    parser.add_argument('--backend', choices=list(BACKENDS),
+                        help='Meet één backend en print JSON (intern gebruikt)')
+    args = parser.parse_args()
+
+    images = labeled_images(args.data_dir, args.limit)
+    if not images:
+        print(f"Geen gelabelde beelden gevonden in {args.data_dir} (draai training/prepare_training_data.py)")
+        return 1
+
+    if args.backend:
+        print(json.dumps(run_backend_benchmark(args.model, images, args.backend)))
+        return 0
+
+    results = compare_backends(args)
+    if not results:
+        return 1
+
+    reference = next((r['predictions'] for r in results if r['loaded_backend'] == 'torch'), None)
+
+    print(f"{len(images)} gelabelde beelden uit {args.data_dir}\n")
+    print(f"{'Backend':<10} {'Geladen':<8} {'Cold start':>11} {'ms/beeld':>9} "
+          f"{'Piek RSS':>10} {'Accuracy':>9} {'= torch':>8}")
+    for r in results:
+        agreement = '-'
+        if reference is not None:
+            agreement = f"{np.mean(np.array(r['predictions']) == np.array(reference)):.1%}"
+        print(f"{r['backend']:<10} {r['loaded_backend']:<8} {r['cold_start_seconds']:>10.2f}s "
+              f"{r['inference_ms_per_image']:>9.2f} {r['peak_rss_mb']:>8.0f}MB "
+              f"{r['accuracy']:>9.1%} {agreement:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+EMSN 2.0 - Nestkast Model ONNX Export
+
+Converteert de nestkast checkpoints (*.pt in MODELS_DIR) naar ONNX zodat
+nestbox_realtime_detector.py en nestbox_occupancy_detector.py op de Pi met
+onnxruntime draaien, zonder torch import en zonder het torchvision model
+elke run opnieuw op te bouwen. De export komt naast het .pt bestand te
+staan (nestbox_model_latest.onnx) met de checkpoint info (classes,
+architecture, best_val_acc, ...) als model metadata. Met --quantize wordt
+daarnaast een dynamisch int8-gekwantiseerde variant geschreven
+(nestbox_model_latest.int8.onnx), te gebruiken met NESTBOX_ONNX_INT8=1.
+
+--verify vergelijkt de exports met PyTorch op de gelabelde beelden van
+training/prepare_training_data.py (data/leeg, data/bezet): maximaal
+verschil in kansen, top-1 overeenkomst en bezet/leeg nauwkeurigheid.
+
+Gebruik:
+    python export_onnx.py                         # Alle modellen in MODELS_DIR
+    python export_onnx.py --quantize --verify
+    python export_onnx.py --models-dir ./models --data-dir ./training/data --force
+
+Requirements (alleen op de export machine):
+    - PyTorch + torchvision
+    - onnx
+    - onnxruntime (voor --quantize en --verify)
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .nestbox_model import (
+        INPUT_SIZE, OnnxOccupancyModel, TorchOccupancyModel,
+        get_torch, load_image_array, load_torch_checkpoint, onnx_path_for
+    )
+except ImportError:
+    from nestbox_model import (
+        INPUT_SIZE, OnnxOccupancyModel, TorchOccupancyModel,
+        get_torch, load_image_array, load_torch_checkpoint, onnx_path_for
+    )
+
+MODELS_DIR = Path('/mnt/nas-birdnet-archive/nestbox/models')
+LABELED_DATA_DIR = Path(__file__).parent / 'training' / 'data'
+
+OPSET_VERSION = 17
+PARITY_TOLERANCE = 1e-4  # Max absoluut verschil in softmax kansen (fp32)
+VERIFY_LIMIT = 200       # Max gelabelde beelden per klasse voor --verify
+
+
+def export_model(model_path: Path, quantize: bool = False, force: bool = False) -> list:
+    """Exporteer één checkpoint naar ONNX (en optioneel int8).
+
+    Returns:
+        Lijst met geschreven ONNX paden (leeg als alles al up-to-date was)
+    """
+    import onnx
+
+    torch = get_torch()
+    onnx_path = onnx_path_for(model_path)
+    written = []
+
+    if force or not onnx_path.exists() or onnx_path.stat().st_mtime < model_path.stat().st_mtime:
+        model, info = load_torch_checkpoint(model_path)
+        dummy = torch.zeros(1, 3, INPUT_SIZE, INPUT_SIZE)
+
+        torch.onnx.export(
+            model, dummy, str(onnx_path),
+            input_names=['image'],
+            output_names=['logits'],
+            dynamic_axes={'image': {0: 'batch'}, 'logits': {0: 'batch'}},
+            opset_version=OPSET_VERSION,
+            dynamo=False,
+        )
+
+        # Checkpoint info als metadata zodat de runtime geen checkpoint nodig heeft
+        onnx_model = onnx.load(str(onnx_path))
+        for key, value in (('checkpoint_info', json.dumps(info)), ('source', model_path.name)):
+            prop = onnx_model.metadata_props.add()
+            prop.key = key
+            prop.value = value
+        onnx.save(onnx_model, str(onnx_path))
+        written.append(onnx_path)
+
+    int8_path = onnx_path_for(model_path, quantized=True)
+    if quantize and (written or force or not int8_path.exists()):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        # Bij MobileNetV2 zitten vrijwel alle gewichten in de convoluties, dus
+        # die worden ook gekwantiseerd. ConvInteger in onnxruntime vraagt uint8
+        # gewichten; of int8 op de Pi sneller is laat benchmark_nestbox_model.py zien
+        quantize_dynamic(
+            str(onnx_path), str(int8_path),
+            op_types_to_quantize=['Conv', 'MatMul', 'Gemm'],
+            weight_type=QuantType.QUInt8,
+        )
+        written.append(int8_path)
+
+    return written
+
+
+def labeled_images(data_dir: Path = LABELED_DATA_DIR,
+                   limit: int = VERIFY_LIMIT) -> List[Tuple[Path, bool]]:
+    """Gelabelde screenshots van prepare_training_data.py.
+
+    Returns:
+        Lijst van (pad, is_bezet), maximaal `limit` per klasse
+    """
+    images = []
+    for label in ('leeg', 'bezet'):
+        files = sorted((data_dir / label).glob('*.jpg'))[:limit]
+        images.extend((path, label == 'bezet') for path in files)
+    return images
+
+
+def occupancy_accuracy(probas: np.ndarray, classes: List[str], occupied: List[bool]) -> float:
+    """Fractie beelden waarvan bezet/leeg klopt (soort modellen: alles behalve 'leeg' is bezet)."""
+    predicted = [classes[i].lower() != 'leeg' for i in probas.argmax(axis=1)]
+    return float(np.mean([p == o for p, o in zip(predicted, occupied)]))
+
+
+def verify_model(model_path: Path, data_dir: Optional[Path] = LABELED_DATA_DIR,
+                 limit: int = VERIFY_LIMIT, samples: int = 8, seed: int = 0) -> Dict[str, dict]:
+    """Vergelijk ONNX output met PyTorch.
+
+    Gebruikt de gelabelde beelden uit `data_dir` als die er zijn (en meet dan
+    ook de nauwkeurigheid), anders willekeurige inputs.
+
+    Returns:
+        Dict met max_abs_diff, top1_agreement en accuracy (of None) per variant
+    """
+    images = labeled_images(data_dir, limit) if data_dir else []
+    if images:
+        x = np.stack([load_image_array(path) for path, _ in images])
+        occupied = [label for _, label in images]
+    else:
+        x = np.random.default_rng(seed).standard_normal((samples, 3, INPUT_SIZE, INPUT_SIZE),
+                                                        dtype=np.float32)
+        occupied = None
+
+    torch_model, info = load_torch_checkpoint(model_path)
+    classes = info['classes']
+    reference = TorchOccupancyModel(torch_model).predict_proba(x)
+
+    report = {
+        model_path.name: {
+            'max_abs_diff': 0.0,
+            'top1_agreement': 1.0,
+            'accuracy': occupancy_accuracy(reference, classes, occupied) if occupied else None,
+        }
+    }
+    for quantized in (False, True):
+        onnx_path = onnx_path_for(model_path, quantized=quantized)
+        if not onnx_path.exists():
+            continue
+        probas = OnnxOccupancyModel(onnx_path).predict_proba(x)
+        report[onnx_path.name] = {
+            'max_abs_diff': float(np.abs(probas - reference).max()),
+            'top1_agreement': float((probas.argmax(axis=1) == reference.argmax(axis=1)).mean()),
+            'accuracy': occupancy_accuracy(probas, classes, occupied) if occupied else None,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export nestkast modellen naar ONNX')
+    parser.add_argument('--models-dir', type=Path, default=MODELS_DIR, help='Directory met .pt modellen')
+    parser.add_argument('--data-dir', type=Path, default=LABELED_DATA_DIR,
+                        help='Gelabelde beelden (leeg/, bezet/) voor --verify')
+    parser.add_argument('--quantize', action='store_true', help='Schrijf ook int8 dynamisch gekwantiseerde variant')
+    parser.add_argument('--force', action='store_true', help='Exporteer ook als ONNX al up-to-date is')
+    parser.add_argument('--verify', action='store_true', help='Controleer ONNX output tegen PyTorch')
+    args = parser.parse_args()
+
+    model_files = sorted(args.models_dir.glob('*.pt'))
+    if not model_files:
+        print(f"Geen .pt modellen gevonden in {args.models_dir}")
+        return 1
+
+    exported = 0
+    failed = 0
+    for model_path in model_files:
+        try:
+            written = export_model(model_path, quantize=args.quantize, force=args.force)
+            exported += len(written)
+            status = ', '.join(p.name for p in written) if written else 'up-to-date'
+            print(f"{model_path.name}: {status}")
+
+            if args.verify:
+                for name, stats in verify_model(model_path, args.data_dir).items():
+                    ok = stats['max_abs_diff'] <= PARITY_TOLERANCE or '.int8.' in name
+                    accuracy = f", accuracy {stats['accuracy']:.1%}" if stats['accuracy'] is not None else ''
+                    print(f"  {name}: max diff {stats['max_abs_diff']:.2e}, "
+                          f"top-1 {stats['top1_agreement']:.0%}{accuracy}{'' if ok else '  <-- AFWIJKING'}")
+                    if not ok:
+                        failed += 1
+        except Exception as e:
+            print(f"{model_path.name}: FOUT {e}")
+            failed += 1
+
+    print(f"\n{len(model_files)} modellen, {exported} ONNX bestanden geschreven, {failed} fouten")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
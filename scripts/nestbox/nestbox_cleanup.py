@@ -10,6 +10,11 @@ Strategie:
 - Alleen LEEG beelden met hoge confidence (>90%) worden verwijderd
 - Bezette beelden worden ALTIJD bewaard
 - Twijfelgevallen (lage confidence) worden bewaard
+- Beelden buiten de (uitgedunde) occupancy log tellen alleen mee als de
+  detector ze echt beoordeeld heeft (nestbox_analyzed_frames); nooit
+  geanalyseerde beelden worden bewaard
+- Rijen in nestbox_analyzed_frames tot en met de cutoff dag worden na de
+  beoordeling verwijderd
 
 Draait dagelijks via systemd timer.
 Modernized: 2026-01-09 - Type hints toegevoegd
@@ -28,6 +33,7 @@ from psycopg2.extensions import connection as PgConnection
 # Voeg project root toe voor imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from core.config import get_postgres_config
+from core.image_catalog import ImageCatalog
 
 # Configuratie
 NAS_BASE = Path("/mnt/nas-birdnet-archive/nestbox")
@@ -65,31 +71,47 @@ def get_image_classification(conn: PgConnection, image_path: Path) -> Optional[D
     return None
 
 
-def get_date_from_path(image_path: Path) -> datetime:
-    """Extract datum uit bestandspad of naam."""
-    # Probeer uit pad: .../screenshots/2026/01/08/bestand.jpg
-    parts = image_path.parts
-    try:
-        # Zoek jaar/maand/dag in pad
-        for i, part in enumerate(parts):
-            if part.isdigit() and len(part) == 4 and int(part) > 2020:
-                year = int(part)
-                month = int(parts[i+1])
-                day = int(parts[i+2])
-                return datetime(year, month, day)
-    except (IndexError, ValueError):
-        pass
-
-    # Probeer uit bestandsnaam: midden_20260108_200012.jpg
-    try:
-        name = image_path.stem
-        date_part = name.split('_')[1]
-        return datetime.strptime(date_part, '%Y%m%d')
-    except (IndexError, ValueError):
-        pass
+def get_analyzed_frame(conn: PgConnection, image_path: Path) -> Optional[Dict[str, Any]]:
+    """Detectie voor een beeld dat wel geanalyseerd is maar niet in de occupancy log staat.
+
+    De realtime detector logt alleen wijzigingen, twijfelgevallen en een
+    periodieke hartslag in nestbox_occupancy; de overige beoordeelde frames
+    staan in nestbox_analyzed_frames. Geen rij = nooit geanalyseerd.
+    """
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT is_occupied, confidence
+        FROM nestbox_analyzed_frames
+        WHERE image_path = %s
+    """, (str(image_path),))
+    row = cur.fetchone()
+    cur.close()
+
+    if row:
+        return {
+            'is_occupied': row[0],
+            'confidence': row[1],
+            'prob_leeg': None
+        }
+    return None
+
+
+def prune_analyzed_frames(conn: PgConnection, nestbox_id: str, deleted_paths, last_day: datetime) -> int:
+    """Verwijder nestbox_analyzed_frames rijen die de cleanup niet meer nodig heeft.
 
-    # Fallback: file modification time
-    return datetime.fromtimestamp(image_path.stat().st_mtime)
+    Elk beeld tot en met de cutoff dag is net beoordeeld: verwijderd (rij
+    overbodig) of bewaard, en een bewaard beeld heeft nooit een 'leeg'
+    rij met hoge confidence. Commit niet.
+    """
+    cur = conn.cursor()
+    cur.execute("""
+        DELETE FROM nestbox_analyzed_frames
+        WHERE image_path = ANY(%s)
+           OR (nestbox_id = %s AND analyzed_at <= %s)
+    """, ([str(p) for p in deleted_paths], nestbox_id, last_day))
+    pruned = cur.rowcount
+    cur.close()
+    return pruned
 
 
 def should_delete(classification: Optional[Dict[str, Any]], image_date: datetime, cutoff_date: datetime) -> Tuple[bool, str]:
@@ -116,13 +138,11 @@ def should_delete(classification: Optional[Dict[str, Any]], image_date: datetime
 
 def cleanup_nestbox(nestbox_id: str, conn: PgConnection, cutoff_date: datetime,
                     dry_run: bool = False, verbose: bool = False) -> Dict[str, Any]:
-    """Cleanup oude screenshots voor één nestkast."""
-    screenshot_dir = NAS_BASE / nestbox_id / "screenshots"
-    if not screenshot_dir.exists():
-        if verbose:
-            print(f"[{nestbox_id}] Screenshot directory niet gevonden")
-        return {'scanned': 0, 'deleted': 0, 'kept': 0, 'bytes_freed': 0}
+    """Cleanup oude screenshots voor één nestkast.
 
+    De kandidaten (beelden tot en met de cutoff dag) komen uit de image
+    catalog; recente beelden worden niet meer gelezen.
+    """
     stats = {
         'scanned': 0,
         'deleted': 0,
@@ -131,19 +151,30 @@ def cleanup_nestbox(nestbox_id: str, conn: PgConnection, cutoff_date: datetime,
         'kept_reasons': {}
     }
 
-    # Scan alle jpg bestanden
-    for image_path in screenshot_dir.rglob("*.jpg"):
+    catalog = ImageCatalog(conn)
+    last_day = cutoff_date.replace(hour=23, minute=59, second=59, microsecond=0)
+    deleted_paths = []
+
+    for taken_at, image_path in catalog.images('nestbox', nestbox_id, datetime.min, last_day):
         stats['scanned'] += 1
 
-        image_date = get_date_from_path(image_path)
+        image_date = taken_at.replace(hour=0, minute=0, second=0, microsecond=0)
         classification = get_image_classification(conn, str(image_path))
+        if classification is None:
+            classification = get_analyzed_frame(conn, str(image_path))
 
         delete, reason = should_delete(classification, image_date, cutoff_date)
 
         if delete:
-            file_size = image_path.stat().st_size
-            if not dry_run:
-                image_path.unlink()
+            try:
+                file_size = image_path.stat().st_size
+                if not dry_run:
+                    image_path.unlink()
+            except FileNotFoundError:
+                # Al weg (handmatig verwijderd); alleen de catalogus bijwerken
+                deleted_paths.append(image_path)
+                continue
+            deleted_paths.append(image_path)
             stats['deleted'] += 1
             stats['bytes_freed'] += file_size
             if verbose:
@@ -153,6 +184,11 @@ def cleanup_nestbox(nestbox_id: str, conn: PgConnection, cutoff_date: datetime,
             stats['kept'] += 1
             stats['kept_reasons'][reason] = stats['kept_reasons'].get(reason, 0) + 1
 
+    if not dry_run:
+        prune_analyzed_frames(conn, nestbox_id, deleted_paths, last_day)
+        conn.commit()
+        catalog.remove(deleted_paths)
+
     return stats
 
 
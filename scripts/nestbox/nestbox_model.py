@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Nestkast Model Backends - EMSN
+
+Gedeeld door nestbox_realtime_detector.py en nestbox_occupancy_detector.py:
+laden van de MobileNetV2 checkpoints en inferentie via PyTorch of via
+ONNX Runtime. De ONNX backend heeft geen torch nodig: een timer run op de
+Pi betaalt dan niet meer voor de torch import en het opbouwen van het model.
+
+Preprocessing gebeurt voor beide backends in NumPy (zelfde resultaat als
+transforms.Resize/ToTensor/Normalize op een PIL beeld).
+
+Backends:
+    NESTBOX_BACKEND=auto   ONNX als <model>.onnx bestaat en niet ouder is dan <model>.pt (default)
+    NESTBOX_BACKEND=torch  Altijd PyTorch
+    NESTBOX_BACKEND=onnx   ONNX, waarschuwing + PyTorch als de export ontbreekt
+    NESTBOX_ONNX_INT8=1    Gebruik <model>.int8.onnx (dynamisch gekwantiseerd) als die bestaat
+
+Exporteren: python export_onnx.py --quantize --verify
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Lazy imports: de ONNX backend importeert torch nooit
+_torch = None
+_ort = None
+
+
+def get_torch():
+    """Lazy load torch."""
+    global _torch
+    if _torch is None:
+        import torch
+        _torch = torch
+    return _torch
+
+
+def get_onnxruntime():
+    """Lazy load onnxruntime. Returns None als niet geïnstalleerd."""
+    global _ort
+    if _ort is None:
+        try:
+            import onnxruntime
+            _ort = onnxruntime
+        except ImportError:
+            _ort = False
+    return _ort or None
+
+
+INPUT_SIZE = 224
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+DEFAULT_CLASSES = ['leeg', 'bezet']
+
+BACKEND = os.environ.get('NESTBOX_BACKEND', 'auto')
+PREFER_INT8 = os.environ.get('NESTBOX_ONNX_INT8', '0') == '1'
+
+
+def load_image_array(image_path: str) -> np.ndarray:
+    """Decodeer een screenshot naar een genormaliseerde model input.
+
+    Args:
+        image_path: Pad naar afbeelding.
+
+    Returns:
+        Float32 array (3, INPUT_SIZE, INPUT_SIZE).
+    """
+    with Image.open(image_path) as image:
+        resized = image.convert('RGB').resize((INPUT_SIZE, INPUT_SIZE), Image.BILINEAR)
+    pixels = np.asarray(resized, dtype=np.float32) / 255.0
+    return ((pixels - MEAN) / STD).transpose(2, 0, 1).copy()
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """Numeriek stabiele softmax over de laatste as."""
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def create_model(num_classes: int = 2, simple_classifier: bool = False):
+    """Maak MobileNetV2 model met aangepaste classifier.
+
+    Args:
+        num_classes: Aantal output classes.
+        simple_classifier: Gebruik eenvoudige classifier (nieuwe modellen).
+
+    Returns:
+        PyTorch model.
+    """
+    nn = get_torch().nn
+    from torchvision import models
+
+    model = models.mobilenet_v2(weights=None)
+    num_features = model.classifier[1].in_features
+
+    if simple_classifier:
+        # Simpele classifier (nieuwe modellen)
+        model.classifier = nn.Sequential(
+            nn.Dropout(p=0.3),
+            nn.Linear(num_features, num_classes)
+        )
+    else:
+        # Complexere classifier (oude modellen)
+        model.classifier = nn.Sequential(
+            nn.Dropout(p=0.2),
+            nn.Linear(num_features, 128),
+            nn.ReLU(),
+            nn.Dropout(p=0.2),
+            nn.Linear(128, num_classes)
+        )
+    return model
+
+
+def checkpoint_info(checkpoint: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadata uit een checkpoint (classes, architecture, best_val_acc, ...) zonder gewichten."""
+    info = {}
+    for key, value in checkpoint.items():
+        if isinstance(value, (str, int, float, bool)) or value is None:
+            info[key] = value
+        elif isinstance(value, (list, tuple)) and all(isinstance(v, (str, int, float)) for v in value):
+            info[key] = list(value)
+    info.setdefault('classes', DEFAULT_CLASSES)
+    return info
+
+
+def load_torch_checkpoint(model_path: Path) -> Tuple[Any, Dict[str, Any]]:
+    """Laad .pt checkpoint als nn.Module in eval mode.
+
+    Returns:
+        Tuple van (model, checkpoint info met o.a. classes).
+    """
+    torch = get_torch()
+    checkpoint = torch.load(model_path, map_location='cpu')
+    info = checkpoint_info(checkpoint)
+    classes = info['classes']
+    state_dict = checkpoint['model_state_dict']
+
+    # Fix voor torch.compile() modellen: verwijder _orig_mod. prefix
+    if any(k.startswith('_orig_mod.') for k in state_dict.keys()):
+        state_dict = {k.replace('_orig_mod.', ''): v for k, v in state_dict.items()}
+
+    # Detecteer classifier type aan de hand van state_dict keys
+    simple_classifier = ('classifier.1.weight' in state_dict
+                         and state_dict['classifier.1.weight'].shape[0] == len(classes))
+
+    model = create_model(num_classes=len(classes), simple_classifier=simple_classifier)
+    model.load_state_dict(state_dict)
+    model.eval()
+    return model, info
+
+
+def onnx_path_for(model_path: Path, quantized: bool = False) -> Path:
+    """ONNX export pad naast het .pt model (nestbox_model_latest.pt -> nestbox_model_latest.onnx)."""
+    suffix = '.int8.onnx' if quantized else '.onnx'
+    return Path(model_path).with_name(Path(model_path).stem + suffix)
+
+
+class TorchOccupancyModel:
+    """PyTorch inference backend."""
+
+    backend = 'torch'
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict_proba(self, x: np.ndarray) -> np.ndarray:
+        """Softmax kansen voor batch (N, 3, INPUT_SIZE, INPUT_SIZE) float32."""
+        torch = get_torch()
+        with torch.no_grad():
+            return torch.softmax(self.model(torch.from_numpy(x)), dim=1).numpy()
+
+
+class OnnxOccupancyModel:
+    """ONNX Runtime inference backend, zelfde contract als TorchOccupancyModel."""
+
+    backend = 'onnx'
+
+    def __init__(self, onnx_path: Path):
+        ort = get_onnxruntime()
+        if ort is None:
+            raise ImportError("onnxruntime is niet geïnstalleerd. Installeer met: pip install onnxruntime")
+
+        # CPU provider (Pi heeft geen CUDA)
+        self.session = ort.InferenceSession(str(onnx_path), providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+        # Checkpoint info (classes, ...) staat als metadata in het model (zie export_onnx.py)
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.info = json.loads(metadata.get('checkpoint_info', '{}'))
+        self.info.setdefault('classes', DEFAULT_CLASSES)
+
+    def predict_proba(self, x: np.ndarray) -> np.ndarray:
+        """Softmax kansen voor batch (N, 3, INPUT_SIZE, INPUT_SIZE) float32."""
+        logits = self.session.run(None, {self.input_name: x})[0]
+        return softmax(logits)
+
+
+def find_onnx(model_path: Path, backend: str = BACKEND, prefer_int8: bool = PREFER_INT8) -> Optional[Path]:
+    """ONNX export voor een .pt model, None = PyTorch gebruiken.
+
+    Een export die ouder is dan het checkpoint (model opnieuw getraind)
+    wordt niet gebruikt.
+    """
+    if backend == 'torch':
+        return None
+
+    candidates = [onnx_path_for(model_path)]
+    if prefer_int8:
+        candidates.insert(0, onnx_path_for(model_path, quantized=True))
+
+    for onnx_path in candidates:
+        if not onnx_path.exists() or get_onnxruntime() is None:
+            continue
+        if model_path.exists() and onnx_path.stat().st_mtime < model_path.stat().st_mtime:
+            logger.warning(f"{onnx_path.name} is ouder dan {model_path.name}, opnieuw exporteren")
+            continue
+        return onnx_path
+
+    if backend == 'onnx':
+        logger.warning(f"Geen bruikbare ONNX export voor {model_path.name}, fallback naar PyTorch")
+    return None
+
+
+def load_model(model_path: Path, backend: str = BACKEND,
+               prefer_int8: bool = PREFER_INT8) -> Tuple[Any, Dict[str, Any]]:
+    """Laad een nestkast model met de gekozen backend.
+
+    Args:
+        model_path: Pad naar het .pt checkpoint (de ONNX export staat ernaast).
+        backend: 'auto', 'torch' of 'onnx'.
+        prefer_int8: Gebruik de int8 export als die bestaat.
+
+    Returns:
+        Tuple van (model met predict_proba, checkpoint info met o.a. classes).
+    """
+    model_path = Path(model_path)
+    onnx_path = find_onnx(model_path, backend, prefer_int8)
+    if onnx_path is not None:
+        model = OnnxOccupancyModel(onnx_path)
+        return model, model.info
+
+    model, info = load_torch_checkpoint(model_path)
+    return TorchOccupancyModel(model), info
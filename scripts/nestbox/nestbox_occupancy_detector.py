@@ -5,14 +5,13 @@ Detecteert automatisch welke vogelsoort in een nestkast zit (of leeg).
 
 Gebruikt MobileNetV2 model getraind op nestkast screenshots.
 Werkt op dag EN nacht screenshots.
+
+Inferentie via ONNX Runtime of PyTorch, zie nestbox_model.py.
 """
 
 import os
 import sys
-import torch
-import torch.nn as nn
-from torchvision import transforms, models
-from PIL import Image
+import numpy as np
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
@@ -23,46 +22,30 @@ import psycopg2
 # Voeg project root toe voor imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from core.config import get_postgres_config
+from core.image_catalog import find_latest
+
+try:
+    from .nestbox_model import load_image_array, load_model as load_backend_model
+except ImportError:
+    from nestbox_model import load_image_array, load_model as load_backend_model
 
 # Configuratie - gebruik het nieuwe soort-herkenning model
 MODEL_PATH = "/mnt/nas-birdnet-archive/nestbox/models/nestbox_species_model.pt"
 FALLBACK_MODEL_PATH = "/mnt/nas-birdnet-archive/nestbox/models/nestbox_occupancy_model.pt"
-INPUT_SIZE = 224
 CONFIDENCE_THRESHOLD = 0.7  # Minimale confidence voor detectie
 
 # Database configuratie via core.config
 DB_CONFIG = get_postgres_config()
 
 
-def create_model(num_classes: int = 2) -> nn.Module:
-    """Maak MobileNetV2 model met aangepaste classifier.
-
-    Args:
-        num_classes: Aantal output classes.
-
-    Returns:
-        PyTorch model.
-    """
-    model = models.mobilenet_v2(weights=None)
-    num_features = model.classifier[1].in_features
-    model.classifier = nn.Sequential(
-        nn.Dropout(p=0.2),
-        nn.Linear(num_features, 128),
-        nn.ReLU(),
-        nn.Dropout(p=0.2),
-        nn.Linear(128, num_classes)
-    )
-    return model
-
-
-def load_model(model_path: Optional[str] = None) -> Tuple[nn.Module, Dict[str, Any]]:
-    """Laad het getrainde model.
+def load_model(model_path: Optional[str] = None) -> Tuple[Any, Dict[str, Any]]:
+    """Laad het getrainde model (ONNX Runtime of PyTorch).
 
     Args:
         model_path: Pad naar model checkpoint, gebruikt default als None.
 
     Returns:
-        Tuple van (model, checkpoint dict).
+        Tuple van (model met predict_proba, checkpoint info zonder gewichten).
     """
     if model_path is None:
         model_path = MODEL_PATH
@@ -71,47 +54,28 @@ def load_model(model_path: Optional[str] = None) -> Tuple[nn.Module, Dict[str, A
     if not os.path.exists(model_path):
         if os.path.exists(FALLBACK_MODEL_PATH):
             model_path = FALLBACK_MODEL_PATH
-        else:
+        elif not os.path.exists(Path(model_path).with_suffix('.onnx')):
             raise FileNotFoundError(f"Model niet gevonden: {model_path}")
 
-    checkpoint = torch.load(model_path, map_location='cpu')
-    classes = checkpoint.get('classes', ['leeg', 'bezet'])
-
-    model = create_model(num_classes=len(classes))
-    model.load_state_dict(checkpoint['model_state_dict'])
-    model.eval()
+    return load_backend_model(Path(model_path))
 
-    return model, checkpoint
 
-
-def predict_image(model: nn.Module, image_path: str, classes: List[str]) -> Dict[str, Any]:
+def predict_image(model, image_path: str, classes: List[str]) -> Dict[str, Any]:
     """Voorspel welke soort in de nestkast zit (of leeg).
 
     Args:
-        model: PyTorch model voor inferentie.
+        model: Model van load_model().
         image_path: Pad naar afbeelding.
         classes: Lijst met class namen.
 
     Returns:
         Dictionary met class, confidence, is_occupied, species, probabilities.
     """
-    transform = transforms.Compose([
-        transforms.Resize((INPUT_SIZE, INPUT_SIZE)),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                             std=[0.229, 0.224, 0.225])
-    ])
-
-    image = Image.open(image_path).convert('RGB')
-    image_tensor = transform(image).unsqueeze(0)
-
-    with torch.no_grad():
-        outputs = model(image_tensor)
-        probabilities = torch.softmax(outputs, dim=1)
-        confidence, predicted = probabilities.max(1)
-
-    class_idx = predicted.item()
-    conf = confidence.item()
+    image = load_image_array(image_path)
+    probabilities = model.predict_proba(image[np.newaxis])[0]
+
+    class_idx = int(probabilities.argmax())
+    conf = float(probabilities[class_idx])
     detected_class = classes[class_idx]
 
     # Bepaal of bezet (alles behalve 'leeg')
@@ -121,7 +85,7 @@ def predict_image(model: nn.Module, image_path: str, classes: List[str]) -> Dict
     species = detected_class if is_occupied else None
 
     # Bouw probabiliteiten dict
-    probs = {cls: probabilities[0][i].item() for i, cls in enumerate(classes)}
+    probs = {cls: float(probabilities[i]) for i, cls in enumerate(classes)}
 
     return {
         'class': detected_class,
@@ -135,7 +99,7 @@ def predict_image(model: nn.Module, image_path: str, classes: List[str]) -> Dict
 
 def analyze_screenshot(
     image_path: str,
-    model: Optional[nn.Module] = None,
+    model: Optional[Any] = None,
     classes: Optional[List[str]] = None,
     verbose: bool = False
 ) -> Dict[str, Any]:
@@ -143,7 +107,7 @@ def analyze_screenshot(
 
     Args:
         image_path: Pad naar screenshot.
-        model: PyTorch model (wordt geladen als None).
+        model: Model van load_model() (wordt geladen als None).
         classes: Class namen (worden geladen als None).
         verbose: Print extra output.
 
@@ -172,7 +136,7 @@ def analyze_screenshot(
 
 def analyze_nestbox(
     nestbox_id: str,
-    model: Optional[nn.Module] = None,
+    model: Optional[Any] = None,
     classes: Optional[List[str]] = None,
     latest_only: bool = True,
     verbose: bool = False
@@ -181,7 +145,7 @@ def analyze_nestbox(
 
     Args:
         nestbox_id: ID van nestkast ('voor', 'midden', 'achter').
-        model: PyTorch model (wordt geladen als None).
+        model: Model van load_model() (wordt geladen als None).
         classes: Class namen (worden geladen als None).
         latest_only: Alleen laatste screenshot analyseren.
         verbose: Print extra output.
@@ -195,16 +159,17 @@ def analyze_nestbox(
         print(f"Geen screenshots gevonden voor nestkast: {nestbox_id}")
         return None
 
-    # Vind screenshots
-    screenshots = sorted(base_path.rglob("*.jpg"))
+    # Vind screenshots (laatste via image catalog, zonder de hele boom te scannen)
+    if latest_only:
+        latest = find_latest('nestbox', nestbox_id)
+        screenshots = [latest[1]] if latest else []
+    else:
+        screenshots = sorted(base_path.rglob("*.jpg"))
 
     if not screenshots:
         print(f"Geen screenshots gevonden voor nestkast: {nestbox_id}")
         return None
 
-    if latest_only:
-        screenshots = [screenshots[-1]]
-
     if model is None:
         model, checkpoint = load_model(MODEL_PATH)
         classes = checkpoint.get('classes', ['leeg', 'bezet'])
@@ -270,7 +235,7 @@ def analyze_all_nestboxes(verbose=False, save_db=False, capture_type=None):
     classes = checkpoint.get('classes', ['leeg', 'bezet'])
 
     if verbose:
-        print(f"Model geladen: {checkpoint.get('architecture', 'mobilenet_v2')}")
+        print(f"Model geladen: {checkpoint.get('architecture', 'mobilenet_v2')} ({model.backend})")
         print(f"Classes: {classes}")
         print(f"Getraind op: {checkpoint.get('train_samples', '?')} samples")
         acc = checkpoint.get('best_val_acc', None)
@@ -17,19 +17,38 @@ Gebruik:
 
     # Dry-run (geen database wijzigingen)
     ./nestbox_realtime_detector.py --all --dry-run
+
+    # Tijden per stap (model, opzoeken, decoderen, inferentie, database)
+    ./nestbox_realtime_detector.py --all --timings
+
+Bij --all worden de nestkasten samen verwerkt: de laatste frames worden
+parallel gedecodeerd, het model draait één forward pass over de gestapelde
+batch en alle database lees- en schrijfacties gaan over één connectie in
+één transactie.
+
+Het model draait via ONNX Runtime als er een actuele export naast het
+checkpoint staat (zonder torch import), anders via PyTorch; zie
+nestbox_model.py en export_onnx.py.
+
+Of een detectie tot een statuswijziging leidt (minimale tijd tussen events,
+nachtelijke slaapplaats bescherming, hysterese) beslist de StatusSmoother
+lokaal op zijn rollende venster van recente detecties; zie
+nestbox_status_smoother.py. Per run is er één query naar nestbox_events
+(handmatige events overnemen) en worden alleen wijzigingen en een uitgedunde
+occupancy log geschreven.
 """
 
 import os
 import sys
 import argparse
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
 
-import torch
-import torch.nn as nn
-from torchvision import transforms, models
-from PIL import Image
+import numpy as np
 from typing import Dict, List, Any, Optional, Tuple
 import psycopg2
 from psycopg2.extensions import connection as PgConnection
@@ -37,11 +56,18 @@ from psycopg2.extensions import connection as PgConnection
 # Voeg project root toe voor imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from core.config import get_postgres_config
+from core.image_catalog import CatalogError, ImageCatalog, find_latest
+
+try:
+    from .nestbox_model import load_image_array, load_model as load_backend_model
+    from .nestbox_status_smoother import STATE_FILE, StatusSmoother
+except ImportError:
+    from nestbox_model import load_image_array, load_model as load_backend_model
+    from nestbox_status_smoother import STATE_FILE, StatusSmoother
 
 # Configuratie
 MODEL_PATH = "/mnt/nas-birdnet-archive/nestbox/models/nestbox_model_latest.pt"
 FALLBACK_MODEL_PATH = "/mnt/nas-birdnet-archive/nestbox/models/nestbox_species_model.pt"
-INPUT_SIZE = 224
 CONFIDENCE_THRESHOLD = 0.50  # Minimale confidence voor statuswijziging (verlaagd voor daglicht detectie)
 
 # Minimale tijd tussen status events (voorkom ruis)
@@ -60,45 +86,25 @@ DB_CONFIG = get_postgres_config()
 NESTBOXES = ['voor', 'midden', 'achter']
 
 
-def create_model(num_classes: int = 2, simple_classifier: bool = False) -> nn.Module:
-    """Maak MobileNetV2 model met aangepaste classifier.
-
-    Args:
-        num_classes: Aantal output classes.
-        simple_classifier: Gebruik eenvoudige classifier (nieuwe modellen).
-
-    Returns:
-        PyTorch model.
-    """
-    model = models.mobilenet_v2(weights=None)
-    num_features = model.classifier[1].in_features
-
-    if simple_classifier:
-        # Simpele classifier (nieuwe modellen)
-        model.classifier = nn.Sequential(
-            nn.Dropout(p=0.3),
-            nn.Linear(num_features, num_classes)
-        )
-    else:
-        # Complexere classifier (oude modellen)
-        model.classifier = nn.Sequential(
-            nn.Dropout(p=0.2),
-            nn.Linear(num_features, 128),
-            nn.ReLU(),
-            nn.Dropout(p=0.2),
-            nn.Linear(128, num_classes)
-        )
-    return model
+@contextmanager
+def stage(timings: Optional[Dict[str, float]], name: str):
+    """Tel de wandkloktijd van het blok op bij timings[name] (als timings niet None is)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
 
 
-def load_model(model_path: Optional[str] = None) -> Tuple[nn.Module, List[str]]:
-    """Laad het getrainde model.
+def load_model(model_path: Optional[str] = None) -> Tuple[Any, List[str]]:
+    """Laad het getrainde model (ONNX Runtime of PyTorch, zie nestbox_model.py).
 
     Args:
         model_path: Pad naar model checkpoint.
 
     Returns:
-        Tuple van (model, class namen).
+        Tuple van (model met predict_proba, class namen).
     """
     if model_path is None:
         model_path = MODEL_PATH
@@ -106,57 +112,23 @@ def load_model(model_path: Optional[str] = None) -> Tuple[nn.Module, List[str]]:
     if not os.path.exists(model_path):
         if os.path.exists(FALLBACK_MODEL_PATH):
             model_path = FALLBACK_MODEL_PATH
-        else:
+        elif not os.path.exists(Path(model_path).with_suffix('.onnx')):
             raise FileNotFoundError(f"Model niet gevonden: {model_path}")
 
-    checkpoint = torch.load(model_path, map_location='cpu')
-    classes = checkpoint.get('classes', ['leeg', 'bezet'])
-    state_dict = checkpoint['model_state_dict']
-
-    # Fix voor torch.compile() modellen: verwijder _orig_mod. prefix
-    if any(k.startswith('_orig_mod.') for k in state_dict.keys()):
-        state_dict = {k.replace('_orig_mod.', ''): v for k, v in state_dict.items()}
+    model, info = load_backend_model(Path(model_path))
+    return model, info['classes']
 
-    # Detecteer classifier type aan de hand van state_dict keys
-    simple_classifier = 'classifier.1.weight' in state_dict and state_dict['classifier.1.weight'].shape[0] == len(classes)
 
-    model = create_model(num_classes=len(classes), simple_classifier=simple_classifier)
-    model.load_state_dict(state_dict)
-    model.eval()
-
-    return model, classes
-
-
-def predict_image(model: nn.Module, image_path: str, classes: List[str]) -> Dict[str, Any]:
-    """Voorspel status van nestkast.
+def make_result(detected_class: str, confidence: float) -> Dict[str, Any]:
+    """Zet een voorspelde class om naar het detectie resultaat.
 
     Args:
-        model: PyTorch model.
-        image_path: Pad naar afbeelding.
-        classes: Lijst met class namen.
+        detected_class: Naam van de voorspelde class.
+        confidence: Softmax kans van die class.
 
     Returns:
         Dictionary met is_occupied, species, confidence, detected_class.
     """
-    transform = transforms.Compose([
-        transforms.Resize((INPUT_SIZE, INPUT_SIZE)),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                             std=[0.229, 0.224, 0.225])
-    ])
-
-    image = Image.open(image_path).convert('RGB')
-    image_tensor = transform(image).unsqueeze(0)
-
-    with torch.no_grad():
-        outputs = model(image_tensor)
-        probabilities = torch.softmax(outputs, dim=1)
-        confidence, predicted = probabilities.max(1)
-
-    class_idx = predicted.item()
-    conf = confidence.item()
-    detected_class = classes[class_idx]
-
     is_occupied = detected_class.lower() != 'leeg'
 
     # Soort toewijzing: huidige beelden zijn 100% Koolmees
@@ -166,11 +138,46 @@ def predict_image(model: nn.Module, image_path: str, classes: List[str]) -> Dict
     return {
         'is_occupied': is_occupied,
         'species': species,
-        'confidence': conf,
+        'confidence': confidence,
         'detected_class': detected_class
     }
 
 
+def predict_batch(model, images: List[np.ndarray], classes: List[str]) -> List[Dict[str, Any]]:
+    """Voorspel de status van meerdere nestkasten in één forward pass.
+
+    Args:
+        model: Model van load_model().
+        images: Arrays van load_image_array().
+        classes: Lijst met class namen.
+
+    Returns:
+        Resultaat per beeld, in dezelfde volgorde (zie make_result).
+    """
+    if not images:
+        return []
+
+    probabilities = model.predict_proba(np.stack(images))
+    predicted = probabilities.argmax(axis=1)
+
+    return [make_result(classes[class_idx], float(probabilities[i, class_idx]))
+            for i, class_idx in enumerate(predicted.tolist())]
+
+
+def predict_image(model, image_path: str, classes: List[str]) -> Dict[str, Any]:
+    """Voorspel status van nestkast.
+
+    Args:
+        model: Model van load_model().
+        image_path: Pad naar afbeelding.
+        classes: Lijst met class namen.
+
+    Returns:
+        Dictionary met is_occupied, species, confidence, detected_class.
+    """
+    return predict_batch(model, [load_image_array(image_path)], classes)[0]
+
+
 def get_db_connection() -> PgConnection:
     """Maak database connectie.
 
@@ -210,6 +217,36 @@ def get_current_status(conn: PgConnection, nestbox_id: str) -> Optional[Dict[str
     return None
 
 
+def get_current_statuses(conn: PgConnection, nestbox_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Huidige status van meerdere nestkasten in één query (zie get_current_status).
+
+    Args:
+        conn: Database connectie.
+        nestbox_ids: IDs van nestkasten.
+
+    Returns:
+        Dictionary nestbox_id -> event dict; nestkasten zonder events ontbreken.
+    """
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT DISTINCT ON (nestbox_id) nestbox_id, event_type, species, event_timestamp
+        FROM nestbox_events
+        WHERE nestbox_id = ANY(%s)
+        ORDER BY nestbox_id, event_timestamp DESC
+    """, (list(nestbox_ids),))
+    rows = cur.fetchall()
+    cur.close()
+
+    return {
+        row[0]: {
+            'event_type': row[1],
+            'species': row[2],
+            'timestamp': row[3]
+        }
+        for row in rows
+    }
+
+
 def get_last_occupancy_detection(conn, nestbox_id):
     """Haal laatste AI detectie op"""
     cur = conn.cursor()
@@ -233,8 +270,8 @@ def get_last_occupancy_detection(conn, nestbox_id):
     return None
 
 
-def save_occupancy_detection(conn, nestbox_id, result, image_path=None, capture_type=None):
-    """Sla AI detectie op in nestbox_occupancy"""
+def save_occupancy_detection(conn, nestbox_id, result, image_path=None, capture_type=None, commit=True):
+    """Sla AI detectie op in nestbox_occupancy (commit=False: onderdeel van een grotere transactie)"""
     cur = conn.cursor()
 
     prob_leeg = 1.0 - result['confidence'] if result['is_occupied'] else result['confidence']
@@ -255,7 +292,20 @@ def save_occupancy_detection(conn, nestbox_id, result, image_path=None, capture_
         result.get('species')
     ))
 
-    conn.commit()
+    if commit:
+        conn.commit()
+    cur.close()
+
+
+def save_analyzed_frame(conn, nestbox_id, result, image_path, timestamp):
+    """Markeer een frame als geanalyseerd buiten de uitgedunde log (zie nestbox_cleanup.py)"""
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO nestbox_analyzed_frames
+        (image_path, nestbox_id, analyzed_at, is_occupied, confidence)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (image_path) DO NOTHING
+    """, (image_path, nestbox_id, timestamp, result['is_occupied'], result['confidence']))
     cur.close()
 
 
@@ -278,55 +328,22 @@ def is_night_time() -> bool:
     return start <= hour < end
 
 
-def get_recent_empty_count(conn: PgConnection, nestbox_id: str, hours: int = 2) -> int:
-    """Tel aantal opeenvolgende 'leeg' detecties in de afgelopen uren.
-
-    Dit helpt om nachtelijke false negatives te filteren. Als een vogel slaapt
-    maar even beweegt, kan de AI denken dat de kast leeg is.
-
-    Args:
-        conn: Database connectie.
-        nestbox_id: ID van nestkast.
-        hours: Aantal uur terug kijken.
-
-    Returns:
-        Aantal opeenvolgende 'leeg' detecties (stopt bij eerste 'bezet').
-    """
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT is_occupied
-        FROM nestbox_occupancy
-        WHERE nestbox_id = %s
-          AND timestamp > NOW() - INTERVAL '%s hours'
-        ORDER BY timestamp DESC
-        LIMIT 10
-    """, (nestbox_id, hours))
-
-    rows = cur.fetchall()
-    cur.close()
-
-    # Tel opeenvolgende 'leeg' (is_occupied=False) vanaf meest recente
-    count = 0
-    for row in rows:
-        if row[0]:  # is_occupied = True
-            break
-        count += 1
-
-    return count
+def occupied_event_type() -> str:
+    """Event type voor een bezette nestkast: onderscheid tussen broedseizoen en slaapplaats"""
+    return 'bezet' if is_breeding_season() else 'slaapplaats'
 
 
-def register_status_change(conn, nestbox_id, new_status, species=None, image_path=None, notes=None):
-    """Registreer statusverandering in nestbox_events"""
+def register_status_change(conn, nestbox_id, new_status, species=None, image_path=None, notes=None,
+                           commit=True, timestamp=None):
+    """Registreer statusverandering in nestbox_events (commit=False: onderdeel van een grotere transactie)"""
     cur = conn.cursor()
 
     # Bepaal event_type
     if new_status:
-        # Bezet: onderscheid tussen broedseizoen en slaapplaats
-        if is_breeding_season():
-            event_type = 'bezet'
+        event_type = occupied_event_type()
+        if event_type == 'bezet':
             default_notes = "Automatisch gedetecteerd door AI"
         else:
-            event_type = 'slaapplaats'
             default_notes = "Nachtelijke slaapplaats buiten broedseizoen"
     else:
         event_type = 'leeg'
@@ -338,7 +355,7 @@ def register_status_change(conn, nestbox_id, new_status, species=None, image_pat
         VALUES (%s, %s, %s, %s, %s, %s, %s)
     """, (
         nestbox_id,
-        datetime.now(),
+        timestamp or datetime.now(),
         event_type,
         species if new_status else None,
         image_path,
@@ -346,63 +363,158 @@ def register_status_change(conn, nestbox_id, new_status, species=None, image_pat
         'AI-detector'
     ))
 
-    conn.commit()
+    if commit:
+        conn.commit()
     cur.close()
 
 
-def should_register_change(current_event, new_is_occupied, new_species, conn=None, nestbox_id=None):
-    """Bepaal of we een statuswijziging moeten registreren.
+def load_smoother() -> StatusSmoother:
+    """StatusSmoother met de drempels van deze service."""
+    return StatusSmoother.load(
+        confidence_threshold=CONFIDENCE_THRESHOLD,
+        min_event_interval=timedelta(minutes=MIN_EVENT_INTERVAL_MINUTES),
+        night_min_empty_streak=NIGHT_MIN_EMPTY_STREAK if NIGHT_PROTECTION_ENABLED else 0,
+    )
+
+
+def find_latest_frames(conn: PgConnection, nestbox_ids: List[str]) -> Dict[str, Tuple[datetime, str]]:
+    """Opnametijd en pad van het nieuwste screenshot per nestkast.
+
+    Gebruikt de image catalog over de bestaande connectie; valt terug op
+    find_latest (dag-mappen) als de catalogus niet bruikbaar is.
+
+    Args:
+        conn: Database connectie.
+        nestbox_ids: IDs van nestkasten.
 
-    Nachtelijke bescherming: Als een vogel 's nachts slaapt en de AI detecteert
-    kort "leeg", negeren we dit tot er meerdere opeenvolgende "leeg" detecties zijn.
-    Dit voorkomt false vertrek-events door beweging of slechte belichting.
+    Returns:
+        Dictionary nestbox_id -> (opnametijd, pad); nestkasten zonder
+        screenshots ontbreken.
     """
-    if current_event is None:
-        # Geen eerdere events - altijd registreren
-        return True
+    try:
+        catalog = ImageCatalog(conn)
+        latest = {nestbox_id: catalog.latest('nestbox', nestbox_id) for nestbox_id in nestbox_ids}
+    except CatalogError:
+        latest = {nestbox_id: find_latest('nestbox', nestbox_id) for nestbox_id in nestbox_ids}
+
+    return {nestbox_id: (found[0], str(found[1])) for nestbox_id, found in latest.items() if found}
 
-    current_type = current_event['event_type']
-    current_is_occupied = current_type not in ['leeg', 'uitgevlogen', 'mislukt']
 
-    # Check of status veranderd is
-    if current_is_occupied != new_is_occupied:
-        # Status is veranderd - check minimum interval
-        time_since_last = datetime.now() - current_event['timestamp']
-        if time_since_last >= timedelta(minutes=MIN_EVENT_INTERVAL_MINUTES):
+def decode_frames(image_paths: Dict[str, str]) -> Dict[str, Optional[np.ndarray]]:
+    """Decodeer de screenshots parallel (PIL en NumPy geven de GIL vrij).
 
-            # Nachtelijke slaapplaats bescherming
-            if (NIGHT_PROTECTION_ENABLED and
-                is_night_time() and
-                current_is_occupied and
-                not new_is_occupied and
-                current_type == 'slaapplaats' and
-                conn is not None and
-                nestbox_id is not None):
+    Args:
+        image_paths: Dictionary nestbox_id -> pad.
 
-                # 's Nachts: alleen "vertrek" registreren na meerdere opeenvolgende "leeg" detecties
-                empty_streak = get_recent_empty_count(conn, nestbox_id, hours=2)
-                if empty_streak < NIGHT_MIN_EMPTY_STREAK:
-                    # Nog niet genoeg bewijs dat vogel echt weg is
-                    return False
+    Returns:
+        Dictionary nestbox_id -> array, of None als het beeld niet leesbaar is.
+    """
+    def load(item):
+        nestbox_id, image_path = item
+        try:
+            return nestbox_id, load_image_array(image_path)
+        except (OSError, ValueError):
+            return nestbox_id, None
 
-            return True
+    if not image_paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(image_paths)) as pool:
+        return dict(pool.map(load, image_paths.items()))
 
-    return False
+
+def process_detection(conn, smoother, nestbox_id, result, image_path, timestamp,
+                      dry_run=False, verbose=False):
+    """Laat de smoother een detectie beoordelen en schrijf wijziging en log.
+
+    `timestamp` is de opnametijd van het screenshot, niet het moment van
+    analyseren. Commit niet: de aanroeper sluit de transactie af en slaat de smoother op.
+    """
+    state = smoother.state(nestbox_id)
+
+    if verbose:
+        status = f"BEZET ({result['species']})" if result['is_occupied'] else "LEEG"
+        print(f"[{nestbox_id}] Detectie: {status} ({result['confidence']:.1%})")
+
+        if state.event_type:
+            print(f"[{nestbox_id}] Huidige status: {state.event_type} (sinds {state.since})")
+
+    decision = smoother.observe(nestbox_id, result, timestamp, night=is_night_time(),
+                                occupied_event_type=occupied_event_type(),
+                                image_path=image_path)
+
+    if verbose:
+        print(f"[{nestbox_id}] P(bezet): {decision['belief']:.2f}")
+
+    # Uitgedunde occupancy log: wijzigingen, twijfel en een periodieke hartslag.
+    # Overige lege frames krijgen een lichte rij, zodat de cleanup weet dat ze
+    # beoordeeld zijn; bezette frames worden nooit opgeruimd en hebben er geen nodig
+    if not dry_run:
+        if decision['log']:
+            save_occupancy_detection(conn, nestbox_id, result, image_path, commit=False)
+        elif not result['is_occupied']:
+            save_analyzed_frame(conn, nestbox_id, result, image_path, timestamp)
+
+    if decision['changed']:
+        new_status = decision['new_status']
+
+        if verbose:
+            print(f"[{nestbox_id}] STATUS WIJZIGING: -> {new_status}")
+
+        if not dry_run:
+            notes = f"AI detectie met {result['confidence']:.1%} confidence (P(bezet) {decision['belief']:.2f})"
+            register_status_change(
+                conn, nestbox_id,
+                result['is_occupied'],
+                species=result.get('species'),
+                image_path=image_path,
+                notes=notes,
+                commit=False,
+                timestamp=timestamp
+            )
+            if verbose:
+                print(f"[{nestbox_id}] Event geregistreerd in database")
+        else:
+            if verbose:
+                print(f"[{nestbox_id}] [DRY-RUN] Zou event registreren")
+
+        return {
+            'nestbox_id': nestbox_id,
+            'status_changed': True,
+            'new_status': new_status,
+            'species': result.get('species'),
+            'confidence': result['confidence']
+        }
+
+    if verbose:
+        if decision['reason'] == 'confidence':
+            print(f"[{nestbox_id}] Confidence te laag ({result['confidence']:.1%} < {CONFIDENCE_THRESHOLD:.0%})")
+        elif decision['reason'] == 'interval':
+            print(f"[{nestbox_id}] Minder dan {MIN_EVENT_INTERVAL_MINUTES} min sinds laatste event")
+        elif decision['reason'] == 'nacht':
+            print(f"[{nestbox_id}] Nachtelijke bescherming: {decision['empty_streak']}/{NIGHT_MIN_EMPTY_STREAK} "
+                  f"leeg detecties (geen vertrek event)")
+
+    return {
+        'nestbox_id': nestbox_id,
+        'status_changed': False,
+        'detected_status': 'bezet' if result['is_occupied'] else 'leeg',
+        'confidence': result['confidence']
+    }
 
 
 def analyze_nestbox(nestbox_id, image_path=None, model=None, classes=None,
                     dry_run=False, verbose=False):
     """Analyseer nestkast en registreer eventuele statuswijziging"""
 
-    # Bepaal image path als niet opgegeven
+    # Bepaal image path als niet opgegeven; een opgegeven beeld geldt als nu
+    taken_at = datetime.now()
     if image_path is None:
-        base_path = Path(f"/mnt/nas-birdnet-archive/nestbox/{nestbox_id}/screenshots")
-        screenshots = sorted(base_path.rglob("*.jpg"))
-        if not screenshots:
+        latest = find_latest('nestbox', nestbox_id)
+        if latest is None:
             if verbose:
                 print(f"[{nestbox_id}] Geen screenshots gevonden")
             return None
-        image_path = str(screenshots[-1])
+        taken_at, image_path = latest[0], str(latest[1])
 
     # Laad model indien nodig
     if model is None:
@@ -411,108 +523,125 @@ def analyze_nestbox(nestbox_id, image_path=None, model=None, classes=None,
     # Voorspel status
     result = predict_image(model, image_path, classes)
 
-    if verbose:
-        status = f"BEZET ({result['species']})" if result['is_occupied'] else "LEEG"
-        print(f"[{nestbox_id}] Detectie: {status} ({result['confidence']:.1%})")
-
     # Database operaties
+    smoother = load_smoother()
     conn = get_db_connection()
 
     try:
-        # Haal huidige status op
-        current_event = get_current_status(conn, nestbox_id)
+        smoother.reconcile(get_current_statuses(conn, [nestbox_id]))
+        outcome = process_detection(conn, smoother, nestbox_id, result, image_path, taken_at,
+                                    dry_run=dry_run, verbose=verbose)
+        conn.commit()
 
-        if verbose and current_event:
-            print(f"[{nestbox_id}] Huidige status: {current_event['event_type']} "
-                  f"(sinds {current_event['timestamp']})")
+    except Exception:
+        conn.rollback()
+        raise
 
-        # Sla detectie altijd op in occupancy tabel
-        if not dry_run:
-            save_occupancy_detection(conn, nestbox_id, result, image_path)
+    finally:
+        conn.close()
 
-        # Check of we statuswijziging moeten registreren
-        if result['confidence'] >= CONFIDENCE_THRESHOLD:
-            if should_register_change(current_event, result['is_occupied'], result.get('species'),
-                                      conn=conn, nestbox_id=nestbox_id):
-                new_status = "bezet" if result['is_occupied'] else "leeg"
+    if not dry_run:
+        smoother.save()
+    return outcome
 
-                if verbose:
-                    old_status = current_event['event_type'] if current_event else "onbekend"
-                    print(f"[{nestbox_id}] STATUS WIJZIGING: {old_status} -> {new_status}")
-
-                if not dry_run:
-                    notes = f"AI detectie met {result['confidence']:.1%} confidence"
-                    register_status_change(
-                        conn, nestbox_id,
-                        result['is_occupied'],
-                        species=result.get('species'),
-                        image_path=image_path,
-                        notes=notes
-                    )
-                    if verbose:
-                        print(f"[{nestbox_id}] Event geregistreerd in database")
-                else:
-                    if verbose:
-                        print(f"[{nestbox_id}] [DRY-RUN] Zou event registreren")
-
-                return {
-                    'nestbox_id': nestbox_id,
-                    'status_changed': True,
-                    'new_status': new_status,
-                    'species': result.get('species'),
-                    'confidence': result['confidence']
-                }
-        else:
-            if verbose:
-                print(f"[{nestbox_id}] Confidence te laag ({result['confidence']:.1%} < {CONFIDENCE_THRESHOLD:.0%})")
 
-        # Extra logging voor nachtelijke bescherming
-        if verbose and is_night_time() and not result['is_occupied']:
-            empty_streak = get_recent_empty_count(conn, nestbox_id, hours=2)
-            if empty_streak < NIGHT_MIN_EMPTY_STREAK:
-                print(f"[{nestbox_id}] Nachtelijke bescherming: {empty_streak}/{NIGHT_MIN_EMPTY_STREAK} leeg detecties (geen vertrek event)")
+def analyze_all_nestboxes(dry_run=False, verbose=False, timings=None):
+    """Analyseer alle nestkasten in één batch.
 
-        return {
-            'nestbox_id': nestbox_id,
-            'status_changed': False,
-            'detected_status': 'bezet' if result['is_occupied'] else 'leeg',
-            'confidence': result['confidence']
-        }
+    Een nestkast waarvan het nieuwste screenshot al beoordeeld is (camera
+    hangt, screenshot service loopt achter) wordt overgeslagen, zodat
+    hetzelfde frame niet opnieuw als verse detectie in het venster komt.
 
-    finally:
-        conn.close()
+    Args:
+        dry_run: Geen database wijzigingen.
+        verbose: Voortgang printen.
+        timings: Optionele dict die per stap de duur in seconden krijgt
+            (model, connect, lookup, decode, inference, database, total).
 
+    Returns:
+        Lijst met resultaten per nestkast (zie process_detection).
+    """
+    started = time.perf_counter()
 
-def analyze_all_nestboxes(dry_run=False, verbose=False):
-    """Analyseer alle nestkasten"""
-    model, classes = load_model()
+    with stage(timings, 'model'):
+        model, classes = load_model()
 
     if verbose:
         print("=" * 50)
         print("NESTKAST REALTIME DETECTIE")
         print("=" * 50)
-        print(f"Model: {MODEL_PATH}")
+        print(f"Model: {MODEL_PATH} ({model.backend})")
         print(f"Confidence threshold: {CONFIDENCE_THRESHOLD:.0%}")
         print(f"Min. interval tussen events: {MIN_EVENT_INTERVAL_MINUTES} min")
+        print(f"Status toestand: {STATE_FILE}")
         print()
 
+    with stage(timings, 'connect'):
+        conn = get_db_connection()
+
     results = []
-    for nestbox_id in NESTBOXES:
-        result = analyze_nestbox(
-            nestbox_id,
-            model=model,
-            classes=classes,
-            dry_run=dry_run,
-            verbose=verbose
-        )
-        if result:
-            results.append(result)
-        if verbose:
-            print()
+    try:
+        with stage(timings, 'lookup'):
+            frames = find_latest_frames(conn, NESTBOXES)
+            smoother = load_smoother()
+            image_paths = {nestbox_id: image_path for nestbox_id, (_, image_path) in frames.items()
+                           if image_path != smoother.state(nestbox_id).last_image_path()}
+
+        with stage(timings, 'decode'):
+            tensors = decode_frames(image_paths)
+
+        ready = []
+        for nestbox_id in NESTBOXES:
+            if nestbox_id not in frames:
+                if verbose:
+                    print(f"[{nestbox_id}] Geen screenshots gevonden\n")
+            elif nestbox_id not in image_paths:
+                if verbose:
+                    print(f"[{nestbox_id}] Geen nieuw screenshot sinds vorige run\n")
+            elif tensors.get(nestbox_id) is None:
+                if verbose:
+                    print(f"[{nestbox_id}] Screenshot niet leesbaar: {image_paths[nestbox_id]}\n")
+            else:
+                ready.append(nestbox_id)
+
+        with stage(timings, 'inference'):
+            detections = predict_batch(model, [tensors[nestbox_id] for nestbox_id in ready], classes)
+
+        with stage(timings, 'database'):
+            if ready:
+                smoother.reconcile(get_current_statuses(conn, ready))
+            for nestbox_id, result in zip(ready, detections):
+                taken_at, image_path = frames[nestbox_id]
+                results.append(process_detection(
+                    conn, smoother, nestbox_id, result, image_path, taken_at,
+                    dry_run=dry_run,
+                    verbose=verbose
+                ))
+                if verbose:
+                    print()
+            conn.commit()
+
+        # Pas na de commit: bij een database fout blijft de vorige toestand staan
+        if not dry_run:
+            smoother.save()
+
+    except Exception:
+        conn.rollback()
+        raise
+
+    finally:
+        conn.close()
+        if timings is not None:
+            timings['total'] = time.perf_counter() - started
 
     return results
 
 
+def format_timings(timings: Dict[str, float]) -> str:
+    """Eén regel met de duur per stap, zoals in de AtmosBird capture log."""
+    return "Timings: " + ", ".join(f"{name}={seconds:.2f}s" for name, seconds in timings.items())
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Nestkast Realtime Detectie Service',
@@ -529,6 +658,8 @@ def main():
                         help='Verbose output')
     parser.add_argument('--json', '-j', action='store_true',
                         help='Output als JSON')
+    parser.add_argument('--timings', '-t', action='store_true',
+                        help='Toon tijd per stap (bij --json op stderr)')
 
     args = parser.parse_args()
 
@@ -545,10 +676,14 @@ def main():
             print(f"Status gewijzigd naar: {result['new_status']}")
 
     elif args.all:
+        timings = {}
         results = analyze_all_nestboxes(
             dry_run=args.dry_run,
-            verbose=args.verbose and not args.json
+            verbose=args.verbose and not args.json,
+            timings=timings
         )
+        if args.timings or (args.verbose and not args.json):
+            print(format_timings(timings), file=sys.stderr if args.json else sys.stdout)
         if args.json:
             print(json.dumps(results, indent=2, default=str))
         else:
@@ -560,7 +695,9 @@ def main():
 
     else:
         # Default: alle nestkasten met verbose
-        analyze_all_nestboxes(dry_run=args.dry_run, verbose=True)
+        timings = {}
+        analyze_all_nestboxes(dry_run=args.dry_run, verbose=True, timings=timings)
+        print(format_timings(timings))
 
 
 if __name__ == '__main__':
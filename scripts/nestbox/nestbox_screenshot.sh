@@ -11,6 +11,8 @@
 # Draait via systemd timer
 
 API_URL="http://192.168.1.178:8081/api/nestbox/capture/screenshot"
+# De API geeft file_path relatief aan deze map (zie NESTBOX_MEDIA_BASE in reports-web/api.py)
+NESTBOX_MEDIA_BASE="/mnt/nas-birdnet-archive/nestbox"
 LOG_FILE="/var/log/nestbox-screenshot.log"
 
 # Bepaal capture type op basis van uur
@@ -36,13 +38,33 @@ capture_screenshot() {
         -d "{\"nestbox_id\": \"$nestbox_id\", \"capture_type\": \"$CAPTURE_TYPE\"}" \
         2>/dev/null)
 
-    if echo "$response" | grep -q '"success"'; then
-        log "SUCCESS: $nestbox_id - $(echo "$response" | grep -o '"file_path": "[^"]*"')"
+    # jsonify schrijft compacte JSON ("file_path":"..."), dus echt parsen
+    file_path=$(echo "$response" | python3 -c "import json,sys; d=json.load(sys.stdin); print(d.get('file_path', '') if d.get('success') else '')" 2>/dev/null)
+
+    if [ -n "$file_path" ]; then
+        log "SUCCESS: $nestbox_id - $file_path"
+        register_in_catalog "$nestbox_id" "$NESTBOX_MEDIA_BASE/$file_path"
     else
         log "ERROR: $nestbox_id - $response"
     fi
 }
 
+register_in_catalog() {
+    # Registreer het nieuwe beeld in de image catalog, zodat de detector en
+    # timelapse het vinden zonder de screenshot boom te scannen
+    local nestbox_id=$1
+    local file_path=$2
+
+    SCRIPT_DIR="$(dirname "$0")"
+    PYTHON="/home/ronny/emsn2/venv/bin/python3"
+    CATALOG="$SCRIPT_DIR/../maintenance/image_catalog_sync.py"
+
+    if [ -n "$file_path" ] && [ -f "$PYTHON" ] && [ -f "$CATALOG" ]; then
+        $PYTHON "$CATALOG" add --source nestbox --camera "$nestbox_id" "$file_path" >/dev/null 2>&1 \
+            || log "WARN: $nestbox_id - niet in image catalog geregistreerd (reconciler pakt het op)"
+    fi
+}
+
 run_occupancy_detection() {
     # Draai realtime detectie na screenshots - detecteert EN registreert statuswijzigingen
     log "Running realtime occupancy detection..."
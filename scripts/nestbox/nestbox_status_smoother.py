@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Nestkast Status Smoother - EMSN
+
+Temporele afvlakking van de AI detecties per nestkast, lokaal in plaats van
+via de nestbox_occupancy historie in PostgreSQL:
+
+- Een tweetoestanden HMM (bezet/leeg) houdt per nestkast een kans P(bezet)
+  bij. Elke detectie werkt die kans bij met de model kans (prob_bezet) als
+  emissie en SWITCH_PROBABILITY als overgangskans tussen twee detecties.
+- Hysterese: de status gaat pas naar bezet boven ENTER_BELIEF en pas naar
+  leeg onder EXIT_BELIEF. Eén zeer zekere detectie is genoeg, twijfelende
+  detecties moeten elkaar bevestigen.
+- Minimale tijd tussen events en nachtelijke slaapplaats bescherming
+  (opeenvolgende 'leeg' detecties) worden beoordeeld op het rollende venster
+  van recente detecties in geheugen.
+
+De toestand staat in een klein JSON bestand (STATE_FILE) zodat een timer run
+of herstart verder gaat waar de vorige stopte. De database krijgt alleen nog
+statuswijzigingen (nestbox_events) en een uitgedunde occupancy log: een rij
+bij elke wijziging, bij twijfel (confidence onder LOG_MIN_CONFIDENCE of een
+detectie die afwijkt van de status) en verder hooguit één per
+LOG_INTERVAL_MINUTES. Niet gelogde frames krijgen alleen een lichte rij in
+nestbox_analyzed_frames (zie nestbox_cleanup.py).
+
+Gebruik:
+    smoother = StatusSmoother.load()
+    smoother.reconcile(get_current_statuses(conn, NESTBOXES))
+    decision = smoother.observe('midden', result, datetime.now(), night=True)
+    smoother.save()
+"""
+
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = Path("/mnt/usb/logs/nestbox_status_state.json")
+
+WINDOW_SIZE = 24              # Detecties per nestkast in het rollende venster
+SWITCH_PROBABILITY = 0.1      # Kans op een echte statuswissel tussen twee detecties
+ENTER_BELIEF = 0.8            # P(bezet) waarboven de status bezet wordt
+EXIT_BELIEF = 0.2             # P(bezet) waaronder de status leeg wordt
+RESET_BELIEF = 0.9            # Zekerheid na een (handmatig) event uit de database
+PROBABILITY_FLOOR = 0.01      # Geen detectie is 100% zeker
+
+# Uitgedunde occupancy log
+LOG_INTERVAL_MINUTES = 180
+LOG_MIN_CONFIDENCE = 0.90
+
+# Event types waarbij de nestkast als leeg geldt
+EMPTY_EVENT_TYPES = ('leeg', 'uitgevlogen', 'mislukt')
+
+
+def event_is_occupied(event_type: str) -> bool:
+    """Of een nestbox_events type een bezette nestkast betekent."""
+    return event_type not in EMPTY_EVENT_TYPES
+
+
+@dataclass
+class NestboxState:
+    """Toestand van één nestkast."""
+
+    status: Optional[bool] = None          # Laatst geregistreerde status (True = bezet)
+    event_type: Optional[str] = None       # Laatst geregistreerde event type
+    since: Optional[datetime] = None       # Tijdstip van dat event
+    belief: float = 0.5                    # P(bezet)
+    window: List[Dict[str, Any]] = field(default_factory=list)
+    last_logged: Optional[datetime] = None
+
+    def empty_streak(self) -> int:
+        """Aantal opeenvolgende 'leeg' detecties vanaf de meest recente."""
+        count = 0
+        for observation in reversed(self.window):
+            if observation['is_occupied']:
+                break
+            count += 1
+        return count
+
+    def last_image_path(self) -> Optional[str]:
+        """Pad van het laatst beoordeelde screenshot, of None."""
+        return self.window[-1].get('image_path') if self.window else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'status': self.status,
+            'event_type': self.event_type,
+            'since': self.since.isoformat() if self.since else None,
+            'belief': self.belief,
+            'window': self.window,
+            'last_logged': self.last_logged.isoformat() if self.last_logged else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'NestboxState':
+        return cls(
+            status=data.get('status'),
+            event_type=data.get('event_type'),
+            since=datetime.fromisoformat(data['since']) if data.get('since') else None,
+            belief=data.get('belief', 0.5),
+            window=data.get('window', [])[-WINDOW_SIZE:],
+            last_logged=datetime.fromisoformat(data['last_logged']) if data.get('last_logged') else None,
+        )
+
+
+class StatusSmoother:
+    """Hysterese/HMM afvlakking van nestkast detecties met in-memory historie."""
+
+    def __init__(self, states: Optional[Dict[str, NestboxState]] = None,
+                 state_file: Path = STATE_FILE,
+                 confidence_threshold: float = 0.5,
+                 min_event_interval: timedelta = timedelta(minutes=30),
+                 night_min_empty_streak: int = 3):
+        self.states = states or {}
+        self.state_file = state_file
+        self.confidence_threshold = confidence_threshold
+        self.min_event_interval = min_event_interval
+        self.night_min_empty_streak = night_min_empty_streak
+
+    @classmethod
+    def load(cls, state_file: Path = STATE_FILE, **kwargs) -> 'StatusSmoother':
+        """Laad de toestand; een ontbrekend of corrupt bestand geeft een lege toestand."""
+        states = {}
+        if state_file.exists():
+            try:
+                with open(state_file) as f:
+                    data = json.load(f)
+                states = {nestbox_id: NestboxState.from_dict(state)
+                          for nestbox_id, state in data.get('nestboxes', {}).items()}
+            except (json.JSONDecodeError, OSError, KeyError, TypeError, ValueError) as e:
+                logger.warning(f"State bestand niet leesbaar, begin opnieuw: {e}")
+        return cls(states, state_file=state_file, **kwargs)
+
+    def save(self) -> bool:
+        """Schrijf de toestand atomisch weg (tijdelijk bestand + rename).
+
+        Een mislukte schrijfactie is niet fataal: de volgende run begint dan
+        met de events uit de database (zie reconcile).
+        """
+        data = {
+            'updated': datetime.now().isoformat(timespec='seconds'),
+            'nestboxes': {nestbox_id: state.to_dict() for nestbox_id, state in self.states.items()},
+        }
+        tmp_path = None
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.state_file.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.state_file)
+            return True
+        except OSError as e:
+            logger.warning(f"State bestand niet opgeslagen: {e}")
+            if tmp_path:
+                Path(tmp_path).unlink(missing_ok=True)
+            return False
+
+    def state(self, nestbox_id: str) -> NestboxState:
+        return self.states.setdefault(nestbox_id, NestboxState())
+
+    def reconcile(self, current_events: Dict[str, Dict[str, Any]]) -> None:
+        """Neem events over die nieuwer zijn dan de eigen toestand.
+
+        Handmatige events (web interface) en de allereerste run zonder state
+        bestand komen zo in de smoother terecht.
+
+        Args:
+            current_events: nestbox_id -> laatste event (zie get_current_statuses).
+        """
+        for nestbox_id, event in current_events.items():
+            state = self.state(nestbox_id)
+            if state.since is not None and event['timestamp'] <= state.since:
+                continue
+            state.status = event_is_occupied(event['event_type'])
+            state.event_type = event['event_type']
+            state.since = event['timestamp']
+            state.belief = RESET_BELIEF if state.status else 1.0 - RESET_BELIEF
+
+    def observe(self, nestbox_id: str, result: Dict[str, Any], timestamp: datetime,
+                night: bool = False, occupied_event_type: str = 'bezet',
+                image_path: Optional[str] = None) -> Dict[str, Any]:
+        """Verwerk één detectie en beslis over een statuswijziging en logging.
+
+        Args:
+            nestbox_id: ID van nestkast.
+            result: Detectie (is_occupied, confidence, species).
+            timestamp: Opnametijd van het beoordeelde screenshot.
+            night: Nachtelijke slaapplaats bescherming actief.
+            occupied_event_type: Event type bij een wissel naar bezet
+                ('bezet' of 'slaapplaats').
+            image_path: Pad van het screenshot; de volgende run slaat een
+                ongewijzigd nieuwste screenshot over (zie last_image_path).
+
+        Returns:
+            Dict met changed, new_status, log, belief, empty_streak en reason.
+        """
+        state = self.state(nestbox_id)
+        is_occupied = result['is_occupied']
+        confidence = result['confidence']
+
+        state.window.append({
+            'timestamp': timestamp.isoformat(timespec='seconds'),
+            'is_occupied': is_occupied,
+            'confidence': round(confidence, 4),
+            'species': result.get('species'),
+            'image_path': image_path,
+        })
+        del state.window[:-WINDOW_SIZE]
+
+        prob_bezet = confidence if is_occupied else 1.0 - confidence
+        prob_bezet = min(max(prob_bezet, PROBABILITY_FLOOR), 1.0 - PROBABILITY_FLOOR)
+
+        if state.status is None:
+            # Geen eerdere events: eerste zekere detectie bepaalt de status
+            state.belief = prob_bezet
+            target = is_occupied if confidence >= self.confidence_threshold else None
+        else:
+            prior = state.belief * (1 - SWITCH_PROBABILITY) + (1 - state.belief) * SWITCH_PROBABILITY
+            bezet = prior * prob_bezet
+            leeg = (1 - prior) * (1 - prob_bezet)
+            state.belief = bezet / (bezet + leeg)
+
+            if state.belief >= ENTER_BELIEF:
+                target = True
+            elif state.belief <= EXIT_BELIEF:
+                target = False
+            else:
+                target = state.status
+
+        changed = False
+        reason = 'stabiel'
+        if target is not None and target != state.status:
+            changed, reason = self._may_change(state, target, is_occupied, confidence, timestamp, night)
+            if changed:
+                state.status = target
+                state.event_type = occupied_event_type if target else 'leeg'
+                state.since = timestamp
+        elif target is None:
+            reason = 'confidence'
+
+        log = (changed
+               or state.last_logged is None
+               or timestamp - state.last_logged >= timedelta(minutes=LOG_INTERVAL_MINUTES)
+               or confidence < LOG_MIN_CONFIDENCE
+               or is_occupied != state.status)
+        if log:
+            state.last_logged = timestamp
+
+        return {
+            'changed': changed,
+            'new_status': 'bezet' if state.status else 'leeg',
+            'log': log,
+            'belief': state.belief,
+            'empty_streak': state.empty_streak(),
+            'reason': reason,
+        }
+
+    def _may_change(self, state: NestboxState, target: bool, is_occupied: bool,
+                    confidence: float, timestamp: datetime, night: bool):
+        """Controleer of een wissel naar `target` nu geregistreerd mag worden."""
+        if state.status is None:
+            return True, 'eerste detectie'
+
+        # De wissel moet gedragen worden door een zekere detectie in die richting
+        if is_occupied != target or confidence < self.confidence_threshold:
+            return False, 'confidence'
+
+        if state.since is not None and timestamp - state.since < self.min_event_interval:
+            return False, 'interval'
+
+        # Nachtelijke bescherming: een slapende vogel die even beweegt of slecht
+        # belicht is, geeft geen vertrek event
+        if (night and not target and state.event_type == 'slaapplaats'
+                and state.empty_streak() < self.night_min_empty_streak):
+            return False, 'nacht'
+
+        return True, 'hysterese'
@@ -19,18 +19,26 @@ COMMAND LINE:
 
     # Handmatige fps instelling
     ./nestbox_timelapse.py -n midden -d 7 --fps 15
+
+SEGMENT CACHE:
+    Volledige dagen worden één keer gecodeerd (per nestkast, resolutie,
+    fps en filter) en daarna zonder her-codering samengevoegd, zie
+    scripts/core/timelapse_segments.py. --duration rondt de fps af naar
+    een vaste stap zodat periodes dezelfde segmenten delen.
 """
 
 import argparse
-import subprocess
-import tempfile
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Tuple, Optional
 import sys
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from core.image_catalog import find_date_range, find_images
+from core.timelapse_segments import build_timelapse, fps_for_duration
+
 # Configuratie
-SCREENSHOTS_BASE = Path("/mnt/nas-birdnet-archive/nestbox")
+CATALOG_SOURCE = "nestbox"  # Screenshots via image_catalog (scripts/core/image_catalog.py)
 OUTPUT_BASE = Path("/mnt/nas-birdnet-archive/gegenereerde_beelden/nestkasten")
 NESTBOXES = ['voor', 'midden', 'achter']
 
@@ -60,39 +68,18 @@ def get_screenshots(
         Lijst van (timestamp, path) tuples gesorteerd op tijd.
     """
     screenshots = []
-    base_path = SCREENSHOTS_BASE / nestbox_id / "screenshots"
 
-    if not base_path.exists():
-        print(f"Error: Screenshots map niet gevonden: {base_path}")
-        return []
+    for timestamp, jpg_file in find_images(CATALOG_SOURCE, nestbox_id, start_date, end_date):
+        hour = timestamp.hour
 
-    # Loop door alle jpg bestanden
-    for jpg_file in sorted(base_path.rglob("*.jpg")):
-        # Parse timestamp uit bestandsnaam: midden_20251223_211216.jpg
-        try:
-            name = jpg_file.stem
-            parts = name.split('_')
-            if len(parts) >= 3:
-                date_str = parts[1]  # 20251223
-                time_str = parts[2]  # 211216
-                timestamp = datetime.strptime(f"{date_str}_{time_str}", "%Y%m%d_%H%M%S")
-
-                # Check datum range
-                if start_date <= timestamp <= end_date:
-                    hour = timestamp.hour
-
-                    # Filter op dag/nacht indien gewenst
-                    if night_only and not (hour >= 22 or hour < 6):
-                        continue
-                    if day_only and (hour >= 22 or hour < 6):
-                        continue
-
-                    screenshots.append((timestamp, jpg_file))
-        except (ValueError, IndexError):
+        # Filter op dag/nacht indien gewenst
+        if night_only and not (hour >= 22 or hour < 6):
             continue
+        if day_only and (hour >= 22 or hour < 6):
+            continue
+
+        screenshots.append((timestamp, jpg_file))
 
-    # Sorteer op timestamp
-    screenshots.sort(key=lambda x: x[0])
     return screenshots
 
 
@@ -105,23 +92,11 @@ def get_available_date_range(nestbox_id: str) -> Tuple[Optional[datetime], Optio
     Returns:
         Tuple van (eerste_datum, laatste_datum) of (None, None).
     """
-    base_path = SCREENSHOTS_BASE / nestbox_id / "screenshots"
-    if not base_path.exists():
+    first, last = find_date_range(CATALOG_SOURCE, nestbox_id)
+    if first is None:
         return None, None
-
-    dates = []
-    for jpg_file in base_path.rglob("*.jpg"):
-        try:
-            parts = jpg_file.stem.split('_')
-            if len(parts) >= 2:
-                date_str = parts[1]
-                dates.append(datetime.strptime(date_str, "%Y%m%d"))
-        except (ValueError, IndexError):
-            continue
-
-    if dates:
-        return min(dates), max(dates)
-    return None, None
+    return (first.replace(hour=0, minute=0, second=0, microsecond=0),
+            last.replace(hour=0, minute=0, second=0, microsecond=0))
 
 
 def create_timelapse(
@@ -129,16 +104,30 @@ def create_timelapse(
     output_path: Path,
     fps: int = 10,
     resolution: str = "1280x720",
-    show_timestamp: bool = True
+    show_timestamp: bool = True,
+    nestbox_id: str = "midden",
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    time_filter: Optional[str] = None,
+    use_cache: bool = True
 ) -> bool:
-    """Maak timelapse video met ffmpeg.
+    """Maak timelapse video uit dag-segmenten (scripts/core/timelapse_segments.py).
+
+    Volledige dagen binnen start_date-end_date komen uit de segment cache
+    (of worden één keer gecodeerd en bewaard); alleen de randdagen worden
+    los gecodeerd. De segmenten worden zonder her-codering samengevoegd.
 
     Args:
         screenshots: Lijst van (timestamp, path) tuples.
         output_path: Pad voor output video.
         fps: Frames per seconde.
         resolution: Video resolutie (WxH).
-        show_timestamp: Timestamp overlay tonen.
+        show_timestamp: Dag en frame positie als overlay.
+        nestbox_id: ID van nestkast (deel van de cache sleutel).
+        start_date: Begin van de gevraagde periode (standaard: eerste screenshot).
+        end_date: Einde van de gevraagde periode (standaard: laatste screenshot).
+        time_filter: 'night' of 'day' als de screenshots gefilterd zijn.
+        use_cache: False codeert alles opnieuw zonder de cache te gebruiken.
 
     Returns:
         True bij succes, False bij fout.
@@ -147,57 +136,19 @@ def create_timelapse(
         print("Error: Geen screenshots om te verwerken")
         return False
 
-    # Maak tijdelijke map voor genummerde symlinks
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmppath = Path(tmpdir)
-
-        print(f"Voorbereiden van {len(screenshots)} frames...")
-
-        # Maak genummerde symlinks voor ffmpeg
-        for i, (timestamp, filepath) in enumerate(screenshots):
-            link_name = tmppath / f"frame_{i:06d}.jpg"
-            link_name.symlink_to(filepath)
-
-        # FFmpeg commando
-        input_pattern = str(tmppath / "frame_%06d.jpg")
-
-        # Parse resolution
-        width, height = resolution.split('x')
-
-        # Bouw filter voor timestamp overlay
-        if show_timestamp:
-            filter_complex = (
-                f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
-                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black,"
-                f"drawtext=fontfile=/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf:"
-                f"fontsize=24:fontcolor=white:x=10:y=h-40:"
-                f"text='%{{frame_num}}/{len(screenshots)}':start_number=1"
-            )
-        else:
-            filter_complex = (
-                f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
-                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black"
-            )
-
-        cmd = [
-            'ffmpeg', '-y',
-            '-framerate', str(fps),
-            '-i', input_pattern,
-            '-vf', filter_complex,
-            '-c:v', 'libx264',
-            '-preset', 'medium',
-            '-crf', '23',
-            '-pix_fmt', 'yuv420p',
-            str(output_path)
-        ]
-
-        print(f"Genereren timelapse ({fps} fps)...")
-        result = subprocess.run(cmd, capture_output=True, text=True)
-
-        if result.returncode != 0:
-            print(f"FFmpeg error: {result.stderr}")
-            return False
+    print(f"Genereren timelapse ({len(screenshots)} frames, {fps} fps)...")
+    counts = build_timelapse(
+        CATALOG_SOURCE, nestbox_id, screenshots,
+        start_date or screenshots[0][0], end_date or screenshots[-1][0], output_path,
+        fps=fps, resolution=resolution, show_timestamp=show_timestamp,
+        time_filter=time_filter, fontsize=24, use_cache=use_cache
+    )
+    if not counts:
+        print("FFmpeg error: zie log voor details")
+        return False
 
+    print(f"Segmenten: {counts['cached']} uit cache, {counts['encoded']} nieuw, "
+          f"{counts['partial']} los gecodeerd")
     return True
 
 
@@ -267,7 +218,7 @@ def interactive_mode():
         print(f"\n  Beschikbare data: {min_date.strftime('%Y-%m-%d')} t/m {max_date.strftime('%Y-%m-%d')}")
 
         # Tel screenshots
-        total = len(list((SCREENSHOTS_BASE / nestbox / "screenshots").rglob("*.jpg")))
+        total = len(get_screenshots(nestbox, min_date, max_date.replace(hour=23, minute=59, second=59)))
         print(f"  Totaal: {total} screenshots")
 
     # 2. Kies periode methode
@@ -321,7 +272,7 @@ def interactive_mode():
         # Bereken redelijke default
         default_duration = min(30, max(10, len(screenshots) // 10))
         duration = input_number("Gewenste video duur in seconden", default=default_duration, min_val=5, max_val=300)
-        fps = max(1, len(screenshots) // duration)
+        fps = fps_for_duration(len(screenshots), duration)
         print(f"  → Berekende framerate: {fps} fps")
     else:
         fps = input_number("Framerate (frames per seconde)", default=10, min_val=1, max_val=60)
@@ -365,7 +316,11 @@ def interactive_mode():
         screenshots, output_path,
         fps=fps,
         resolution="1280x720",
-        show_timestamp=True
+        show_timestamp=True,
+        nestbox_id=nestbox,
+        start_date=start_date,
+        end_date=end_date,
+        time_filter='night' if night_only else 'day' if day_only else None
     )
 
     if success:
@@ -408,7 +363,9 @@ def main():
     parser.add_argument('--day-only', action='store_true',
                         help='Alleen dag screenshots (06:00-22:00)')
     parser.add_argument('--no-timestamp', action='store_true',
-                        help='Geen frame teller overlay')
+                        help='Geen dag/frame overlay')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Alle dagen opnieuw coderen, segment cache niet gebruiken')
     parser.add_argument('-o', '--output', type=str, default=None,
                         help='Output bestandsnaam (optioneel)')
     parser.add_argument('--list', action='store_true',
@@ -466,7 +423,7 @@ def main():
 
     # Bepaal fps
     if args.duration:
-        fps = max(1, len(screenshots) // args.duration)
+        fps = fps_for_duration(len(screenshots), args.duration)
         print(f"Gewenste duur: {args.duration}s → berekende fps: {fps}")
     elif args.fps:
         fps = args.fps
@@ -499,7 +456,12 @@ def main():
         screenshots, output_path,
         fps=fps,
         resolution=args.resolution,
-        show_timestamp=not args.no_timestamp
+        show_timestamp=not args.no_timestamp,
+        nestbox_id=args.nestbox,
+        start_date=start_date,
+        end_date=end_date,
+        time_filter='night' if args.night_only else 'day' if args.day_only else None,
+        use_cache=not args.no_cache
     )
 
     if success:
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+EMSN Detections Hourly Rollup
+
+Maintains detections_hourly (migration 022): detection count, average and
+maximum confidence per station, species and hour. lifetime_sync.py refreshes
+the hours it touched after every sync; the FlySafe analyses and dashboards
+read the rollup instead of re-aggregating bird_detections.
+
+- refresh_hours() recomputes a set of hours for one station from
+  bird_detections (upsert, so it is idempotent and needs no DELETE right)
+- --backfill rebuilds the rollup for a date range, one week per transaction
+- --check compares the rollup with bird_detections and reports (or with
+  --repair refreshes) the hours that differ
+
+Usage:
+    python detections_hourly.py --backfill                      # Full history
+    python detections_hourly.py --backfill --since 2025-09-01 --station zolder
+    python detections_hourly.py --check --days 30
+    python detections_hourly.py --check --days 30 --repair
+
+Author: EMSN 2.0
+"""
+
+import argparse
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import psycopg2
+
+HIGH_CONFIDENCE = 0.7  # Threshold behind high_conf_count/high_conf_avg
+BACKFILL_BATCH_DAYS = 7  # Days per backfill transaction
+
+# Recompute the given hours of one station. Rows of species that no longer
+# have (non-deleted) detections in such an hour are zeroed afterwards.
+REFRESH_SQL = """
+    INSERT INTO detections_hourly (
+        station, species, hour, common_name, count, avg_conf, max_conf,
+        high_conf_count, high_conf_avg, refreshed_at
+    )
+    SELECT
+        station,
+        species,
+        DATE_TRUNC('hour', detection_timestamp) AS hour,
+        MAX(common_name),
+        COUNT(*),
+        AVG(confidence),
+        MAX(confidence),
+        COUNT(*) FILTER (WHERE confidence >= %(high_confidence)s),
+        AVG(confidence) FILTER (WHERE confidence >= %(high_confidence)s),
+        NOW()
+    FROM bird_detections
+    WHERE station = %(station)s
+      AND detection_timestamp >= %(start)s
+      AND detection_timestamp < %(end)s
+      AND DATE_TRUNC('hour', detection_timestamp) = ANY(%(hours)s::timestamp[])
+      AND species IS NOT NULL
+      AND NOT COALESCE(deleted, FALSE)
+    GROUP BY station, species, DATE_TRUNC('hour', detection_timestamp)
+    ON CONFLICT (station, species, hour) DO UPDATE SET
+        common_name = EXCLUDED.common_name,
+        count = EXCLUDED.count,
+        avg_conf = EXCLUDED.avg_conf,
+        max_conf = EXCLUDED.max_conf,
+        high_conf_count = EXCLUDED.high_conf_count,
+        high_conf_avg = EXCLUDED.high_conf_avg,
+        refreshed_at = EXCLUDED.refreshed_at
+"""
+
+ZERO_STALE_SQL = """
+    UPDATE detections_hourly h
+    SET count = 0, avg_conf = NULL, max_conf = NULL,
+        high_conf_count = 0, high_conf_avg = NULL, refreshed_at = NOW()
+    WHERE h.station = %(station)s
+      AND h.hour = ANY(%(hours)s::timestamp[])
+      AND h.count > 0
+      AND NOT EXISTS (
+          SELECT 1 FROM bird_detections b
+          WHERE b.station = h.station
+            AND b.species = h.species
+            AND b.detection_timestamp >= h.hour
+            AND b.detection_timestamp < h.hour + INTERVAL '1 hour'
+            AND NOT COALESCE(b.deleted, FALSE)
+      )
+"""
+
+# (station, hour) buckets where the rollup and bird_detections disagree
+CHECK_SQL = """
+    WITH raw AS (
+        SELECT station, DATE_TRUNC('hour', detection_timestamp) AS hour,
+               COUNT(*) AS count,
+               COUNT(*) FILTER (WHERE confidence >= %(high_confidence)s) AS high_conf_count,
+               COUNT(DISTINCT species) AS species_count
+        FROM bird_detections
+        WHERE detection_timestamp >= %(start)s
+          AND detection_timestamp < %(end)s
+          AND species IS NOT NULL
+          AND NOT COALESCE(deleted, FALSE)
+          AND (%(station)s::text IS NULL OR station = %(station)s)
+        GROUP BY 1, 2
+    ),
+    rollup AS (
+        SELECT station, hour,
+               SUM(count) AS count,
+               SUM(high_conf_count) AS high_conf_count,
+               COUNT(*) FILTER (WHERE count > 0) AS species_count
+        FROM detections_hourly
+        WHERE hour >= %(start)s
+          AND hour < %(end)s
+          AND (%(station)s::text IS NULL OR station = %(station)s)
+        GROUP BY 1, 2
+    )
+    SELECT COALESCE(r.station, h.station) AS station,
+           COALESCE(r.hour, h.hour) AS hour,
+           COALESCE(r.count, 0) AS raw_count,
+           COALESCE(h.count, 0) AS rollup_count
+    FROM raw r
+    FULL OUTER JOIN rollup h ON r.station = h.station AND r.hour = h.hour
+    WHERE COALESCE(r.count, 0) <> COALESCE(h.count, 0)
+       OR COALESCE(r.high_conf_count, 0) <> COALESCE(h.high_conf_count, 0)
+       OR COALESCE(r.species_count, 0) <> COALESCE(h.species_count, 0)
+    ORDER BY 2, 1
+"""
+
+
+def truncate_hour(timestamp: datetime) -> datetime:
+    """Start of the hour of a timestamp."""
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def hours_for_ids(cursor, ids: Iterable[int]) -> Set[datetime]:
+    """Hours of existing bird_detections rows, for updates and (soft) deletes.
+
+    Args:
+        cursor: PostgreSQL cursor.
+        ids: bird_detections ids.
+
+    Returns:
+        Set of hour timestamps.
+    """
+    ids = list(ids)
+    if not ids:
+        return set()
+    cursor.execute("""
+        SELECT DISTINCT DATE_TRUNC('hour', detection_timestamp)
+        FROM bird_detections
+        WHERE id = ANY(%s) AND detection_timestamp IS NOT NULL
+    """, (ids,))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def refresh_hours(cursor, station: str, hours: Iterable[datetime]) -> int:
+    """Recompute the rollup rows of one station for the given hours.
+
+    Runs in the caller's transaction, so a sync and its rollup update are
+    committed together.
+
+    Args:
+        cursor: PostgreSQL cursor.
+        station: Station name ('zolder' or 'berging').
+        hours: Hour timestamps (truncated to the hour).
+
+    Returns:
+        Number of rollup rows written or zeroed.
+    """
+    hours = sorted({truncate_hour(h) for h in hours})
+    if not hours:
+        return 0
+
+    params = {
+        'station': station,
+        'hours': hours,
+        'start': hours[0],
+        'end': hours[-1] + timedelta(hours=1),
+        'high_confidence': HIGH_CONFIDENCE,
+    }
+    cursor.execute(REFRESH_SQL, params)
+    written = cursor.rowcount
+    cursor.execute(ZERO_STALE_SQL, params)
+    return written + cursor.rowcount
+
+
+def get_stations(cursor) -> List[str]:
+    """Stations present in bird_detections."""
+    cursor.execute("SELECT DISTINCT station FROM bird_detections WHERE station IS NOT NULL ORDER BY station")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def get_detection_range(cursor) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """First and last detection_timestamp in bird_detections."""
+    cursor.execute("SELECT MIN(detection_timestamp), MAX(detection_timestamp) FROM bird_detections")
+    return cursor.fetchone()
+
+
+def backfill(conn, since: date, until: date, stations: List[str],
+             batch_days: int = BACKFILL_BATCH_DAYS) -> int:
+    """Rebuild the rollup for [since, until], committing per batch of days.
+
+    Args:
+        conn: PostgreSQL connection.
+        since: First day to rebuild.
+        until: Last day to rebuild (inclusive).
+        stations: Stations to rebuild.
+        batch_days: Days per transaction.
+
+    Returns:
+        Number of rollup rows written or zeroed.
+    """
+    total = 0
+    cursor = conn.cursor()
+    day = since
+    while day <= until:
+        batch_end = min(until, day + timedelta(days=batch_days - 1))
+        start = datetime.combine(day, datetime.min.time())
+        hours = [start + timedelta(hours=h)
+                 for h in range(((batch_end - day).days + 1) * 24)]
+        for station in stations:
+            total += refresh_hours(cursor, station, hours)
+        conn.commit()
+        print(f"  {day} .. {batch_end}: {total:,} rows")
+        day = batch_end + timedelta(days=1)
+    return total
+
+
+def check_consistency(conn, since: datetime, until: datetime,
+                      station: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Compare the rollup with bird_detections per station and hour.
+
+    Args:
+        conn: PostgreSQL connection.
+        since: Start of the checked range.
+        until: End of the checked range (exclusive).
+        station: Only check this station (None = all).
+
+    Returns:
+        List of {'station', 'hour', 'raw_count', 'rollup_count'} for every
+        hour where count, high-confidence count or species count differ.
+    """
+    cursor = conn.cursor()
+    cursor.execute(CHECK_SQL, {
+        'start': since,
+        'end': until,
+        'station': station,
+        'high_confidence': HIGH_CONFIDENCE,
+    })
+    return [
+        {'station': row[0], 'hour': row[1], 'raw_count': row[2], 'rollup_count': row[3]}
+        for row in cursor.fetchall()
+    ]
+
+
+def main() -> int:
+    """Main entry point for backfill and consistency check.
+
+    Returns:
+        Exit code (0 for success, 1 for errors or inconsistencies).
+    """
+    parser = argparse.ArgumentParser(description="EMSN detections_hourly rollup")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--backfill", action="store_true", help="Rebuild the rollup from bird_detections")
+    mode.add_argument("--check", action="store_true", help="Compare the rollup with bird_detections")
+    parser.add_argument("--station", help="Only this station")
+    parser.add_argument("--since", type=date.fromisoformat, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--until", type=date.fromisoformat, help="Last day (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, help="Last N days (instead of --since)")
+    parser.add_argument("--repair", action="store_true", help="With --check: refresh inconsistent hours")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    from core.config import get_postgres_config
+
+    conn = psycopg2.connect(**get_postgres_config())
+    try:
+        cursor = conn.cursor()
+        first, last = get_detection_range(cursor)
+        if first is None:
+            print("No detections in bird_detections")
+            return 0
+
+        until = args.until or last.date()
+        if args.days:
+            since = until - timedelta(days=args.days - 1)
+        else:
+            since = args.since or first.date()
+        stations = [args.station] if args.station else get_stations(cursor)
+
+        if args.backfill:
+            print(f"Backfilling detections_hourly {since} .. {until} ({', '.join(stations)})")
+            total = backfill(conn, since, until, stations)
+            print(f"Done: {total:,} rollup rows written")
+            return 0
+
+        start = datetime.combine(since, datetime.min.time())
+        end = datetime.combine(until + timedelta(days=1), datetime.min.time())
+        mismatches = check_consistency(conn, start, end, args.station)
+        for m in mismatches[:50]:
+            print(f"  {m['station']:10} {m['hour']:%Y-%m-%d %H:00}  "
+                  f"bird_detections={m['raw_count']}  rollup={m['rollup_count']}")
+        if len(mismatches) > 50:
+            print(f"  ... {len(mismatches) - 50} more")
+        print(f"{len(mismatches)} inconsistent hours in {since} .. {until}")
+
+        if mismatches and args.repair:
+            by_station: Dict[str, List[datetime]] = {}
+            for m in mismatches:
+                by_station.setdefault(m['station'], []).append(m['hour'])
+            for station, hours in by_station.items():
+                refresh_hours(cursor, station, hours)
+            conn.commit()
+            print(f"Repaired {len(mismatches)} hours")
+            return 0
+
+        return 1 if mismatches else 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
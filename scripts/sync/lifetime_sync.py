@@ -32,6 +32,9 @@ import paho.mqtt.client as mqtt
 import psycopg2
 from psycopg2.extras import execute_batch
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from sync.detections_hourly import hours_for_ids, refresh_hours, truncate_hour
+
 # =============================================================================
 # Configuration
 # =============================================================================
@@ -262,6 +265,7 @@ class SyncResult:
     updated: int = 0
     soft_deleted: int = 0
     errors: int = 0
+    rollup_rows: int = 0
 
 
 def get_sqlite_detections(conn: sqlite3.Connection) -> Dict[str, Dict[str, Any]]:
@@ -557,6 +561,21 @@ def sync_station(
             result.soft_deleted = len(to_delete)
             logger.info(f"Soft deleted {result.soft_deleted} removed detections")
 
+        # Refresh detections_hourly for every hour this sync touched, in the
+        # same transaction. A failing rollup must not lose the sync itself;
+        # detections_hourly.py --check --repair catches up later.
+        touched = {truncate_hour(det["detection_timestamp"]) for det in to_insert}
+        touched |= hours_for_ids(cursor, [upd["id"] for upd in to_update] + to_restore + to_delete)
+        if touched:
+            cursor.execute("SAVEPOINT detections_hourly")
+            try:
+                result.rollup_rows = refresh_hours(cursor, station, touched)
+                cursor.execute("RELEASE SAVEPOINT detections_hourly")
+                logger.info(f"Refreshed detections_hourly: {len(touched)} hours, {result.rollup_rows} rows")
+            except psycopg2.Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT detections_hourly")
+                logger.warning(f"detections_hourly refresh failed: {e}")
+
         pg_conn.commit()
 
     except Exception as e:
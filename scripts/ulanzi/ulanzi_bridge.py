@@ -9,6 +9,7 @@ Voert anti-spam filtering uit gebaseerd op rarity tiers.
 import json
 import re
 import sys
+import threading
 import time
 import requests
 import psycopg2
@@ -636,6 +637,13 @@ class UlanziBridge:
         self.vocalization_classifier = None
         self.vocalization_enabled = True  # Set to False to disable
 
+        # Detecties die wachten op vocalisatie enrichment van de publisher
+        # (station, detection_id) -> (detection, station_label, received_at)
+        self.pending_enrichment = {}
+        self.enrichment_wait = MQTT_CONFIG.get('enrichment_wait_seconds', 8)
+        # MQTT callbacks en de enrichment timeout lopen in verschillende threads
+        self.detection_lock = threading.RLock()
+
     def _get_vocalization_type(self, dutch_name: str, audio_file: str = None) -> str | None:
         """Get vocalization type (zang/roep/alarm) for a detection."""
         if not self.vocalization_enabled:
@@ -745,6 +753,8 @@ class UlanziBridge:
                     'vocalization': data.get('vocalization'),
                     'vocalization_nl': data.get('vocalization_nl'),
                     'vocalization_confidence': data.get('vocalization_confidence'),
+                    'vocalization_pending': data.get('vocalization_pending'),
+                    'detection_id': data.get('detection_id'),
                     'station': data.get('station', ''),
                     'raw': text
                 }
@@ -786,6 +796,8 @@ class UlanziBridge:
             topics = [
                 (MQTT_CONFIG['topics']['zolder_detection'], 1),
                 (MQTT_CONFIG['topics']['berging_detection'], 1),
+                (MQTT_CONFIG['topics']['zolder_enriched'], 1),
+                (MQTT_CONFIG['topics']['berging_enriched'], 1),
                 (MQTT_CONFIG['topics']['dual_detection'], 1),
                 (MQTT_CONFIG['topics']['presence'], 1),
             ]
@@ -796,8 +808,18 @@ class UlanziBridge:
 
     def on_mqtt_message(self, client, userdata, msg):
         """MQTT message callback"""
+        with self.detection_lock:
+            self._handle_mqtt_message(msg)
+
+    def _handle_mqtt_message(self, msg):
+        """Verwerk MQTT bericht (aanroeper houdt detection_lock vast)"""
         topic = msg.topic
 
+        # Vocalisatie enrichment voor een eerder ontvangen detectie
+        if topic.endswith('/enriched'):
+            self.handle_enrichment(msg.payload)
+            return
+
         # Handle presence updates
         if 'presence' in topic:
             try:
@@ -830,6 +852,52 @@ class UlanziBridge:
         if detection.get('station'):
             station = detection['station'].capitalize()
 
+        # Publisher classificeert vocalisatie async - wacht kort op enrichment
+        if detection.get('vocalization_pending') and detection.get('detection_id') is not None:
+            key = (detection['station'], detection['detection_id'])
+            self.pending_enrichment[key] = (detection, station, time.monotonic())
+            return
+
+        self.process_detection(detection, station)
+
+    def handle_enrichment(self, payload):
+        """Merge vocalisatie enrichment met de wachtende detectie en verwerk die"""
+        try:
+            data = json.loads(payload.decode('utf-8') if isinstance(payload, bytes) else payload)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            self.logger.error(f"Failed to parse enrichment JSON: {e}")
+            return
+
+        key = (data.get('station', ''), data.get('detection_id'))
+        pending = self.pending_enrichment.pop(key, None)
+        if not pending:
+            # Detectie al zonder vocalisatie getoond (timeout) of gefilterd
+            return
+
+        detection, station, received_at = pending
+        if data.get('classified'):
+            detection['vocalization'] = data.get('vocalization')
+            detection['vocalization_nl'] = data.get('vocalization_nl')
+            detection['vocalization_confidence'] = data.get('vocalization_confidence')
+
+        waited = time.monotonic() - received_at
+        self.logger.info(f"Enrichment for {detection['common_name']} after {waited:.1f}s: "
+                         f"{detection.get('vocalization_nl') or 'geen type'}")
+        self.process_detection(detection, station)
+
+    def flush_expired_enrichments(self):
+        """Verwerk detecties waarvan de enrichment te lang uitblijft"""
+        now = time.monotonic()
+        with self.detection_lock:
+            expired = [key for key, (_, _, received_at) in self.pending_enrichment.items()
+                       if now - received_at > self.enrichment_wait]
+            for key in expired:
+                detection, station, _ = self.pending_enrichment.pop(key)
+                self.logger.info(f"Enrichment timeout for {detection['common_name']}, showing without type")
+                self.process_detection(detection, station)
+
+    def process_detection(self, detection, station):
+        """Filter en toon een (eventueel verrijkte) detectie op de Ulanzi"""
         # Check confidence threshold
         if detection['confidence'] < CONFIDENCE_THRESHOLDS['min_display']:
             self.logger.info(f"Skipping low confidence: {detection['common_name']} ({detection['confidence']:.0%})")
@@ -885,7 +953,7 @@ class UlanziBridge:
 
         # Get vocalization type - prefer from MQTT message (already classified by publisher)
         vocalization_type = detection.get('vocalization_nl')
-        if not vocalization_type:
+        if not vocalization_type and detection.get('vocalization_pending') is None:
             # Fallback: classify locally (for legacy Apprise messages)
             vocalization_type = self._get_vocalization_type(dutch_name, detection.get('file'))
 
@@ -1121,8 +1189,11 @@ class UlanziBridge:
             self.running = True
             self.logger.success("Bridge service started")
 
-            # Run forever
-            self.mqtt_client.loop_forever()
+            # MQTT in achtergrond thread, hoofdthread bewaakt enrichment timeouts
+            self.mqtt_client.loop_start()
+            while self.running:
+                self.flush_expired_enrichments()
+                time.sleep(1)
 
         except KeyboardInterrupt:
             self.logger.info("Shutting down...")
@@ -1131,6 +1202,7 @@ class UlanziBridge:
         finally:
             self.running = False
             if self.mqtt_client:
+                self.mqtt_client.loop_stop()
                 self.mqtt_client.disconnect()
 
 
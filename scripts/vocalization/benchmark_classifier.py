@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+EMSN 2.0 - Vocalization Classifier Benchmark
+
+Vergelijkt de doorvoer (clips/sec) van de oude per-bestand loop
+(classify per detectie) met classify_batch (parallel decoden, één
+forward pass per soort).
+
+Met --compare-backends wordt per inference backend (torch, onnx,
+onnx-int8) in een apart proces de cold start (import + model laden),
+warme latency per clip en piek RSS gemeten.
+
+Gebruik:
+    python benchmark_classifier.py --species Merel --audio-dir /home/ronny/BirdSongs/Extracted/By_Date/2026-05-01/Merel
+    python benchmark_classifier.py --species Merel --audio-dir ./clips --limit 100 --models-dir ./models
+    python benchmark_classifier.py --species Merel --audio-dir ./clips --compare-backends
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from vocalization_classifier import MODELS_DIR, VocalizationClassifier
+
+
+def find_audio_files(audio_dir: Path, limit: int) -> list:
+    """Verzamel audio clips (mp3/wav) uit een directory (recursief)."""
+    files = sorted(p for p in audio_dir.rglob('*') if p.suffix.lower() in ('.mp3', '.wav'))
+    return files[:limit]
+
+
+def run_benchmark(classifier, species: str, files: list, workers: int) -> dict:
+    """Meet clips/sec voor loop en batch modus.
+
+    Het model wordt vooraf één keer geladen zodat beide modi een warme
+    cache hebben en alleen decoding + inference gemeten wordt.
+    """
+    classifier.classify(species, files[0])
+
+    start = time.perf_counter()
+    loop_results = [classifier.classify(species, f) for f in files]
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_results = classifier.classify_batch(species, files, decode_workers=workers)
+    batch_seconds = time.perf_counter() - start
+
+    mismatches = sum(
+        1 for a, b in zip(loop_results, batch_results)
+        if (a is None) != (b is None) or (a and a['type'] != b['type'])
+    )
+
+    return {
+        'clips': len(files),
+        'loop_seconds': loop_seconds,
+        'batch_seconds': batch_seconds,
+        'loop_clips_per_sec': len(files) / loop_seconds if loop_seconds else 0,
+        'batch_clips_per_sec': len(files) / batch_seconds if batch_seconds else 0,
+        'mismatches': mismatches,
+    }
+
+
+BACKENDS = {
+    'torch': {'backend': 'torch', 'prefer_int8': False},
+    'onnx': {'backend': 'onnx', 'prefer_int8': False},
+    'onnx-int8': {'backend': 'onnx', 'prefer_int8': True},
+}
+
+
+def run_backend_benchmark(models_dir: Path, species: str, files: list, backend: str) -> dict:
+    """Meet cold start, warme latency en piek RSS voor één backend.
+
+    Bedoeld om in een vers proces te draaien (zie compare_backends) zodat
+    import kosten en geheugen niet door andere backends vertekend worden.
+    """
+    start = time.perf_counter()
+    classifier = VocalizationClassifier(models_dir=models_dir, **BACKENDS[backend])
+    first = classifier.classify(species, files[0])
+    cold_seconds = time.perf_counter() - start
+
+    model, _ = classifier._load_model(classifier._find_model(species))
+    inputs = [classifier._prepare_input(Path(f)) for f in files]
+    inputs = [x for x in inputs if x is not None]
+
+    start = time.perf_counter()
+    for x in inputs:
+        model.predict_proba(x[None, None])
+    inference_seconds = time.perf_counter() - start
+
+    return {
+        'backend': backend,
+        'loaded_backend': model.backend,
+        'cold_start_seconds': cold_seconds,
+        'inference_ms_per_clip': 1000 * inference_seconds / len(inputs) if inputs else 0,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'first_type': first['type'] if first else None,
+    }
+
+
+def compare_backends(args) -> list:
+    """Draai run_backend_benchmark per backend in een apart proces."""
+    results = []
+    for backend in BACKENDS:
+        cmd = [
+            sys.executable, __file__,
+            '--species', args.species, '--audio-dir', str(args.audio_dir),
+            '--models-dir', str(args.models_dir), '--limit', str(args.limit),
+            '--backend', backend,
+        ]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{backend}: mislukt\n{proc.stderr.strip()[-500:]}")
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark vocalization classify vs classify_batch')
+    parser.add_argument('--species', required=True, help='Soortnaam met een getraind model (bijv. Merel)')
+    parser.add_argument('--audio-dir', required=True, type=Path, help='Directory met audio clips')
+    parser.add_argument('--models-dir', type=Path, default=MODELS_DIR, help='Directory met .pt modellen')
+    parser.add_argument('--limit', type=int, default=50, help='Max aantal clips')
+    parser.add_argument('--workers', type=int, default=4, help='Decode threads voor classify_batch')
+    parser.add_argument('--compare-backends', action='store_true',
+                        help='Vergelijk latency en RSS van torch, onnx en onnx-int8')
+    parser.add_argument('--backend', choices=list(BACKENDS),
+                        help='Meet één backend en print JSON (gebruikt door --compare-backends)')
+    args = parser.parse_args()
+
+    files = find_audio_files(args.audio_dir, args.limit)
+    if not files:
+        print(f"Geen audio gevonden in {args.audio_dir}")
+        return 1
+
+    if args.backend:
+        print(json.dumps(run_backend_benchmark(args.models_dir, args.species, files, args.backend)))
+        return 0
+
+    if args.compare_backends:
+        print(f"{'Backend':<10} {'Geladen':<8} {'Cold start':>11} {'ms/clip':>8} {'Piek RSS':>10}")
+        for r in compare_backends(args):
+            print(f"{r['backend']:<10} {r['loaded_backend']:<8} {r['cold_start_seconds']:>10.2f}s "
+                  f"{r['inference_ms_per_clip']:>8.2f} {r['peak_rss_mb']:>8.0f}MB")
+        return 0
+
+    classifier = VocalizationClassifier(models_dir=args.models_dir)
+    if not classifier.has_model(args.species):
+        print(f"Geen model voor {args.species} in {args.models_dir}")
+        return 1
+
+    stats = run_benchmark(classifier, args.species, files, args.workers)
+
+    print(f"Clips:        {stats['clips']}")
+    print(f"Loop:         {stats['loop_seconds']:.2f}s ({stats['loop_clips_per_sec']:.1f} clips/s)")
+    print(f"Batch:        {stats['batch_seconds']:.2f}s ({stats['batch_clips_per_sec']:.1f} clips/s)")
+    if stats['batch_seconds']:
+        print(f"Speedup:      {stats['loop_seconds'] / stats['batch_seconds']:.1f}x")
+    print(f"Mismatches:   {stats['mismatches']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+EMSN 2.0 - Vocalization Model ONNX Export
+
+Converteert alle vocalisatie checkpoints (*_cnn_2025*.pt) naar ONNX zodat
+de classifier op de Pi's met onnxruntime kan draaien zonder torch import.
+De export komt naast het .pt bestand te staan (soort_cnn_2025.onnx) met
+class_names als model metadata. Met --quantize wordt daarnaast een
+dynamisch int8-gekwantiseerde variant geschreven (soort_cnn_2025.int8.onnx).
+
+Gebruik:
+    python export_onnx.py                         # Alle modellen in MODELS_DIR
+    python export_onnx.py --models-dir ./models --quantize
+    python export_onnx.py --force --verify        # Opnieuw exporteren + parity check
+
+Requirements (alleen op de export machine):
+    - PyTorch
+    - onnx
+    - onnxruntime (voor --quantize en --verify)
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from vocalization_classifier import (
+    INPUT_SHAPE, MODELS_DIR, OnnxVocalizationModel, TorchVocalizationModel,
+    get_torch, load_torch_checkpoint, onnx_path_for
+)
+
+OPSET_VERSION = 17
+PARITY_TOLERANCE = 1e-4  # Max absoluut verschil in softmax kansen (fp32)
+
+
+def export_model(model_path: Path, quantize: bool = False, force: bool = False) -> list:
+    """Exporteer één checkpoint naar ONNX (en optioneel int8).
+
+    Returns:
+        Lijst met geschreven ONNX paden (leeg als alles al up-to-date was)
+    """
+    import onnx
+
+    torch = get_torch()
+    onnx_path = onnx_path_for(model_path)
+    written = []
+
+    if force or not onnx_path.exists() or onnx_path.stat().st_mtime < model_path.stat().st_mtime:
+        model, class_names = load_torch_checkpoint(model_path)
+        dummy = torch.zeros(1, 1, *INPUT_SHAPE)
+
+        torch.onnx.export(
+            model, dummy, str(onnx_path),
+            input_names=['spectrogram'],
+            output_names=['logits'],
+            dynamic_axes={'spectrogram': {0: 'batch'}, 'logits': {0: 'batch'}},
+            opset_version=OPSET_VERSION,
+            dynamo=False,
+        )
+
+        # class_names als metadata zodat de runtime geen checkpoint nodig heeft
+        onnx_model = onnx.load(str(onnx_path))
+        for key, value in (('class_names', json.dumps(class_names)), ('source', model_path.name)):
+            prop = onnx_model.metadata_props.add()
+            prop.key = key
+            prop.value = value
+        onnx.save(onnx_model, str(onnx_path))
+        written.append(onnx_path)
+
+    int8_path = onnx_path_for(model_path, quantized=True)
+    if quantize and (written or force or not int8_path.exists()):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        # Alleen de dense lagen: daar zitten vrijwel alle gewichten, en
+        # ConvInteger is op ARM trager dan de fp32 convolutie
+        quantize_dynamic(
+            str(onnx_path), str(int8_path),
+            op_types_to_quantize=['MatMul', 'Gemm'],
+            weight_type=QuantType.QInt8,
+        )
+        written.append(int8_path)
+
+    return written
+
+
+def verify_model(model_path: Path, samples: int = 8, seed: int = 0) -> dict:
+    """Vergelijk ONNX output met PyTorch op willekeurige spectrogrammen.
+
+    Returns:
+        Dict met max_abs_diff en top1_agreement per ONNX variant
+    """
+    rng = np.random.default_rng(seed)
+    x = rng.random((samples, 1, *INPUT_SHAPE), dtype=np.float32)
+
+    torch_model, _ = load_torch_checkpoint(model_path)
+    reference = TorchVocalizationModel(torch_model).predict_proba(x)
+
+    report = {}
+    for quantized in (False, True):
+        onnx_path = onnx_path_for(model_path, quantized=quantized)
+        if not onnx_path.exists():
+            continue
+        probas = OnnxVocalizationModel(onnx_path).predict_proba(x)
+        report[onnx_path.name] = {
+            'max_abs_diff': float(np.abs(probas - reference).max()),
+            'top1_agreement': float((probas.argmax(axis=1) == reference.argmax(axis=1)).mean()),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export vocalization CNNs to ONNX')
+    parser.add_argument('--models-dir', type=Path, default=MODELS_DIR, help='Directory met .pt modellen')
+    parser.add_argument('--quantize', action='store_true', help='Schrijf ook int8 dynamisch gekwantiseerde variant')
+    parser.add_argument('--force', action='store_true', help='Exporteer ook als ONNX al up-to-date is')
+    parser.add_argument('--verify', action='store_true', help='Controleer ONNX output tegen PyTorch')
+    args = parser.parse_args()
+
+    model_files = sorted(args.models_dir.glob('*.pt'))
+    if not model_files:
+        print(f"Geen .pt modellen gevonden in {args.models_dir}")
+        return 1
+
+    exported = 0
+    failed = 0
+    for model_path in model_files:
+        try:
+            written = export_model(model_path, quantize=args.quantize, force=args.force)
+            exported += len(written)
+            status = ', '.join(p.name for p in written) if written else 'up-to-date'
+            print(f"{model_path.name}: {status}")
+
+            if args.verify:
+                for name, stats in verify_model(model_path).items():
+                    ok = stats['max_abs_diff'] <= PARITY_TOLERANCE or '.int8.' in name
+                    print(f"  {name}: max diff {stats['max_abs_diff']:.2e}, "
+                          f"top-1 {stats['top1_agreement']:.0%}{'' if ok else '  <-- AFWIJKING'}")
+                    if not ok:
+                        failed += 1
+        except Exception as e:
+            print(f"{model_path.name}: FOUT {e}")
+            failed += 1
+
+    print(f"\n{len(model_files)} modellen, {exported} ONNX bestanden geschreven, {failed} fouten")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+EMSN 2.0 - Vocalization Feature Store
+
+Content-addressed cache voor mel spectrogrammen zodat dezelfde BirdNET clip
+maar één keer gedecodeerd wordt, door de classifier (Pi), de enricher na een
+herstart en de training (Docker op de NAS).
+
+Eén float16 .npy per (audio inhoud, mel parameters) in een gesharde
+directory:
+
+    <root>/<params-hash>/<ab>/<abcdef...>.npy
+
+De key is een SHA1 van de grootte en de inhoud van het audiobestand, zodat
+hetzelfde bestand onder een ander pad (NAS mount, kopie) dezelfde features
+vindt. Binnen een proces wordt de digest per (pad, grootte, mtime)
+onthouden; een ongewijzigd bestand wordt dus maar één keer gehasht.
+
+Gewijzigde mel parameters geven een nieuwe params-directory; oude features
+worden dan vanzelf als eerste geëvict. Bij een cache hit wordt de mtime van
+het .npy bestand bijgewerkt (NAS mounts draaien vaak met noatime), eviction
+verwijdert de oudste bestanden tot de store onder het byte budget zit.
+
+Gebruik:
+    store = FeatureStore(root, max_bytes=2 * 1024**3, params={'n_mels': 128, ...})
+    features = store.get_or_compute(audio_path, compute_fn)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FEATURE_DTYPE = np.float16  # Spectrogrammen zijn genormaliseerd naar 0..1
+EVICT_TARGET_RATIO = 0.9    # Evict tot 90% van budget, niet bij elke put opnieuw
+DIGEST_MEMO_SIZE = 10000    # Onthouden content digests (pad, grootte, mtime -> key)
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+class FeatureStore:
+    """Gesharde .npy feature cache met byte-begrensde eviction.
+
+    Thread-safe voor de decode workers van classify_batch. Schrijven gaat via
+    een tijdelijk bestand + os.replace zodat lezers (ook op een andere host
+    via de NAS) nooit een half geschreven array zien.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, params: dict):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.params = dict(params)
+        self.params_hash = hashlib.sha1(
+            json.dumps(self.params, sort_keys=True, default=str).encode()
+        ).hexdigest()[:12]
+        self.params_dir = self.root / self.params_hash
+
+        # Alleen actief als de bovenliggende directory (NAS mount) bestaat,
+        # anders wordt er niets naar een lege mountpoint geschreven
+        self.enabled = self.root.exists() or self.root.parent.exists()
+
+        self._lock = threading.Lock()
+        self._bytes_used = None  # Lazy: eerste put scant de store
+        self._digests = {}
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def key_for(self, audio_path: Path) -> str | None:
+        """Cache key (content digest) voor een audiobestand, None als het niet leesbaar is."""
+        try:
+            stat = Path(audio_path).stat()
+        except OSError:
+            return None
+
+        # Snelle check: ongewijzigd pad, grootte en mtime -> eerder berekende digest
+        memo_key = (str(Path(audio_path).resolve()), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            key = self._digests.get(memo_key)
+        if key:
+            return key
+
+        digest = hashlib.sha1(f"{stat.st_size}|".encode())
+        try:
+            with open(audio_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        key = digest.hexdigest()
+
+        with self._lock:
+            if len(self._digests) >= DIGEST_MEMO_SIZE:
+                self._digests.clear()
+            self._digests[memo_key] = key
+        return key
+
+    def path_for(self, key: str) -> Path:
+        """Pad van het .npy bestand voor een key."""
+        return self.params_dir / key[:2] / f"{key}.npy"
+
+    def get(self, audio_path: Path) -> np.ndarray | None:
+        """Lees features voor een audiobestand (float16), None bij een miss."""
+        if not self.enabled:
+            return None
+
+        key = self.key_for(audio_path)
+        features = None
+        if key:
+            path = self.path_for(key)
+            try:
+                features = np.load(path)
+                os.utime(path)  # Markeer als recent gebruikt voor eviction
+            except (OSError, ValueError):
+                features = None
+
+        with self._lock:
+            if features is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return features
+
+    def put(self, audio_path: Path, features: np.ndarray) -> bool:
+        """Sla features op als float16. Returns False als de store niet schrijfbaar is."""
+        if not self.enabled:
+            return False
+
+        key = self.key_for(audio_path)
+        if not key:
+            return False
+
+        path = self.path_for(key)
+        tmp_path = path.with_name(f".{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.asarray(features, dtype=FEATURE_DTYPE))
+            os.replace(tmp_path, path)
+            nbytes = path.stat().st_size
+        except OSError as e:
+            tmp_path.unlink(missing_ok=True)
+            logger.warning(f"Feature store niet schrijfbaar ({self.root}): {e}, uitgeschakeld")
+            self.enabled = False
+            return False
+
+        with self._lock:
+            self.writes += 1
+            if self._bytes_used is None:
+                self._bytes_used = self._scan_bytes()
+            else:
+                self._bytes_used += nbytes
+            over_budget = self._bytes_used > self.max_bytes
+
+        if over_budget:
+            self.evict()
+        return True
+
+    def get_or_compute(self, audio_path: Path, compute) -> np.ndarray | None:
+        """Features uit de store, of compute(audio_path) uitvoeren en opslaan.
+
+        Returns:
+            float32 array, of None als compute None oplevert
+        """
+        features = self.get(audio_path)
+        if features is not None:
+            return features.astype(np.float32)
+
+        features = compute(audio_path)
+        if features is not None:
+            self.put(audio_path, features)
+            features = np.asarray(features, dtype=np.float32)
+        return features
+
+    def _iter_files(self):
+        """Alle .npy bestanden in de store (alle params-directories)."""
+        if not self.root.exists():
+            return
+        yield from self.root.glob('*/*/*.npy')
+
+    def _scan_bytes(self) -> int:
+        """Totale grootte van de store op disk."""
+        total = 0
+        for path in self._iter_files():
+            try:
+                total += path.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def evict(self, target_bytes: int | None = None) -> int:
+        """Verwijder de minst recent gebruikte features tot onder target_bytes.
+
+        Args:
+            target_bytes: Doelgrootte, standaard EVICT_TARGET_RATIO * max_bytes
+
+        Returns:
+            Aantal verwijderde bestanden
+        """
+        if target_bytes is None:
+            target_bytes = int(self.max_bytes * EVICT_TARGET_RATIO)
+
+        entries = []
+        for path in self._iter_files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= target_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+        with self._lock:
+            self._bytes_used = total
+            self.evictions += removed
+
+        if removed:
+            logger.info(f"Feature store: {removed} features verwijderd, "
+                        f"{total / 1024 / 1024:.0f} MB in gebruik")
+        return removed
+
+    def stats(self) -> dict:
+        """Store tellers voor logging en metrics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'writes': self.writes,
+                'evictions': self.evictions,
+                'bytes_used': self._bytes_used,
+                'max_bytes': self.max_bytes,
+            }
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+EMSN 2.0 - Remote Audio Cache
+
+Lokale, byte-begrensde cache van BirdNET audio van een andere Pi (berging).
+In plaats van één scp (en SSH handshake) per detectie haalt fetch() alle
+ontbrekende bestanden van een batch op met één rsync --files-from over een
+gemultiplexte SSH verbinding (ControlMaster), die tussen batches open blijft.
+
+De cache spiegelt de remote structuur (YYYY-MM-DD/Soort/bestand.mp3), dus
+bestanden blijven over runs heen bruikbaar en hebben een stabiel pad (en
+mtime), zodat de feature store de content digest niet opnieuw berekent. LRU
+eviction gebeurt op atime, die bij elke cache hit expliciet gezet wordt.
+
+Gebruik:
+    cache = RemoteAudioCache('192.168.1.87', 'ronny', '/home/ronny/BirdSongs/Extracted/By_Date',
+                             Path('/mnt/usb/cache/berging-audio'), max_bytes=1024**3)
+    paths = cache.fetch(['2026-05-01/Merel/Merel-87-2026-05-01-birdnet-06:12:03.mp3'])
+"""
+
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+RSYNC_TIMEOUT = 300  # Seconden voor één batch
+SSH_CONTROL_PERSIST = 600  # Houd de SSH master verbinding 10 minuten open
+EVICT_TARGET_RATIO = 0.9
+
+# rsync exit codes: 23/24 = (deels) niet gevonden bestanden, 255 = SSH fout
+RSYNC_PARTIAL = (23, 24)
+
+
+class RemoteAudioCache:
+    """Bulk rsync fetch naar een lokale LRU cache."""
+
+    def __init__(self, host: str, user: str, remote_base: str, cache_dir: Path, max_bytes: int):
+        self.host = host
+        self.user = user
+        self.remote_base = remote_base.rstrip('/')
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.control_path = Path(tempfile.gettempdir()) / f"emsn-ssh-{user}@{host}"
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fetched = 0
+        self.missing = 0
+        self.evictions = 0
+        self.unreachable = False  # Laatste fetch faalde op SSH/netwerk niveau
+
+    def local_path(self, relative_path: str) -> Path:
+        """Pad in de cache voor een remote pad relatief aan remote_base."""
+        return self.cache_dir / relative_path
+
+    def _ssh_command(self) -> str:
+        """SSH commando voor rsync -e met connection multiplexing."""
+        return (f"ssh -o BatchMode=yes -o ConnectTimeout=5 "
+                f"-o ControlMaster=auto -o ControlPath={self.control_path} "
+                f"-o ControlPersist={SSH_CONTROL_PERSIST}")
+
+    @staticmethod
+    def _touch(path: Path):
+        """Markeer als recent gebruikt: alleen atime, mtime blijft de digest check van de feature store."""
+        try:
+            os.utime(path, (time.time(), path.stat().st_mtime))
+        except OSError:
+            pass
+
+    def fetch(self, relative_paths: list) -> dict:
+        """Zorg dat de bestanden lokaal staan, met één rsync voor alle missers.
+
+        Args:
+            relative_paths: Paden relatief aan remote_base
+
+        Returns:
+            Dict relative_path -> lokale Path, of None als niet beschikbaar
+        """
+        result = {}
+        to_fetch = []
+        for rel in dict.fromkeys(relative_paths):
+            path = self.local_path(rel)
+            if path.exists() and path.stat().st_size > 0:
+                self._touch(path)
+                result[rel] = path
+                self.hits += 1
+            else:
+                to_fetch.append(rel)
+
+        if to_fetch:
+            self._rsync(to_fetch)
+            for rel in to_fetch:
+                path = self.local_path(rel)
+                if path.exists() and path.stat().st_size > 0:
+                    result[rel] = path
+                    self.fetched += 1
+                else:
+                    result[rel] = None
+                    self.missing += 1
+            self.evict()
+
+        return result
+
+    def _rsync(self, relative_paths: list) -> bool:
+        """Haal bestanden op met rsync --files-from. Zet self.unreachable."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.write('\n'.join(relative_paths) + '\n')
+            list_path = f.name
+
+        # Geen -t: lokale mtime = ophaaltijd, stabiel zolang het bestand in de cache staat
+        cmd = [
+            'rsync', '-q', '--files-from', list_path,
+            '-e', self._ssh_command(),
+            f"{self.user}@{self.host}:{self.remote_base}/",
+            f"{self.cache_dir}/",
+        ]
+        try:
+            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=RSYNC_TIMEOUT)
+            self.unreachable = proc.returncode not in (0, *RSYNC_PARTIAL)
+            if self.unreachable:
+                logger.warning(f"rsync van {self.host} mislukt ({proc.returncode}): {proc.stderr.strip()[-200:]}")
+            return not self.unreachable
+        except (subprocess.TimeoutExpired, OSError) as e:
+            logger.warning(f"rsync van {self.host} mislukt: {e}")
+            self.unreachable = True
+            return False
+        finally:
+            Path(list_path).unlink(missing_ok=True)
+
+    def _entries(self) -> list:
+        """(atime, size, path) van alle bestanden in de cache."""
+        entries = []
+        for path in self.cache_dir.rglob('*'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path.is_file():
+                entries.append((stat.st_atime, stat.st_size, path))
+        return entries
+
+    def evict(self, target_bytes: int | None = None) -> int:
+        """Verwijder minst recent gebruikte bestanden als de cache te groot is.
+
+        Returns:
+            Aantal verwijderde bestanden
+        """
+        if not self.cache_dir.exists():
+            return 0
+
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes and target_bytes is None:
+                return 0
+
+            if target_bytes is None:
+                target_bytes = int(self.max_bytes * EVICT_TARGET_RATIO)
+
+            removed = 0
+            for _, size, path in sorted(entries, key=lambda e: e[0]):
+                if total <= target_bytes:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+
+            self.evictions += removed
+
+        if removed:
+            logger.info(f"Audio cache: {removed} bestanden verwijderd, {total / 1024 / 1024:.0f} MB in gebruik")
+        return removed
+
+    def stats(self) -> dict:
+        """Cache tellers voor logging."""
+        lookups = self.hits + self.fetched + self.missing
+        return {
+            'hits': self.hits,
+            'fetched': self.fetched,
+            'missing': self.missing,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'unreachable': self.unreachable,
+        }
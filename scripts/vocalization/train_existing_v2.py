@@ -2,16 +2,21 @@
 """
 Train CNN op bestaande spectrogrammen - skip download fase.
 V2: Met sampling limiet per klasse om geheugen te sparen.
+
+Spectrogrammen worden incrementeel in een memmap dataset verzameld
+(spectrograms-<soort>/dataset, zie training_dataset.py): alleen nieuwe
+clips worden toegevoegd en X_spectrograms.npy wordt opnieuw geëxporteerd
+zodra er nieuwe data is.
 """
 import os
 import sys
-import random
-import numpy as np
 from pathlib import Path
 import psycopg2
 from datetime import datetime
 import subprocess
 
+from training_dataset import SpectrogramDatasetBuilder
+
 DATA_DIR = Path('/app/data')
 MODELS_DIR = DATA_DIR / 'models'
 LOGS_DIR = Path('/app/logs')
@@ -27,6 +32,11 @@ try:
 except ImportError:
     _pg = {}
 
+# Audio clips (mp3/wav) in de klasse directories gaan via de feature store
+# die ook de classifier gebruikt: dezelfde NAS volume als /app/data
+FEATURES_DIR = DATA_DIR / 'features'
+_feature_extractor = None
+
 # Database config (core module or environment variables)
 PG_HOST = _pg.get('host') or os.environ.get('PG_HOST', '192.168.1.25')
 PG_PORT = _pg.get('port') or os.environ.get('PG_PORT', '5433')
@@ -34,9 +44,11 @@ PG_DB = _pg.get('database') or os.environ.get('PG_DB', 'emsn')
 PG_USER = _pg.get('user') or os.environ.get('PG_USER', 'birdpi_zolder')
 PG_PASS = _pg.get('password') or os.environ.get('PG_PASS', '')
 
+
 def get_pg():
     return psycopg2.connect(host=PG_HOST, port=PG_PORT, database=PG_DB, user=PG_USER, password=PG_PASS)
 
+
 def update_status(species, status, phase, progress, **kwargs):
     conn = get_pg()
     cur = conn.cursor()
@@ -58,56 +70,59 @@ def update_status(species, status, phase, progress, **kwargs):
     cur.close()
     conn.close()
 
+
+def get_feature_extractor():
+    """Classifier voor de audio clips, pas bij het eerste gebruik aangemaakt (None zonder classifier)."""
+    global _feature_extractor
+    if _feature_extractor is None:
+        try:
+            from vocalization_classifier import VocalizationClassifier
+        except ImportError:
+            return None
+        _feature_extractor = VocalizationClassifier(models_dir=MODELS_DIR, features_dir=FEATURES_DIR)
+    return _feature_extractor
+
+
+def update_dataset(spec_dir):
+    """Voeg nieuwe clips uit spec_dir/<klasse>/ toe aan de memmap dataset.
+
+    Returns:
+        (builder, dict klasse -> aantal nieuw)
+    """
+    builder = SpectrogramDatasetBuilder(spec_dir / 'dataset', feature_extractor=get_feature_extractor())
+    added = builder.add_directory(spec_dir)
+
+    for cls, count in added.items():
+        print(f"  {cls}: {count} nieuw")
+    print(f"  Totaal in dataset: {builder.count}")
+    return builder, added
+
+
 def combine_spectrograms(spec_dir, max_per_class=MAX_PER_CLASS):
-    """Combineer spectrogrammen met limiet per klasse om geheugen te sparen."""
-    X_list, y_list = [], []
-    total_available = 0
-
-    for cls in ['song', 'call', 'alarm']:
-        cls_dir = spec_dir / cls
-        if not cls_dir.exists():
-            print(f"  {cls}: directory niet gevonden")
-            continue
-        files = list(cls_dir.glob('*.npy'))
-        total_available += len(files)
-        print(f"  {cls}: {len(files)} files", end="")
-
-        # Sample als teveel bestanden
-        if len(files) > max_per_class:
-            files = random.sample(files, max_per_class)
-            print(f" (sampled {max_per_class})")
-        else:
-            print()
-
-        loaded = 0
-        for f in files:
-            try:
-                X_list.append(np.load(f))
-                y_list.append(cls)
-                loaded += 1
-            except Exception as e:
-                pass
-
-        print(f"    Loaded: {loaded}")
-
-    print(f"  Totaal beschikbaar: {total_available}")
-    print(f"  Geladen voor training: {len(X_list)}")
-
-    if len(X_list) < 100:
+    """Actualiseer de memmap dataset en exporteer X/y met limiet per klasse.
+
+    Alleen clips die nog niet in het manifest staan worden geladen; de
+    export streamt in chunks zodat de dataset nooit twee keer in RAM staat.
+    """
+    x_file = spec_dir / 'X_spectrograms.npy'
+    builder, added = update_dataset(spec_dir)
+
+    if builder.count < 100:
         print("  ERROR: Te weinig data!")
+        builder.close()
         return False
 
-    X = np.stack(X_list)
-    y = np.array(y_list)
+    if x_file.exists() and not any(added.values()):
+        print("  Geen nieuwe spectrogrammen, X_spectrograms.npy is actueel")
+        builder.close()
+        return True
 
-    mem_mb = X.nbytes / 1024**2
-    print(f"  Array: {X.shape} ({mem_mb:.1f} MB)")
-
-    np.save(spec_dir / 'X_spectrograms.npy', X)
-    np.save(spec_dir / 'y_labels.npy', y)
-    print(f"  Opgeslagen!")
+    exported = builder.export_npy(x_file, spec_dir / 'y_labels.npy', max_per_class=max_per_class)
+    builder.close()
+    print(f"  Geëxporteerd voor training: {exported}")
     return True
 
+
 def train_species(name, dirname):
     spec_dir = DATA_DIR / f'spectrograms-{dirname}'
     model_path = MODELS_DIR / f'{dirname}_cnn_v1.keras'
@@ -127,14 +142,10 @@ def train_species(name, dirname):
 
     update_status(name, 'training', 'Combineren', 55)
 
-    # Check of al gecombineerd
-    x_file = spec_dir / 'X_spectrograms.npy'
-    if x_file.exists():
-        print(f"  X_spectrograms.npy bestaat al, skip combineren")
-    else:
-        if not combine_spectrograms(spec_dir):
-            update_status(name, 'failed', 'Te weinig data', 0, error_message='< 100 spectrograms')
-            return
+    # Nieuwe clips toevoegen (ook als X_spectrograms.npy al bestaat)
+    if not combine_spectrograms(spec_dir):
+        update_status(name, 'failed', 'Te weinig data', 0, error_message='< 100 spectrograms')
+        return
 
     update_status(name, 'training', 'CNN training', 60)
     MODELS_DIR.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+EMSN 2.0 - Vocalization Training Orchestrator
+
+Traint de soorten uit train_existing_v2.SPECIES parallel in een process
+pool in plaats van na elkaar. Het aantal gelijktijdige jobs volgt uit het
+aantal cores (TRAIN_THREADS_PER_JOB torch threads per job) en het vrije
+geheugen (MEMORY_PER_JOB_MB per job).
+
+Per soort:
+    1. Nieuwe clips toevoegen aan de memmap dataset (training_dataset.py)
+    2. PyTorch training direct uit de memmap (create_cnn_model architectuur)
+    3. Na elke epoch een checkpoint met model + optimizer state; een
+       gecrashte of gestopte run gaat verder bij de volgende epoch
+    4. Beste model (validatie accuracy) als <soort>_cnn_<jaar>.pt, het
+       formaat dat VocalizationClassifier laadt
+
+Voortgang, wall time en samples/sec komen in de vocalization_training tabel.
+
+Gebruik:
+    python train_orchestrator.py                      # Alle soorten
+    python train_orchestrator.py --species Merel Vink --epochs 30
+    python train_orchestrator.py --workers 2 --force  # Bestaande modellen opnieuw trainen
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from train_existing_v2 import DATA_DIR, MODELS_DIR, SPECIES, update_dataset, update_status
+from training_dataset import MemmapSpectrogramDataset
+from vocalization_classifier import create_cnn_model, get_torch
+
+CHECKPOINT_DIR = MODELS_DIR / 'checkpoints'
+MIN_SAMPLES = 100
+
+TRAIN_THREADS_PER_JOB = 2  # torch intra-op threads per soort
+MEMORY_PER_JOB_MB = 1500   # Model, optimizer, batches en torch runtime
+
+DEFAULT_EPOCHS = 50
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_PATIENCE = 10
+LEARNING_RATE = 1e-3
+
+
+def available_memory_mb() -> int:
+    """MemAvailable uit /proc/meminfo, 0 als onbekend."""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return 0
+
+
+def pool_size(jobs: int, threads_per_job: int = TRAIN_THREADS_PER_JOB,
+              memory_per_job_mb: int = MEMORY_PER_JOB_MB) -> int:
+    """Aantal parallelle trainingen dat in cores en geheugen past (minimaal 1)."""
+    by_cpu = (os.cpu_count() or 1) // threads_per_job
+    memory = available_memory_mb()
+    by_memory = memory // memory_per_job_mb if memory else by_cpu
+    return max(1, min(by_cpu, by_memory, jobs))
+
+
+def report_status(species, status, phase, progress, **kwargs):
+    """update_status zonder dat een database storing de training stopt."""
+    try:
+        update_status(species, status, phase, progress, **kwargs)
+    except Exception as e:
+        print(f"  [{species}] status update mislukt: {e}")
+
+
+def checkpoint_path(dirname: str) -> Path:
+    return CHECKPOINT_DIR / f"{dirname}.ckpt.pt"
+
+
+def model_path_for(dirname: str) -> Path:
+    """Model van dit jaar; VocalizationClassifier kiest bij meerdere jaren het nieuwste."""
+    return MODELS_DIR / f"{dirname}_cnn_{datetime.now().year}.pt"
+
+
+def save_checkpoint(path: Path, state: dict):
+    """Schrijf checkpoint atomair zodat een crash tijdens opslaan niets corrumpeert."""
+    torch = get_torch()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    torch.save(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def evaluate(model, loader, label_map) -> float:
+    """Accuracy op een DataLoader."""
+    torch = get_torch()
+    model.eval()
+    correct = total = 0
+    with torch.no_grad():
+        for x, y in loader:
+            y = label_map[y]
+            correct += (model(x).argmax(dim=1) == y).sum().item()
+            total += len(y)
+    return correct / total if total else 0.0
+
+
+def train_species_job(name: str, dirname: str, epochs: int = DEFAULT_EPOCHS,
+                      batch_size: int = DEFAULT_BATCH_SIZE, patience: int = DEFAULT_PATIENCE,
+                      threads: int = TRAIN_THREADS_PER_JOB, force: bool = False) -> dict:
+    """Train één soort, hervat vanaf het laatste checkpoint als dat bestaat.
+
+    Draait in een worker proces van de pool.
+
+    Returns:
+        Dict met status, accuracy, epochs, wall_time_seconds, samples_per_sec
+    """
+    torch = get_torch()
+    torch.set_num_threads(threads)
+    from torch.utils.data import DataLoader
+
+    spec_dir = DATA_DIR / f'spectrograms-{dirname}'
+    model_path = model_path_for(dirname)
+    ckpt_path = checkpoint_path(dirname)
+
+    if model_path.exists() and not force:
+        report_status(name, 'completed', 'Model bestaat al', 100)
+        return {'species': name, 'status': 'skipped'}
+
+    if not spec_dir.exists():
+        return {'species': name, 'status': 'skipped', 'error': 'no spectrograms directory'}
+
+    report_status(name, 'training', 'Dataset bijwerken', 55)
+    builder, _ = update_dataset(spec_dir)
+    builder.close()
+    if builder.count < MIN_SAMPLES:
+        report_status(name, 'failed', 'Te weinig data', 0, error_message=f'< {MIN_SAMPLES} spectrograms')
+        return {'species': name, 'status': 'failed', 'error': 'too little data'}
+
+    dataset = MemmapSpectrogramDataset(spec_dir / 'dataset')
+    train_set, val_set = dataset.split(val_fraction=0.2)
+
+    # Alleen klassen met data; labels hermappen naar 0..n-1
+    counts = dataset.class_counts()
+    class_names = [cls for cls in dataset.classes if counts[cls] > 0]
+    label_map = torch.full((len(dataset.classes),), -1, dtype=torch.long)
+    for i, cls in enumerate(class_names):
+        label_map[dataset.classes.index(cls)] = i
+
+    torch.manual_seed(0)
+    model = create_cnn_model(num_classes=len(class_names))
+    optimizer = torch.optim.Adam(model.parameters(), lr=LEARNING_RATE)
+    criterion = torch.nn.CrossEntropyLoss()
+
+    state = {'epoch': 0, 'best_acc': -1.0, 'best_state': None, 'stale_epochs': 0,
+             'elapsed': 0.0, 'samples': 0}
+    if ckpt_path.exists():
+        checkpoint = torch.load(ckpt_path, map_location='cpu', weights_only=False)
+        if checkpoint.get('class_names') == class_names:
+            model.load_state_dict(checkpoint['model_state_dict'])
+            optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
+            state = checkpoint['state']
+            print(f"  [{name}] hervat na epoch {state['epoch']}")
+
+    train_loader = DataLoader(train_set, batch_size=batch_size, shuffle=True)
+    val_loader = DataLoader(val_set, batch_size=batch_size * 2)
+
+    for epoch in range(state['epoch'] + 1, epochs + 1):
+        if state['stale_epochs'] >= patience:
+            break
+
+        start = time.monotonic()
+        model.train()
+        for x, y in train_loader:
+            optimizer.zero_grad()
+            loss = criterion(model(x), label_map[y])
+            loss.backward()
+            optimizer.step()
+        acc = evaluate(model, val_loader, label_map)
+
+        state['epoch'] = epoch
+        state['elapsed'] += time.monotonic() - start
+        state['samples'] += len(train_set)
+        if acc > state['best_acc']:
+            state['best_acc'] = acc
+            state['best_state'] = {k: v.clone() for k, v in model.state_dict().items()}
+            state['stale_epochs'] = 0
+        else:
+            state['stale_epochs'] += 1
+
+        save_checkpoint(ckpt_path, {
+            'model_state_dict': model.state_dict(),
+            'optimizer_state_dict': optimizer.state_dict(),
+            'class_names': class_names,
+            'state': state,
+        })
+
+        samples_per_sec = state['samples'] / state['elapsed'] if state['elapsed'] else 0
+        report_status(name, 'training', f'Epoch {epoch}/{epochs}', 60 + int(40 * epoch / epochs),
+                      accuracy=state['best_acc'], wall_time_seconds=round(state['elapsed'], 1),
+                      samples_per_sec=round(samples_per_sec, 1), epochs_completed=epoch)
+
+    get_torch().save({
+        'model_state_dict': state['best_state'] or model.state_dict(),
+        'num_classes': len(class_names),
+        'class_names': class_names,
+        'accuracy': state['best_acc'],
+        'epochs_trained': state['epoch'],
+        'training_samples': len(train_set),
+    }, model_path)
+    ckpt_path.unlink(missing_ok=True)
+
+    samples_per_sec = state['samples'] / state['elapsed'] if state['elapsed'] else 0
+    report_status(name, 'completed', 'Voltooid', 100, accuracy=state['best_acc'],
+                  spectrograms_count=dataset.manifest['count'],
+                  wall_time_seconds=round(state['elapsed'], 1),
+                  samples_per_sec=round(samples_per_sec, 1), epochs_completed=state['epoch'])
+
+    return {
+        'species': name,
+        'status': 'completed',
+        'accuracy': state['best_acc'],
+        'epochs': state['epoch'],
+        'wall_time_seconds': state['elapsed'],
+        'samples_per_sec': samples_per_sec,
+        'model': model_path.name,
+    }
+
+
+def run(species: list, workers: int, **job_kwargs) -> list:
+    """Train alle soorten in een process pool. Returns resultaat dict per soort."""
+    print(f"Training {len(species)} soorten met {workers} parallelle jobs "
+          f"({job_kwargs.get('threads', TRAIN_THREADS_PER_JOB)} threads per job)")
+
+    results = []
+    # spawn: geen geërfde torch thread pools of open database connecties
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {pool.submit(train_species_job, name, dirname, **job_kwargs): name
+                   for name, dirname in species}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                report_status(name, 'failed', 'Error', 0, error_message=str(e)[:200])
+                result = {'species': name, 'status': 'failed', 'error': str(e)}
+            results.append(result)
+
+            if result['status'] == 'completed':
+                print(f"  {name}: {result['accuracy']:.1%} na {result['epochs']} epochs, "
+                      f"{result['wall_time_seconds']:.0f}s ({result['samples_per_sec']:.0f} samples/s)")
+            else:
+                print(f"  {name}: {result['status']} {result.get('error', '')}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train vocalization models parallel with resumable checkpoints')
+    parser.add_argument('--species', nargs='+', help='Soortnamen (standaard alle uit SPECIES)')
+    parser.add_argument('--workers', type=int, help='Parallelle jobs (standaard op basis van cores en geheugen)')
+    parser.add_argument('--threads', type=int, default=TRAIN_THREADS_PER_JOB, help='Torch threads per job')
+    parser.add_argument('--epochs', type=int, default=DEFAULT_EPOCHS)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--patience', type=int, default=DEFAULT_PATIENCE)
+    parser.add_argument('--force', action='store_true', help='Ook soorten met een bestaand model trainen')
+    args = parser.parse_args()
+
+    species = SPECIES
+    if args.species:
+        wanted = {s.lower() for s in args.species}
+        species = [(name, dirname) for name, dirname in SPECIES if name.lower() in wanted]
+    if not species:
+        print("Geen soorten geselecteerd")
+        return 1
+
+    workers = args.workers or pool_size(len(species), args.threads)
+    start = time.monotonic()
+    results = run(species, workers, epochs=args.epochs, batch_size=args.batch_size,
+                  patience=args.patience, threads=args.threads, force=args.force)
+
+    completed = sum(1 for r in results if r['status'] == 'completed')
+    print(f"\n{completed}/{len(results)} soorten getraind in {time.monotonic() - start:.0f}s")
+    return 0 if all(r['status'] != 'failed' for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+EMSN 2.0 - Memory-mapped Vocalization Training Dataset
+
+Vervangt het in-RAM combineren van losse .npy spectrogrammen. De builder
+schrijft spectrogrammen in één voorgealloceerde np.memmap (spectrograms.dat)
+en houdt een manifest bij met bronbestand, hash, grootte, mtime en label per
+rij, zodat een volgende build alleen nieuwe clips toevoegt. Alleen bestanden
+waarvan pad, grootte of mtime afwijkt van het manifest worden gehasht. Het geheugengebruik is één
+spectrogram tegelijk, ongeacht de grootte van de dataset.
+
+Layout:
+    <dataset_dir>/spectrograms.dat   ruwe memmap, capacity x H x W
+    <dataset_dir>/manifest.json      shape, dtype, count, classes, entries
+
+MemmapSpectrogramDataset leest daar rij voor rij uit en is direct bruikbaar
+als map-style dataset voor torch.utils.data.DataLoader (torch wordt pas
+geïmporteerd in __getitem__).
+
+Gebruik:
+    builder = SpectrogramDatasetBuilder(spec_dir / 'dataset')
+    added = builder.add_directory(spec_dir)      # song/, call/, alarm/
+    dataset = MemmapSpectrogramDataset(spec_dir / 'dataset')
+    loader = DataLoader(dataset, batch_size=32, shuffle=True)
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+CLASSES = ['song', 'call', 'alarm']
+DATA_FILE = 'spectrograms.dat'
+MANIFEST_FILE = 'manifest.json'
+GROWTH_FACTOR = 1.5  # Capacity groeit met 50% als de memmap vol is
+AUDIO_SUFFIXES = ('.mp3', '.wav')
+
+
+def file_hash(path: Path) -> str:
+    """SHA1 van de bestandsinhoud (spectrogram .npy of audio clip)."""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_name(path: Path, root: Path | None = None) -> str:
+    """Bronbestand zoals in het manifest (relatief aan root als opgegeven)."""
+    return str(path.relative_to(root)) if root else str(path)
+
+
+def load_manifest(dataset_dir: Path) -> dict | None:
+    """Lees het manifest, None als de dataset nog niet bestaat."""
+    path = Path(dataset_dir) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+class SpectrogramDatasetBuilder:
+    """Append-only builder voor een memmap dataset met manifest.
+
+    Args:
+        dataset_dir: Output directory (wordt aangemaakt)
+        feature_extractor: Optioneel object met extract_features(paths) voor
+            audio clips (VocalizationClassifier, leest via de feature store)
+    """
+
+    def __init__(self, dataset_dir: Path, feature_extractor=None):
+        self.dataset_dir = Path(dataset_dir)
+        self.feature_extractor = feature_extractor
+        self.manifest = load_manifest(self.dataset_dir) or {
+            'shape': None,
+            'dtype': None,
+            'capacity': 0,
+            'count': 0,
+            'classes': list(CLASSES),
+            'entries': [],
+        }
+        self._known = {e['hash'] for e in self.manifest['entries']}
+        self._by_source = {e['source']: e for e in self.manifest['entries']}
+        self._stats_updated = False  # Manifest entries zonder (actuele) grootte/mtime bijgewerkt
+        self._memmap = None
+        self._reserve = 0  # Rijen om vooraf te alloceren voor de lopende add_files
+
+    @property
+    def count(self) -> int:
+        return self.manifest['count']
+
+    def _open(self, capacity: int):
+        """Open (of vergroot) de memmap tot minstens capacity rijen."""
+        shape = tuple(self.manifest['shape'])
+        dtype = np.dtype(self.manifest['dtype'])
+        data_path = self.dataset_dir / DATA_FILE
+
+        if capacity > self.manifest['capacity']:
+            capacity = max(capacity, int(self.manifest['capacity'] * GROWTH_FACTOR))
+            if self._memmap is not None:
+                self._memmap.flush()
+                self._memmap = None
+            # Bestand vergroten zonder de bestaande rijen te kopiëren
+            with open(data_path, 'ab') as f:
+                f.truncate(capacity * int(np.prod(shape)) * dtype.itemsize)
+            self.manifest['capacity'] = capacity
+
+        if self._memmap is None:
+            self._memmap = np.memmap(data_path, dtype=dtype, mode='r+',
+                                     shape=(self.manifest['capacity'], *shape))
+        return self._memmap
+
+    def _save_manifest(self):
+        """Schrijf het manifest atomair (na flush van de data)."""
+        if self._memmap is not None:
+            self._memmap.flush()
+        tmp_path = self.dataset_dir / f".{MANIFEST_FILE}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.dataset_dir / MANIFEST_FILE)
+        self._stats_updated = False
+
+    def _new_sources(self, files: list, root: Path | None = None) -> list:
+        """(path, hash, stat) van bestanden die nog niet in het manifest staan.
+
+        Een bestand met hetzelfde pad, dezelfde grootte en mtime als in het
+        manifest wordt zonder hashen overgeslagen; alleen gewijzigde of
+        nieuwe kandidaten worden gehasht.
+        """
+        new = []
+        for path in files:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entry = self._by_source.get(source_name(path, root))
+            if entry and entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+                continue
+
+            digest = file_hash(path)
+            if digest in self._known:
+                if entry and entry['hash'] == digest:
+                    # Ouder manifest of alleen mtime gewijzigd: volgende keer geen hash nodig
+                    entry['size'], entry['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+                    self._stats_updated = True
+                continue
+            new.append((path, digest, stat))
+        return new
+
+    def add_files(self, files: list, label: str, root: Path | None = None) -> int:
+        """Voeg spectrogram (.npy) of audio bestanden toe met één label.
+
+        Bestanden waarvan de hash al in het manifest staat worden
+        overgeslagen. Arrays met een afwijkende vorm worden genegeerd.
+
+        Returns:
+            Aantal toegevoegde rijen
+        """
+        if label not in self.manifest['classes']:
+            self.manifest['classes'].append(label)
+
+        new = self._new_sources(files, root)
+        if not new:
+            if self._stats_updated:
+                self._save_manifest()
+            return 0
+
+        self.dataset_dir.mkdir(parents=True, exist_ok=True)
+        self._reserve = self.count + len(new)
+        audio = [n for n in new if n[0].suffix.lower() in AUDIO_SUFFIXES]
+        arrays = [n for n in new if n[0].suffix.lower() not in AUDIO_SUFFIXES]
+
+        added = 0
+        for path, digest, stat in arrays:
+            try:
+                x = np.load(path)
+            except (OSError, ValueError):
+                continue
+            added += self._append(x, path, digest, stat, label, root)
+
+        if audio and self.feature_extractor is not None:
+            features = self.feature_extractor.extract_features([p for p, _, _ in audio])
+            for (path, digest, stat), x in zip(audio, features):
+                if x is not None:
+                    added += self._append(x, path, digest, stat, label, root)
+
+        self._save_manifest()
+        return added
+
+    def _append(self, x: np.ndarray, path: Path, digest: str, stat: os.stat_result,
+                label: str, root: Path | None) -> int:
+        """Schrijf één array in de volgende vrije rij."""
+        if self.manifest['shape'] is None:
+            self.manifest['shape'] = list(x.shape)
+            self.manifest['dtype'] = str(x.dtype)
+        if list(x.shape) != self.manifest['shape']:
+            return 0
+
+        index = self.manifest['count']
+        data = self._open(max(index + 1, self._reserve))
+        data[index] = x
+        self.manifest['count'] = index + 1
+        entry = {
+            'source': source_name(path, root),
+            'hash': digest,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'label': label,
+        }
+        self.manifest['entries'].append(entry)
+        self._by_source[entry['source']] = entry
+        self._known.add(digest)
+        return 1
+
+    def add_directory(self, spec_dir: Path) -> dict:
+        """Voeg alle bestanden uit spec_dir/<klasse>/ toe.
+
+        Returns:
+            Dict klasse -> aantal toegevoegde rijen
+        """
+        spec_dir = Path(spec_dir)
+        added = {}
+        for cls in self.manifest['classes']:
+            cls_dir = spec_dir / cls
+            if not cls_dir.exists():
+                continue
+            files = sorted(f for f in cls_dir.iterdir()
+                           if f.suffix.lower() in ('.npy', *AUDIO_SUFFIXES))
+            added[cls] = self.add_files(files, cls, root=spec_dir)
+        return added
+
+    def labels(self) -> np.ndarray:
+        """Label index per rij (volgorde van manifest classes)."""
+        index = {cls: i for i, cls in enumerate(self.manifest['classes'])}
+        return np.array([index[e['label']] for e in self.manifest['entries']], dtype=np.int64)
+
+    def export_npy(self, x_path: Path, y_path: Path, max_per_class: int | None = None,
+                   seed: int = 0, chunk_size: int = 512) -> int:
+        """Schrijf X_spectrograms.npy/y_labels.npy zoals combine_spectrograms deed.
+
+        Streamt in chunks via een .npy memmap, zodat ook hier de dataset
+        nooit volledig in RAM staat.
+
+        Returns:
+            Aantal geëxporteerde rijen
+        """
+        if not self.count:
+            return 0
+
+        labels = [e['label'] for e in self.manifest['entries']]
+        rows = np.arange(self.count)
+        if max_per_class:
+            rng = np.random.default_rng(seed)
+            keep = []
+            for cls in self.manifest['classes']:
+                cls_rows = rows[np.array(labels) == cls]
+                if len(cls_rows) > max_per_class:
+                    cls_rows = np.sort(rng.choice(cls_rows, max_per_class, replace=False))
+                keep.append(cls_rows)
+            rows = np.sort(np.concatenate(keep))
+
+        data = self._open(self.count)
+        out = np.lib.format.open_memmap(x_path, mode='w+', dtype=data.dtype,
+                                        shape=(len(rows), *self.manifest['shape']))
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            out[start:start + len(chunk)] = data[chunk]
+        out.flush()
+        del out
+
+        np.save(y_path, np.array([labels[i] for i in rows]))
+        return len(rows)
+
+    def close(self):
+        """Flush en sluit de memmap."""
+        if self._memmap is not None:
+            self._memmap.flush()
+            self._memmap = None
+
+
+class MemmapSpectrogramDataset:
+    """Map-style dataset die spectrogrammen uit de memmap streamt.
+
+    Geschikt voor torch.utils.data.DataLoader: __getitem__ geeft
+    (tensor (1, H, W) float32, label index). De memmap wordt per proces
+    lazy geopend zodat DataLoader workers hem niet hoeven te picklen.
+
+    Args:
+        dataset_dir: Directory van SpectrogramDatasetBuilder
+        indices: Optionele subset van rijen (train/validatie split)
+    """
+
+    def __init__(self, dataset_dir: Path, indices=None):
+        self.dataset_dir = Path(dataset_dir)
+        self.manifest = load_manifest(self.dataset_dir)
+        if self.manifest is None:
+            raise FileNotFoundError(f"Geen dataset manifest in {self.dataset_dir}")
+
+        self.classes = self.manifest['classes']
+        class_index = {cls: i for i, cls in enumerate(self.classes)}
+        self.labels = np.array([class_index[e['label']] for e in self.manifest['entries']], dtype=np.int64)
+        self.indices = np.arange(self.manifest['count']) if indices is None else np.asarray(indices)
+        self._data = None
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def _array(self) -> np.memmap:
+        if self._data is None:
+            self._data = np.memmap(self.dataset_dir / DATA_FILE, dtype=np.dtype(self.manifest['dtype']),
+                                   mode='r', shape=(self.manifest['capacity'], *self.manifest['shape']))
+        return self._data
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_data'] = None
+        return state
+
+    def get_array(self, i: int) -> tuple:
+        """(float32 ndarray (1, H, W), label) zonder torch."""
+        row = self.indices[i]
+        x = np.array(self._array()[row], dtype=np.float32)[np.newaxis]
+        return x, int(self.labels[row])
+
+    def __getitem__(self, i: int):
+        import torch
+        x, label = self.get_array(i)
+        return torch.from_numpy(x), label
+
+    def split(self, val_fraction: float = 0.2, seed: int = 0) -> tuple:
+        """Gestratificeerde train/validatie split als twee datasets."""
+        rng = np.random.default_rng(seed)
+        train, val = [], []
+        for cls in range(len(self.classes)):
+            rows = self.indices[self.labels[self.indices] == cls]
+            rows = rng.permutation(rows)
+            n_val = int(round(len(rows) * val_fraction))
+            val.extend(rows[:n_val])
+            train.extend(rows[n_val:])
+        return (MemmapSpectrogramDataset(self.dataset_dir, np.sort(train)),
+                MemmapSpectrogramDataset(self.dataset_dir, np.sort(val)))
+
+    def class_counts(self) -> dict:
+        """Aantal rijen per klasse in deze (sub)set."""
+        counts = np.bincount(self.labels[self.indices], minlength=len(self.classes))
+        return dict(zip(self.classes, counts.tolist()))
@@ -17,22 +17,40 @@ Usage:
         print(f"{result['type']} ({result['confidence']:.0%})")
         # Output: song (87%)
 
+    # Classify many clips of one species with a single forward pass
+    results = classifier.classify_batch("Eurasian Blackbird", ["/a.mp3", "/b.mp3"])
+
+    # ONNX Runtime backend (geen torch import nodig op de Pi):
+    #   python export_onnx.py --models-dir /path/to/models [--quantize]
+    # Daarna gebruikt de classifier automatisch <model>.onnx naast <model>.pt
+
 Requirements:
-    - PyTorch
+    - PyTorch of onnxruntime (als .onnx modellen geëxporteerd zijn)
     - librosa
     - scikit-image
     - numpy
 """
 
+import json
+import os
 import re
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import numpy as np
 
+try:
+    from .feature_store import FeatureStore
+except ImportError:
+    from feature_store import FeatureStore
+
 # Lazy imports voor snellere startup
 _torch = None
 _librosa = None
+_ort = None
 
 
 def get_torch():
@@ -53,6 +71,18 @@ def get_librosa():
     return _librosa
 
 
+def get_onnxruntime():
+    """Lazy load onnxruntime. Returns None als niet geïnstalleerd."""
+    global _ort
+    if _ort is None:
+        try:
+            import onnxruntime
+            _ort = onnxruntime
+        except ImportError:
+            _ort = False
+    return _ort or None
+
+
 # Configuration - override MODELS_DIR via environment or constructor
 MODELS_DIR = Path(
     __import__('os').environ.get(
@@ -67,6 +97,38 @@ HOP_LENGTH = 512
 FMIN = 500
 FMAX = 8000
 SEGMENT_DURATION = 3.0
+INPUT_SHAPE = (128, 128)
+
+# Batch inference
+DECODE_WORKERS = min(4, os.cpu_count() or 1)  # Threads voor audio decoding (ffmpeg/libsndfile laten de GIL los)
+MAX_BATCH_SIZE = 64  # Max spectrogrammen per forward pass
+
+# Inference backend: 'auto' gebruikt ONNX Runtime als <model>.onnx bestaat,
+# 'torch' forceert PyTorch, 'onnx' geeft een waarschuwing als export ontbreekt
+BACKEND = os.environ.get('VOCALIZATION_BACKEND', 'auto')
+# Gebruik <model>.int8.onnx (dynamisch gekwantiseerd) als die bestaat
+PREFER_INT8 = os.environ.get('VOCALIZATION_ONNX_INT8', '0') == '1'
+DEFAULT_CLASS_NAMES = ['song', 'call', 'alarm']
+
+# Model cache budget in bytes (gewichten), niet in aantal modellen
+MODEL_CACHE_BYTES = int(os.environ.get('VOCALIZATION_CACHE_MB', '256')) * 1024 * 1024
+
+# Feature store: mel spectrogrammen gedeeld met enricher en training (NAS).
+# Leeg VOCALIZATION_FEATURES_DIR schakelt de store uit.
+_features_dir = os.environ.get('VOCALIZATION_FEATURES_DIR', str(MODELS_DIR.parent / 'features'))
+FEATURES_DIR = Path(_features_dir) if _features_dir else None
+FEATURES_MAX_BYTES = int(os.environ.get('VOCALIZATION_FEATURES_MB', '2048')) * 1024 * 1024
+# Alles wat de features beïnvloedt zit in de store key
+FEATURE_PARAMS = {
+    'sample_rate': SAMPLE_RATE,
+    'n_mels': N_MELS,
+    'n_fft': N_FFT,
+    'hop_length': HOP_LENGTH,
+    'fmin': FMIN,
+    'fmax': FMAX,
+    'segment_duration': SEGMENT_DURATION,
+    'input_shape': INPUT_SHAPE,
+}
 
 # Vertaling naar Nederlands
 VOC_TYPE_NL = {
@@ -184,6 +246,177 @@ def create_cnn_model(num_classes=3, ultimate=False):
     return ColabVocalizationCNN(num_classes=num_classes)
 
 
+def load_torch_checkpoint(model_path: Path, mmap: bool = True):
+    """Laad .pt checkpoint als nn.Module in eval mode. Returns (model, class_names).
+
+    Met mmap=True worden de gewichten uit het bestand gemapt in plaats van
+    gekopieerd (alleen zipfile checkpoints en torch >= 2.1; oude formaten en
+    oudere torch versies vallen terug op normaal laden).
+    """
+    torch = get_torch()
+    checkpoint = None
+    mapped = False
+    if mmap:
+        try:
+            checkpoint = torch.load(model_path, map_location='cpu', weights_only=False, mmap=True)
+            mapped = True
+        except (RuntimeError, TypeError):
+            # TypeError: torch < 2.1 kent het mmap argument niet
+            logger.debug(f"Geen mmap mogelijk voor {model_path.name}, normaal laden")
+    if checkpoint is None:
+        checkpoint = torch.load(model_path, map_location='cpu', weights_only=False)
+
+    num_classes = checkpoint.get('num_classes', 3)
+
+    # Detecteer ultimate model aan bestandsnaam of versie
+    is_ultimate = 'ultimate' in model_path.name.lower() or \
+                  'ultimate' in checkpoint.get('version', '').lower()
+
+    model = create_cnn_model(num_classes=num_classes, ultimate=is_ultimate)
+    if mapped:
+        # assign=True (ook torch >= 2.1) hergebruikt de gemapte tensors i.p.v. een kopie te maken
+        model.load_state_dict(checkpoint['model_state_dict'], assign=True)
+    else:
+        model.load_state_dict(checkpoint['model_state_dict'])
+    model.eval()
+
+    # Haal class_names uit checkpoint (voor modellen met <3 klassen)
+    class_names = checkpoint.get('class_names', DEFAULT_CLASS_NAMES)
+    return model, class_names
+
+
+def onnx_path_for(model_path: Path, quantized: bool = False) -> Path:
+    """ONNX export pad naast het .pt model (soort_cnn_2025.pt -> soort_cnn_2025.onnx)."""
+    suffix = '.int8.onnx' if quantized else '.onnx'
+    return model_path.with_name(model_path.stem + suffix)
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """Numeriek stabiele softmax over de laatste as."""
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class TorchVocalizationModel:
+    """PyTorch inference backend."""
+
+    backend = 'torch'
+
+    def __init__(self, model):
+        self.model = model
+        self.nbytes = sum(t.nbytes for t in model.state_dict().values())
+
+    def predict_proba(self, x: np.ndarray) -> np.ndarray:
+        """Softmax kansen voor batch (N, 1, 128, 128) float32."""
+        torch = get_torch()
+        with torch.no_grad():
+            return torch.softmax(self.model(torch.from_numpy(x)), dim=1).numpy()
+
+
+class OnnxVocalizationModel:
+    """ONNX Runtime inference backend, zelfde contract als TorchVocalizationModel."""
+
+    backend = 'onnx'
+
+    def __init__(self, onnx_path: Path):
+        ort = get_onnxruntime()
+        if ort is None:
+            raise ImportError("onnxruntime is niet geïnstalleerd. Installeer met: pip install onnxruntime")
+
+        # CPU provider (Pi heeft geen CUDA)
+        self.session = ort.InferenceSession(str(onnx_path), providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.nbytes = Path(onnx_path).stat().st_size  # Gewichten zitten vrijwel volledig in het bestand
+
+        # class_names staan als metadata in het model (zie export_onnx.py)
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.class_names = json.loads(metadata.get('class_names', json.dumps(DEFAULT_CLASS_NAMES)))
+
+    def predict_proba(self, x: np.ndarray) -> np.ndarray:
+        """Softmax kansen voor batch (N, 1, 128, 128) float32."""
+        logits = self.session.run(None, {self.input_name: x})[0]
+        return softmax(logits)
+
+
+class ModelCache:
+    """LRU cache voor geladen modellen, begrensd op bytes in plaats van aantal.
+
+    Gepinde entries (veel gedetecteerde soorten) worden nooit verwijderd.
+    Niet thread-safe: VocalizationClassifier roept dit aan onder zijn lock.
+    """
+
+    def __init__(self, budget_bytes: int = MODEL_CACHE_BYTES):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()  # key -> (value, nbytes), oudste eerst
+        self.pinned = set()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key):
+        """Haal entry op en markeer als recent gebruikt. None bij miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value, nbytes: int):
+        """Voeg entry toe en verwijder oudste niet-gepinde entries tot het budget past."""
+        if key in self._entries:
+            self.bytes_used -= self._entries.pop(key)[1]
+
+        self._evict(self.budget_bytes - nbytes)
+        self._entries[key] = (value, nbytes)
+        self.bytes_used += nbytes
+
+    def _evict(self, target_bytes: int):
+        """Verwijder LRU entries (pins overgeslagen) tot bytes_used <= target_bytes."""
+        for key in list(self._entries):
+            if self.bytes_used <= target_bytes:
+                break
+            if key in self.pinned:
+                continue
+            self.bytes_used -= self._entries.pop(key)[1]
+            self.evictions += 1
+            logger.debug(f"Model uit cache verwijderd: {Path(key).name}")
+
+    def pin(self, key):
+        """Pin entry zodat die niet verwijderd wordt."""
+        self.pinned.add(key)
+
+    def unpin_all(self):
+        """Verwijder alle pins (entries blijven in de cache)."""
+        self.pinned.clear()
+
+    def pinned_bytes(self) -> int:
+        """Totale grootte van de gepinde entries in de cache."""
+        return sum(self._entries[k][1] for k in self.pinned if k in self._entries)
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction tellers en bezetting voor de health check."""
+        lookups = self.hits + self.misses
+        return {
+            'models': len(self._entries),
+            'pinned': len(self.pinned),
+            'bytes_used': self.bytes_used,
+            'budget_bytes': self.budget_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
 class VocalizationClassifier:
     """
     Classifier voor vocalisatie types (song/call/alarm).
@@ -195,20 +428,27 @@ class VocalizationClassifier:
             print(f"{result['type_nl']} ({result['confidence']:.0%})")
     """
 
-    def __init__(self, models_dir: Path = MODELS_DIR, max_cached_models: int = 5):
+    def __init__(self, models_dir: Path = MODELS_DIR, cache_budget_bytes: int = MODEL_CACHE_BYTES,
+                 backend: str = BACKEND, prefer_int8: bool = PREFER_INT8,
+                 features_dir: Path | None = FEATURES_DIR, features_max_bytes: int = FEATURES_MAX_BYTES):
         self.models_dir = Path(models_dir)
-        self.models_cache = {}
-        self.cache_order = []  # LRU tracking
-        self.max_cached_models = max_cached_models
+        self.feature_store = (FeatureStore(features_dir, features_max_bytes, FEATURE_PARAMS)
+                              if features_dir else None)
+        self.backend = backend
+        self.prefer_int8 = prefer_int8
+        self.models_cache = ModelCache(cache_budget_bytes)
         self.available_models = {}
         self._initialized = False
+        self._lock = threading.RLock()  # Cache is gedeeld door worker threads
 
     def _init_lazy(self):
         """Lazy initialization - alleen laden als nodig."""
         if self._initialized:
             return
-        self._scan_models()
-        self._initialized = True
+        with self._lock:
+            if not self._initialized:
+                self._scan_models()
+                self._initialized = True
 
     def _scan_models(self):
         """Scan beschikbare modellen.
@@ -217,6 +457,11 @@ class VocalizationClassifier:
         - *_cnn_2025.pt (standaard)
         - *_cnn_2025_ultimate.pt (Colab A100 training - prioriteit)
         - *_ultimate.pt (alternatief formaat)
+
+        Bij meerdere modellen voor een soort (train_orchestrator.py schrijft
+        elk jaar een nieuw <soort>_cnn_<jaar>.pt) wint ultimate, dan het
+        nieuwste jaar en dan de nieuwste mtime, onafhankelijk van de glob
+        volgorde.
         """
         if not self.models_dir.exists():
             logger.warning(f"Models directory niet gevonden: {self.models_dir}")
@@ -227,8 +472,10 @@ class VocalizationClassifier:
         for model_file in self.models_dir.glob("*.pt"):
             name = model_file.stem
 
-            # Bepaal prioriteit: ultimate modellen hebben voorrang
+            # Bepaal prioriteit: ultimate modellen hebben voorrang, dan nieuwste jaar/mtime
             is_ultimate = 'ultimate' in name.lower()
+            year = re.search(r'_cnn_(\d{4})', name)
+            rank = (is_ultimate, int(year.group(1)) if year else 0, model_file.stat().st_mtime)
 
             # Extract species name uit verschillende formaten
             # Format: soort_cnn_2025_ultimate.pt of soort_cnn_2025.pt of soort_ultimate.pt
@@ -237,16 +484,15 @@ class VocalizationClassifier:
             species_name = species_name.replace('_', ' ').title()
             key = species_name.lower()
 
-            # Ultimate modellen overschrijven altijd standaard modellen
-            if key not in all_models or is_ultimate:
-                all_models[key] = (model_file, is_ultimate)
+            if key not in all_models or rank > all_models[key][1]:
+                all_models[key] = (model_file, rank)
 
         # Sla alleen de paths op
-        for key, (model_file, is_ultimate) in all_models.items():
+        for key, (model_file, rank) in all_models.items():
             self.available_models[key] = model_file
 
         # Tel ultimate vs standaard
-        ultimate_count = sum(1 for _, is_ult in all_models.values() if is_ult)
+        ultimate_count = sum(1 for _, rank in all_models.values() if rank[0])
         standard_count = len(all_models) - ultimate_count
 
         logger.info(f"Vocalization classifier: {len(self.available_models)} modellen "
@@ -275,47 +521,99 @@ class VocalizationClassifier:
 
     def _load_model(self, model_path: Path):
         """Laad model met LRU caching. Returns (model, metadata)."""
+        with self._lock:
+            return self._load_model_locked(model_path)
+
+    def _load_model_locked(self, model_path: Path):
+        """Laad model, aanroeper houdt self._lock vast."""
         path_str = str(model_path)
 
-        # Cache hit - verplaats naar einde (recent used)
-        if path_str in self.models_cache:
-            if path_str in self.cache_order:
-                self.cache_order.remove(path_str)
-            self.cache_order.append(path_str)
-            return self.models_cache[path_str]
+        # Cache hit - wordt automatisch als recent gebruikt gemarkeerd
+        cached = self.models_cache.get(path_str)
+        if cached is not None:
+            return cached
 
         try:
-            torch = get_torch()
-            checkpoint = torch.load(model_path, map_location='cpu', weights_only=False)
-
-            num_classes = checkpoint.get('num_classes', 3)
+            onnx_path = self._find_onnx(model_path)
+            if onnx_path:
+                model = OnnxVocalizationModel(onnx_path)
+                class_names = model.class_names
+            else:
+                torch_model, class_names = load_torch_checkpoint(model_path)
+                model = TorchVocalizationModel(torch_model)
 
-            # Detecteer ultimate model aan bestandsnaam of versie
-            is_ultimate = 'ultimate' in model_path.name.lower() or \
-                          'ultimate' in checkpoint.get('version', '').lower()
+            self.models_cache.put(path_str, (model, class_names), model.nbytes)
+            return (model, class_names)
 
-            model = create_cnn_model(num_classes=num_classes, ultimate=is_ultimate)
-            model.load_state_dict(checkpoint['model_state_dict'])
-            model.eval()
+        except Exception as e:
+            logger.error(f"Fout bij laden model {model_path}: {e}")
+            return None
 
-            # Haal class_names uit checkpoint (voor modellen met <3 klassen)
-            class_names = checkpoint.get('class_names', ['song', 'call', 'alarm'])
+    def pin_species(self, species_names: list) -> list:
+        """Laad en pin modellen van veel gedetecteerde soorten.
 
-            # LRU cache cleanup - verwijder oudste model als cache vol is
-            while len(self.models_cache) >= self.max_cached_models and self.cache_order:
-                oldest = self.cache_order.pop(0)
-                if oldest in self.models_cache:
-                    del self.models_cache[oldest]
-                    logger.debug(f"Model uit cache verwijderd: {Path(oldest).name}")
+        Pins worden vervangen; er wordt gestopt zodra de gepinde modellen
+        het cache budget zouden overschrijden.
 
-            self.models_cache[path_str] = (model, class_names)
-            self.cache_order.append(path_str)
-            return (model, class_names)
+        Args:
+            species_names: Soortnamen, meest gedetecteerd eerst
 
-        except Exception as e:
-            logger.error(f"Fout bij laden model {model_path}: {e}")
+        Returns:
+            Lijst met soortnamen die daadwerkelijk gepind zijn
+        """
+        pinned = []
+        with self._lock:
+            self.models_cache.unpin_all()
+            for species_name in species_names:
+                model_path = self._find_model(species_name)
+                if not model_path or self._load_model_locked(model_path) is None:
+                    continue
+
+                key = str(model_path)
+                self.models_cache.pin(key)
+                if self.models_cache.pinned_bytes() > self.models_cache.budget_bytes:
+                    self.models_cache.pinned.discard(key)
+                    logger.warning(f"Cache budget vol, {species_name} niet gepind")
+                    break
+                pinned.append(species_name)
+
+        logger.info(f"Vocalization cache: {len(pinned)} soorten gepind")
+        return pinned
+
+    def cache_stats(self) -> dict:
+        """Cache tellers (hits, misses, evictions, bytes) voor metrics en health check."""
+        with self._lock:
+            return self.models_cache.stats()
+
+    def feature_stats(self) -> dict | None:
+        """Feature store tellers, None als de store uitgeschakeld is."""
+        return self.feature_store.stats() if self.feature_store else None
+
+    def _find_onnx(self, model_path: Path) -> Path | None:
+        """Vind ONNX export voor een .pt model, None = PyTorch gebruiken.
+
+        Een export die ouder is dan het checkpoint (model opnieuw getraind)
+        wordt niet gebruikt.
+        """
+        if self.backend == 'torch':
             return None
 
+        candidates = [onnx_path_for(model_path)]
+        if self.prefer_int8:
+            candidates.insert(0, onnx_path_for(model_path, quantized=True))
+
+        for onnx_path in candidates:
+            if not onnx_path.exists() or get_onnxruntime() is None:
+                continue
+            if model_path.exists() and onnx_path.stat().st_mtime < model_path.stat().st_mtime:
+                logger.warning(f"{onnx_path.name} is ouder dan {model_path.name}, opnieuw exporteren")
+                continue
+            return onnx_path
+
+        if self.backend == 'onnx':
+            logger.warning(f"Geen bruikbare ONNX export voor {model_path.name}, fallback naar PyTorch")
+        return None
+
     def _audio_to_spectrogram(self, audio_path: Path) -> np.ndarray | None:
         """Converteer audio naar spectrogram."""
         try:
@@ -350,6 +648,50 @@ class VocalizationClassifier:
         self._init_lazy()
         return self._find_model(species_name) is not None
 
+    def _prepare_input(self, audio_path: Path) -> np.ndarray | None:
+        """Audio naar model input (128x128 float32 spectrogram), None bij fouten.
+
+        Gaat via de feature store als die actief is: een bekende clip wordt
+        dan niet opnieuw gedecodeerd.
+        """
+        if not audio_path.exists():
+            return None
+
+        if self.feature_store and self.feature_store.enabled:
+            return self.feature_store.get_or_compute(audio_path, self._compute_input)
+        return self._compute_input(audio_path)
+
+    def _compute_input(self, audio_path: Path) -> np.ndarray | None:
+        """Decodeer audio en maak het 128x128 float32 spectrogram."""
+        spectrogram = self._audio_to_spectrogram(audio_path)
+        if spectrogram is None:
+            return None
+
+        # Resize naar 128x128
+        if spectrogram.shape != INPUT_SHAPE:
+            from skimage.transform import resize
+            spectrogram = resize(spectrogram, INPUT_SHAPE, anti_aliasing=True)
+
+        return spectrogram.astype(np.float32)
+
+    @staticmethod
+    def _build_result(probas, class_names: list, model_path: Path) -> dict:
+        """Maak resultaat dict uit softmax kansen van één sample."""
+        # Gebruik class_names uit model (ondersteunt 2 of 3 klassen)
+        class_idx = int(np.argmax(probas))
+        voc_type = class_names[class_idx]
+
+        return {
+            'type': voc_type,
+            'type_nl': VOC_TYPE_NL.get(voc_type, voc_type),
+            'confidence': float(probas[class_idx]),
+            'model': model_path.name,
+            'probabilities': {
+                name: float(probas[i])
+                for i, name in enumerate(class_names)
+            }
+        }
+
     def classify(self, species_name: str, audio_path: str | Path) -> dict | None:
         """
         Classificeer vocalisatie type.
@@ -361,58 +703,84 @@ class VocalizationClassifier:
         Returns:
             Dict met type, type_nl, confidence, of None als niet mogelijk
         """
+        return self.classify_batch(species_name, [audio_path])[0]
+
+    def extract_features(self, audio_paths: list, decode_workers: int = DECODE_WORKERS) -> list:
+        """
+        Model input features voor meerdere audiobestanden.
+
+        Ook gebruikt door de training zodat clips die al geclassificeerd zijn
+        niet opnieuw gedecodeerd worden (en andersom).
+
+        Args:
+            audio_paths: Paden naar audiobestanden
+            decode_workers: Aantal threads voor audio decoding
+
+        Returns:
+            Lijst met 128x128 float32 arrays of None, in volgorde van audio_paths
+        """
+        paths = [Path(p) for p in audio_paths]
+
+        # Audio decoding parallel (I/O en C-extensies), één bestand direct
+        if len(paths) <= 1 or decode_workers <= 1:
+            return [self._prepare_input(p) for p in paths]
+        with ThreadPoolExecutor(max_workers=min(decode_workers, len(paths))) as pool:
+            return list(pool.map(self._prepare_input, paths))
+
+    def classify_batch(self, species_name: str, audio_paths: list,
+                       decode_workers: int = DECODE_WORKERS) -> list:
+        """
+        Classificeer meerdere audiobestanden van één soort in één keer.
+
+        Het model wordt één keer geladen, audio wordt parallel gedecodeerd en
+        alle spectrogrammen gaan gestapeld door één forward pass.
+
+        Args:
+            species_name: Nederlandse soortnaam (bijv. "Merel")
+            audio_paths: Paden naar audiobestanden
+            decode_workers: Aantal threads voor audio decoding
+
+        Returns:
+            Lijst met resultaat dicts (zie classify) of None, in volgorde van audio_paths
+        """
+        results = [None] * len(audio_paths)
+        if not audio_paths:
+            return results
+
         model_path = self._find_model(species_name)
         if not model_path:
-            return None
+            return results
 
-        audio_path = Path(audio_path)
-        if not audio_path.exists():
-            return None
+        paths = [Path(p) for p in audio_paths]
+        if not any(p.exists() for p in paths):
+            return results
 
-        result = self._load_model(model_path)
-        if result is None:
-            return None
+        loaded = self._load_model(model_path)
+        if loaded is None:
+            return results
 
-        model, class_names = result
+        model, class_names = loaded
 
-        spectrogram = self._audio_to_spectrogram(audio_path)
-        if spectrogram is None:
-            return None
+        inputs = self.extract_features(paths, decode_workers)
+        valid = [i for i, x in enumerate(inputs) if x is not None]
+        if not valid:
+            return results
 
         try:
-            torch = get_torch()
-
-            # Resize naar 128x128
-            if spectrogram.shape != (128, 128):
-                from skimage.transform import resize
-                spectrogram = resize(spectrogram, (128, 128), anti_aliasing=True)
-
-            # Naar tensor
-            x = torch.FloatTensor(spectrogram).unsqueeze(0).unsqueeze(0)
-
-            with torch.no_grad():
-                outputs = model(x)
-                probas = torch.softmax(outputs, dim=1)[0]
-
-            # Gebruik class_names uit model (ondersteunt 2 of 3 klassen)
-            class_idx = probas.argmax().item()
-            confidence = probas[class_idx].item()
-            voc_type = class_names[class_idx]
-
-            return {
-                'type': voc_type,
-                'type_nl': VOC_TYPE_NL.get(voc_type, voc_type),
-                'confidence': confidence,
-                'model': model_path.name,
-                'probabilities': {
-                    name: probas[i].item()
-                    for i, name in enumerate(class_names)
-                }
-            }
+            for start in range(0, len(valid), MAX_BATCH_SIZE):
+                chunk = valid[start:start + MAX_BATCH_SIZE]
+
+                # Batch: (N, 1, 128, 128)
+                x = np.stack([inputs[i] for i in chunk])[:, np.newaxis]
+                probas = model.predict_proba(x)
+
+                for row, i in enumerate(chunk):
+                    results[i] = self._build_result(probas[row], class_names, model_path)
 
         except Exception as e:
             logger.error(f"Classificatie fout: {e}")
-            return None
+
+        return results
 
 
 # Singleton instance voor hergebruik
@@ -3,18 +3,25 @@
 EMSN 2.0 - Vocalization Enricher Service
 
 Verrijkt bird_detections in de database met vocalisatie type (zang/roep/alarm).
-Draait periodiek en classificeert detecties waar vocalization_type NULL is.
+Draait periodiek en werkt de enrichment queue af (vocalization_state, zie
+database/migrations/018_vocalization_enrichment_state.sql):
+
+    pending -> done | no_model | no_audio | failed (retry na backoff)
+
+Soorten zonder model en verdwenen audio worden gemarkeerd zodat ze niet
+elke batch opnieuw geselecteerd worden.
 
 Audio wordt opgehaald via:
 - Lokaal filesystem voor zolder
-- SSH voor berging (robuuster dan SSHFS mount)
+- Bulk rsync over SSH voor berging (robuuster dan SSHFS mount), in een
+  lokale LRU cache die over runs heen hergebruikt wordt
 """
 
 import sys
 import time
-import tempfile
-import subprocess
 import psycopg2
+from psycopg2.extras import execute_values
+from collections import defaultdict
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -24,6 +31,7 @@ sys.path.insert(0, str(PROJECT_ROOT))
 sys.path.insert(0, str(PROJECT_ROOT / 'scripts'))
 
 from scripts.vocalization.vocalization_classifier import VocalizationClassifier
+from scripts.vocalization.remote_audio_cache import RemoteAudioCache
 from core.logging import EMSNLogger
 from core.config import get_postgres_config
 from core.network import HOSTS
@@ -43,8 +51,31 @@ BERGING_SSH = {
     'user': 'ronny',
 }
 
+# Lokale cache voor berging audio (één rsync per batch i.p.v. scp per bestand)
+BERGING_AUDIO_CACHE_DIR = Path('/mnt/usb/cache/berging-audio')
+BERGING_AUDIO_CACHE_MB = 1024
+
 LOG_DIR = Path('/mnt/usb/logs')
 BATCH_SIZE = 50  # Normaal: 50 per batch
+PINNED_SPECIES = 5  # Top-N soorten (30 dagen) blijven in de model cache
+
+# Enrichment states (kolom vocalization_state)
+STATE_PENDING = 'pending'
+STATE_DONE = 'done'
+STATE_NO_MODEL = 'no_model'
+STATE_NO_AUDIO = 'no_audio'
+STATE_FAILED = 'failed'
+
+MAX_ATTEMPTS = 5  # Daarna blijft een detectie failed zonder retry
+RETRY_BASE_MINUTES = 30  # Backoff: 30 min, 1 uur, 2 uur, ...
+
+# Gedeeld WHERE-deel van de work queue, matcht idx_bird_detections_vocalization_queue
+QUEUE_CONDITION = """
+    vocalization_type IS NULL
+    AND vocalization_state IN ('pending', 'failed')
+    AND station IN ('zolder', 'berging')
+    AND (vocalization_state = 'pending' OR vocalization_retry_after <= NOW())
+"""
 
 
 class VocalizationEnricher:
@@ -53,6 +84,12 @@ class VocalizationEnricher:
     def __init__(self):
         self.pg_conn = None
         self.classifier = None
+        self.berging_unreachable = False
+        self.berging_audio = RemoteAudioCache(
+            BERGING_SSH['host'], BERGING_SSH['user'], AUDIO_PATHS['berging'],
+            BERGING_AUDIO_CACHE_DIR, BERGING_AUDIO_CACHE_MB * 1024 * 1024
+        )
+        self.berging_files = {}  # Relatief pad -> lokaal pad voor de huidige batch
         self.logger = EMSNLogger('vocalization-enricher', log_dir=LOG_DIR)
 
     def log(self, level, message):
@@ -80,23 +117,58 @@ class VocalizationEnricher:
             self.log('ERROR', f'Failed to initialize classifier: {e}')
             return False
 
-    def get_pending_detections(self, limit=BATCH_SIZE):
-        """Get detections that need vocalization classification."""
+    def get_top_species(self, limit=PINNED_SPECIES, days=30):
+        """Get most detected species of the last days (for model pinning)."""
         try:
             with self.pg_conn.cursor() as cursor:
-                # Get all detections without vocalization type
-                # Both stations now have audio access (berging via SSHFS)
-                # No date limit - process entire history
-                query = """
-                    SELECT id, station, common_name, date, time, file_name
+                cursor.execute("""
+                    SELECT common_name, COUNT(*) AS count
                     FROM bird_detections
-                    WHERE vocalization_type IS NULL
+                    WHERE detection_timestamp > NOW() - make_interval(days => %s)
                       AND station IN ('zolder', 'berging')
-                    ORDER BY detection_timestamp DESC
+                    GROUP BY common_name
+                    ORDER BY count DESC
                     LIMIT %s
-                """
+                """, (days, limit))
+                return [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            self.log('WARNING', f'Error fetching top species: {e}')
+            return []
+
+    def pin_top_species(self):
+        """Keep the models of the most detected species loaded."""
+        pinned = self.classifier.pin_species(self.get_top_species())
+        if pinned:
+            self.log('INFO', f"Pinned models: {', '.join(pinned)}")
 
-                cursor.execute(query, (limit,))
+    def log_cache_stats(self):
+        """Log model cache counters."""
+        stats = self.classifier.cache_stats()
+        self.log('INFO', f"Model cache: {stats['models']} models "
+                         f"({stats['bytes_used'] / 1024 / 1024:.0f}/{stats['budget_bytes'] / 1024 / 1024:.0f} MB), "
+                         f"{stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions")
+
+        features = self.classifier.feature_stats()
+        if features and features['enabled']:
+            self.log('INFO', f"Feature store: {features['hits']} hits, {features['misses']} misses "
+                             f"({features['hit_rate']:.0%}), {features['evictions']} evictions")
+
+    def get_pending_detections(self, limit=BATCH_SIZE):
+        """Get the next detections from the enrichment work queue.
+
+        Returns a flat list of detection dicts, newest first; process_batch
+        groups them by species for classify_batch.
+        """
+        try:
+            with self.pg_conn.cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT id, station, common_name, date, time, file_name,
+                           COALESCE(vocalization_attempts, 0)
+                    FROM bird_detections
+                    WHERE {QUEUE_CONDITION}
+                    ORDER BY detection_timestamp DESC
+                    LIMIT %s
+                """, (limit,))
                 rows = cursor.fetchall()
 
             detections = []
@@ -107,7 +179,8 @@ class VocalizationEnricher:
                     'common_name': row[2],
                     'date': row[3],
                     'time': row[4],
-                    'file_name': row[5]
+                    'file_name': row[5],
+                    'attempts': row[6]
                 })
 
             return detections
@@ -116,11 +189,70 @@ class VocalizationEnricher:
             self.log('ERROR', f'Error fetching pending detections: {e}')
             return []
 
+    def get_backlog_size(self):
+        """Number of detections in the work queue (uses the partial index)."""
+        try:
+            with self.pg_conn.cursor() as cursor:
+                cursor.execute(f"SELECT COUNT(*) FROM bird_detections WHERE {QUEUE_CONDITION}")
+                return cursor.fetchone()[0]
+        except Exception as e:
+            self.log('WARNING', f'Error counting backlog: {e}')
+            return None
+
+    def requeue_new_models(self):
+        """Put no_model detections back to pending for species that now have a model."""
+        try:
+            with self.pg_conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT DISTINCT common_name FROM bird_detections
+                    WHERE vocalization_state = 'no_model'
+                """)
+                species = [row[0] for row in cursor.fetchall()
+                           if self.classifier.has_model(row[0])]
+                if not species:
+                    return 0
+
+                cursor.execute("""
+                    UPDATE bird_detections
+                    SET vocalization_state = 'pending', vocalization_attempts = 0
+                    WHERE vocalization_state = 'no_model'
+                      AND common_name = ANY(%s)
+                """, (species,))
+                requeued = cursor.rowcount
+
+            self.log('INFO', f"Requeued {requeued} detections with new models: {', '.join(species)}")
+            return requeued
+        except Exception as e:
+            self.log('WARNING', f'Error requeueing no_model detections: {e}')
+            return 0
+
+    def mark_species_no_model(self, common_name):
+        """Mark the whole queue of a species without model as no_model in one update."""
+        try:
+            with self.pg_conn.cursor() as cursor:
+                cursor.execute(f"""
+                    UPDATE bird_detections
+                    SET vocalization_state = 'no_model'
+                    WHERE {QUEUE_CONDITION}
+                      AND common_name = %s
+                """, (common_name,))
+                return cursor.rowcount
+        except Exception as e:
+            self.log('WARNING', f'Error marking {common_name} as no_model: {e}')
+            return 0
+
+    @staticmethod
+    def _relative_audio_path(detection):
+        """BirdNET-Pi layout: By_Date/YYYY-MM-DD/Species_Name/filename.mp3 (relative part)."""
+        date_str = detection['date'].strftime('%Y-%m-%d')
+        species_dir_name = detection['common_name'].replace(' ', '_')
+        return f"{date_str}/{species_dir_name}/{detection['file_name']}"
+
     def find_audio_file(self, detection):
         """Find the audio file for a detection.
 
         For zolder: returns local Path
-        For berging: fetches via SSH and returns temp file path
+        For berging: returns the cached copy fetched by prefetch_berging_audio
         """
         station = detection['station']
         base_path = AUDIO_PATHS.get(station)
@@ -128,18 +260,40 @@ class VocalizationEnricher:
         if not base_path:
             return None
 
+        if station == 'berging':
+            if not detection['file_name']:
+                return None
+            return self.berging_files.get(self._relative_audio_path(detection))
+
         # BirdNET-Pi organizes files as:
         # By_Date/YYYY-MM-DD/Species_Name/filename.mp3
         date_str = detection['date'].strftime('%Y-%m-%d')
         species_dir_name = detection['common_name'].replace(' ', '_')
         file_name = detection['file_name']
 
-        if station == 'zolder':
-            # Local filesystem access
-            return self._find_local_audio(base_path, date_str, species_dir_name, file_name, detection)
-        else:
-            # Berging: fetch via SSH
-            return self._fetch_berging_audio(base_path, date_str, species_dir_name, file_name)
+        # Local filesystem access
+        return self._find_local_audio(base_path, date_str, species_dir_name, file_name, detection)
+
+    def prefetch_berging_audio(self, detections):
+        """Fetch all berging audio of a batch with one rsync into the local cache."""
+        relative_paths = [
+            self._relative_audio_path(det) for det in detections
+            if det['station'] == 'berging' and det['file_name']
+            and self.classifier.has_model(det['common_name'])
+        ]
+        self.berging_files = {}
+        self.berging_unreachable = False
+        if not relative_paths:
+            return
+
+        start = time.monotonic()
+        self.berging_files = self.berging_audio.fetch(relative_paths)
+        self.berging_unreachable = self.berging_audio.unreachable
+
+        stats = self.berging_audio.stats()
+        self.log('INFO', f"Berging audio: {len(relative_paths)} files in {time.monotonic() - start:.1f}s "
+                         f"(cache {stats['hits']} hits, {stats['fetched']} fetched, {stats['missing']} missing"
+                         f"{', UNREACHABLE' if self.berging_unreachable else ''})")
 
     def _find_local_audio(self, base_path, date_str, species_dir_name, file_name, detection):
         """Find audio file on local filesystem (zolder)."""
@@ -174,93 +328,87 @@ class VocalizationEnricher:
 
         return None
 
-    def _fetch_berging_audio(self, base_path, date_str, species_dir_name, file_name):
-        """Fetch audio file from berging via SSH.
+    def classify_species(self, common_name, detections):
+        """Classify all detections of one species with a single model load.
 
-        Returns path to temporary file, or None if not found.
+        Returns list of (state, voc_type, confidence) tuples in detection order.
         """
-        if not file_name:
-            return None
-
-        remote_path = f"{base_path}/{date_str}/{species_dir_name}/{file_name}"
-
-        # Create temp file for the audio
-        temp_file = tempfile.NamedTemporaryFile(suffix='.mp3', delete=False)
-        temp_path = temp_file.name
-        temp_file.close()
-
-        try:
-            # Use scp to fetch the file
-            cmd = [
-                'scp', '-q', '-o', 'ConnectTimeout=5',
-                f"{BERGING_SSH['user']}@{BERGING_SSH['host']}:{remote_path}",
-                temp_path
-            ]
-            result = subprocess.run(cmd, capture_output=True, timeout=30)
-
-            if result.returncode == 0 and Path(temp_path).stat().st_size > 0:
-                return Path(temp_path)
-            else:
-                # File not found or error
-                Path(temp_path).unlink(missing_ok=True)
-                return None
-
-        except (subprocess.TimeoutExpired, Exception) as e:
-            Path(temp_path).unlink(missing_ok=True)
-            return None
-
-    def classify_detection(self, detection):
-        """Classify a single detection."""
-        common_name = detection['common_name']
-        station = detection['station']
-
         # Check if we have a model for this species
         if not self.classifier.has_model(common_name):
-            return None, None
+            return [(STATE_NO_MODEL, None, None)] * len(detections)
+
+        # Find audio files
+        audio_files = [self.find_audio_file(det) for det in detections]
+        results = []
+        for det, audio_file in zip(detections, audio_files):
+            if audio_file:
+                results.append((STATE_FAILED, None, None))
+            elif det['station'] == 'berging' and self.berging_unreachable:
+                results.append((STATE_FAILED, None, None))  # Transient, opnieuw proberen
+            else:
+                results.append((STATE_NO_AUDIO, None, None))
 
-        # Find audio file
-        audio_file = self.find_audio_file(detection)
-        if not audio_file:
-            return None, None
+        found = [i for i, audio_file in enumerate(audio_files) if audio_file]
+        if not found:
+            return results
 
-        # Classify
+        # Classify in one batch
         try:
-            result = self.classifier.classify(common_name, str(audio_file))
-            if result:
-                return result['type_nl'], result['confidence']
+            batch = self.classifier.classify_batch(common_name, [str(audio_files[i]) for i in found])
+            for i, result in zip(found, batch):
+                if result:
+                    results[i] = (STATE_DONE, result['type_nl'], result['confidence'])
         except Exception as e:
             self.log('WARNING', f"Classification error for {common_name}: {e}")
-        finally:
-            # Cleanup temp files (berging audio fetched via SSH)
-            if station == 'berging' and audio_file and '/tmp/' in str(audio_file):
-                try:
-                    Path(audio_file).unlink(missing_ok=True)
-                except OSError:
-                    pass  # File cleanup is non-critical
 
-        return None, None
+        return results
 
-    def update_detection(self, detection_id, voc_type, confidence):
-        """Update a detection with vocalization info."""
-        try:
-            with self.pg_conn.cursor() as cursor:
-                query = """
-                    UPDATE bird_detections
-                    SET vocalization_type = %s,
-                        vocalization_confidence = %s
-                    WHERE id = %s
-                """
+    @staticmethod
+    def retry_delay_minutes(attempts):
+        """Backoff for a failed detection, None when giving up."""
+        if attempts >= MAX_ATTEMPTS:
+            return None
+        return RETRY_BASE_MINUTES * 2 ** (attempts - 1)
+
+    def update_detections(self, updates):
+        """Write the outcome of a batch in one statement and one transaction.
 
-                cursor.execute(query, (voc_type, confidence, detection_id))
-            # autocommit=True, geen expliciete commit nodig
+        Args:
+            updates: List of (detection, state, voc_type, confidence)
+        """
+        rows = []
+        for det, state, voc_type, confidence in updates:
+            attempts = det.get('attempts', 0)
+            retry_minutes = None
+            if state == STATE_FAILED:
+                attempts += 1
+                retry_minutes = self.retry_delay_minutes(attempts)
+            rows.append((det['id'], state, voc_type, confidence, attempts, retry_minutes))
+
+        if not rows:
+            return True
+
+        try:
+            with self.pg_conn:
+                with self.pg_conn.cursor() as cursor:
+                    execute_values(cursor, """
+                        UPDATE bird_detections AS b
+                        SET vocalization_state = v.state,
+                            vocalization_type = v.voc_type,
+                            vocalization_confidence = v.confidence,
+                            vocalization_attempts = v.attempts,
+                            vocalization_retry_after = NOW() + make_interval(mins => v.retry_minutes)
+                        FROM (VALUES %s) AS v(id, state, voc_type, confidence, attempts, retry_minutes)
+                        WHERE b.id = v.id
+                    """, rows, template="(%s, %s, %s, %s::numeric, %s::smallint, %s::integer)")
             return True
 
         except Exception as e:
-            self.log('ERROR', f'Error updating detection {detection_id}: {e}')
+            self.log('ERROR', f'Error updating {len(rows)} detections: {e}')
             return False
 
     def process_batch(self):
-        """Process a batch of pending detections."""
+        """Process a batch from the work queue."""
         detections = self.get_pending_detections()
 
         if not detections:
@@ -269,21 +417,43 @@ class VocalizationEnricher:
 
         self.log('INFO', f'Processing {len(detections)} detections...')
 
-        enriched = 0
-        skipped = 0
+        start = time.monotonic()
+        counts = defaultdict(int)
+        updates = []
 
+        # Groepeer per soort zodat elk model één keer per batch geladen wordt
+        by_species = defaultdict(list)
         for det in detections:
-            voc_type, confidence = self.classify_detection(det)
-
-            if voc_type:
-                if self.update_detection(det['id'], voc_type, confidence):
-                    enriched += 1
-                    self.log('INFO', f"  {det['common_name']}: {voc_type} ({confidence:.0f}%)")
-            else:
-                skipped += 1
+            by_species[det['common_name']].append(det)
+
+        self.prefetch_berging_audio(detections)
+        for common_name, species_detections in by_species.items():
+            if not self.classifier.has_model(common_name):
+                # Hele queue van deze soort in één keer, niet alleen deze batch
+                marked = self.mark_species_no_model(common_name)
+                counts[STATE_NO_MODEL] += marked
+                continue
+
+            results = self.classify_species(common_name, species_detections)
+            for det, (state, voc_type, confidence) in zip(species_detections, results):
+                updates.append((det, state, voc_type, confidence))
+                counts[state] += 1
+                if state == STATE_DONE:
+                    self.log('INFO', f"  {det['common_name']}: {voc_type} ({confidence:.0%})")
+
+        if not self.update_detections(updates):
+            return 0
 
-        self.log('INFO', f'Batch complete: {enriched} enriched, {skipped} skipped')
-        return enriched
+        elapsed = time.monotonic() - start
+        rate = len(detections) / elapsed if elapsed > 0 else 0
+        backlog = self.get_backlog_size()
+        self.log('INFO', f"Batch complete: {counts[STATE_DONE]} enriched, {counts[STATE_NO_MODEL]} no_model, "
+                         f"{counts[STATE_NO_AUDIO]} no_audio, {counts[STATE_FAILED]} failed, "
+                         f"{len(by_species)} species ({rate:.1f} clips/s), backlog {backlog}")
+        self.log_cache_stats()
+        # Alleen rijen die echt uit de queue verdwenen tellen als voortgang: een
+        # mislukte no_model markering mag run_once niet eindeloos laten herhalen
+        return len(updates) + counts[STATE_NO_MODEL]
 
     def run_once(self):
         """Run enrichment once."""
@@ -297,15 +467,22 @@ class VocalizationEnricher:
         if not self.init_classifier():
             return False
 
+        self.pin_top_species()
+        self.requeue_new_models()
+        self.log('INFO', f'Backlog: {self.get_backlog_size()} detections')
+
         try:
             total = 0
+            start = time.monotonic()
             while True:
-                enriched = self.process_batch()
-                total += enriched
-                if enriched == 0:
+                processed = self.process_batch()
+                total += processed
+                if processed == 0:
                     break
 
-            self.log('SUCCESS', f'Total enriched: {total} detections')
+            elapsed = time.monotonic() - start
+            rate = total / elapsed if elapsed > 0 else 0
+            self.log('SUCCESS', f'Total processed: {total} detections ({rate:.1f}/s)')
             return True
 
         finally:
@@ -327,6 +504,8 @@ class VocalizationEnricher:
                     if not self.connect():
                         time.sleep(60)
                         continue
+                    self.pin_top_species()
+                    self.requeue_new_models()
 
                 self.process_batch()
 
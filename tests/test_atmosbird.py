@@ -7,26 +7,68 @@ Tests worden geskipt als dependencies niet beschikbaar zijn.
 """
 
 import sys
+import tempfile
 from pathlib import Path
 from unittest import TestCase, main, skipIf
 from unittest.mock import MagicMock, patch
-from datetime import datetime, date
+from datetime import datetime, date, timedelta, timezone
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
 
+# numpy en cv2 worden door meerdere modules gebruikt; de blokken hieronder
+# importeren alleen hun eigen module
+try:
+    import numpy as np
+except ImportError:
+    np = None
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
 # Check if atmosbird module can be imported
 ATMOSBIRD_MODULE_AVAILABLE = False
 try:
+    import psycopg2
     from atmosbird.atmosbird_analysis import (
         STATION_ID, LOCATION_LAT, LOCATION_LON,
-        CAMERA_FOV_DIAGONAL, ISS_NORAD_ID
+        CAMERA_FOV_DIAGONAL, ISS_NORAD_ID,
+        MARK_ANALYZED_SQL, MARK_FAILED_SQL, PENDING_OBSERVATIONS_SQL, SkyAnalyzer,
+        count_star_contours, histogram_percentile
     )
     ATMOSBIRD_MODULE_AVAILABLE = True
 except ImportError:
     pass
 
+# Check if capture module can be imported
+CAPTURE_MODULE_AVAILABLE = False
+try:
+    from atmosbird import atmosbird_capture
+    from atmosbird.atmosbird_capture import SkyCapture, next_capture_time
+    CAPTURE_MODULE_AVAILABLE = True
+except ImportError:
+    pass
+
+# Check if meteor scanner can be imported
+METEOR_SCANNER_AVAILABLE = False
+try:
+    from atmosbird.meteor_scanner import (
+        BACKGROUND_FRAMES, RollingBackground, detect_transients, make_chunks, scan_frames
+    )
+    METEOR_SCANNER_AVAILABLE = True
+except ImportError:
+    pass
+
+# Check if ephemeris module can be imported
+EPHEMERIS_AVAILABLE = False
+try:
+    from atmosbird.ephemeris import DEFAULT_TLE, Ephemeris, get_ephemeris, to_epoch
+    EPHEMERIS_AVAILABLE = True
+except ImportError:
+    pass
+
 # Check if astral is available (for sun/moon tests)
 ASTRAL_AVAILABLE = False
 try:
@@ -205,5 +247,377 @@ class TestCloudCoverageEstimation(TestCase):
         self.assertEqual(max_oktas, 8)
 
 
+@skipIf(not ATMOSBIRD_MODULE_AVAILABLE, "atmosbird module dependencies not available")
+class TestIncrementalAnalysis(TestCase):
+    """Tests voor SkyAnalyzer.process_recent_observations."""
+
+    def setUp(self):
+        self.analyzer = SkyAnalyzer.__new__(SkyAnalyzer)
+        self.analyzer.logger = MagicMock()
+        self.analyzer.conn = MagicMock()
+        self.cursor = self.analyzer.conn.cursor.return_value
+        self.analyzer.sky_positions = MagicMock(side_effect=lambda times: [{}] * len(times))
+        self.analyzer.check_iss_visibility = MagicMock(return_value={'visible': False})
+        self.analyzer.analyze_moon = MagicMock(return_value=None)
+        self.analyzer.analyze_stars = MagicMock(return_value=None)
+        self.analyzer.detect_meteor = MagicMock(return_value=None)
+        self.analyzer.load_frame = MagicMock(side_effect=lambda path: f"frame:{path}")
+
+    def test_only_pending_frames_each_decoded_once(self):
+        """Test dat alleen ongeanalyseerde frames één keer gedecodeerd en gemarkeerd worden."""
+        self.cursor.fetchall.return_value = [
+            (11, datetime(2026, 1, 5, 22, 10), 'b.jpg', 20.0, 10),
+            (12, datetime(2026, 1, 5, 22, 20), 'c.jpg', 20.0, 10),
+        ]
+        self.cursor.fetchone.return_value = (datetime(2026, 1, 5, 22, 0), 'a.jpg', 20.0)
+
+        with patch('atmosbird.atmosbird_analysis.execute_values'):
+            self.assertEqual(self.analyzer.process_recent_observations(), 2)
+
+        self.assertEqual(self.cursor.execute.call_args_list[0][0][0], PENDING_OBSERVATIONS_SQL)
+        self.assertEqual([c[0][0] for c in self.analyzer.load_frame.call_args_list], ['a.jpg', 'b.jpg', 'c.jpg'])
+        self.assertEqual([c[0] for c in self.analyzer.detect_meteor.call_args_list],
+                         [('frame:b.jpg', 'frame:a.jpg'), ('frame:c.jpg', 'frame:b.jpg')])
+        self.assertIn(((MARK_ANALYZED_SQL, ([11, 12],)),), self.cursor.execute.call_args_list)
+        self.analyzer.conn.commit.assert_called_once()
+
+    def test_no_pending_no_commit(self):
+        """Test dat zonder nieuwe observaties niets geschreven wordt."""
+        self.cursor.fetchall.return_value = []
+        self.assertEqual(self.analyzer.process_recent_observations(), 0)
+        self.analyzer.conn.commit.assert_not_called()
+        self.analyzer.load_frame.assert_not_called()
+
+    def executed(self, sql):
+        return [c[0][1] for c in self.cursor.execute.call_args_list if c[0][0] == sql]
+
+    def test_failed_observation_marked(self):
+        """Test dat een mislukte observatie met foutmelding gemarkeerd wordt en de rest doorgaat."""
+        self.cursor.fetchall.return_value = [
+            (11, datetime(2026, 1, 5, 22, 10), 'b.jpg', 20.0, None),
+            (12, datetime(2026, 1, 5, 22, 20), 'c.jpg', 20.0, 10),
+        ]
+        self.cursor.fetchone.return_value = None
+        self.analyzer.analyze_moon.side_effect = [RuntimeError('ephem'), None]
+
+        with patch('atmosbird.atmosbird_analysis.execute_values'):
+            self.assertEqual(self.analyzer.process_recent_observations(), 2)
+
+        self.assertEqual(self.executed(MARK_ANALYZED_SQL), [([12],)])
+        self.assertEqual(self.executed(MARK_FAILED_SQL), [('ephem', 11)])
+        self.analyzer.conn.commit.assert_called_once()
+        self.analyzer.conn.rollback.assert_not_called()
+
+    def test_missing_cloud_coverage_skips_stars(self):
+        """Test dat een NULL cloud_coverage geen sterrenanalyse en geen fout geeft."""
+        self.cursor.fetchall.return_value = [(11, datetime(2026, 1, 5, 22, 10), 'b.jpg', 20.0, None)]
+        self.cursor.fetchone.return_value = None
+
+        with patch('atmosbird.atmosbird_analysis.execute_values'):
+            self.assertEqual(self.analyzer.process_recent_observations(), 1)
+
+        self.analyzer.analyze_stars.assert_not_called()
+        self.assertEqual(self.executed(MARK_ANALYZED_SQL), [([11],)])
+        self.assertEqual(self.executed(MARK_FAILED_SQL), [])
+
+    def test_failed_insert_saved_per_observation(self):
+        """Test dat een foute resultaat rij alleen de eigen observatie kost (savepoint per rij)."""
+        self.cursor.fetchall.return_value = [
+            (11, datetime(2026, 1, 5, 22, 10), 'b.jpg', 150.0, 90),
+            (12, datetime(2026, 1, 5, 22, 20), 'c.jpg', 150.0, 90),
+        ]
+        self.cursor.fetchone.return_value = None
+        self.analyzer.analyze_moon.return_value = {
+            'phase_name': 'Volle maan', 'illumination': 99.0, 'age_days': 14.8,
+            'altitude': 30.0, 'azimuth': 180.0, 'visible': True,
+        }
+
+        def fake_execute_values(cursor, sql, rows):
+            if any(row[0] == 11 for row in rows):
+                raise psycopg2.DataError('bad row')
+
+        with patch('atmosbird.atmosbird_analysis.execute_values', side_effect=fake_execute_values):
+            self.assertEqual(self.analyzer.process_recent_observations(), 2)
+
+        statements = [c[0][0] for c in self.cursor.execute.call_args_list]
+        self.assertIn('ROLLBACK TO SAVEPOINT analysis_batch', statements)
+        self.assertEqual(statements.count('ROLLBACK TO SAVEPOINT analysis_observation'), 1)
+        self.assertEqual(self.executed(MARK_ANALYZED_SQL), [([12],)])
+        self.assertEqual(self.executed(MARK_FAILED_SQL), [('bad row', 11)])
+        self.analyzer.conn.commit.assert_called_once()
+
+
+@skipIf(not ATMOSBIRD_MODULE_AVAILABLE, "atmosbird module dependencies not available")
+class TestStarAnalysis(TestCase):
+    """Tests voor de histogram/piramide sterrenanalyse."""
+
+    def setUp(self):
+        import cv2
+        import numpy as np
+        self.np = np
+        rng = np.random.default_rng(5)
+        frame = rng.normal(25, 4, (240, 320)).clip(0, 255).astype(np.uint8)
+        for _ in range(60):
+            center = (int(rng.integers(0, 320)), int(rng.integers(0, 240)))
+            cv2.circle(frame, center, int(rng.integers(1, 3)), int(rng.integers(90, 255)), -1)
+        self.frame = frame
+        self.analyzer = SkyAnalyzer.__new__(SkyAnalyzer)
+        self.analyzer.logger = MagicMock()
+
+    def test_histogram_percentile_matches_numpy(self):
+        """Test dat het histogram percentiel gelijk is aan np.percentile."""
+        hist = self.np.bincount(self.frame.ravel(), minlength=256)
+        for q in (0, 50, 99.5, 100):
+            self.assertAlmostEqual(histogram_percentile(hist, q), float(self.np.percentile(self.frame, q)))
+
+    def test_search_factor_gives_same_result(self):
+        """Test dat de grove zoektocht dezelfde sterren vindt als één volledige pass."""
+        full = self.analyzer.analyze_stars(self.frame, 20.0, search_factor=1)
+        self.assertGreater(full['star_count'], 0)
+        for factor in (2, 3, 4, 8):
+            self.assertEqual(self.analyzer.analyze_stars(self.frame, 20.0, search_factor=factor), full)
+
+    def test_touching_blocks_counted_once(self):
+        """Test dat een ster over meerdere blokken één keer geteld wordt."""
+        frame = self.np.zeros((32, 32), dtype=self.np.uint8)
+        frame[7:10, 7:10] = 200  # Over de grens van 4x4 en 8x8 blokken
+        frame[20:23, 25:28] = 200
+        self.assertEqual(count_star_contours(frame, 100, 1), 2)
+        self.assertEqual(count_star_contours(frame, 100, 4), 2)
+        self.assertEqual(count_star_contours(frame, 100, 8), 2)
+
+    def test_daytime_frame_skipped(self):
+        """Test dat heldere (dag) frames niet geanalyseerd worden."""
+        self.assertIsNone(self.analyzer.analyze_stars(self.frame, 120.0))
+
+
+@skipIf(not METEOR_SCANNER_AVAILABLE, "meteor scanner dependencies not available")
+class TestMeteorScanner(TestCase):
+    """Tests voor de nachtelijke meteoor scan (meteor_scanner.py)."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rng = np.random.default_rng(11)
+        self.sky = self.rng.normal(20, 1, (480, 640)).clip(0, 255).astype(np.uint8)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def streak(self, frame, start=(300, 300), end=(600, 500)):
+        frame = frame.copy()
+        cv2.line(frame, start, end, 220, 6)
+        return frame
+
+    def write_night(self, count, meteors=(), gap_after=None):
+        """Schrijf een reeks frames (1/4 decode: 640x480 -> 160x120) elke 10 minuten."""
+        frames, taken_at = [], datetime(2026, 1, 5, 20, 0)
+        for i in range(count):
+            frame = self.streak(self.sky) if i in meteors else self.sky
+            path = Path(self.tmp.name) / f"sky_{taken_at:%Y%m%d_%H%M%S}.jpg"
+            cv2.imwrite(str(path), frame)
+            frames.append((taken_at, str(path)))
+            taken_at += timedelta(minutes=60 if i == gap_after else 10)
+        return frames
+
+    def test_median_ignores_transient(self):
+        """Test dat een enkel helder frame de lopende mediaan niet verandert."""
+        background = RollingBackground(self.sky.shape, size=5)
+        for frame in (self.sky, self.sky, self.streak(self.sky), self.sky, self.sky, self.sky):
+            background.push(frame)
+        self.assertEqual(background.count, 5)
+        self.assertTrue((background.median() == self.sky).all())
+
+    def test_diagonal_streak_detected_round_blob_not(self):
+        """Test dat een diagonaal spoor gevonden wordt en een ronde vlek niet."""
+        blob = self.sky.copy()
+        cv2.circle(blob, (200, 200), 8, 220, -1)
+        self.assertEqual(detect_transients(blob, self.sky), [])
+
+        found = detect_transients(self.streak(self.sky, end=(380, 360)), self.sky)
+        self.assertEqual(len(found), 1)
+        self.assertGreater(found[0]['brightness_delta'], 150)
+
+    def test_chunks_overlap_by_background(self):
+        """Test dat elke chunk de achtergrond frames ervoor meekrijgt als warm-up."""
+        tasks = make_chunks(list(range(10)), chunk_frames=4, overlap=2)
+        self.assertEqual(tasks, [([0, 1, 2, 3], 0), ([2, 3, 4, 5, 6, 7], 2), ([6, 7, 8, 9], 2)])
+
+    def test_chunked_scan_equals_sequential(self):
+        """Test dat een scan in kleine chunks dezelfde kandidaten geeft als één pass."""
+        frames = self.write_night(16, meteors=(6, 9, 13))
+        whole_stats, whole = scan_frames(frames, workers=1, chunk_frames=len(frames))
+        chunk_stats, chunked = scan_frames(frames, workers=1, chunk_frames=BACKGROUND_FRAMES - 1)
+
+        self.assertEqual([c['path'] for c in whole], [frames[i][1] for i in (6, 9, 13)])
+        self.assertEqual(chunked, whole)
+        self.assertEqual(chunk_stats, whole_stats)
+
+    def test_gap_restarts_background(self):
+        """Test dat na een gat in de reeks eerst een nieuwe achtergrond opgebouwd wordt."""
+        frames = self.write_night(12, meteors=(6, 10), gap_after=4)
+        _, candidates = scan_frames(frames, workers=1)
+        self.assertEqual([c['path'] for c in candidates], [frames[10][1]])
+
+
+@skipIf(not CAPTURE_MODULE_AVAILABLE, "capture module dependencies not available")
+class TestCaptureService(TestCase):
+    """Tests voor de capture service (SkyCapture.run / serve)."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        frame = np.full((60, 80, 3), 40, dtype=np.uint8)
+        self.jpeg = cv2.imencode('.jpg', frame)[1].tobytes()
+
+        self.capture = SkyCapture.__new__(SkyCapture)
+        self.capture.logger = MagicMock()
+        self.capture.ai_classifier = MagicMock()
+        self.capture.ai_classifier.predict.return_value = {
+            'class_name': 'helder', 'cloud_coverage_percent': 5.0, 'confidence': 0.9
+        }
+        self.capture.pool = None
+        self.capture.conn = None
+        self.capture.jpeg = None
+        self.capture.frame = None
+        self.capture.running = False
+        self.capture.update_health_metrics = MagicMock()
+        self.capture.save_to_database = MagicMock(return_value=42)
+
+        def fake_capture():
+            self.capture.jpeg = self.jpeg
+            return True
+        self.capture.capture_photo = MagicMock(side_effect=fake_capture)
+
+        self.pool_class = patch.object(atmosbird_capture, 'SimpleConnectionPool')
+        self.raw_dir = patch.object(atmosbird_capture, 'RAW_PHOTO_DIR', self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_frame_decoded_once_and_shared(self):
+        """Test dat de foto één keer gedecodeerd wordt en de classifier het frame krijgt."""
+        decode = MagicMock(side_effect=cv2.imdecode)
+        with self.pool_class, self.raw_dir, patch.object(atmosbird_capture.cv2, 'imdecode', decode):
+            self.assertTrue(self.capture.run())
+
+        decode.assert_called_once()
+        image = self.capture.ai_classifier.predict.call_args[0][0]
+        self.assertEqual(image.shape, (60, 80, 3))
+        analysis = self.capture.save_to_database.call_args[0][0]
+        self.assertEqual(analysis['sky_type'], 'clear')
+        self.assertEqual(Path(self.capture.final_image_path).read_bytes(), self.jpeg)
+        self.assertIsNone(self.capture.frame)
+
+    def test_pool_reused_across_captures(self):
+        """Test dat de connection pool één keer aangemaakt en per foto hergebruikt wordt."""
+        with self.pool_class as pool_class, self.raw_dir:
+            pool = pool_class.return_value
+            pool.getconn.return_value.closed = 0
+            self.assertTrue(self.capture.run())
+            self.assertTrue(self.capture.run())
+
+        pool_class.assert_called_once()
+        self.assertEqual(pool.getconn.call_count, 2)
+        self.assertEqual(pool.putconn.call_count, 2)
+        self.assertIsNone(self.capture.conn)
+
+    def test_timings_reported(self):
+        """Test dat de tijd per stap bijgehouden en gelogd wordt."""
+        with self.pool_class, self.raw_dir:
+            self.capture.run()
+
+        self.assertEqual(set(self.capture.timings),
+                         {'database', 'capture', 'decode', 'analyze', 'store', 'total'})
+        logged = [c[0][1] for c in self.capture.logger.log.call_args_list]
+        self.assertTrue(any(line.startswith('Timings: database=') for line in logged))
+
+    def test_stream_restarted_after_failed_capture(self):
+        """Test dat de livestream ook na een timeout van rpicam-still weer start."""
+        del self.capture.capture_photo
+
+        def fake_run(cmd, **kwargs):
+            if cmd[0] == 'rpicam-still':
+                raise atmosbird_capture.subprocess.TimeoutExpired(cmd, 10)
+            return MagicMock(returncode=0)
+
+        with patch.object(atmosbird_capture.subprocess, 'run', side_effect=fake_run) as run, \
+                patch.object(atmosbird_capture.time, 'sleep'):
+            self.assertFalse(self.capture.capture_photo())
+
+        actions = [c[0][0][2] for c in run.call_args_list if c[0][0][0] != 'rpicam-still']
+        self.assertEqual(actions, ['stop', 'start'])
+
+    def test_next_capture_time_on_the_clock(self):
+        """Test dat de service op hele intervallen van de klok fotografeert."""
+        self.assertEqual(next_capture_time(1200.0, 600), 1800)
+        self.assertEqual(next_capture_time(1799.9, 600), 1800)
+
+
+@skipIf(not EPHEMERIS_AVAILABLE, "ephemeris dependencies not available")
+class TestEphemerisCache(TestCase):
+    """Tests voor de vooraf berekende ISS/zon/maan posities."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.grid = Ephemeris.compute(datetime(2025, 12, 23, 22, 0), 2, DEFAULT_TLE, 52.36, 6.47, 12)
+
+    def test_interpolation_matches_pyephem(self):
+        """Test dat geïnterpoleerde posities overeenkomen met een directe PyEphem berekening."""
+        import ephem
+        when = datetime(2025, 12, 23, 22, 47, 13)
+        position = self.grid.at(to_epoch([when]))
+
+        observer = ephem.Observer()
+        observer.lat, observer.lon, observer.elevation = '52.36', '6.47', 12
+        observer.date = datetime.fromtimestamp(when.timestamp(), timezone.utc).replace(tzinfo=None)
+        moon = ephem.Moon(observer)
+        iss = ephem.readtle(*DEFAULT_TLE)
+        iss.compute(observer)
+
+        self.assertAlmostEqual(position['moon_alt'][0], np.degrees(moon.alt), delta=0.01)
+        self.assertAlmostEqual(position['moon_phase'][0], moon.phase, delta=0.01)
+        self.assertAlmostEqual(position['iss_alt'][0], np.degrees(iss.alt), delta=0.5)
+        self.assertGreater(position['moon_age_days'][0], 0)
+
+    def test_azimuth_wraps_around_north(self):
+        """Test dat azimuth interpolatie over 360° -> 0° niet via 180° gaat."""
+        grid = Ephemeris('k', 0.0, 10.0, {
+            'iss_alt': np.zeros(2), 'iss_az': np.array([350.0, 10.0]), 'sun_alt': np.zeros(2),
+            'moon_alt': np.zeros(2), 'moon_az': np.zeros(2), 'moon_phase': np.zeros(2),
+        }, np.array([-1.0]))
+        self.assertAlmostEqual(grid.at(np.array([5.0]))['iss_az'][0], 0.0)
+
+    def test_current_grid_reused_when_covering(self):
+        """Test dat een passend grid hergebruikt wordt zonder herberekening."""
+        epochs = to_epoch([datetime(2025, 12, 23, 23, 0)])
+        with patch('atmosbird.ephemeris.load_tle', return_value=DEFAULT_TLE), \
+                patch.object(Ephemeris, 'compute') as compute:
+            self.assertIs(get_ephemeris(epochs, 52.36, 6.47, 12, current=self.grid), self.grid)
+        compute.assert_not_called()
+
+    def test_new_tle_rebuilds(self):
+        """Test dat een nieuwe TLE tot een nieuw grid leidt."""
+        epochs = to_epoch([datetime(2025, 12, 23, 23, 0)])
+        new_tle = (DEFAULT_TLE[0], DEFAULT_TLE[1].replace('25355.95645853', '25360.00000000'), DEFAULT_TLE[2])
+        with patch('atmosbird.ephemeris.load_tle', return_value=new_tle), \
+                patch.object(Ephemeris, 'compute', return_value=MagicMock()) as compute:
+            get_ephemeris(epochs, 52.36, 6.47, 12, path=Path('/nonexistent/cache.npz'), current=self.grid)
+        compute.assert_called_once()
+
+    def test_iss_passes(self):
+        """Test dat zichtbare passes aaneengesloten stukken boven 30° in het donker zijn."""
+        iss_alt = np.array([10.0, 35.0, 60.0, 40.0, 5.0, 45.0, 50.0])
+        sun_alt = np.array([-20.0, -20.0, -20.0, -20.0, -20.0, 5.0, 5.0])
+        grid = Ephemeris('k', 0.0, 10.0, {
+            'iss_alt': iss_alt, 'iss_az': np.full(7, 90.0), 'sun_alt': sun_alt,
+            'moon_alt': np.zeros(7), 'moon_az': np.zeros(7), 'moon_phase': np.zeros(7),
+        }, np.array([-1.0]))
+
+        passes = grid.iss_passes()
+
+        self.assertEqual(len(passes), 1)
+        self.assertEqual(passes[0]['max_altitude'], 60.0)
+        self.assertEqual((passes[0]['end'] - passes[0]['start']).total_seconds(), 20)
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Unit tests voor scripts/core/image_catalog.py module.
+
+Test het parsen van bestandsnamen, de scan van dag-mappen, de reconciler
+en de terugval op de schijf als de catalogus niet bereikbaar is.
+Tests worden geskipt als dependencies niet beschikbaar zijn.
+"""
+
+import json
+import sys
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+# Check if catalog module can be imported
+CATALOG_MODULE_AVAILABLE = False
+try:
+    from core import image_catalog
+    from core.image_catalog import (
+        UPSERT_SQL, CatalogError, ImageCatalog, find_images, find_latest,
+        parse_timestamp, scan_images
+    )
+    CATALOG_MODULE_AVAILABLE = True
+except ImportError:
+    pass
+
+
+def make_image(root: Path, name: str, size: int = 10) -> Path:
+    """Maak een nep beeld in de dag-map van de naam (prefix_JJJJMMDD_UUMMSS.jpg)."""
+    day = name.split('_')[1]
+    path = root / day[:4] / day[4:6] / day[6:8] / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'x' * size)
+    return path
+
+
+@skipIf(not CATALOG_MODULE_AVAILABLE, "image catalog dependencies not available")
+class TestParseAndScan(TestCase):
+    """Tests voor parse_timestamp en scan_images."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parse_timestamp(self):
+        """Test dat de opnametijd uit de bestandsnaam komt en prefixes gecheckt worden."""
+        self.assertEqual(parse_timestamp('sky_20260105_192858.jpg', 'sky'), datetime(2026, 1, 5, 19, 28, 58))
+        self.assertEqual(parse_timestamp('midden_20251223_211216.jpg'), datetime(2025, 12, 23, 21, 12, 16))
+        self.assertIsNone(parse_timestamp('thumb_20260105_192858.jpg', 'sky'))
+        self.assertIsNone(parse_timestamp('sky_latest.jpg', 'sky'))
+
+    def test_scan_reads_only_requested_days(self):
+        """Test dat met een periode alleen die dag-mappen gelezen worden."""
+        make_image(self.root, 'sky_20260104_235900.jpg')
+        inside = make_image(self.root, 'sky_20260105_000100.jpg', size=42)
+        make_image(self.root, 'sky_20260107_120000.jpg')
+        (inside.parent / 'notes.txt').write_text('geen beeld')
+
+        found = scan_images(self.root, 'sky', date(2026, 1, 5), date(2026, 1, 6))
+
+        self.assertEqual(found, {str(inside): (datetime(2026, 1, 5, 0, 1), 42)})
+        self.assertEqual(len(scan_images(self.root, 'sky')), 3)
+
+
+@skipIf(not CATALOG_MODULE_AVAILABLE, "image catalog dependencies not available")
+class TestReconcile(TestCase):
+    """Tests voor ImageCatalog.reconcile."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.conn = MagicMock()
+        self.cursor = self.conn.cursor.return_value.__enter__.return_value
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_adds_new_and_removes_missing(self):
+        """Test dat nieuwe beelden geregistreerd en verdwenen beelden verwijderd worden."""
+        known = make_image(self.root, 'midden_20260501_080000.jpg', size=5)
+        new = make_image(self.root, 'midden_20260501_090000.jpg', size=7)
+        gone = self.root / '2026' / '05' / '01' / 'midden_20260501_070000.jpg'
+        self.cursor.fetchall.return_value = [(str(known), 5), (str(gone), 9)]
+        self.cursor.rowcount = 1
+
+        with patch.object(image_catalog, 'camera_root', return_value=self.root), \
+                patch.object(image_catalog, 'execute_values') as execute_values:
+            stats = ImageCatalog(self.conn).reconcile('nestbox', 'midden', days=2, today=date(2026, 5, 2))
+
+        self.assertEqual(stats, {'scanned': 2, 'added': 1, 'removed': 1})
+        rows = execute_values.call_args[0][2]
+        self.assertEqual(execute_values.call_args[0][1], UPSERT_SQL)
+        self.assertEqual(rows, [('nestbox', 'midden', datetime(2026, 5, 1, 9), str(new), 7)])
+        window = self.cursor.execute.call_args_list[0][0][1]
+        self.assertEqual(window[2:], (datetime(2026, 5, 1), datetime(2026, 5, 3)))
+        self.assertEqual(self.cursor.execute.call_args_list[-1][0][1], ([str(gone)],))
+
+
+@skipIf(not CATALOG_MODULE_AVAILABLE, "image catalog dependencies not available")
+class TestAddCapture(TestCase):
+    """Tests voor ImageCatalog.add met het pad uit de screenshot capture API."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_api_relative_path_matches_reconciler(self):
+        """Test dat het relatieve file_path uit de API dezelfde key krijgt als de reconciler."""
+        # Zoals Flask jsonify het schrijft: compact, geen spatie na de dubbele punt
+        response = json.dumps({
+            'success': True,
+            'id': 5,
+            'file_path': 'midden/screenshots/2026/01/08/midden_20260108_200012.jpg',
+            'url': '/api/nestbox/media/file/5',
+        }, separators=(',', ':'))
+
+        with patch.object(image_catalog, 'NAS_ARCHIVE', self.root), \
+                patch.object(image_catalog, 'execute_values') as execute_values:
+            root = image_catalog.camera_root('nestbox', 'midden')
+            image = make_image(root, 'midden_20260108_200012.jpg', size=12)
+            ImageCatalog(MagicMock()).add('nestbox', 'midden', json.loads(response)['file_path'])
+            reconciled = scan_images(root)
+
+        rows = execute_values.call_args[0][2]
+        self.assertEqual(rows, [('nestbox', 'midden', datetime(2026, 1, 8, 20, 0, 12), str(image), 12)])
+        self.assertIn(rows[0][3], reconciled)
+
+
+@skipIf(not CATALOG_MODULE_AVAILABLE, "image catalog dependencies not available")
+class TestFallback(TestCase):
+    """Tests voor de lookups zonder bereikbare catalogus."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.unavailable = patch.object(ImageCatalog, '__enter__', side_effect=CatalogError('offline'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_find_latest_walks_back_day_dirs(self):
+        """Test dat het laatste beeld in de meest recente dag-map gevonden wordt."""
+        make_image(self.root, 'voor_20260428_230000.jpg')
+        latest = make_image(self.root, 'voor_20260429_061500.jpg')
+
+        with self.unavailable, patch.object(image_catalog, 'camera_root', return_value=self.root), \
+                patch.object(image_catalog, '_logger'):
+            self.assertEqual(find_latest('nestbox', 'voor', today=date(2026, 5, 2)),
+                             (datetime(2026, 4, 29, 6, 15), latest))
+
+    def test_find_images_filters_period(self):
+        """Test dat de terugval alleen beelden binnen de periode geeft, gesorteerd."""
+        make_image(self.root, 'sky_20260105_050000.jpg')
+        second = make_image(self.root, 'sky_20260105_220000.jpg')
+        first = make_image(self.root, 'sky_20260105_120000.jpg')
+
+        with self.unavailable, patch.object(image_catalog, 'camera_root', return_value=self.root), \
+                patch.object(image_catalog, '_logger'):
+            found = find_images('atmosbird', 'berging', datetime(2026, 1, 5, 6), datetime(2026, 1, 5, 23))
+
+        self.assertEqual(found, [(datetime(2026, 1, 5, 12), first), (datetime(2026, 1, 5, 22), second)])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Unit tests voor scripts/core/timelapse_segments.py module.
+
+Test dat volledige dagen één keer gecodeerd en daarna uit de cache
+gehaald worden, dat randdagen los gecodeerd worden en dat de segmenten
+zonder her-codering (concat demuxer, -c copy) samengevoegd worden.
+Tests worden geskipt als dependencies niet beschikbaar zijn.
+"""
+
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+# Check if segment module can be imported
+SEGMENTS_MODULE_AVAILABLE = False
+try:
+    from core import timelapse_segments
+    from core.timelapse_segments import build_timelapse, fingerprint, fps_for_duration
+    SEGMENTS_MODULE_AVAILABLE = True
+except ImportError:
+    pass
+
+
+def fake_ffmpeg(calls):
+    """subprocess.run vervanger die het output bestand aanmaakt en de aanroep bewaart."""
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        Path(cmd[-1]).write_bytes(b'mp4')
+        return MagicMock(returncode=0, stderr='')
+    return run
+
+
+@skipIf(not SEGMENTS_MODULE_AVAILABLE, "timelapse segment dependencies not available")
+class TestSegmentCache(TestCase):
+    """Tests voor build_timelapse en de dag-segment cache."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.root = self.dir / 'segmenten'
+        self.output = self.dir / 'out.mp4'
+        start = datetime(2026, 1, 1)
+        self.frames = []
+        for i in range(9):  # 3 dagen, elke 8 uur
+            timestamp = start + timedelta(hours=8 * i)
+            path = self.dir / f"sky_{timestamp:%Y%m%d_%H%M%S}.jpg"
+            path.write_bytes(b'jpg')
+            self.frames.append((timestamp, path))
+        self.start = start
+        self.end = start + timedelta(days=3) - timedelta(seconds=1)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, frames, start, end, calls, **kwargs):
+        with patch.object(timelapse_segments.subprocess, 'run', side_effect=fake_ffmpeg(calls)):
+            return build_timelapse('atmosbird', 'berging', frames, start, end, self.output,
+                                   fps=10, resolution='640x360', root=self.root, **kwargs)
+
+    def test_whole_days_are_cached(self):
+        """Tweede run codeert niets opnieuw, alleen concat."""
+        calls = []
+        self.assertEqual(self.build(self.frames, self.start, self.end, calls),
+                         {'cached': 0, 'encoded': 3, 'partial': 0})
+        self.assertEqual(len(calls), 4)
+
+        calls = []
+        self.assertEqual(self.build(self.frames, self.start, self.end, calls),
+                         {'cached': 3, 'encoded': 0, 'partial': 0})
+        self.assertEqual(len(calls), 1)
+        self.assertIn('concat', calls[0])
+        self.assertEqual(calls[0][calls[0].index('-c') + 1], 'copy')
+
+    def test_changed_day_is_reencoded(self):
+        """Een extra frame maakt alleen het segment van die dag ongeldig."""
+        self.build(self.frames, self.start, self.end, [])
+        extra = (self.frames[-1][0] + timedelta(hours=1), self.frames[-1][1])
+        counts = self.build(self.frames + [extra], self.start, self.end, [])
+        self.assertEqual(counts, {'cached': 2, 'encoded': 1, 'partial': 0})
+
+    def test_partial_days_not_cached(self):
+        """Randdagen buiten de volledige periode komen niet in de cache."""
+        start = self.start + timedelta(hours=12)
+        frames = [f for f in self.frames if f[0] >= start]
+        counts = self.build(frames, start, self.end, [])
+        self.assertEqual(counts, {'cached': 0, 'encoded': 2, 'partial': 1})
+        cached = sorted(p.name for p in self.root.rglob('*.mp4'))
+        self.assertEqual(cached, ['2026-01-02.mp4', '2026-01-03.mp4'])
+
+    def test_no_cache(self):
+        counts = self.build(self.frames, self.start, self.end, [], use_cache=False)
+        self.assertEqual(counts, {'cached': 0, 'encoded': 0, 'partial': 3})
+        self.assertFalse(self.root.exists())
+
+    def test_ffmpeg_failure(self):
+        """Mislukte codering geeft een leeg resultaat en laat geen segment achter."""
+        failed = MagicMock(returncode=1, stderr='error')
+        with patch.object(timelapse_segments.subprocess, 'run', return_value=failed):
+            counts = build_timelapse('atmosbird', 'berging', self.frames, self.start, self.end,
+                                     self.output, root=self.root)
+        self.assertEqual(counts, {})
+        self.assertEqual(list(self.root.rglob('*.mp4')), [])
+
+    def test_fingerprint_and_fps(self):
+        self.assertEqual(fingerprint(self.frames), fingerprint(list(self.frames)))
+        self.assertNotEqual(fingerprint(self.frames), fingerprint(self.frames[:-1]))
+        self.assertEqual(fps_for_duration(300, 30), 10)
+        self.assertEqual(fps_for_duration(310, 30), 10)
+        self.assertEqual(fps_for_duration(5, 30), 1)
+
+
+if __name__ == '__main__':
+    main()
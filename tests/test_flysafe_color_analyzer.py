@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Unit tests voor scripts/flysafe/color_analyzer.py module.
+
+Test dat de lookup table telling (level_counts) exact dezelfde aantallen
+geeft als de oorspronkelijke boolean masks per kleurniveau, ook op de
+randen van de (overlappende) kleurbereiken.
+Tests worden geskipt als dependencies niet beschikbaar zijn.
+"""
+
+import sys
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts' / 'flysafe'))
+
+# Check if analyzer module can be imported
+ANALYZER_MODULE_AVAILABLE = False
+try:
+    import numpy as np
+    from color_analyzer import RadarColorAnalyzer
+    from benchmark_color_analyzer import counts_match, mask_counts
+    ANALYZER_MODULE_AVAILABLE = True
+except ImportError:
+    pass
+
+
+def edge_image(rng, shape=(120, 160)) -> 'np.ndarray':
+    """Willekeurig beeld met veel pixels op de grenswaarden van COLOR_RANGES."""
+    edges = sorted({v for c in RadarColorAnalyzer.COLOR_RANGES.values() for v in c.values()}
+                   | {v + 1 for c in RadarColorAnalyzer.COLOR_RANGES.values() for v in c.values() if v < 255}
+                   | {v - 1 for c in RadarColorAnalyzer.COLOR_RANGES.values() for v in c.values() if v > 0})
+    img = rng.integers(0, 256, size=(*shape, 3), dtype=np.uint8)
+    mask = rng.random(shape) < 0.5
+    img[mask] = rng.choice(edges, size=(int(mask.sum()), 3))
+    return img
+
+
+@skipIf(not ANALYZER_MODULE_AVAILABLE, "color analyzer dependencies not available")
+class TestLevelCounts(TestCase):
+    """Tests voor de single-pass LUT telling."""
+
+    def setUp(self):
+        self.analyzer = RadarColorAnalyzer()
+        self.rng = np.random.default_rng(0)
+
+    def test_matches_mask_counts(self):
+        """Test dat ROI en kwadrant tellingen gelijk zijn aan de masks."""
+        for shape in [(120, 160), (75, 33), (1, 1)]:
+            img = edge_image(self.rng, shape)
+            self.assertTrue(counts_match(mask_counts(self.analyzer, img), self.analyzer.level_counts(img)))
+
+    def test_overlapping_edges_counted_twice(self):
+        """Test dat een pixel op een overlap in beide niveaus telt, net als bij masks."""
+        img = np.array([[[220, 100, 50]]], dtype=np.uint8)  # g == 100: very_high en high
+        counts = self.analyzer.level_counts(img)['roi']
+        self.assertEqual(counts['very_high'], 1)
+        self.assertEqual(counts['high'], 1)
+
+    def test_rgba_image(self):
+        """Test dat een alpha kanaal genegeerd wordt."""
+        img = edge_image(self.rng)
+        rgba = np.dstack([img, np.full(img.shape[:2], 255, dtype=np.uint8)])
+        self.assertEqual(self.analyzer.level_counts(rgba), self.analyzer.level_counts(img))
+
+    def test_grayscale_returns_zero(self):
+        """Test dat grijswaarden beelden nul tellingen opleveren."""
+        counts = self.analyzer.level_counts(np.zeros((10, 10), dtype=np.uint8))
+        self.assertEqual(sum(counts['roi'].values()), 0)
+
+    def test_analysis_unchanged(self):
+        """Test dat intensiteit en richting gelijk zijn aan de mask-gebaseerde berekening."""
+        img = edge_image(self.rng, (200, 300))
+        roi = self.analyzer.define_roi(img.shape)
+        reference = mask_counts(self.analyzer, img[roi])
+
+        result = self.analyzer.analyze_intensity(img, roi)
+        direction = self.analyzer.detect_direction(img, roi)
+
+        self.assertEqual(result['pixel_counts'], reference['roi'])
+        scores = {q: sum(c.values()) for q, c in reference['quadrants'].items()}
+        self.assertEqual(direction, max(scores, key=scores.get))
+
+
+if __name__ == '__main__':
+    main()
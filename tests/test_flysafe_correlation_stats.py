@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Unit tests voor scripts/flysafe/correlation_stats.py module.
+
+Test de gevectoriseerde Pearson correlatie per groep, de vertraagde
+kruiscorrelatie en het bootstrap betrouwbaarheidsinterval tegen
+np.corrcoef als referentie.
+Tests worden geskipt als dependencies niet beschikbaar zijn.
+"""
+
+import sys
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts' / 'flysafe'))
+
+# Check if stats module can be imported
+STATS_MODULE_AVAILABLE = False
+try:
+    import numpy as np
+    from correlation_stats import bootstrap_ci, grouped_pearson, lagged_correlations
+    STATS_MODULE_AVAILABLE = True
+except ImportError:
+    pass
+
+
+@skipIf(not STATS_MODULE_AVAILABLE, "correlation stats dependencies not available")
+class TestGroupedPearson(TestCase):
+    """Tests voor grouped_pearson."""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(1)
+
+    def test_matches_corrcoef_per_group(self):
+        """Test dat r per groep gelijk is aan np.corrcoef op de subset."""
+        groups = self.rng.integers(0, 4, 2000)
+        x = self.rng.poisson(3, 2000).astype(float)
+        y = x * 5 + self.rng.normal(0, 10, 2000) * (groups + 1)
+
+        stats = grouped_pearson(groups, x, y)
+
+        for g in range(4):
+            mask = groups == g
+            self.assertAlmostEqual(stats['r'][g], np.corrcoef(x[mask], y[mask])[0, 1], places=10)
+            self.assertEqual(stats['n'][g], mask.sum())
+            self.assertAlmostEqual(stats['sum_x'][g], x[mask].sum())
+            self.assertAlmostEqual(stats['mean_y'][g], y[mask].mean())
+
+    def test_zero_variance_and_empty_group(self):
+        """Test dat constante data en lege groepen r = 0 geven."""
+        stats = grouped_pearson(np.array([0, 0, 0]), np.array([1.0, 1.0, 1.0]), np.array([1.0, 2.0, 3.0]), 2)
+        self.assertEqual(stats['r'].tolist(), [0.0, 0.0])
+        self.assertEqual(stats['n'].tolist(), [3, 0])
+
+
+@skipIf(not STATS_MODULE_AVAILABLE, "correlation stats dependencies not available")
+class TestLaggedCorrelations(TestCase):
+    """Tests voor lagged_correlations."""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(2)
+
+    def test_recovers_lag(self):
+        """Test dat een reeks die 3 uur achter de radar loopt bij lag 3 piekt."""
+        radar = self.rng.random(500) * 100
+        detections = np.roll(radar, 3)[None, :] + self.rng.normal(0, 1, (1, 500))
+
+        lagged = lagged_correlations(radar, detections, max_lag=6)
+
+        self.assertEqual(lagged.shape, (1, 7))
+        self.assertEqual(int(np.argmax(lagged[0])), 3)
+        self.assertGreater(lagged[0, 3], 0.99)
+
+    def test_skips_missing_radar(self):
+        """Test dat uren zonder radar overgeslagen worden, zoals np.corrcoef op de rest."""
+        radar = self.rng.random(200)
+        radar[::7] = np.nan
+        detections = self.rng.random((2, 200))
+
+        lagged = lagged_correlations(radar, detections, max_lag=2)
+
+        x = radar[:198]
+        valid = ~np.isnan(x)
+        expected = np.corrcoef(x[valid], detections[1, 2:][valid])[0, 1]
+        self.assertAlmostEqual(lagged[1, 2], expected, places=10)
+
+    def test_constant_series_is_nan(self):
+        """Test dat een reeks zonder variantie NaN geeft."""
+        lagged = lagged_correlations(np.arange(50.0), np.zeros((1, 50)), max_lag=1)
+        self.assertTrue(np.all(np.isnan(lagged)))
+
+
+@skipIf(not STATS_MODULE_AVAILABLE, "correlation stats dependencies not available")
+class TestBootstrapCI(TestCase):
+    """Tests voor bootstrap_ci."""
+
+    def test_interval_contains_r_and_is_reproducible(self):
+        """Test dat het interval r bevat en met dezelfde seed gelijk is."""
+        rng = np.random.default_rng(3)
+        x = rng.normal(size=300)
+        y = 0.5 * x + rng.normal(size=300)
+        r = np.corrcoef(x, y)[0, 1]
+
+        low, high = bootstrap_ci(x, y, samples=400)
+
+        self.assertLess(low, r)
+        self.assertGreater(high, r)
+        self.assertEqual((low, high), bootstrap_ci(x, y, samples=400))
+
+    def test_too_few_pairs(self):
+        """Test dat minder dan 3 paren (nan, nan) geeft."""
+        low, high = bootstrap_ci(np.array([1.0, 2.0]), np.array([3.0, 4.0]))
+        self.assertTrue(np.isnan(low) and np.isnan(high))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Unit tests voor scripts/flysafe/radar_correlation.py module.
+
+Test dat analyze_all alle observaties met één set-based UPDATE op één
+verbinding correleert, en de referentie score berekening in Python.
+Tests worden geskipt als dependencies niet beschikbaar zijn.
+"""
+
+import sys
+from datetime import date, time
+from decimal import Decimal
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts' / 'flysafe'))
+
+# Check if correlation module can be imported
+CORRELATION_MODULE_AVAILABLE = False
+try:
+    import radar_correlation
+    from radar_correlation import CORRELATION_UPDATE_SQL, RadarCorrelationAnalyzer
+    CORRELATION_MODULE_AVAILABLE = True
+except ImportError:
+    pass
+
+
+@skipIf(not CORRELATION_MODULE_AVAILABLE, "radar correlation dependencies not available")
+class TestAnalyzeAll(TestCase):
+    """Tests voor de set-based correlatie."""
+
+    def setUp(self):
+        self.analyzer = RadarCorrelationAnalyzer()
+        self.conn = MagicMock()
+        self.cursor = self.conn.cursor.return_value
+        self.analyzer.get_db_connection = MagicMock(return_value=self.conn)
+
+    def test_single_statement_on_one_connection(self):
+        """Test dat alle observaties in één statement en één commit bijgewerkt worden."""
+        self.cursor.fetchall.return_value = [
+            {'id': 1, 'observation_date': date(2026, 5, 1), 'observation_time': time(6, 5),
+             'intensity_level': 80, 'intensity_category': 'very_high',
+             'bird_detections_count': 42, 'species_count': 12, 'correlation_score': Decimal('0.9120')},
+            {'id': 2, 'observation_date': date(2026, 5, 1), 'observation_time': time(7, 5),
+             'intensity_level': 5, 'intensity_category': 'minimal',
+             'bird_detections_count': 0, 'species_count': 0, 'correlation_score': Decimal('1.0000')},
+        ]
+
+        with patch.object(radar_correlation, 'logger'):
+            results = self.analyzer.analyze_all()
+
+        self.analyzer.get_db_connection.assert_called_once()
+        self.cursor.execute.assert_called_once()
+        sql, params = self.cursor.execute.call_args[0]
+        self.assertEqual(sql, CORRELATION_UPDATE_SQL)
+        self.assertEqual(params, {'min_confidence': radar_correlation.MIN_CONFIDENCE,
+                                  'window_hours': radar_correlation.TIME_WINDOW_HOURS})
+        self.conn.commit.assert_called_once()
+        self.conn.close.assert_called_once()
+
+        self.assertEqual([r['id'] for r in results], [1, 2])
+        self.assertEqual(results[0]['detections'], 42)
+        self.assertEqual(results[0]['species'], 12)
+        self.assertEqual(results[0]['correlation'], 0.912)
+        self.assertEqual(results[1]['timestamp'], '2026-05-01 07:05:00')
+
+    def test_failure_rolls_back(self):
+        """Test dat een database fout de transactie terugdraait en [] geeft."""
+        self.cursor.execute.side_effect = Exception('lock timeout')
+
+        with patch.object(radar_correlation, 'logger'):
+            self.assertEqual(self.analyzer.analyze_all(), [])
+
+        self.conn.rollback.assert_called_once()
+        self.conn.commit.assert_not_called()
+        self.conn.close.assert_called_once()
+
+    def test_query_is_set_based(self):
+        """Test dat de query een LATERAL window join en een enkele UPDATE is."""
+        self.assertIn('CROSS JOIN LATERAL', CORRELATION_UPDATE_SQL)
+        self.assertEqual(CORRELATION_UPDATE_SQL.count('UPDATE radar_observations'), 1)
+        self.assertIn('WHERE correlation_score IS NULL', CORRELATION_UPDATE_SQL)
+
+
+@skipIf(not CORRELATION_MODULE_AVAILABLE, "radar correlation dependencies not available")
+class TestCorrelationScore(TestCase):
+    """Tests voor de referentie score (gespiegeld in CORRELATION_UPDATE_SQL)."""
+
+    def setUp(self):
+        self.analyzer = RadarCorrelationAnalyzer()
+
+    def stats(self, high, species):
+        return {'high_confidence_count': high, 'species_count': species, 'avg_confidence': 0.8}
+
+    def test_both_low_is_boosted(self):
+        """Test dat lage intensiteit zonder detecties maximaal correleert."""
+        self.assertEqual(self.analyzer.calculate_correlation_score(0, self.stats(0, 0)), 1.0)
+
+    def test_mismatch_penalized(self):
+        """Test dat hoge intensiteit zonder detecties 0 scoort."""
+        self.assertEqual(self.analyzer.calculate_correlation_score(100, self.stats(0, 0)), 0.0)
+
+    def test_both_high_capped(self):
+        """Test dat de boost bij hoge waarden op 1.0 afgekapt wordt."""
+        self.assertEqual(self.analyzer.calculate_correlation_score(90, self.stats(40, 10)), 1.0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Unit tests voor scripts/flysafe/reanalyze_radar.py module.
+
+Test het doorlopen van de image tree, dat de bulk analyse hetzelfde
+resultaat geeft als analyze_image, en dat alleen rijen onder de huidige
+ANALYZER_VERSION in batches bijgewerkt worden (zonder database).
+Tests worden geskipt als dependencies niet beschikbaar zijn.
+"""
+
+import shutil
+import sys
+import tempfile
+from datetime import date
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts' / 'flysafe'))
+
+# Check if reanalyze module can be imported
+REANALYZE_MODULE_AVAILABLE = False
+try:
+    import numpy as np
+    from PIL import Image
+    import color_analyzer
+    import reanalyze_radar
+    from color_analyzer import ANALYZER_VERSION, RadarColorAnalyzer, decode_image
+    REANALYZE_MODULE_AVAILABLE = True
+except ImportError:
+    pass
+
+
+def radar_png(path: Path, seed: int, mode: str = 'RGB'):
+    """Schrijf een willekeurig 'radar' beeld met veel gekleurde pixels."""
+    rng = np.random.default_rng(seed)
+    palette = np.array([[230, 50, 50], [230, 150, 50], [230, 230, 80], [150, 230, 150],
+                        [50, 150, 200], [255, 255, 255]], dtype=np.uint8)
+    img = palette[rng.integers(0, len(palette), size=(60, 80))]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    image = Image.fromarray(img)
+    if mode == 'P':
+        image = image.quantize(colors=len(palette))
+    image.save(path)
+
+
+@skipIf(not REANALYZE_MODULE_AVAILABLE, "reanalyze module dependencies not available")
+class TestReanalyze(TestCase):
+    """Tests voor de bulk heranalyse."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.paths = []
+        for i, (station, day) in enumerate([('herwijnen', '2026/04/30'), ('herwijnen', '2026/05/01'),
+                                            ('herwijnen', '2026/05/02'), ('wier', '2026/05/01')]):
+            path = self.tmp / station / day / f"radar_{station}_{day.replace('/', '')}_120000.png"
+            radar_png(path, seed=i)
+            self.paths.append(path)
+        (self.tmp / 'herwijnen' / 'notes').mkdir()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_iter_images_filters(self):
+        """Test filter op station en datum directory."""
+        found = list(reanalyze_radar.iter_images(self.tmp, stations=['herwijnen'],
+                                                 since=date(2026, 5, 1), until=date(2026, 5, 1)))
+        self.assertEqual(found, [self.paths[1]])
+        self.assertEqual(len(list(reanalyze_radar.iter_images(self.tmp))), 4)
+
+    def test_decode_matches_pil(self):
+        """Test dat de snelle decode gelijk is aan PIL, ook voor palette PNGs."""
+        palette_path = self.tmp / 'palette.png'
+        radar_png(palette_path, seed=9, mode='P')
+        for path in (self.paths[0], palette_path):
+            expected = np.asarray(Image.open(path).convert('RGB'))
+            np.testing.assert_array_equal(decode_image(path), expected)
+            with patch.object(color_analyzer, 'cv2', None):
+                np.testing.assert_array_equal(decode_image(path), expected)
+
+    def test_analyze_file_matches_analyze_image(self):
+        """Test dat de worker analyse hetzelfde resultaat geeft als analyze_image."""
+        with patch.object(color_analyzer, 'logger'):
+            expected = RadarColorAnalyzer().analyze_image(str(self.paths[0]))
+        path, result = reanalyze_radar.analyze_file(self.paths[0])
+
+        self.assertEqual(path, self.paths[0])
+        self.assertEqual(result['intensity'], expected['intensity'])
+        self.assertEqual(result['score'], expected['intensity_score'])
+        self.assertEqual(result['direction'], expected['direction'])
+
+    def test_unreadable_image(self):
+        """Test dat een kapot bestand None oplevert in plaats van een exception."""
+        broken = self.tmp / 'broken.png'
+        broken.write_bytes(b'not a png')
+        self.assertIsNone(reanalyze_radar.analyze_file(broken)[1])
+
+    def test_reanalyze_updates_pending_rows_in_batches(self):
+        """Test dat alleen pending rijen geanalyseerd en per batch geschreven worden."""
+        pending = {self.paths[0].name: 10, self.paths[1].name: 11, 'radar_gone.png': 12}
+        conn = MagicMock()
+        with patch.object(reanalyze_radar, 'pending_observations', return_value=pending), \
+                patch.object(reanalyze_radar, 'BATCH_SIZE', 1), \
+                patch.object(reanalyze_radar, 'execute_values') as execute_values:
+            stats = reanalyze_radar.reanalyze(conn, self.tmp, workers=1)
+
+        self.assertEqual(stats['analyzed'], 2)
+        self.assertEqual(stats['updated'], 2)
+        self.assertEqual(stats['skipped'], 1)
+        self.assertEqual(execute_values.call_count, 2)
+        self.assertEqual(conn.commit.call_count, 2)
+        rows = sorted(call.args[2][0] for call in execute_values.call_args_list)
+        self.assertEqual([row[0] for row in rows], [10, 11])
+        self.assertTrue(all(row[3] == ANALYZER_VERSION for row in rows))
+        # De correlatie hoort bij de oude intensiteit en moet opnieuw berekend worden
+        self.assertIn('correlation_score = NULL', execute_values.call_args.args[1])
+
+    def test_dry_run_writes_nothing(self):
+        """Test dat --dry-run analyseert zonder te schrijven."""
+        pending = {p.name: i for i, p in enumerate(self.paths)}
+        with patch.object(reanalyze_radar, 'pending_observations', return_value=pending), \
+                patch.object(reanalyze_radar, 'execute_values') as execute_values:
+            stats = reanalyze_radar.reanalyze(MagicMock(), self.tmp, workers=1, dry_run=True)
+
+        self.assertEqual(stats['analyzed'], 4)
+        self.assertEqual(stats['updated'], 0)
+        execute_values.assert_not_called()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Unit tests voor scripts/flysafe/timelapse_generator.py module.
+
+Test dat frames in een worker pool gerenderd en in volgorde als raw RGB
+naar ffmpeg gepiped worden, zonder tijdelijke PNGs.
+Tests worden geskipt als dependencies niet beschikbaar zijn.
+"""
+
+import io
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts' / 'flysafe'))
+
+# Check if timelapse module can be imported
+TIMELAPSE_MODULE_AVAILABLE = False
+try:
+    from PIL import Image
+    import timelapse_generator
+    from timelapse_generator import TimelapseGenerator, render_frame
+    TIMELAPSE_MODULE_AVAILABLE = True
+except ImportError:
+    pass
+
+
+class FakeFFmpeg:
+    """Popen vervanger die de stdin bytes bewaart."""
+
+    def __init__(self, cmd, stdin=None, stderr=None):
+        self.cmd = cmd
+        self.stdin = io.BytesIO()
+        self.stdin.close = lambda: None
+        self.stderr = io.BytesIO(b'')
+        self.returncode = 0
+
+    def wait(self):
+        return self.returncode
+
+
+@skipIf(not TIMELAPSE_MODULE_AVAILABLE, "timelapse dependencies not available")
+class TestStreaming(TestCase):
+    """Tests voor de streaming frame pipeline."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.frames = []
+        for i, color in enumerate([(255, 0, 0), (0, 255, 0), (0, 0, 255)]):
+            path = self.dir / f"radar_herwijnen_20260501_0{i}0000.png"
+            Image.new('RGB', (40, 30), color).save(path)
+            self.frames.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_render_frame_resizes_and_returns_rgb(self):
+        """Test dat een frame naar de doelgrootte geschaald wordt als RGB bytes."""
+        data = render_frame((self.frames[0], None, (20, 10)))
+        self.assertEqual(len(data), 20 * 10 * 3)
+        self.assertEqual(data[:3], bytes([255, 0, 0]))
+
+    def test_render_frame_unreadable(self):
+        """Test dat een onleesbaar bestand None geeft."""
+        bad = self.dir / 'bad.png'
+        bad.write_bytes(b'not a png')
+        with patch.object(timelapse_generator, 'logger'):
+            self.assertIsNone(render_frame((bad, None, (40, 30))))
+
+    def test_frames_piped_in_order_without_temp_files(self):
+        """Test dat frames in volgorde gepiped worden en onleesbare overgeslagen."""
+        bad = self.dir / 'bad.png'
+        bad.write_bytes(b'not a png')
+        tasks = [(self.frames[0], None, (40, 30)), (bad, None, (40, 30)),
+                 (self.frames[1], None, (40, 30)), (self.frames[2], None, (40, 30))]
+        procs = []
+
+        def fake_popen(cmd, **kwargs):
+            procs.append(FakeFFmpeg(cmd, **kwargs))
+            return procs[-1]
+
+        with patch.object(timelapse_generator.subprocess, 'Popen', side_effect=fake_popen), \
+                patch.object(timelapse_generator, 'FRAME_WINDOW', 2), \
+                patch.object(timelapse_generator, 'logger'):
+            generator = TimelapseGenerator.__new__(TimelapseGenerator)
+            written = generator.stream_to_ffmpeg(tasks, (40, 30), 4, ['out.mp4'], workers=2)
+
+        self.assertEqual(written, 3)
+        data = procs[0].stdin.getvalue()
+        frame = 40 * 30 * 3
+        self.assertEqual(len(data), 3 * frame)
+        self.assertEqual([data[i * frame:i * frame + 3] for i in range(3)],
+                         [bytes([255, 0, 0]), bytes([0, 255, 0]), bytes([0, 0, 255])])
+        cmd = procs[0].cmd
+        self.assertEqual(cmd[cmd.index('-f') + 1], 'rawvideo')
+        self.assertEqual(cmd[cmd.index('-s') + 1], '40x30')
+        self.assertEqual(cmd[cmd.index('-i') + 1], '-')
+        self.assertEqual(sorted(p.name for p in self.dir.iterdir()),
+                         sorted([f.name for f in self.frames] + ['bad.png']))
+
+    def test_ffmpeg_failure_returns_none(self):
+        """Test dat een ffmpeg fout None geeft."""
+        def failing_popen(cmd, **kwargs):
+            proc = FakeFFmpeg(cmd, **kwargs)
+            proc.returncode = 1
+            return proc
+
+        with patch.object(timelapse_generator.subprocess, 'Popen', side_effect=failing_popen), \
+                patch.object(timelapse_generator, 'logger'):
+            generator = TimelapseGenerator.__new__(TimelapseGenerator)
+            self.assertIsNone(generator.stream_to_ffmpeg(
+                [(self.frames[0], datetime(2026, 5, 1), (40, 30))], (40, 30), 4, ['out.mp4'], workers=1))
+
+
+if __name__ == '__main__':
+    main()
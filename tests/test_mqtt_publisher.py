@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Unit tests voor scripts/mqtt/birdnet_mqtt_publisher.py module.
+
+Test de async vocalisatie worker pool en enrichment berichten.
+Tests worden geskipt als dependencies niet beschikbaar zijn.
+"""
+
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+# Check if publisher module can be imported
+PUBLISHER_MODULE_AVAILABLE = False
+try:
+    from mqtt import birdnet_mqtt_publisher as publisher
+    from mqtt.birdnet_mqtt_publisher import (
+        BirdNetMQTTPublisher, VocalizationWorker, TOPIC_DETECTION, TOPIC_ENRICHED
+    )
+    PUBLISHER_MODULE_AVAILABLE = True
+except (ImportError, FileNotFoundError):
+    pass
+
+
+def _mock_classifier(result=None, has_model=True):
+    """Maak een mock VocalizationClassifier."""
+    classifier = MagicMock()
+    classifier.has_model.return_value = has_model
+    classifier.classify.return_value = result
+    return classifier
+
+
+@skipIf(not PUBLISHER_MODULE_AVAILABLE, "publisher module dependencies not available")
+class TestVocalizationWorker(TestCase):
+    """Tests voor de vocalisatie worker pool."""
+
+    def setUp(self):
+        self.published = []
+        self.worker = VocalizationWorker(lambda topic, msg: self.published.append((topic, msg)) or True,
+                                         max_workers=1, max_pending=2)
+
+    def tearDown(self):
+        self.worker.shutdown(wait=True)
+
+    def test_submit_without_model_returns_false(self):
+        """Test dat soorten zonder model geen enrichment krijgen."""
+        with patch.object(publisher, 'get_vocalization_classifier', return_value=_mock_classifier(has_model=False)):
+            self.assertFalse(self.worker.submit(1, 'Merel', 'merel.mp3', '2026-05-01'))
+        self.assertEqual(self.worker.pending, 0)
+
+    def test_submit_publishes_enrichment(self):
+        """Test dat classificatie als enrichment bericht gepubliceerd wordt."""
+        result = {'type': 'song', 'type_nl': 'zang', 'confidence': 0.9}
+        with patch.object(publisher, 'get_vocalization_classifier', return_value=_mock_classifier(result)), \
+                patch.object(Path, 'exists', return_value=True):
+            self.assertTrue(self.worker.submit(42, 'Merel', 'merel.mp3', '2026-05-01'))
+            self.worker.shutdown(wait=True)
+
+        self.assertEqual(len(self.published), 1)
+        topic, msg = self.published[0]
+        self.assertEqual(topic, TOPIC_ENRICHED)
+        self.assertEqual(msg['detection_id'], 42)
+        self.assertTrue(msg['classified'])
+        self.assertEqual(msg['vocalization_nl'], 'zang')
+
+    def test_low_confidence_is_unclassified(self):
+        """Test dat lage confidence een enrichment zonder type oplevert."""
+        result = {'type': 'call', 'type_nl': 'roep', 'confidence': 0.3}
+        with patch.object(publisher, 'get_vocalization_classifier', return_value=_mock_classifier(result)), \
+                patch.object(Path, 'exists', return_value=True):
+            self.worker.submit(7, 'Merel', 'merel.mp3', '2026-05-01')
+            self.worker.shutdown(wait=True)
+
+        _, msg = self.published[0]
+        self.assertFalse(msg['classified'])
+        self.assertNotIn('vocalization', msg)
+        self.assertEqual(self.worker.get_metrics()['unclassified'], 1)
+
+    def test_queue_full_drops_classification(self):
+        """Test dat een volle queue nieuwe jobs weigert."""
+        self.worker.pending = 2
+        with patch.object(publisher, 'get_vocalization_classifier', return_value=_mock_classifier()):
+            self.assertFalse(self.worker.submit(1, 'Merel', 'merel.mp3', '2026-05-01'))
+        self.assertEqual(self.worker.get_metrics()['dropped'], 1)
+
+    def test_metrics_latency(self):
+        """Test dat latency statistieken berekend worden."""
+        self.worker.latencies.extend([0.1, 0.2, 0.3])
+        metrics = self.worker.get_metrics()
+
+        self.assertEqual(metrics['queue_depth'], 0)
+        self.assertAlmostEqual(metrics['latency_avg_seconds'], 0.2)
+        self.assertAlmostEqual(metrics['latency_max_seconds'], 0.3)
+
+
+@skipIf(not PUBLISHER_MODULE_AVAILABLE, "publisher module dependencies not available")
+class TestPublishDetection(TestCase):
+    """Tests voor de volgorde van detectie en enrichment in publish_detection."""
+
+    DETECTION = {'rowid': 42, 'Com_Name': 'Merel', 'File_Name': 'merel.mp3',
+                 'Date': '2026-05-01', 'Time': '06:00:00', 'Confidence': 0.9}
+
+    def setUp(self):
+        self.calls = []
+        self.publisher = BirdNetMQTTPublisher.__new__(BirdNetMQTTPublisher)
+        self.publisher.vocalization = VocalizationWorker(MagicMock(return_value=True), max_workers=1)
+        self.publisher.vocalization.executor = MagicMock()
+        self.publisher.vocalization.executor.submit.side_effect = \
+            lambda *args: self.calls.append(('classify', args[1]))
+
+    def publish(self, ok):
+        def fake_publish(topic, msg, retain=False):
+            self.calls.append(('publish', topic))
+            return ok
+        self.publisher._publish_json = fake_publish
+        with patch.object(publisher, 'get_vocalization_classifier', return_value=_mock_classifier()):
+            return self.publisher.publish_detection(self.DETECTION)
+
+    def test_detection_published_before_classification(self):
+        """Test dat de detectie gepubliceerd is voordat de classificatie ingepland wordt."""
+        self.assertTrue(self.publish(ok=True))
+        self.assertEqual(self.calls, [('publish', TOPIC_DETECTION), ('classify', 42)])
+        self.assertEqual(self.publisher.vocalization.pending, 1)
+
+    def test_batch_has_distinct_detection_ids(self):
+        """Test dat elke rij uit birds.db zijn eigen rowid als detection_id krijgt."""
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Path(tmp) / 'birds.db'
+            conn = sqlite3.connect(db)
+            conn.execute("CREATE TABLE detections (Date DATE, Time TIME, Com_Name VARCHAR(100), "
+                         "Confidence FLOAT, File_Name VARCHAR(100))")
+            conn.executemany("INSERT INTO detections VALUES (?, ?, ?, ?, ?)", [
+                ('2026-05-01', '06:00:00', 'Merel', 0.9, 'merel.mp3'),
+                ('2026-05-01', '06:00:05', 'Vink', 0.8, 'vink.mp3'),
+                ('2026-05-01', '06:00:09', 'Merel', 0.7, 'merel2.mp3'),
+            ])
+            conn.commit()
+            conn.close()
+
+            self.publisher.last_detection_id = 1
+            with patch.object(publisher, 'BIRDNET_DB', db):
+                detections = self.publisher.get_new_detections()
+
+        self.assertEqual([d['rowid'] for d in detections], [2, 3])
+        published = []
+        self.publisher._publish_json = lambda topic, msg, retain=False: published.append(msg) or True
+        with patch.object(publisher, 'get_vocalization_classifier', return_value=None):
+            for detection in detections:
+                self.assertTrue(self.publisher.publish_detection(detection))
+        self.assertEqual([m['detection_id'] for m in published], [2, 3])
+
+    def test_failed_publish_skips_classification(self):
+        """Test dat een mislukte publish geen classificatie inplant en de plek vrijgeeft."""
+        self.assertFalse(self.publish(ok=False))
+        self.assertEqual(self.calls, [('publish', TOPIC_DETECTION)])
+        self.assertEqual(self.publisher.vocalization.pending, 0)
+
+
+if __name__ == '__main__':
+    main()
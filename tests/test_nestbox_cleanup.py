@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Unit tests voor scripts/nestbox/nestbox_cleanup.py module.
+
+Test dat alleen beelden die echt door de detector beoordeeld zijn (rij in
+nestbox_occupancy of nestbox_analyzed_frames) verwijderd worden, en dat een
+nooit geanalyseerd beeld tussen gelogde beelden bewaard blijft. De
+nestbox_analyzed_frames rijen tot en met de cutoff dag worden opgeruimd.
+Tests worden geskipt als dependencies niet beschikbaar zijn.
+"""
+
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+# Check if cleanup module can be imported
+CLEANUP_MODULE_AVAILABLE = False
+try:
+    from nestbox import nestbox_cleanup
+    CLEANUP_MODULE_AVAILABLE = True
+except ImportError:
+    pass
+
+
+class FakeCursor:
+    """Cursor die per tabel een rij teruggeeft op basis van image_path."""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.row = None
+        self.rowcount = 0
+
+    def execute(self, sql, params):
+        if sql.lstrip().startswith('DELETE'):
+            self.tables.setdefault('deletes', []).append(params)
+            return
+        table = 'nestbox_analyzed_frames' if 'nestbox_analyzed_frames' in sql else 'nestbox_occupancy'
+        self.row = self.tables[table].get(params[0])
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+@skipIf(not CLEANUP_MODULE_AVAILABLE, "nestbox cleanup dependencies not available")
+class TestCleanupClassification(TestCase):
+    """Tests voor cleanup_nestbox met de uitgedunde occupancy log."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.taken_at = datetime(2025, 5, 1, 12, 0)
+        self.images = []
+        for i, name in enumerate(('gelogd', 'ongezien', 'beoordeeld')):
+            path = self.dir / f"{name}.jpg"
+            path.write_bytes(b'jpg')
+            self.images.append((self.taken_at + timedelta(hours=i), path))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_unanalysed_image_survives(self):
+        """Een nooit geanalyseerd beeld tussen gelogde beelden wordt niet verwijderd."""
+        logged, unseen, analysed = (str(p) for _, p in self.images)
+        tables = {
+            'nestbox_occupancy': {logged: (False, 0.95, 0.95)},
+            'nestbox_analyzed_frames': {analysed: (False, 0.97)},
+        }
+        conn = MagicMock()
+        conn.cursor.side_effect = lambda: FakeCursor(tables)
+        catalog = MagicMock()
+        catalog.images.return_value = self.images
+
+        with patch.object(nestbox_cleanup, 'ImageCatalog', return_value=catalog):
+            stats = nestbox_cleanup.cleanup_nestbox('midden', conn, datetime(2026, 1, 1))
+
+        self.assertEqual(stats['deleted'], 2)
+        self.assertEqual(stats['kept_reasons'], {'geen classificatie': 1})
+        self.assertTrue(Path(unseen).exists())
+        self.assertFalse(Path(logged).exists())
+        self.assertFalse(Path(analysed).exists())
+        catalog.remove.assert_called_once_with([Path(logged), Path(analysed)])
+
+        # Rijen van verwijderde beelden en alles tot en met de cutoff dag gaan weg
+        self.assertEqual(tables['deletes'], [([logged, analysed], 'midden', datetime(2026, 1, 1, 23, 59, 59))])
+        conn.commit.assert_called_once()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Unit tests voor scripts/nestbox/nestbox_model.py en export_onnx.py.
+
+Test de NumPy preprocessing tegen de torchvision transform, het kiezen
+van een (actuele) ONNX export en de ONNX Runtime backend tegen PyTorch op
+gelabelde beelden in de indeling van prepare_training_data.py, met een
+willekeurig geïnitialiseerd MobileNetV2 checkpoint.
+Tests worden geskipt als dependencies niet beschikbaar zijn.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+# Preprocessing en backend keuze hebben alleen numpy en PIL nodig
+MODEL_MODULE_AVAILABLE = False
+try:
+    import numpy as np
+    from PIL import Image
+    from nestbox import nestbox_model
+    from nestbox.nestbox_model import INPUT_SIZE, find_onnx, load_image_array, onnx_path_for
+    MODEL_MODULE_AVAILABLE = True
+except ImportError:
+    pass
+
+# Check if torch dependencies can be imported
+TORCH_AVAILABLE = False
+try:
+    import torch
+    from torchvision import transforms
+    from nestbox.nestbox_model import create_model, load_torch_checkpoint
+    TORCH_AVAILABLE = MODEL_MODULE_AVAILABLE
+except ImportError:
+    pass
+
+# Check if ONNX export dependencies are available
+ONNX_DEPS_AVAILABLE = False
+try:
+    import onnx  # noqa: F401
+    import onnxruntime  # noqa: F401
+    from nestbox.export_onnx import export_model, labeled_images, verify_model
+    from nestbox import nestbox_occupancy_detector
+    ONNX_DEPS_AVAILABLE = TORCH_AVAILABLE
+except ImportError:
+    pass
+
+
+def make_labeled_dir(root: Path, per_class: int = 6) -> Path:
+    """Maak data/leeg en data/bezet zoals prepare_training_data.py."""
+    data_dir = root / 'data'
+    rng = np.random.default_rng(0)
+    for label, base in (('leeg', 30), ('bezet', 170)):
+        (data_dir / label).mkdir(parents=True)
+        for i in range(per_class):
+            pixels = np.clip(base + rng.normal(0, 40, (180, 320, 3)), 0, 255).astype(np.uint8)
+            Image.fromarray(pixels).save(data_dir / label / f"{label}_{i:03d}.jpg")
+    return data_dir
+
+
+def make_checkpoint(root: Path) -> Path:
+    """Willekeurig MobileNetV2 checkpoint, opgeslagen zoals na torch.compile()."""
+    torch.manual_seed(0)
+    model = create_model(num_classes=2, simple_classifier=True)
+    model_path = root / 'nestbox_model_latest.pt'
+    torch.save({
+        'model_state_dict': {f"_orig_mod.{k}": v for k, v in model.state_dict().items()},
+        'classes': ['leeg', 'bezet'],
+        'architecture': 'mobilenet_v2',
+        'best_val_acc': 0.9,
+    }, model_path)
+    return model_path
+
+
+@skipIf(not MODEL_MODULE_AVAILABLE, "nestbox model dependencies not available")
+class TestPreprocessing(TestCase):
+    """Tests voor load_image_array en find_onnx."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.image_path = self.dir / 'voor_20260501_120000.jpg'
+        Image.new('RGB', (320, 180), (124, 116, 104)).save(self.image_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_load_image_array(self):
+        """Test vorm, type en normalisatie van de model input."""
+        x = load_image_array(str(self.image_path))
+        self.assertEqual(x.shape, (3, INPUT_SIZE, INPUT_SIZE))
+        self.assertEqual(x.dtype, np.float32)
+        # (124, 116, 104) ligt vlak bij het ImageNet gemiddelde
+        self.assertLess(np.abs(x).max(), 0.05)
+
+    @skipIf(not TORCH_AVAILABLE, "torch not available")
+    def test_matches_torchvision_transform(self):
+        """Test dat de NumPy preprocessing gelijk is aan transforms.Resize/ToTensor/Normalize."""
+        pixels = np.random.default_rng(1).integers(0, 256, (180, 320, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(self.dir / 'ruis.png')
+        transform = transforms.Compose([
+            transforms.Resize((INPUT_SIZE, INPUT_SIZE)),
+            transforms.ToTensor(),
+            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
+        ])
+        expected = transform(Image.open(self.dir / 'ruis.png').convert('RGB')).numpy()
+        np.testing.assert_allclose(load_image_array(str(self.dir / 'ruis.png')), expected, atol=1e-5)
+
+    def test_find_onnx(self):
+        """Test backend keuze: torch forceert PyTorch, verouderde export wordt genegeerd."""
+        model_path = self.dir / 'nestbox_model_latest.pt'
+        model_path.write_bytes(b'pt')
+        fp32 = onnx_path_for(model_path)
+        int8 = onnx_path_for(model_path, quantized=True)
+        self.assertEqual(fp32.name, 'nestbox_model_latest.onnx')
+        self.assertEqual(int8.name, 'nestbox_model_latest.int8.onnx')
+
+        with patch.object(nestbox_model, 'get_onnxruntime', return_value=object()):
+            self.assertIsNone(find_onnx(model_path, 'auto'))
+            fp32.write_bytes(b'onnx')
+            int8.write_bytes(b'onnx')
+            self.assertEqual(find_onnx(model_path, 'auto', prefer_int8=False), fp32)
+            self.assertEqual(find_onnx(model_path, 'auto', prefer_int8=True), int8)
+            self.assertIsNone(find_onnx(model_path, 'torch'))
+
+            # Opnieuw getraind model: export is verouderd
+            later = fp32.stat().st_mtime + 60
+            os.utime(model_path, (later, later))
+            self.assertIsNone(find_onnx(model_path, 'auto'))
+
+        # Zonder onnxruntime valt ook een geforceerde onnx backend terug op PyTorch
+        with patch.object(nestbox_model, 'get_onnxruntime', return_value=None):
+            os.utime(model_path, (0, 0))
+            self.assertIsNone(find_onnx(model_path, 'onnx'))
+
+
+@skipIf(not TORCH_AVAILABLE, "torch not available")
+class TestTorchCheckpoint(TestCase):
+    """Tests voor load_torch_checkpoint."""
+
+    def test_compiled_checkpoint(self):
+        """Test dat _orig_mod. prefixes verwijderd worden en de metadata bewaard blijft."""
+        with tempfile.TemporaryDirectory() as tmp:
+            model, info = load_torch_checkpoint(make_checkpoint(Path(tmp)))
+        self.assertEqual(info['classes'], ['leeg', 'bezet'])
+        self.assertEqual(info['architecture'], 'mobilenet_v2')
+        self.assertNotIn('model_state_dict', info)
+        self.assertFalse(model.training)
+
+
+@skipIf(not ONNX_DEPS_AVAILABLE, "ONNX export dependencies not available")
+class TestOnnxBackend(TestCase):
+    """Accuracy-parity tests voor de ONNX Runtime backend op gelabelde beelden."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = Path(tempfile.mkdtemp())
+        cls.model_path = make_checkpoint(cls.tmp)
+        cls.data_dir = make_labeled_dir(cls.tmp)
+        cls.written = export_model(cls.model_path, quantize=True)
+        cls.report = verify_model(cls.model_path, cls.data_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def test_exports_written(self):
+        self.assertEqual([p.name for p in self.written],
+                         ['nestbox_model_latest.onnx', 'nestbox_model_latest.int8.onnx'])
+        self.assertEqual(export_model(self.model_path, quantize=True), [])  # up-to-date
+
+    def test_fp32_parity_with_torch(self):
+        """Test dat fp32 ONNX dezelfde kansen en nauwkeurigheid geeft als PyTorch."""
+        self.assertEqual(len(labeled_images(self.data_dir)), 12)
+        fp32 = self.report['nestbox_model_latest.onnx']
+        self.assertLess(fp32['max_abs_diff'], 1e-4)
+        self.assertEqual(fp32['top1_agreement'], 1.0)
+        self.assertEqual(fp32['accuracy'], self.report['nestbox_model_latest.pt']['accuracy'])
+
+    def test_int8_variant(self):
+        """Test dat de int8 variant kleiner is en geldige kansen geeft."""
+        int8_path = onnx_path_for(self.model_path, quantized=True)
+        self.assertLess(int8_path.stat().st_size, onnx_path_for(self.model_path).stat().st_size)
+        self.assertIn('nestbox_model_latest.int8.onnx', self.report)
+
+        model, info = nestbox_model.load_model(self.model_path, backend='onnx', prefer_int8=True)
+        probas = model.predict_proba(np.stack([load_image_array(p) for p, _ in labeled_images(self.data_dir)]))
+        np.testing.assert_allclose(probas.sum(axis=1), 1.0, atol=1e-5)
+
+    def test_predict_image_contract(self):
+        """Test dat predict_image met ONNX hetzelfde resultaat geeft als met PyTorch."""
+        image_path = str(labeled_images(self.data_dir)[0][0])
+        onnx_model, info = nestbox_occupancy_detector.load_model(str(self.model_path))
+        torch_model, _ = nestbox_model.load_model(self.model_path, backend='torch')
+
+        self.assertEqual(onnx_model.backend, 'onnx')
+        self.assertEqual(info['classes'], ['leeg', 'bezet'])
+        a = nestbox_occupancy_detector.predict_image(onnx_model, image_path, info['classes'])
+        b = nestbox_occupancy_detector.predict_image(torch_model, image_path, info['classes'])
+        self.assertEqual(set(a), {'class', 'class_idx', 'confidence', 'is_occupied', 'species', 'probabilities'})
+        self.assertEqual(a['class'], b['class'])
+        self.assertAlmostEqual(a['confidence'], b['confidence'], places=4)
+
+
+if __name__ == '__main__':
+    main()
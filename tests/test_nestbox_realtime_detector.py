@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Unit tests voor scripts/nestbox/nestbox_realtime_detector.py module.
+
+Test de gebatchte pipeline: één forward pass over alle nestkasten met
+dezelfde uitkomst als per beeld, alle database acties over één
+connectie met één commit, en de StatusSmoother toestand die pas na de
+commit weggeschreven wordt.
+Tests worden geskipt als dependencies niet beschikbaar zijn.
+"""
+
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+# Check if realtime detector module can be imported
+REALTIME_MODULE_AVAILABLE = False
+try:
+    import torch
+    import torch.nn as nn
+    from PIL import Image
+    from nestbox import nestbox_realtime_detector as detector
+    from nestbox.nestbox_model import TorchOccupancyModel
+    from nestbox.nestbox_status_smoother import StatusSmoother
+    REALTIME_MODULE_AVAILABLE = True
+except ImportError:
+    pass
+
+
+if REALTIME_MODULE_AVAILABLE:
+    class MeanModel(nn.Module):
+        """Klein model: helder beeld = bezet."""
+
+        def __init__(self):
+            super().__init__()
+            self.batch_sizes = []
+
+        def forward(self, x):
+            self.batch_sizes.append(x.shape[0])
+            mean = x.mean(dim=(1, 2, 3))
+            return torch.stack([-mean, mean], dim=1) * 5
+
+
+@skipIf(not REALTIME_MODULE_AVAILABLE, "realtime detector dependencies not available")
+class TestBatchedPipeline(TestCase):
+    """Tests voor predict_batch en analyze_all_nestboxes."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.taken_at = datetime(2026, 5, 1, 12, 0)
+        self.paths = {}
+        for nestbox_id, gray in zip(detector.NESTBOXES, (10, 200, 90)):
+            path = self.dir / f"{nestbox_id}_20260501_120000.jpg"
+            Image.new('RGB', (320, 180), (gray, gray, gray)).save(path)
+            self.paths[nestbox_id] = str(path)
+        self.frames = {nestbox_id: (self.taken_at, path) for nestbox_id, path in self.paths.items()}
+        self.net = MeanModel()
+        self.model = TorchOccupancyModel(self.net)
+        self.classes = ['leeg', 'bezet']
+        self.state_file = self.dir / 'state.json'
+
+    def smoother(self):
+        return StatusSmoother.load(self.state_file, confidence_threshold=detector.CONFIDENCE_THRESHOLD)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_batch_matches_single(self):
+        """Eén gestapelde forward pass geeft hetzelfde als per beeld."""
+        single = [detector.predict_image(self.model, p, self.classes) for p in self.paths.values()]
+        images = [detector.load_image_array(p) for p in self.paths.values()]
+        batch = detector.predict_batch(self.model, images, self.classes)
+
+        self.assertEqual(self.net.batch_sizes[-1], 3)
+        self.assertEqual([r['detected_class'] for r in batch], [r['detected_class'] for r in single])
+        for a, b in zip(single, batch):
+            self.assertAlmostEqual(a['confidence'], b['confidence'], places=5)
+        self.assertEqual(batch[1]['species'], 'Koolmees')
+        self.assertIsNone(batch[0]['species'])
+
+    def test_one_connection_one_commit(self):
+        """Alle nestkasten over één connectie, één commit; onleesbaar beeld wordt overgeslagen."""
+        conn = MagicMock()
+        conn.cursor.return_value.fetchall.return_value = [
+            ('voor', 'leeg', None, datetime(2026, 5, 1, 8, 0)),
+        ]
+        frames = dict(self.frames, achter=(self.taken_at, str(self.dir / 'ontbreekt.jpg')))
+
+        with patch.object(detector, 'load_model', return_value=(self.model, self.classes)), \
+                patch.object(detector, 'load_smoother', side_effect=self.smoother), \
+                patch.object(detector, 'get_db_connection', return_value=conn) as connect, \
+                patch.object(detector, 'find_latest_frames', return_value=frames):
+            timings = {}
+            results = detector.analyze_all_nestboxes(timings=timings)
+
+        connect.assert_called_once()
+        conn.commit.assert_called_once()
+        conn.close.assert_called_once()
+        self.assertEqual(self.net.batch_sizes, [2])
+        self.assertEqual([r['nestbox_id'] for r in results], ['voor', 'midden'])
+        self.assertFalse(results[0]['status_changed'])  # voor was al leeg
+        self.assertTrue(results[1]['status_changed'])
+        for name in ('model', 'lookup', 'decode', 'inference', 'database', 'total'):
+            self.assertIn(name, timings)
+
+        # Alleen nestbox_events query en schrijfacties, geen historie queries
+        queries = [c.args[0] for c in conn.cursor.return_value.execute.call_args_list]
+        self.assertEqual(sum('SELECT' in q for q in queries), 1)
+        self.assertEqual(sum('INSERT INTO nestbox_events' in q for q in queries), 1)
+        self.assertEqual(sum('INSERT INTO nestbox_occupancy' in q for q in queries), 2)
+
+        state = self.smoother().state('midden')
+        self.assertTrue(state.status)
+        self.assertEqual(len(state.window), 1)
+        self.assertEqual(state.since, self.taken_at)
+
+    def test_same_frame_observed_once(self):
+        """Een ongewijzigd nieuwste screenshot komt niet opnieuw in het venster."""
+        conn = MagicMock()
+        conn.cursor.return_value.fetchall.return_value = []
+
+        with patch.object(detector, 'load_model', return_value=(self.model, self.classes)), \
+                patch.object(detector, 'load_smoother', side_effect=self.smoother), \
+                patch.object(detector, 'get_db_connection', return_value=conn), \
+                patch.object(detector, 'find_latest_frames', return_value=self.frames):
+            first = detector.analyze_all_nestboxes()
+            second = detector.analyze_all_nestboxes()
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(second, [])
+        self.assertEqual(self.net.batch_sizes, [3])
+        for nestbox_id in detector.NESTBOXES:
+            state = self.smoother().state(nestbox_id)
+            self.assertEqual(len(state.window), 1)
+            self.assertEqual(state.window[0]['timestamp'], self.taken_at.isoformat(timespec='seconds'))
+            self.assertEqual(state.last_image_path(), self.paths[nestbox_id])
+
+    def test_rollback_on_error(self):
+        conn = MagicMock()
+        conn.cursor.return_value.execute.side_effect = RuntimeError("db weg")
+
+        with patch.object(detector, 'load_model', return_value=(self.model, self.classes)), \
+                patch.object(detector, 'load_smoother', side_effect=self.smoother), \
+                patch.object(detector, 'get_db_connection', return_value=conn), \
+                patch.object(detector, 'find_latest_frames', return_value=self.frames):
+            with self.assertRaises(RuntimeError):
+                detector.analyze_all_nestboxes()
+
+        conn.rollback.assert_called_once()
+        conn.commit.assert_not_called()
+        conn.close.assert_called_once()
+        self.assertFalse(self.state_file.exists())
+
+
+if __name__ == '__main__':
+    main()
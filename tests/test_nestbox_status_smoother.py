@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Unit tests voor scripts/nestbox/nestbox_status_smoother.py module.
+
+Test de hysterese (één twijfelende detectie wisselt de status niet, een
+bevestigde wel), de minimale tijd tussen events, de nachtelijke
+slaapplaats bescherming op het in-memory venster, het overnemen van
+handmatige events, de uitgedunde occupancy log en het state bestand.
+Tests worden geskipt als dependencies niet beschikbaar zijn.
+"""
+
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+# Check if smoother module can be imported
+SMOOTHER_MODULE_AVAILABLE = False
+try:
+    from nestbox.nestbox_status_smoother import (
+        LOG_INTERVAL_MINUTES, NestboxState, StatusSmoother, WINDOW_SIZE
+    )
+    SMOOTHER_MODULE_AVAILABLE = True
+except ImportError:
+    pass
+
+
+def detection(occupied: bool, confidence: float) -> dict:
+    return {'is_occupied': occupied, 'confidence': confidence, 'species': 'Koolmees' if occupied else None}
+
+
+@skipIf(not SMOOTHER_MODULE_AVAILABLE, "smoother module not available")
+class TestStatusSmoother(TestCase):
+    """Tests voor StatusSmoother.observe en reconcile."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state_file = Path(self.tmp.name) / 'state.json'
+        self.smoother = StatusSmoother(state_file=self.state_file)
+        self.start = datetime(2026, 5, 1, 12, 0)
+        self.smoother.reconcile({'midden': {'event_type': 'bezet', 'species': 'Koolmees',
+                                            'timestamp': self.start - timedelta(days=1)}})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def feed(self, observations, nestbox_id='midden', night=False, step=timedelta(hours=1)):
+        decisions = []
+        for i, (occupied, confidence) in enumerate(observations, start=1):
+            decisions.append(self.smoother.observe(nestbox_id, detection(occupied, confidence),
+                                                   self.start + i * step, night=night))
+        return decisions
+
+    def test_first_detection_sets_status(self):
+        """Zonder eerdere events bepaalt de eerste zekere detectie de status."""
+        decision = self.feed([(False, 0.4), (True, 0.7)], nestbox_id='voor')
+        self.assertFalse(decision[0]['changed'])
+        self.assertEqual(decision[0]['reason'], 'confidence')
+        self.assertTrue(decision[1]['changed'])
+        self.assertEqual(decision[1]['new_status'], 'bezet')
+
+    def test_single_doubtful_detection_is_ignored(self):
+        """Eén 'leeg' van 90% wisselt niet, een tweede bevestigt het vertrek."""
+        first, second = self.feed([(False, 0.9), (False, 0.9)])
+        self.assertFalse(first['changed'])
+        self.assertGreater(first['belief'], 0.2)
+        self.assertTrue(second['changed'])
+        self.assertEqual(second['new_status'], 'leeg')
+
+    def test_very_confident_detection_switches(self):
+        decision, = self.feed([(False, 0.99)])
+        self.assertTrue(decision['changed'])
+
+    def test_flicker_does_not_switch(self):
+        """Afwisselende detecties blijven binnen de hysterese band."""
+        decisions = self.feed([(False, 0.8), (True, 0.8)] * 4)
+        self.assertFalse(any(d['changed'] for d in decisions))
+        self.assertTrue(self.smoother.state('midden').status)
+
+    def test_min_event_interval(self):
+        self.smoother.state('midden').since = self.start
+        decision, = self.feed([(False, 0.99)], step=timedelta(minutes=10))
+        self.assertFalse(decision['changed'])
+        self.assertEqual(decision['reason'], 'interval')
+
+    def test_night_protection(self):
+        """'s Nachts verlaat een slaapplaats pas na NIGHT_MIN_EMPTY_STREAK leeg detecties."""
+        self.smoother.state('midden').event_type = 'slaapplaats'
+        decisions = self.feed([(False, 0.99)] * 3, night=True)
+        self.assertEqual([d['reason'] for d in decisions[:2]], ['nacht', 'nacht'])
+        self.assertEqual(decisions[1]['empty_streak'], 2)
+        self.assertTrue(decisions[2]['changed'])
+
+    def test_reconcile_manual_event(self):
+        """Een nieuwer (handmatig) event vervangt de eigen toestand, een ouder niet."""
+        self.feed([(False, 0.99)])
+        state = self.smoother.state('midden')
+        self.assertFalse(state.status)
+
+        self.smoother.reconcile({'midden': {'event_type': 'eieren', 'timestamp': self.start}})
+        self.assertFalse(state.status)
+
+        self.smoother.reconcile({'midden': {'event_type': 'eieren', 'timestamp': self.start + timedelta(hours=2)}})
+        self.assertTrue(state.status)
+        self.assertEqual(state.event_type, 'eieren')
+
+    def test_downsampled_log(self):
+        """Stabiele zekere detecties worden hooguit één keer per LOG_INTERVAL_MINUTES gelogd."""
+        decisions = self.feed([(True, 0.97)] * 7)
+        logged = [i for i, d in enumerate(decisions) if d['log']]
+        self.assertEqual(logged, [0, LOG_INTERVAL_MINUTES // 60, 2 * LOG_INTERVAL_MINUTES // 60])
+
+        # Twijfel en afwijkende detecties worden altijd gelogd
+        doubtful, deviating = self.feed([(True, 0.6), (False, 0.7)])
+        self.assertTrue(doubtful['log'])
+        self.assertTrue(deviating['log'])
+
+    def test_state_file_roundtrip(self):
+        self.feed([(True, 0.9)] * (WINDOW_SIZE + 5))
+        self.assertTrue(self.smoother.save())
+
+        loaded = StatusSmoother.load(self.state_file).state('midden')
+        original = self.smoother.state('midden')
+        self.assertEqual(loaded, original)
+        self.assertEqual(len(loaded.window), WINDOW_SIZE)
+
+    def test_corrupt_state_file(self):
+        self.state_file.write_text('{kapot')
+        self.assertEqual(StatusSmoother.load(self.state_file).states, {})
+        self.assertEqual(NestboxState().empty_streak(), 0)
+
+
+if __name__ == '__main__':
+    main()
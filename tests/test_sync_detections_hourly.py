@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Unit tests voor scripts/sync/detections_hourly.py module.
+
+Test de incrementele refresh van de uur-rollup, de backfill per batch en
+de consistency check.
+Tests worden geskipt als dependencies niet beschikbaar zijn.
+"""
+
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+# Check if rollup module can be imported
+ROLLUP_MODULE_AVAILABLE = False
+try:
+    from sync.detections_hourly import (
+        HIGH_CONFIDENCE, REFRESH_SQL, ZERO_STALE_SQL,
+        backfill, check_consistency, hours_for_ids, refresh_hours, truncate_hour
+    )
+    ROLLUP_MODULE_AVAILABLE = True
+except ImportError:
+    pass
+
+
+@skipIf(not ROLLUP_MODULE_AVAILABLE, "rollup module dependencies not available")
+class TestRefreshHours(TestCase):
+    """Tests voor refresh_hours."""
+
+    def setUp(self):
+        self.cursor = MagicMock()
+        self.cursor.rowcount = 3
+
+    def test_hours_truncated_and_deduplicated(self):
+        """Test dat timestamps naar unieke, gesorteerde uren gaan."""
+        written = refresh_hours(self.cursor, 'zolder', [
+            datetime(2026, 5, 1, 6, 45, 12),
+            datetime(2026, 5, 1, 4, 5),
+            datetime(2026, 5, 1, 6, 0),
+        ])
+
+        self.assertEqual(self.cursor.execute.call_count, 2)
+        sql, params = self.cursor.execute.call_args_list[0][0]
+        self.assertEqual(sql, REFRESH_SQL)
+        self.assertEqual(params['station'], 'zolder')
+        self.assertEqual(params['hours'], [datetime(2026, 5, 1, 4), datetime(2026, 5, 1, 6)])
+        self.assertEqual(params['start'], datetime(2026, 5, 1, 4))
+        self.assertEqual(params['end'], datetime(2026, 5, 1, 7))
+        self.assertEqual(params['high_confidence'], HIGH_CONFIDENCE)
+        self.assertEqual(self.cursor.execute.call_args_list[1][0][0], ZERO_STALE_SQL)
+        self.assertEqual(written, 6)
+
+    def test_no_hours_no_queries(self):
+        """Test dat een lege set niets uitvoert."""
+        self.assertEqual(refresh_hours(self.cursor, 'zolder', []), 0)
+        self.cursor.execute.assert_not_called()
+
+    def test_refresh_is_upsert_without_deleted(self):
+        """Test dat de refresh idempotent is en soft-deletes negeert."""
+        self.assertIn('ON CONFLICT (station, species, hour) DO UPDATE', REFRESH_SQL)
+        self.assertIn('NOT COALESCE(deleted, FALSE)', REFRESH_SQL)
+        self.assertNotIn('DELETE', ZERO_STALE_SQL)
+
+    def test_truncate_hour(self):
+        """Test dat truncate_hour minuten en seconden weghaalt."""
+        self.assertEqual(truncate_hour(datetime(2026, 5, 1, 23, 59, 59, 999)), datetime(2026, 5, 1, 23))
+
+
+@skipIf(not ROLLUP_MODULE_AVAILABLE, "rollup module dependencies not available")
+class TestHoursForIds(TestCase):
+    """Tests voor hours_for_ids."""
+
+    def test_no_ids_no_query(self):
+        """Test dat zonder ids geen query gedaan wordt."""
+        cursor = MagicMock()
+        self.assertEqual(hours_for_ids(cursor, []), set())
+        cursor.execute.assert_not_called()
+
+    def test_returns_hours(self):
+        """Test dat de uren van bestaande rijen teruggegeven worden."""
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [(datetime(2026, 5, 1, 6),), (datetime(2026, 5, 2, 22),)]
+        self.assertEqual(hours_for_ids(cursor, [1, 2, 3]),
+                         {datetime(2026, 5, 1, 6), datetime(2026, 5, 2, 22)})
+        self.assertEqual(cursor.execute.call_args[0][1], ([1, 2, 3],))
+
+
+@skipIf(not ROLLUP_MODULE_AVAILABLE, "rollup module dependencies not available")
+class TestBackfillAndCheck(TestCase):
+    """Tests voor backfill en check_consistency."""
+
+    def test_backfill_commits_per_batch(self):
+        """Test dat backfill per batch van dagen commit en alle uren ververst."""
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+        cursor.rowcount = 0
+
+        backfill(conn, date(2026, 5, 1), date(2026, 5, 10), ['zolder', 'berging'], batch_days=7)
+
+        self.assertEqual(conn.commit.call_count, 2)
+        refreshes = [c[0][1] for c in cursor.execute.call_args_list if c[0][0] == REFRESH_SQL]
+        self.assertEqual(len(refreshes), 4)
+        self.assertEqual(len(refreshes[0]['hours']), 7 * 24)
+        self.assertEqual(refreshes[2]['start'], datetime(2026, 5, 8))
+        self.assertEqual(refreshes[2]['end'], datetime(2026, 5, 11))
+
+    def test_check_returns_mismatches(self):
+        """Test dat check_consistency afwijkende uren teruggeeft."""
+        conn = MagicMock()
+        conn.cursor.return_value.fetchall.return_value = [
+            ('zolder', datetime(2026, 5, 1, 6), 12, 10),
+        ]
+
+        mismatches = check_consistency(conn, datetime(2026, 5, 1), datetime(2026, 5, 2))
+
+        self.assertEqual(mismatches, [{
+            'station': 'zolder', 'hour': datetime(2026, 5, 1, 6),
+            'raw_count': 12, 'rollup_count': 10,
+        }])
+        params = conn.cursor.return_value.execute.call_args[0][1]
+        self.assertIsNone(params['station'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Unit tests voor scripts/vocalization/vocalization_classifier.py module.
+
+Test batch inferentie tegen de enkelvoudige classify, de ONNX Runtime
+backend tegen PyTorch en de byte-begrensde model cache, met een
+willekeurig geïnitialiseerd model en synthetische audio. De feature
+store wordt getest op hits, float16 opslag en eviction.
+Tests worden geskipt als dependencies niet beschikbaar zijn.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+# numpy wordt door beide blokken gebruikt; eenmalig en optioneel importeren
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ModelCache en FeatureStore hebben alleen numpy nodig
+CACHE_MODULE_AVAILABLE = False
+try:
+    from vocalization.feature_store import FeatureStore
+    from vocalization import vocalization_classifier
+    from vocalization.vocalization_classifier import ModelCache, onnx_path_for
+    CACHE_MODULE_AVAILABLE = True
+except ImportError:
+    pass
+
+# Check if classifier dependencies can be imported
+VOCALIZATION_DEPS_AVAILABLE = False
+try:
+    import soundfile
+    import torch
+    import librosa  # noqa: F401
+    import skimage  # noqa: F401
+    from vocalization.vocalization_classifier import (
+        SAMPLE_RATE, VocalizationClassifier, create_cnn_model
+    )
+    VOCALIZATION_DEPS_AVAILABLE = True
+except ImportError:
+    pass
+
+# Check if ONNX export dependencies are available
+ONNX_DEPS_AVAILABLE = False
+try:
+    import onnx  # noqa: F401
+    import onnxruntime  # noqa: F401
+    from vocalization.export_onnx import export_model, verify_model
+    ONNX_DEPS_AVAILABLE = VOCALIZATION_DEPS_AVAILABLE
+except ImportError:
+    pass
+
+
+def make_model_dir(tmp: Path, species: str = 'merel', ultimate: bool = False) -> Path:
+    """Schrijf een willekeurig geïnitialiseerd checkpoint zoals Colab dat maakt."""
+    torch.manual_seed(0)
+    model = create_cnn_model(num_classes=3, ultimate=ultimate)
+    suffix = '_ultimate' if ultimate else ''
+    path = tmp / f"{species}_cnn_2025{suffix}.pt"
+    torch.save({
+        'model_state_dict': model.state_dict(),
+        'num_classes': 3,
+        'class_names': ['song', 'call', 'alarm'],
+    }, path)
+    return path
+
+
+def make_clips(tmp: Path, count: int) -> list:
+    """Schrijf korte wav clips met verschillende tonen."""
+    clips = []
+    t = np.linspace(0, 1.5, int(SAMPLE_RATE * 1.5), endpoint=False)
+    for i in range(count):
+        audio = 0.3 * np.sin(2 * np.pi * (1000 + 400 * i) * t)
+        path = tmp / f"clip_{i}.wav"
+        soundfile.write(path, audio, SAMPLE_RATE)
+        clips.append(path)
+    return clips
+
+
+@skipIf(not VOCALIZATION_DEPS_AVAILABLE, "vocalization dependencies not available")
+class TestClassifyBatch(TestCase):
+    """Tests voor classify_batch."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        make_model_dir(self.tmp)
+        self.clips = make_clips(self.tmp, 4)
+        self.classifier = VocalizationClassifier(models_dir=self.tmp)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_batch_matches_single(self):
+        """Test dat batch resultaten gelijk zijn aan per-bestand classificatie."""
+        single = [self.classifier.classify('Merel', clip) for clip in self.clips]
+        batch = self.classifier.classify_batch('Merel', self.clips)
+
+        self.assertEqual(len(batch), len(self.clips))
+        for a, b in zip(single, batch):
+            self.assertEqual(a['type'], b['type'])
+            self.assertAlmostEqual(a['confidence'], b['confidence'], places=4)
+
+    def test_missing_files_keep_position(self):
+        """Test dat ontbrekende bestanden None opleveren op de juiste positie."""
+        paths = [self.clips[0], self.tmp / 'missing.wav', self.clips[1]]
+        results = self.classifier.classify_batch('Merel', paths)
+
+        self.assertIsNotNone(results[0])
+        self.assertIsNone(results[1])
+        self.assertIsNotNone(results[2])
+
+    def test_unknown_species_returns_none(self):
+        """Test dat soorten zonder model alleen None opleveren."""
+        self.assertEqual(self.classifier.classify_batch('Koolmees', self.clips[:2]), [None, None])
+
+    def test_empty_batch(self):
+        """Test dat een lege batch een lege lijst oplevert."""
+        self.assertEqual(self.classifier.classify_batch('Merel', []), [])
+
+
+@skipIf(not CACHE_MODULE_AVAILABLE, "vocalization module not available")
+class TestModelCache(TestCase):
+    """Tests voor de byte-begrensde LRU model cache."""
+
+    def test_evicts_least_recently_used_by_bytes(self):
+        """Test dat de oudste entry verdwijnt zodra het byte budget overschreden wordt."""
+        cache = ModelCache(budget_bytes=100)
+        cache.put('a', 'A', 40)
+        cache.put('b', 'B', 40)
+        cache.get('a')  # a is nu recent gebruikt
+        cache.put('c', 'C', 40)
+
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.bytes_used, 80)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_pinned_entries_survive(self):
+        """Test dat gepinde entries nooit verwijderd worden."""
+        cache = ModelCache(budget_bytes=100)
+        cache.put('pinned', 'P', 60)
+        cache.pin('pinned')
+        cache.put('x', 'X', 30)
+        cache.put('y', 'Y', 30)
+
+        self.assertIn('pinned', cache)
+        self.assertNotIn('x', cache)
+        self.assertIn('y', cache)
+
+    def test_counters(self):
+        """Test hit/miss tellers en hit rate."""
+        cache = ModelCache(budget_bytes=100)
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', 'A', 10)
+        self.assertEqual(cache.get('a'), 'A')
+
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_rate'], 0.5)
+        self.assertEqual(stats['bytes_used'], 10)
+
+    def test_replace_existing_key(self):
+        """Test dat opnieuw toevoegen de bytes niet dubbel telt."""
+        cache = ModelCache(budget_bytes=100)
+        cache.put('a', 'A', 50)
+        cache.put('a', 'A2', 50)
+        self.assertEqual(cache.bytes_used, 50)
+        self.assertEqual(len(cache), 1)
+
+
+@skipIf(not CACHE_MODULE_AVAILABLE, "vocalization module not available")
+class TestFindOnnx(TestCase):
+    """Tests voor de backend keuze in VocalizationClassifier._find_onnx."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.model_path = Path(self.tmp.name) / 'merel_cnn_2025.pt'
+        self.model_path.write_bytes(b'pt')
+        self.classifier = vocalization_classifier.VocalizationClassifier.__new__(
+            vocalization_classifier.VocalizationClassifier)
+        self.classifier.backend = 'auto'
+        self.classifier.prefer_int8 = False
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_stale_export_falls_back_to_torch(self):
+        """Test dat een export ouder dan het opnieuw getrainde .pt model genegeerd wordt."""
+        fp32 = onnx_path_for(self.model_path)
+        fp32.write_bytes(b'onnx')
+        with patch.object(vocalization_classifier, 'get_onnxruntime', return_value=object()):
+            self.assertEqual(self.classifier._find_onnx(self.model_path), fp32)
+
+            later = fp32.stat().st_mtime + 60
+            os.utime(self.model_path, (later, later))
+            with self.assertLogs(vocalization_classifier.logger, level='WARNING'):
+                self.assertIsNone(self.classifier._find_onnx(self.model_path))
+
+
+@skipIf(not CACHE_MODULE_AVAILABLE, "vocalization module not available")
+class TestLoadTorchCheckpoint(TestCase):
+    """Tests voor mmap laden in load_torch_checkpoint, met een nagebootste torch."""
+
+    def setUp(self):
+        self.checkpoint = {'model_state_dict': {'w': 1}, 'num_classes': 3}
+        self.model = MagicMock()
+
+    def load(self, torch):
+        with patch.object(vocalization_classifier, 'get_torch', return_value=torch), \
+                patch.object(vocalization_classifier, 'create_cnn_model', return_value=self.model):
+            return vocalization_classifier.load_torch_checkpoint(Path('merel_cnn_2025.pt'))
+
+    def test_old_torch_without_mmap(self):
+        """Test dat torch < 2.1 (geen mmap argument) normaal laadt zonder assign."""
+        def load(path, map_location, weights_only, **kwargs):
+            if 'mmap' in kwargs:
+                raise TypeError("load() got an unexpected keyword argument 'mmap'")
+            return self.checkpoint
+
+        model, class_names = self.load(MagicMock(load=load))
+        self.assertIs(model, self.model)
+        self.model.load_state_dict.assert_called_once_with({'w': 1})
+        self.assertEqual(class_names, vocalization_classifier.DEFAULT_CLASS_NAMES)
+
+    def test_mmap_assigns(self):
+        """Test dat een gemapt checkpoint met assign=True geladen wordt."""
+        self.load(MagicMock(load=MagicMock(return_value=self.checkpoint)))
+        self.model.load_state_dict.assert_called_once_with({'w': 1}, assign=True)
+
+
+@skipIf(not CACHE_MODULE_AVAILABLE, "vocalization module not available")
+class TestScanModels(TestCase):
+    """Tests voor de model keuze bij meerdere jaren per soort."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.models_dir = Path(self.tmp.name)
+        for name in ('merel_cnn_2025.pt', 'merel_cnn_2026.pt',
+                     'roodborst_cnn_2025_ultimate.pt', 'roodborst_cnn_2026.pt'):
+            (self.models_dir / name).write_bytes(b'pt')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def scan(self, reverse):
+        classifier = vocalization_classifier.VocalizationClassifier.__new__(
+            vocalization_classifier.VocalizationClassifier)
+        classifier.models_dir = self.models_dir
+        classifier.available_models = {}
+        files = sorted(self.models_dir.glob('*.pt'), reverse=reverse)
+        with patch.object(Path, 'glob', return_value=iter(files)):
+            classifier._scan_models()
+        return {key: path.name for key, path in classifier.available_models.items()}
+
+    def test_newest_year_wins_regardless_of_order(self):
+        """Test dat ultimate en daarna het nieuwste jaar gekozen worden, ongeacht de glob volgorde."""
+        expected = {'merel': 'merel_cnn_2026.pt', 'roodborst': 'roodborst_cnn_2025_ultimate.pt'}
+        self.assertEqual(self.scan(reverse=False), expected)
+        self.assertEqual(self.scan(reverse=True), expected)
+
+
+@skipIf(not VOCALIZATION_DEPS_AVAILABLE, "vocalization dependencies not available")
+class TestClassifierCache(TestCase):
+    """Tests voor model cache integratie in VocalizationClassifier."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        make_model_dir(self.tmp, 'merel')
+        make_model_dir(self.tmp, 'roodborst')
+        self.clips = make_clips(self.tmp, 1)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_budget_for_one_model_evicts(self):
+        """Test dat een budget voor één model bij wisselende soorten evict."""
+        classifier = VocalizationClassifier(models_dir=self.tmp, backend='torch',
+                                            cache_budget_bytes=40 * 1024 * 1024)
+        classifier.classify('Merel', self.clips[0])
+        classifier.classify('Roodborst', self.clips[0])
+        classifier.classify('Merel', self.clips[0])
+
+        stats = classifier.cache_stats()
+        self.assertEqual(stats['models'], 1)
+        self.assertEqual(stats['misses'], 3)
+        self.assertEqual(stats['evictions'], 2)
+
+    def test_pinned_species_not_evicted(self):
+        """Test dat een gepinde soort geladen blijft."""
+        classifier = VocalizationClassifier(models_dir=self.tmp, backend='torch',
+                                            cache_budget_bytes=40 * 1024 * 1024)
+        self.assertEqual(classifier.pin_species(['Merel']), ['Merel'])
+        classifier.classify('Roodborst', self.clips[0])
+        classifier.classify('Merel', self.clips[0])
+
+        self.assertEqual(classifier.cache_stats()['hits'], 1)
+
+
+@skipIf(not CACHE_MODULE_AVAILABLE, "vocalization module not available")
+class TestFeatureStore(TestCase):
+    """Tests voor de content-addressed feature store."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.store = FeatureStore(self.tmp / 'features', max_bytes=10 * 1024 * 1024, params={'n_mels': 128})
+        self.audio = []
+        for i in range(3):
+            path = self.tmp / f"clip_{i}.mp3"
+            path.write_bytes(bytes([i]) * 100)
+            self.audio.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_roundtrip_float16(self):
+        """Test dat features als float16 opgeslagen en teruggelezen worden."""
+        features = np.random.default_rng(0).random((128, 128), dtype=np.float32)
+        self.assertIsNone(self.store.get(self.audio[0]))
+        self.assertTrue(self.store.put(self.audio[0], features))
+
+        cached = self.store.get(self.audio[0])
+        self.assertEqual(cached.dtype, np.float16)
+        np.testing.assert_allclose(cached, features, atol=1e-3)
+        self.assertEqual(self.store.stats()['hits'], 1)
+
+    def test_get_or_compute_calls_once(self):
+        """Test dat compute alleen bij een miss aangeroepen wordt."""
+        calls = []
+
+        def compute(path):
+            calls.append(path)
+            return np.ones((4, 4), dtype=np.float32)
+
+        first = self.store.get_or_compute(self.audio[0], compute)
+        second = self.store.get_or_compute(self.audio[0], compute)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(second.dtype, np.float32)
+        np.testing.assert_array_equal(first, second)
+
+    def test_modified_audio_misses(self):
+        """Test dat een gewijzigd audiobestand een nieuwe key krijgt."""
+        key = self.store.key_for(self.audio[0])
+        self.audio[0].write_bytes(b'x' * 200)
+        self.assertNotEqual(self.store.key_for(self.audio[0]), key)
+
+    def test_copy_shares_features(self):
+        """Test dat een kopie onder een ander pad dezelfde features vindt."""
+        copy = self.tmp / 'elders' / 'clip_0.mp3'
+        copy.parent.mkdir()
+        shutil.copy(self.audio[0], copy)
+        self.store.put(self.audio[0], np.ones((4, 4), dtype=np.float32))
+
+        self.assertEqual(self.store.key_for(copy), self.store.key_for(self.audio[0]))
+        self.assertIsNotNone(self.store.get(copy))
+
+    def test_params_change_key_directory(self):
+        """Test dat andere mel parameters een andere directory gebruiken."""
+        other = FeatureStore(self.tmp / 'features', max_bytes=1024, params={'n_mels': 64})
+        self.assertNotEqual(other.params_dir, self.store.params_dir)
+
+    def test_evicts_oldest_by_bytes(self):
+        """Test dat de minst recent gebruikte features verwijderd worden."""
+        features = np.zeros((64, 64), dtype=np.float32)
+        for i, path in enumerate(self.audio):
+            self.store.put(path, features)
+            stored = self.store.path_for(self.store.key_for(path))
+            os.utime(stored, (1000 + i, 1000 + i))
+
+        entry_bytes = stored.stat().st_size
+        removed = self.store.evict(target_bytes=2 * entry_bytes)
+
+        self.assertEqual(removed, 1)
+        self.assertIsNone(self.store.get(self.audio[0]))
+        self.assertIsNotNone(self.store.get(self.audio[2]))
+
+    def test_missing_root_parent_disables(self):
+        """Test dat een ontbrekende mount de store uitschakelt."""
+        store = FeatureStore(self.tmp / 'missing' / 'features', max_bytes=1024, params={})
+        self.assertFalse(store.enabled)
+        self.assertFalse(store.put(self.audio[0], np.zeros(4)))
+
+
+@skipIf(not VOCALIZATION_DEPS_AVAILABLE, "vocalization dependencies not available")
+class TestClassifierFeatureStore(TestCase):
+    """Tests voor feature store integratie in VocalizationClassifier."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        make_model_dir(self.tmp)
+        self.clips = make_clips(self.tmp, 3)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_second_pass_skips_decoding(self):
+        """Test dat een tweede classificatie geen audio decodeert en gelijk blijft."""
+        classifier = VocalizationClassifier(models_dir=self.tmp, backend='torch',
+                                            features_dir=self.tmp / 'features')
+        first = classifier.classify_batch('Merel', self.clips)
+
+        with patch.object(classifier, '_audio_to_spectrogram', side_effect=AssertionError('decoded')):
+            second = classifier.classify_batch('Merel', self.clips)
+
+        self.assertEqual(classifier.feature_stats()['hits'], 3)
+        for a, b in zip(first, second):
+            self.assertEqual(a['type'], b['type'])
+            self.assertAlmostEqual(a['confidence'], b['confidence'], places=2)
+
+    def test_disabled_without_features_dir(self):
+        """Test dat features_dir=None de store uitschakelt."""
+        classifier = VocalizationClassifier(models_dir=self.tmp, features_dir=None)
+        self.assertIsNone(classifier.feature_stats())
+
+
+@skipIf(not ONNX_DEPS_AVAILABLE, "onnx/onnxruntime not available")
+class TestOnnxBackend(TestCase):
+    """Accuracy-parity tests voor de ONNX Runtime backend."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = Path(tempfile.mkdtemp())
+        cls.model_paths = [make_model_dir(cls.tmp), make_model_dir(cls.tmp, 'zanglijster', ultimate=True)]
+        for model_path in cls.model_paths:
+            export_model(model_path, quantize=True)
+        cls.clips = make_clips(cls.tmp, 4)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def test_fp32_parity_with_torch(self):
+        """Test dat fp32 ONNX dezelfde kansen geeft als PyTorch."""
+        for model_path in self.model_paths:
+            report = verify_model(model_path)
+            fp32 = report[f"{model_path.stem}.onnx"]
+            self.assertLess(fp32['max_abs_diff'], 1e-4)
+            self.assertEqual(fp32['top1_agreement'], 1.0)
+
+    def test_int8_top1_agreement(self):
+        """Test dat de int8 variant dezelfde klasse kiest."""
+        for model_path in self.model_paths:
+            report = verify_model(model_path)
+            int8 = report[f"{model_path.stem}.int8.onnx"]
+            self.assertGreaterEqual(int8['top1_agreement'], 0.95)
+
+    def test_classifier_uses_onnx_when_exported(self):
+        """Test dat de classifier automatisch ONNX kiest en gelijke resultaten geeft."""
+        onnx_clf = VocalizationClassifier(models_dir=self.tmp, backend='auto')
+        torch_clf = VocalizationClassifier(models_dir=self.tmp, backend='torch')
+
+        onnx_results = onnx_clf.classify_batch('Merel', self.clips)
+        torch_results = torch_clf.classify_batch('Merel', self.clips)
+
+        model, class_names = onnx_clf._load_model(onnx_clf._find_model('Merel'))
+        self.assertEqual(model.backend, 'onnx')
+        self.assertEqual(class_names, ['song', 'call', 'alarm'])
+        for a, b in zip(onnx_results, torch_results):
+            self.assertEqual(a['type'], b['type'])
+            self.assertAlmostEqual(a['confidence'], b['confidence'], places=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Unit tests voor scripts/vocalization/vocalization_enricher.py module.
+
+Test de enrichment state machine (done/no_model/no_audio/failed), de
+retry backoff en de bulk berging audio cache met een mock classifier en
+een gesimuleerde rsync, zonder database of netwerk.
+Tests worden geskipt als dependencies niet beschikbaar zijn.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import date
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+# Check if enricher module can be imported
+ENRICHER_MODULE_AVAILABLE = False
+try:
+    from scripts.vocalization import vocalization_enricher as enricher_module
+    from scripts.vocalization.vocalization_enricher import (
+        MAX_ATTEMPTS, STATE_DONE, STATE_FAILED, STATE_NO_AUDIO, STATE_NO_MODEL,
+        VocalizationEnricher
+    )
+    from scripts.vocalization import remote_audio_cache
+    from scripts.vocalization.remote_audio_cache import RemoteAudioCache
+    ENRICHER_MODULE_AVAILABLE = True
+except (ImportError, FileNotFoundError):
+    pass
+
+
+def _detection(det_id, station='zolder', species='Merel', attempts=0):
+    """Maak een detectie dict zoals get_pending_detections die oplevert."""
+    return {'id': det_id, 'station': station, 'common_name': species,
+            'date': None, 'time': None, 'file_name': f'{det_id}.mp3', 'attempts': attempts}
+
+
+@skipIf(not ENRICHER_MODULE_AVAILABLE, "enricher module dependencies not available")
+class TestEnrichmentStates(TestCase):
+    """Tests voor de enrichment state machine."""
+
+    def setUp(self):
+        with patch.object(enricher_module, 'EMSNLogger'):
+            self.enricher = VocalizationEnricher()
+        self.enricher.classifier = MagicMock()
+        self.enricher.classifier.has_model.return_value = True
+
+    def test_states_per_detection(self):
+        """Test done, no_audio en failed binnen één soort batch."""
+        detections = [_detection(1), _detection(2), _detection(3)]
+        audio = {1: Path('/a/1.mp3'), 2: None, 3: Path('/a/3.mp3')}
+        self.enricher.find_audio_file = lambda det: audio[det['id']]
+        self.enricher.classifier.classify_batch.return_value = [
+            {'type_nl': 'zang', 'confidence': 0.9}, None
+        ]
+
+        results = self.enricher.classify_species('Merel', detections)
+
+        self.assertEqual(results[0], (STATE_DONE, 'zang', 0.9))
+        self.assertEqual(results[1][0], STATE_NO_AUDIO)
+        self.assertEqual(results[2][0], STATE_FAILED)
+
+    def test_unreachable_berging_is_failed(self):
+        """Test dat ontbrekende berging audio bij SSH fouten opnieuw geprobeerd wordt."""
+        self.enricher.find_audio_file = lambda det: None
+        self.enricher.berging_unreachable = True
+
+        results = self.enricher.classify_species('Merel', [_detection(1, station='berging')])
+        self.assertEqual(results[0][0], STATE_FAILED)
+
+    def test_no_model(self):
+        """Test dat soorten zonder model no_model krijgen zonder audio te zoeken."""
+        self.enricher.classifier.has_model.return_value = False
+        self.enricher.find_audio_file = MagicMock()
+
+        results = self.enricher.classify_species('Koolmees', [_detection(1), _detection(2)])
+
+        self.assertEqual([r[0] for r in results], [STATE_NO_MODEL, STATE_NO_MODEL])
+        self.enricher.find_audio_file.assert_not_called()
+
+    def test_retry_backoff(self):
+        """Test exponentiële backoff en opgeven na MAX_ATTEMPTS."""
+        self.assertEqual(VocalizationEnricher.retry_delay_minutes(1) * 2,
+                         VocalizationEnricher.retry_delay_minutes(2))
+        self.assertIsNone(VocalizationEnricher.retry_delay_minutes(MAX_ATTEMPTS))
+
+    def test_process_batch_groups_and_marks(self):
+        """Test dat process_batch per soort classificeert en no_model in bulk markeert."""
+        detections = [_detection(1, species='Merel'), _detection(2, species='Koolmees'),
+                      _detection(3, species='Merel')]
+        self.enricher.get_pending_detections = MagicMock(return_value=detections)
+        self.enricher.get_backlog_size = MagicMock(return_value=0)
+        self.enricher.mark_species_no_model = MagicMock(return_value=10)
+        self.enricher.update_detections = MagicMock(return_value=True)
+        self.enricher.log_cache_stats = MagicMock()
+        self.enricher.classifier.has_model.side_effect = lambda name: name == 'Merel'
+        self.enricher.find_audio_file = lambda det: Path(f"/a/{det['id']}.mp3")
+        self.enricher.classifier.classify_batch.return_value = [
+            {'type_nl': 'zang', 'confidence': 0.9}, {'type_nl': 'roep', 'confidence': 0.8}
+        ]
+
+        self.assertEqual(self.enricher.process_batch(), 12)
+
+        self.enricher.classifier.classify_batch.assert_called_once()
+        self.enricher.mark_species_no_model.assert_called_once_with('Koolmees')
+        updates = self.enricher.update_detections.call_args[0][0]
+        self.assertEqual([(det['id'], state) for det, state, _, _ in updates],
+                         [(1, STATE_DONE), (3, STATE_DONE)])
+
+    def test_process_batch_no_progress_on_mark_error(self):
+        """Test dat een mislukte no_model markering 0 teruggeeft zodat run_once stopt."""
+        self.enricher.get_pending_detections = MagicMock(return_value=[_detection(1, species='Koolmees')])
+        self.enricher.get_backlog_size = MagicMock(return_value=1)
+        self.enricher.mark_species_no_model = MagicMock(return_value=0)
+        self.enricher.update_detections = MagicMock(return_value=True)
+        self.enricher.log_cache_stats = MagicMock()
+        self.enricher.classifier.has_model.return_value = False
+
+        self.assertEqual(self.enricher.process_batch(), 0)
+
+
+class FakeRsync:
+    """Simuleer rsync --files-from door bestanden uit een 'remote' directory te kopiëren."""
+
+    def __init__(self, remote_dir: Path, returncode: int = 0):
+        self.remote_dir = remote_dir
+        self.returncode = returncode
+        self.calls = []
+
+    def __call__(self, cmd, **kwargs):
+        list_path = cmd[cmd.index('--files-from') + 1]
+        files = Path(list_path).read_text().split()
+        self.calls.append(files)
+        dest = Path(cmd[-1])
+        missing = False
+        if self.returncode == 0:
+            for rel in files:
+                src = self.remote_dir / rel
+                if src.exists():
+                    (dest / rel).parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy(src, dest / rel)
+                else:
+                    missing = True
+        code = 23 if missing and self.returncode == 0 else self.returncode
+        return subprocess.CompletedProcess(cmd, code, '', '')
+
+
+@skipIf(not ENRICHER_MODULE_AVAILABLE, "enricher module dependencies not available")
+class TestRemoteAudioCache(TestCase):
+    """Tests voor de bulk rsync audio cache."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.remote = self.tmp / 'remote'
+        self.files = []
+        for i in range(3):
+            rel = f"2026-05-01/Merel/merel-{i}.mp3"
+            (self.remote / rel).parent.mkdir(parents=True, exist_ok=True)
+            (self.remote / rel).write_bytes(b'a' * 1000)
+            self.files.append(rel)
+        self.cache = RemoteAudioCache('berging', 'ronny', str(self.remote), self.tmp / 'cache', max_bytes=10_000)
+        self.rsync = FakeRsync(self.remote)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_one_rsync_per_batch_and_reuse(self):
+        """Test dat een batch één rsync doet en een tweede fetch uit de cache komt."""
+        with patch.object(remote_audio_cache.subprocess, 'run', self.rsync):
+            first = self.cache.fetch(self.files + ['2026-05-01/Merel/weg.mp3'])
+            second = self.cache.fetch(self.files)
+
+        self.assertEqual(len(self.rsync.calls), 1)
+        self.assertEqual(len(self.rsync.calls[0]), 4)
+        self.assertIsNone(first['2026-05-01/Merel/weg.mp3'])
+        self.assertTrue(all(second[rel].exists() for rel in self.files))
+        self.assertFalse(self.cache.unreachable)
+        self.assertEqual(self.cache.stats()['hits'], 3)
+
+    def test_ssh_failure_marks_unreachable(self):
+        """Test dat een SSH fout (exit 255) als onbereikbaar gemarkeerd wordt."""
+        with patch.object(remote_audio_cache.subprocess, 'run', FakeRsync(self.remote, returncode=255)):
+            result = self.cache.fetch(self.files[:1])
+
+        self.assertIsNone(result[self.files[0]])
+        self.assertTrue(self.cache.unreachable)
+
+    def test_evicts_least_recently_used(self):
+        """Test LRU eviction op atime zonder de mtime te wijzigen."""
+        with patch.object(remote_audio_cache.subprocess, 'run', self.rsync):
+            paths = self.cache.fetch(self.files)
+        for i, rel in enumerate(self.files):
+            os.utime(paths[rel], (1000 + i, 500))
+
+        removed = self.cache.evict(target_bytes=2000)
+
+        self.assertEqual(removed, 1)
+        self.assertFalse(paths[self.files[0]].exists())
+        self.assertEqual(paths[self.files[2]].stat().st_mtime, 500)
+
+    def test_enricher_uses_cached_berging_audio(self):
+        """Test dat de enricher berging audio uit de bulk fetch haalt."""
+        with patch.object(enricher_module, 'EMSNLogger'):
+            enricher = VocalizationEnricher()
+        enricher.classifier = MagicMock()
+        enricher.classifier.has_model.return_value = True
+        enricher.berging_audio = self.cache
+        det = _detection(1, station='berging')
+        det.update(date=date(2026, 5, 1), file_name='merel-0.mp3')
+
+        with patch.object(remote_audio_cache.subprocess, 'run', self.rsync):
+            enricher.prefetch_berging_audio([det])
+
+        self.assertEqual(enricher.find_audio_file(det), self.cache.local_path(self.files[0]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Unit tests voor scripts/vocalization/training_dataset.py en
+train_orchestrator.py.
+
+Test de incrementele memmap dataset builder (manifest, hashes, groei),
+de chunked export, de streaming dataset en het hervatten van training
+vanaf een checkpoint met synthetische spectrogrammen.
+Tests worden geskipt als dependencies niet beschikbaar zijn.
+"""
+
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+# Dataset builder heeft alleen numpy nodig
+DATASET_MODULE_AVAILABLE = False
+try:
+    import numpy as np
+    from vocalization import training_dataset
+    from vocalization.training_dataset import (
+        MemmapSpectrogramDataset, SpectrogramDatasetBuilder, load_manifest
+    )
+    DATASET_MODULE_AVAILABLE = True
+except ImportError:
+    pass
+
+TORCH_AVAILABLE = False
+try:
+    import torch  # noqa: F401
+    TORCH_AVAILABLE = DATASET_MODULE_AVAILABLE
+except ImportError:
+    pass
+
+# Orchestrator heeft ook psycopg2 en core.config nodig
+ORCHESTRATOR_AVAILABLE = False
+try:
+    from vocalization import train_orchestrator
+    ORCHESTRATOR_AVAILABLE = TORCH_AVAILABLE
+except (ImportError, FileNotFoundError):
+    pass
+
+
+def write_spectrograms(spec_dir: Path, counts: dict, start: int = 0, shape=(16, 16)) -> None:
+    """Schrijf unieke .npy spectrogrammen per klasse; [0, 0] = volgnummer."""
+    for offset, (cls, count) in enumerate(counts.items()):
+        (spec_dir / cls).mkdir(parents=True, exist_ok=True)
+        for i in range(start, start + count):
+            x = np.full(shape, offset, dtype=np.float32)
+            x[0, 0] = i
+            np.save(spec_dir / cls / f"{cls}_{i}.npy", x)
+
+
+@skipIf(not DATASET_MODULE_AVAILABLE, "numpy not available")
+class TestDatasetBuilder(TestCase):
+    """Tests voor SpectrogramDatasetBuilder."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.spec_dir = self.tmp / 'spectrograms-merel'
+        self.dataset_dir = self.spec_dir / 'dataset'
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_build_and_manifest(self):
+        """Test dat alle bestanden met label en hash in het manifest komen."""
+        write_spectrograms(self.spec_dir, {'song': 5, 'call': 3})
+        builder = SpectrogramDatasetBuilder(self.dataset_dir)
+        added = builder.add_directory(self.spec_dir)
+        builder.close()
+
+        self.assertEqual(added, {'song': 5, 'call': 3})
+        manifest = load_manifest(self.dataset_dir)
+        self.assertEqual(manifest['count'], 8)
+        self.assertGreaterEqual(manifest['capacity'], 8)
+        self.assertEqual(manifest['shape'], [16, 16])
+        self.assertEqual(manifest['entries'][0]['source'], 'song/song_0.npy')
+        self.assertEqual(len({e['hash'] for e in manifest['entries']}), 8)
+
+    def test_incremental_only_appends_new(self):
+        """Test dat een tweede build alleen nieuwe clips toevoegt."""
+        write_spectrograms(self.spec_dir, {'song': 4})
+        SpectrogramDatasetBuilder(self.dataset_dir).add_directory(self.spec_dir)
+
+        write_spectrograms(self.spec_dir, {'song': 2, 'alarm': 1}, start=4)
+        builder = SpectrogramDatasetBuilder(self.dataset_dir)
+        added = builder.add_directory(self.spec_dir)
+        builder.close()
+
+        self.assertEqual(added, {'song': 2, 'alarm': 1})
+        dataset = MemmapSpectrogramDataset(self.dataset_dir)
+        self.assertEqual(len(dataset), 7)
+        values = sorted(dataset.get_array(i)[0][0, 0, 0] for i in range(len(dataset)))
+        self.assertEqual(values, [0, 1, 2, 3, 4, 4, 5])
+
+    def test_unchanged_files_not_hashed(self):
+        """Test dat alleen nieuwe of gewijzigde bestanden gehasht worden (grootte/mtime prefilter)."""
+        write_spectrograms(self.spec_dir, {'song': 4})
+        SpectrogramDatasetBuilder(self.dataset_dir).add_directory(self.spec_dir)
+
+        write_spectrograms(self.spec_dir, {'song': 1}, start=4)
+        with patch.object(training_dataset, 'file_hash', wraps=training_dataset.file_hash) as hashed:
+            added = SpectrogramDatasetBuilder(self.dataset_dir).add_directory(self.spec_dir)
+
+        self.assertEqual(added, {'song': 1})
+        self.assertEqual([c.args[0].name for c in hashed.call_args_list], ['song_4.npy'])
+        entry = load_manifest(self.dataset_dir)['entries'][0]
+        self.assertEqual(entry['size'], (self.spec_dir / 'song' / 'song_0.npy').stat().st_size)
+
+    def test_wrong_shape_skipped(self):
+        """Test dat spectrogrammen met een andere vorm dan de eerste genegeerd worden."""
+        write_spectrograms(self.spec_dir, {'song': 2})
+        np.save(self.spec_dir / 'song' / 'zz_odd.npy', np.zeros((8, 8), dtype=np.float32))
+
+        builder = SpectrogramDatasetBuilder(self.dataset_dir)
+        self.assertEqual(builder.add_directory(self.spec_dir), {'song': 2})
+
+    def test_export_npy_limits_per_class(self):
+        """Test dat de export X/y schrijft met max_per_class."""
+        write_spectrograms(self.spec_dir, {'song': 10, 'call': 3})
+        builder = SpectrogramDatasetBuilder(self.dataset_dir)
+        builder.add_directory(self.spec_dir)
+
+        exported = builder.export_npy(self.tmp / 'X.npy', self.tmp / 'y.npy', max_per_class=4, chunk_size=3)
+        builder.close()
+
+        X = np.load(self.tmp / 'X.npy')
+        y = np.load(self.tmp / 'y.npy')
+        self.assertEqual(exported, 7)
+        self.assertEqual(X.shape, (7, 16, 16))
+        self.assertEqual(sorted(y.tolist()).count('song'), 4)
+        self.assertEqual(sorted(y.tolist()).count('call'), 3)
+
+
+@skipIf(not DATASET_MODULE_AVAILABLE, "numpy not available")
+class TestMemmapDataset(TestCase):
+    """Tests voor MemmapSpectrogramDataset."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        write_spectrograms(self.tmp, {'song': 10, 'call': 5})
+        SpectrogramDatasetBuilder(self.tmp / 'dataset').add_directory(self.tmp)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_split_is_stratified(self):
+        """Test dat de split per klasse verdeelt en niet overlapt."""
+        dataset = MemmapSpectrogramDataset(self.tmp / 'dataset')
+        train, val = dataset.split(val_fraction=0.2)
+
+        self.assertEqual(val.class_counts(), {'song': 2, 'call': 1, 'alarm': 0})
+        self.assertEqual(len(train) + len(val), len(dataset))
+        self.assertFalse(set(train.indices) & set(val.indices))
+
+    @skipIf(not TORCH_AVAILABLE, "torch not available")
+    def test_dataloader_batches(self):
+        """Test dat een DataLoader batches (N, 1, H, W) uit de memmap haalt."""
+        from torch.utils.data import DataLoader
+
+        loader = DataLoader(MemmapSpectrogramDataset(self.tmp / 'dataset'), batch_size=4)
+        x, y = next(iter(loader))
+
+        self.assertEqual(tuple(x.shape), (4, 1, 16, 16))
+        self.assertEqual(y.tolist(), [0, 0, 0, 0])
+
+
+@skipIf(not ORCHESTRATOR_AVAILABLE, "orchestrator dependencies not available")
+class TestTrainOrchestrator(TestCase):
+    """Tests voor pool sizing en hervatbare training."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        spec_dir = self.tmp / 'spectrograms-merel'
+        rng = np.random.default_rng(0)
+        for cls in ('song', 'call'):
+            (spec_dir / cls).mkdir(parents=True)
+            for i in range(60):
+                np.save(spec_dir / cls / f"{i}.npy", rng.random((128, 128), dtype=np.float32))
+
+        self.status = MagicMock()
+        self.patches = [
+            patch.object(train_orchestrator, 'DATA_DIR', self.tmp),
+            patch.object(train_orchestrator, 'MODELS_DIR', self.tmp / 'models'),
+            patch.object(train_orchestrator, 'CHECKPOINT_DIR', self.tmp / 'models' / 'checkpoints'),
+            patch.object(train_orchestrator, 'report_status', self.status),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_pool_size_limited_by_memory(self):
+        """Test dat de pool niet groter wordt dan cores en geheugen toelaten."""
+        with patch.object(train_orchestrator, 'available_memory_mb', return_value=3000), \
+                patch.object(train_orchestrator.os, 'cpu_count', return_value=8):
+            self.assertEqual(train_orchestrator.pool_size(10, threads_per_job=2, memory_per_job_mb=1500), 2)
+            self.assertEqual(train_orchestrator.pool_size(1, threads_per_job=2, memory_per_job_mb=1500), 1)
+
+    def test_resume_from_checkpoint(self):
+        """Test dat een afgebroken run verder gaat bij de volgende epoch."""
+        model_path = self.tmp / 'models' / 'merel_cnn_2026.pt'
+        broken = self.tmp / 'missing' / 'model.pt'
+
+        # Eerste run: checkpoint na epoch 1, daarna 'crash' bij opslaan model
+        with patch.object(train_orchestrator, 'model_path_for', return_value=broken):
+            with self.assertRaises(Exception):
+                train_orchestrator.train_species_job('Merel', 'merel', epochs=1, batch_size=32, threads=1)
+        self.assertTrue(train_orchestrator.checkpoint_path('merel').exists())
+
+        self.status.reset_mock()
+        with patch.object(train_orchestrator, 'model_path_for', return_value=model_path):
+            result = train_orchestrator.train_species_job('Merel', 'merel', epochs=2, batch_size=32, threads=1)
+
+        phases = [call.args[2] for call in self.status.call_args_list]
+        self.assertIn('Epoch 2/2', phases)
+        self.assertNotIn('Epoch 1/2', phases)
+        self.assertEqual(result['epochs'], 2)
+        self.assertGreater(result['samples_per_sec'], 0)
+        self.assertTrue(model_path.exists())
+        self.assertFalse(train_orchestrator.checkpoint_path('merel').exists())
+
+        checkpoint = torch.load(model_path, weights_only=False)
+        self.assertEqual(checkpoint['class_names'], ['song', 'call'])
+        self.assertEqual(checkpoint['num_classes'], 2)
+
+
+if __name__ == '__main__':
+    main()